@@ -0,0 +1,137 @@
+# backend/gunicorn.conf.py
+
+"""
+Configuração do gunicorn para produção: `gunicorn -c gunicorn.conf.py` (a partir de backend/).
+
+- preload_app: a aplicação (rotas, configuração e o bootstrap do banco) é carregada uma
+  única vez no master e compartilhada com os workers via fork. pandas, matplotlib e NumPy
+  não fazem parte disso: são importados só na geração de relatórios. Nenhuma conexão com
+  o MongoDB é aberta antes do fork (core.database conecta no primeiro uso).
+- Serviços de fundo (manifestos de scans, sincronização do Tenable e o consumidor da fila
+  de relatórios em lote) rodam em um processo dedicado, filho do master, e não em um
+  worker: workers são reciclados a cada max_requests e mortos após graceful_timeout, o que
+  abortaria os relatórios em execução. O processo é recriado se morrer e, ao desligar, tem
+  até SERVICOS_TEMPO_ENCERRAMENTO_SEGUNDOS para terminar os relatórios em andamento.
+- gthread com um único worker por padrão: a geração de relatórios passa a maior parte do
+  tempo esperando o pdflatex e os streams SSE/NDJSON ficam abertos por minutos, então a
+  escala vem das threads (GUNICORN_THREADS). O progresso dos relatórios (SSE) e o profiling
+  ficam na memória do worker que gera o relatório; com GUNICORN_WORKERS > 1, use afinidade de
+  sessão no proxy.
+- Métricas (/metrics): PROMETHEUS_MULTIPROC_DIR (padrão: auditex-metricas no diretório
+  temporário, esvaziado a cada início) ativa o modo multiprocesso do prometheus_client, que
+  soma as métricas dos workers, do processo dos serviços de fundo e dos processos do lote.
+"""
+
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+
+wsgi_app = "src.wsgi:app"
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+
+workers = int(os.getenv("GUNICORN_WORKERS", "1"))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "16"))
+preload_app = True
+
+# Relatórios grandes (parsing + duas passadas do pdflatex) podem levar vários minutos
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "900"))
+graceful_timeout = 60
+keepalive = 5
+
+# Recicla workers periodicamente para limitar o crescimento de memória (caches, matplotlib)
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = 100
+
+accesslog = "-"
+errorlog = "-"
+
+# Definido antes de a aplicação ser carregada (preload_app): o prometheus_client escolhe o
+# modo multiprocesso na importação. Arquivos de uma execução anterior seriam somados de novo,
+# mas o reload (SIGHUP) relê este arquivo no mesmo master e não pode apagar os atuais
+_pasta_metricas = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "auditex-metricas"))
+if os.environ.get("AUDITEX_METRICAS_MASTER") != str(os.getpid()):
+    shutil.rmtree(_pasta_metricas, ignore_errors=True)
+    os.environ["AUDITEX_METRICAS_MASTER"] = str(os.getpid())
+os.makedirs(_pasta_metricas, exist_ok=True)
+
+
+# Processo dos serviços de fundo (ver src.main.executar_servicos_de_fundo). É criado com
+# os.fork, e não com multiprocessing.Process: os workers herdariam o registro de filhos do
+# multiprocessing e tentariam esperar por este processo ao sair
+_servicos = {"pid": None, "app": None, "encerrando": False}
+INTERVALO_SUPERVISAO_SERVICOS = 10 # segundos
+
+
+def _processo_vivo(pid) -> bool:
+    try:
+        pid_terminado, _ = os.waitpid(pid, os.WNOHANG)
+    except ChildProcessError:
+        return False # Já recolhido pelo master do gunicorn (reap_workers)
+    return pid_terminado == 0
+
+
+def _marcar_processo_encerrado(pid) -> None:
+    from src.core.metrics import marcar_processo_encerrado
+    marcar_processo_encerrado(pid)
+
+
+def _iniciar_processo_servicos(server):
+    pid = os.fork()
+    if pid:
+        _servicos["pid"] = pid
+        server.log.info("Processo dos serviços de fundo iniciado (pid %s)", pid)
+        return
+
+    codigo = 0
+    try:
+        # O processo herda os handlers de sinais do master; SIGTERM e SIGINT são tratados pelos serviços
+        for sinal in (signal.SIGHUP, signal.SIGQUIT, signal.SIGUSR1, signal.SIGUSR2,
+                      signal.SIGWINCH, signal.SIGTTIN, signal.SIGTTOU, signal.SIGCHLD):
+            signal.signal(sinal, signal.SIG_DFL)
+        from src.main import executar_servicos_de_fundo
+        executar_servicos_de_fundo(_servicos["app"])
+    except BaseException:
+        server.log.exception("Erro no processo dos serviços de fundo")
+        codigo = 1
+    finally:
+        # Sem o atexit do master; códigos 3 e 4 fariam o gunicorn encerrar (erro de boot)
+        os._exit(codigo)
+
+
+def _supervisionar_servicos(server):
+    while not _servicos["encerrando"]:
+        time.sleep(INTERVALO_SUPERVISAO_SERVICOS)
+        if not _servicos["encerrando"] and not _processo_vivo(_servicos["pid"]):
+            server.log.warning("Processo dos serviços de fundo terminou; reiniciando")
+            _marcar_processo_encerrado(_servicos["pid"])
+            _iniciar_processo_servicos(server)
+
+
+def when_ready(server):
+    _servicos["app"] = server.app.wsgi()
+    _iniciar_processo_servicos(server)
+    threading.Thread(target=_supervisionar_servicos, args=(server,), daemon=True, name="supervisor-servicos").start()
+
+
+def child_exit(server, worker):
+    _marcar_processo_encerrado(worker.pid)
+
+
+def on_exit(server):
+    _servicos["encerrando"] = True
+    pid = _servicos["pid"]
+    if pid is None or not _processo_vivo(pid):
+        return
+    os.kill(pid, signal.SIGTERM)
+    # Margem além do tempo que os serviços têm para terminar os relatórios em execução
+    limite = time.monotonic() + float(os.getenv("SERVICOS_TEMPO_ENCERRAMENTO_SEGUNDOS", "600")) + 30
+    while _processo_vivo(pid) and time.monotonic() < limite:
+        time.sleep(0.5)
+    if _processo_vivo(pid):
+        server.log.warning("Processo dos serviços de fundo não terminou a tempo; encerrando com SIGKILL")
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
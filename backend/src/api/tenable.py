@@ -1,12 +1,44 @@
 # backend/src/api/tenable.py
 
 import requests
+import httpx
+import asyncio
+import hashlib
 import json
 import os
+import threading
 import time
+from concurrent.futures import Future
+from pathlib import Path
+from cachetools import TTLCache
+from ..core.config import Config
 from ..core.database import Database # Importa Database
+from ..core.scan_manifest import escrever_manifesto
+from ..data_processing.columnar_cache import escrever_copia_colunar
+from ..core.metrics import TENABLE_REQUEST_SECONDS, ACTIVE_JOBS, QUEUE_DEPTH, normalizar_endpoint
+from ..core.logging_config import obter_logger
 from ..models.settings import SystemSettings # Importa o modelo SystemSettings
 
+logger = obter_logger(__name__)
+
+# Parâmetros do fluxo de exportação (solicitar -> aguardar -> baixar)
+EXPORT_POLL_INITIAL_INTERVAL = 1.0 # segundos
+EXPORT_POLL_MAX_INTERVAL = 30.0 # segundos
+EXPORT_TIMEOUT = 600.0 # segundos
+DOWNLOAD_CHUNK_SIZE = 64 * 1024 # bytes
+
+# Tempo de vida (segundos) das respostas em cache, por endpoint
+CACHE_TTLS = {
+    "scans": 60,
+    "scan_details": 300,
+}
+CACHE_MAX_ENTRIES = 512
+
+# Novas tentativas para respostas 429 (limite de requisições) e 5xx do Tenable
+MAX_RETRIES = 3
+RETRY_BACKOFF_BASE = 1.0 # segundos; dobra a cada tentativa quando não há Retry-After
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
 class TenableApi:
     _instance = None # Para implementar o padrão Singleton (garantir uma única instância)
 
@@ -14,7 +46,9 @@ class TenableApi:
         if cls._instance is None:
             cls._instance = super(TenableApi, cls).__new__(cls)
             cls._instance.db = db_instance # Armazena a instância do banco de dados
+            cls._instance.base_url = Config("config.json").tenable_base_url.rstrip('/')
             cls._instance._load_credentials_from_db() # Carrega credenciais na criação
+            cls._instance._init_cache()
             cls._instance.initialized = True # Garante que só inicialize uma vez
         return cls._instance
 
@@ -22,9 +56,85 @@ class TenableApi:
     def __init__(self, db_instance: Database):
         if not hasattr(self, 'initialized'): # Evita re-inicialização se __new__ já o fez
             self.db = db_instance
+            self.base_url = Config("config.json").tenable_base_url.rstrip('/')
             self._load_credentials_from_db()
+            self._init_cache()
             self.initialized = True
 
+    def _init_cache(self):
+        """Inicializa o cache TTL de respostas (um TTLCache por endpoint) e seus contadores."""
+        self._cache = {endpoint: TTLCache(maxsize=CACHE_MAX_ENTRIES, ttl=ttl) for endpoint, ttl in CACHE_TTLS.items()}
+        self._cache_lock = threading.Lock()
+        self._cache_em_andamento = {} # (endpoint, chave) -> Future da requisição em andamento
+        self._cache_geracao = {endpoint: 0 for endpoint in CACHE_TTLS}
+        self._cache_stats = {endpoint: {"hits": 0, "misses": 0, "coalesced": 0} for endpoint in CACHE_TTLS}
+
+    def _cached_request(self, endpoint: str, chave, buscar):
+        """
+        Retorna a resposta em cache de `endpoint`/`chave` ou executa `buscar()`.
+        Chamadas simultâneas com a mesma chave aguardam a mesma requisição ao Tenable
+        em vez de dispararem requisições duplicadas.
+        """
+        with self._cache_lock:
+            cache = self._cache[endpoint]
+            if chave in cache:
+                self._cache_stats[endpoint]["hits"] += 1
+                return cache[chave]
+            futuro = self._cache_em_andamento.get((endpoint, chave))
+            if futuro is not None:
+                self._cache_stats[endpoint]["coalesced"] += 1
+                responsavel = False
+            else:
+                futuro = Future()
+                self._cache_em_andamento[(endpoint, chave)] = futuro
+                self._cache_stats[endpoint]["misses"] += 1
+                responsavel = True
+            geracao = self._cache_geracao[endpoint]
+
+        if not responsavel:
+            return futuro.result()
+
+        try:
+            resultado = buscar()
+        except Exception as e:
+            with self._cache_lock:
+                self._cache_em_andamento.pop((endpoint, chave), None)
+            futuro.set_exception(e)
+            raise
+
+        with self._cache_lock:
+            # Se o cache foi invalidado durante a requisição, a resposta pode estar desatualizada e não é guardada
+            if self._cache_geracao[endpoint] == geracao:
+                self._cache[endpoint][chave] = resultado
+            self._cache_em_andamento.pop((endpoint, chave), None)
+        futuro.set_result(resultado)
+        return resultado
+
+    def invalidate_cache(self, scan_id=None):
+        """
+        Invalida o cache de respostas. Com `scan_id`, remove apenas os detalhes desse scan
+        (e a listagem de scans); sem ele, limpa o cache inteiro.
+        """
+        with self._cache_lock:
+            if scan_id is None:
+                endpoints = list(self._cache.keys())
+                for endpoint in endpoints:
+                    self._cache[endpoint].clear()
+            else:
+                endpoints = ["scans", "scan_details"]
+                self._cache["scans"].clear()
+                self._cache["scan_details"].pop(str(scan_id), None)
+            for endpoint in endpoints:
+                self._cache_geracao[endpoint] += 1
+
+    def cache_stats(self):
+        """Retorna os contadores de hits/misses/coalesced e o tamanho atual do cache por endpoint."""
+        with self._cache_lock:
+            return {
+                endpoint: {**stats, "size": len(self._cache[endpoint]), "ttl": CACHE_TTLS[endpoint]}
+                for endpoint, stats in self._cache_stats.items()
+            }
+
     def _load_credentials_from_db(self):
         """Carrega as chaves da API Tenable do banco de dados."""
         db_temp_instance = Database() # Crie uma nova instância temporária para evitar problemas de conexão fechada
@@ -34,13 +144,13 @@ class TenableApi:
                 settings = SystemSettings.from_dict(settings_doc)
                 self.api_key = settings.tenable_api_key
                 self.access_key = settings.tenable_access_key
-                print("Tenable API credentials carregados do banco de dados.")
+                logger.info("Tenable API credentials carregados do banco de dados.")
             else:
                 self.api_key = None
                 self.access_key = None
-                print("Tenable API credentials não encontrados no banco de dados.")
+                logger.warning("Tenable API credentials não encontrados no banco de dados.")
         except Exception as e:
-            print(f"Erro ao carregar credenciais da API Tenable do DB: {e}")
+            logger.error(f"Erro ao carregar credenciais da API Tenable do DB: {e}")
             self.api_key = None
             self.access_key = None
         finally:
@@ -59,16 +169,369 @@ class TenableApi:
             "Content-Type": "application/json"
         }
 
-    def _make_request(self, method, url, data=None):
+    @staticmethod
+    def _tempo_espera_retry(headers, tentativa: int) -> float:
+        """Usa o cabeçalho Retry-After quando presente; caso contrário, backoff exponencial."""
+        retry_after = headers.get("Retry-After")
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+        return RETRY_BACKOFF_BASE * (2 ** tentativa)
+
+    def _registrar_latencia(self, method, url, inicio: float, status):
+        TENABLE_REQUEST_SECONDS.observe(
+            time.perf_counter() - inicio,
+            method=method, endpoint=normalizar_endpoint(url[len(self.base_url):]), status=status
+        )
+
+    def _make_request(self, method, url, data=None, params=None):
         headers = self._get_headers()
         try:
-            response = requests.request(method, url, headers=headers, json=data)
-            response.raise_for_status() # Lança um HTTPError para respostas de erro (4xx ou 5xx)
-            return response.json()
+            for tentativa in range(MAX_RETRIES + 1):
+                inicio = time.perf_counter()
+                try:
+                    response = requests.request(method, url, headers=headers, json=data, params=params)
+                except requests.exceptions.RequestException:
+                    self._registrar_latencia(method, url, inicio, "error")
+                    raise
+                self._registrar_latencia(method, url, inicio, response.status_code)
+                if response.status_code in RETRY_STATUS_CODES and tentativa < MAX_RETRIES:
+                    espera = self._tempo_espera_retry(response.headers, tentativa)
+                    logger.warning(f"Tenable respondeu {response.status_code} para {url}; nova tentativa em {espera:.1f}s.")
+                    time.sleep(espera)
+                    continue
+                response.raise_for_status() # Lança um HTTPError para respostas de erro (4xx ou 5xx)
+                return response.json()
         except requests.exceptions.RequestException as e:
-            print(f"Erro na requisição da API Tenable: {e}")
+            logger.error(f"Erro na requisição da API Tenable: {e}")
             raise
 
-    def get_scans(self):
-        url = "https://cloud.tenable.com/scans" # Ou a URL configurada do Tenable
-        return self._make_request("GET", url)
\ No newline at end of file
+    def get_scans(self, use_cache: bool = True):
+        url = f"{self.base_url}/scans"
+        if not use_cache:
+            return self._make_request("GET", url)
+        return self._cached_request("scans", "all", lambda: self._make_request("GET", url))
+
+    def get_scan_details(self, scan_id, use_cache: bool = True):
+        url = f"{self.base_url}/scans/{scan_id}"
+        if not use_cache:
+            return self._make_request("GET", url)
+        return self._cached_request("scan_details", str(scan_id), lambda: self._make_request("GET", url))
+
+    # --- Exportação de scans (solicitar, aguardar e baixar em disco) ---
+
+    def request_scan_export(self, scan_id, history_id=None, export_format: str = "csv"):
+        """Solicita ao Tenable a exportação de um scan e retorna o id do arquivo gerado."""
+        url = f"{self.base_url}/scans/{scan_id}/export"
+        params = {"history_id": history_id} if history_id else None
+        export = self._make_request("POST", url, data={"format": export_format}, params=params)
+        return export["file"]
+
+    def wait_for_scan_export(self, scan_id, file_id, export_timeout: float = EXPORT_TIMEOUT):
+        """
+        Consulta o status da exportação até ela ficar pronta. O intervalo entre as
+        consultas dobra a cada tentativa, até EXPORT_POLL_MAX_INTERVAL.
+        """
+        url = f"{self.base_url}/scans/{scan_id}/export/{file_id}/status"
+        intervalo = EXPORT_POLL_INITIAL_INTERVAL
+        inicio = time.monotonic()
+        while True:
+            status = self._make_request("GET", url)
+            if status.get("status") == "ready":
+                return
+            if status.get("status") == "error":
+                raise RuntimeError(f"O Tenable reportou erro na exportação do scan {scan_id}.")
+            if time.monotonic() - inicio > export_timeout:
+                raise TimeoutError(f"Exportação do scan {scan_id} não ficou pronta em {export_timeout} segundos.")
+            time.sleep(intervalo)
+            intervalo = min(intervalo * 2, EXPORT_POLL_MAX_INTERVAL)
+
+    def download_scan_export(self, scan_id, file_id, destino):
+        """
+        Baixa um arquivo exportado direto para `destino`, em blocos de DOWNLOAD_CHUNK_SIZE.
+        O arquivo é gravado em `<destino>.part` e só é renomeado ao final, junto com o
+        checksum SHA-256 em `<destino>.sha256`.
+
+        Retorna um dicionário com o caminho, o tamanho em bytes e o SHA-256 do arquivo.
+        """
+        destino = Path(destino)
+        url = f"{self.base_url}/scans/{scan_id}/export/{file_id}/download"
+        arquivo_temp = destino.with_name(destino.name + ".part")
+        sha256 = hashlib.sha256()
+        total_bytes = 0
+        try:
+            for tentativa in range(MAX_RETRIES + 1):
+                inicio = time.perf_counter()
+                with requests.get(url, headers=self._get_headers(), stream=True) as response:
+                    if response.status_code in RETRY_STATUS_CODES and tentativa < MAX_RETRIES:
+                        self._registrar_latencia("GET", url, inicio, response.status_code)
+                        time.sleep(self._tempo_espera_retry(response.headers, tentativa))
+                        continue
+                    response.raise_for_status()
+                    with open(arquivo_temp, 'wb') as f:
+                        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                            f.write(chunk)
+                            sha256.update(chunk)
+                            total_bytes += len(chunk)
+                    # Para downloads a latência registrada inclui a transferência do arquivo inteiro
+                    self._registrar_latencia("GET", url, inicio, response.status_code)
+                    break
+            os.replace(arquivo_temp, destino)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Erro ao baixar exportação do scan {scan_id}: {e}")
+            raise
+        finally:
+            if arquivo_temp.exists():
+                arquivo_temp.unlink()
+
+        checksum = sha256.hexdigest()
+        self._salvar_checksum(destino, checksum)
+        return {"path": str(destino), "bytes": total_bytes, "sha256": checksum}
+
+    def export_scan_csv(self, scan_id, history_id, destino):
+        """
+        Executa o fluxo completo de exportação CSV de um scan e grava o resultado em `destino`.
+        Retorna o mesmo dicionário de `download_scan_export`.
+        """
+        file_id = self.request_scan_export(scan_id, history_id, "csv")
+        self.wait_for_scan_export(scan_id, file_id)
+        return self.download_scan_export(scan_id, file_id, destino)
+
+    @staticmethod
+    def _salvar_checksum(destino: Path, checksum: str):
+        with open(destino.with_name(destino.name + ".sha256"), 'w', encoding='utf-8') as f:
+            f.write(f"{checksum}  {destino.name}\n")
+
+    # --- Download concorrente de scans (cliente assíncrono httpx) ---
+
+    async def _make_request_async(self, client: httpx.AsyncClient, method, url, params=None, data=None):
+        for tentativa in range(MAX_RETRIES + 1):
+            inicio = time.perf_counter()
+            try:
+                response = await client.request(method, url, params=params, json=data)
+            except httpx.HTTPError:
+                self._registrar_latencia(method, url, inicio, "error")
+                raise
+            self._registrar_latencia(method, url, inicio, response.status_code)
+            if response.status_code in RETRY_STATUS_CODES and tentativa < MAX_RETRIES:
+                await asyncio.sleep(self._tempo_espera_retry(response.headers, tentativa))
+                continue
+            response.raise_for_status()
+            return response.json()
+
+    async def _export_scan_csv_to_file_async(self, client: httpx.AsyncClient, scan_id, history_id, destino: Path,
+                                             export_timeout: float = EXPORT_TIMEOUT):
+        """
+        Versão assíncrona de `export_scan_csv`: solicita a exportação, aguarda com backoff
+        e grava o CSV em disco em blocos, junto com o checksum SHA-256 (que é retornado).
+        """
+        export = await self._make_request_async(
+            client, "POST", f"{self.base_url}/scans/{scan_id}/export",
+            params={"history_id": history_id}, data={"format": "csv"}
+        )
+        file_id = export["file"]
+
+        intervalo = EXPORT_POLL_INITIAL_INTERVAL
+        inicio = time.monotonic()
+        while True:
+            status = await self._make_request_async(
+                client, "GET", f"{self.base_url}/scans/{scan_id}/export/{file_id}/status"
+            )
+            if status.get("status") == "ready":
+                break
+            if status.get("status") == "error":
+                raise RuntimeError(f"O Tenable reportou erro na exportação do scan {scan_id}.")
+            if time.monotonic() - inicio > export_timeout:
+                raise TimeoutError(f"Exportação do scan {scan_id} não ficou pronta em {export_timeout} segundos.")
+            await asyncio.sleep(intervalo)
+            intervalo = min(intervalo * 2, EXPORT_POLL_MAX_INTERVAL)
+
+        arquivo_temp = destino.with_name(destino.name + ".part")
+        sha256 = hashlib.sha256()
+        try:
+            url_download = f"{self.base_url}/scans/{scan_id}/export/{file_id}/download"
+            for tentativa in range(MAX_RETRIES + 1):
+                inicio = time.perf_counter()
+                async with client.stream("GET", url_download) as response:
+                    if response.status_code in RETRY_STATUS_CODES and tentativa < MAX_RETRIES:
+                        self._registrar_latencia("GET", url_download, inicio, response.status_code)
+                        await asyncio.sleep(self._tempo_espera_retry(response.headers, tentativa))
+                        continue
+                    response.raise_for_status()
+                    with open(arquivo_temp, 'wb') as f:
+                        async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                            f.write(chunk)
+                            sha256.update(chunk)
+                    self._registrar_latencia("GET", url_download, inicio, response.status_code)
+                    break
+            os.replace(arquivo_temp, destino)
+        finally:
+            if arquivo_temp.exists():
+                arquivo_temp.unlink()
+        checksum = sha256.hexdigest()
+        self._salvar_checksum(destino, checksum)
+        return checksum
+
+    async def _download_scan_async(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, job: dict, on_progress):
+        """
+        Baixa os detalhes (JSON) e, para scans VM, o CSV exportado de um único scan.
+        O semáforo limita quantos scans são baixados ao mesmo tempo.
+        """
+        async with semaphore:
+            QUEUE_DEPTH.dec(queue="tenable_scan_download")
+            ACTIVE_JOBS.inc(kind="tenable_scan_download")
+            on_progress({"scanId": job["scan_id"], "scanName": job["scan_name"], "status": "downloading"})
+            try:
+                scan_directory = Path(job["scan_directory"])
+                scan_directory.mkdir(parents=True, exist_ok=True)
+
+                scan_details = await self._make_request_async(
+                    client, "GET", f"{self.base_url}/scans/{job['scan_id']}"
+                )
+                json_file_path = scan_directory / f"{job['scan_name']}.json"
+                await asyncio.to_thread(self._salvar_json_scan, json_file_path, scan_details)
+
+                if job["scan_type"] == 'vm' and job.get("history_id"):
+                    checksum = await self._export_scan_csv_to_file_async(
+                        client, job["scan_id"], job["history_id"], scan_directory / "servidores_scan.csv"
+                    )
+                    await asyncio.to_thread(escrever_copia_colunar, scan_directory / "servidores_scan.csv", checksum)
+
+                resultado = {"scanId": job["scan_id"], "scanName": job["scan_name"], "status": "done",
+                             "folder_path": str(scan_directory)}
+            except Exception as e:
+                logger.error(f"Erro ao baixar scan '{job['scan_name']}' do Tenable: {e}")
+                resultado = {"scanId": job["scan_id"], "scanName": job["scan_name"], "status": "error", "error": str(e)}
+            finally:
+                ACTIVE_JOBS.dec(kind="tenable_scan_download")
+            on_progress(resultado)
+            return resultado
+
+    async def _download_scans_bulk_async(self, jobs, max_concurrency: int, on_progress):
+        semaphore = asyncio.Semaphore(max_concurrency)
+        limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+        timeout = httpx.Timeout(60.0, connect=10.0)
+        async with httpx.AsyncClient(headers=self._get_headers(), limits=limits, timeout=timeout) as client:
+            return await asyncio.gather(
+                *(self._download_scan_async(client, semaphore, job, on_progress) for job in jobs)
+            )
+
+    def download_scans_bulk(self, jobs, max_concurrency: int = 4, on_progress=None):
+        """
+        Baixa vários scans do Tenable em paralelo, com no máximo `max_concurrency`
+        scans em andamento ao mesmo tempo. Cada arquivo é gravado em disco assim que
+        fica pronto.
+
+        Cada job é um dicionário com scan_id, scan_name, scan_type ('was' ou 'vm'),
+        scan_directory e, opcionalmente, history_id (necessário para exportar o CSV dos scans VM).
+        `on_progress` recebe um dicionário de status por scan ('downloading', 'done' ou 'error').
+        Retorna a lista de resultados finais, na mesma ordem dos jobs.
+        """
+        if on_progress is None:
+            on_progress = lambda evento: None
+        # Cada scan sai da fila quando ganha o semáforo; o que sobrar (ex.: cancelamento) é descontado no final
+        QUEUE_DEPTH.inc(len(jobs), queue="tenable_scan_download")
+        iniciados = []
+        def on_progress_com_fila(evento):
+            if evento.get("status") == "downloading":
+                iniciados.append(evento)
+            on_progress(evento)
+        try:
+            return asyncio.run(self._download_scans_bulk_async(jobs, max(1, max_concurrency), on_progress_com_fila))
+        finally:
+            QUEUE_DEPTH.dec(len(jobs) - len(iniciados), queue="tenable_scan_download")
+
+    # --- Exportação de vulnerabilidades em chunks (API /vulns/export) ---
+
+    def request_vulns_export(self, filters: dict = None, num_assets: int = 500):
+        """
+        Solicita ao Tenable uma exportação de vulnerabilidades dividida em chunks de até
+        `num_assets` ativos cada. Retorna o export_uuid.
+        """
+        url = f"{self.base_url}/vulns/export"
+        body = {"num_assets": num_assets, "filters": filters or {}}
+        return self._make_request("POST", url, data=body)["export_uuid"]
+
+    def wait_for_vulns_export(self, export_uuid, export_timeout: float = EXPORT_TIMEOUT):
+        """
+        Consulta o status da exportação (com backoff) até ela terminar e retorna a lista
+        de chunks disponíveis para download.
+        """
+        url = f"{self.base_url}/vulns/export/{export_uuid}/status"
+        intervalo = EXPORT_POLL_INITIAL_INTERVAL
+        inicio = time.monotonic()
+        while True:
+            status = self._make_request("GET", url)
+            estado = status.get("status")
+            if estado == "FINISHED":
+                return sorted(status.get("chunks_available", []))
+            if estado in ("ERROR", "CANCELLED"):
+                raise RuntimeError(f"Exportação de vulnerabilidades {export_uuid} terminou com status {estado}.")
+            if time.monotonic() - inicio > export_timeout:
+                raise TimeoutError(f"Exportação de vulnerabilidades {export_uuid} não terminou em {export_timeout} segundos.")
+            time.sleep(intervalo)
+            intervalo = min(intervalo * 2, EXPORT_POLL_MAX_INTERVAL)
+
+    async def _download_vulns_chunk_async(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+                                          export_uuid, chunk_id, destino_dir: Path):
+        async with semaphore:
+            vulnerabilidades = await self._make_request_async(
+                client, "GET", f"{self.base_url}/vulns/export/{export_uuid}/chunks/{chunk_id}"
+            )
+            destino = destino_dir / f"chunk_{chunk_id}.ndjson"
+            await asyncio.to_thread(self._salvar_ndjson, destino, vulnerabilidades)
+            return str(destino)
+
+    async def _download_vulns_chunks_async(self, export_uuid, chunk_ids, destino_dir: Path, max_concurrency: int):
+        semaphore = asyncio.Semaphore(max_concurrency)
+        limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+        timeout = httpx.Timeout(120.0, connect=10.0)
+        async with httpx.AsyncClient(headers=self._get_headers(), limits=limits, timeout=timeout) as client:
+            return await asyncio.gather(
+                *(self._download_vulns_chunk_async(client, semaphore, export_uuid, chunk_id, destino_dir)
+                  for chunk_id in chunk_ids)
+            )
+
+    def download_vulns_export_chunks(self, export_uuid, chunk_ids, destino_dir, max_concurrency: int = 4):
+        """
+        Baixa os chunks de uma exportação de vulnerabilidades em paralelo, gravando cada
+        um em `<destino_dir>/chunk_<id>.ndjson` (uma vulnerabilidade por linha).
+        Retorna a lista de arquivos gravados.
+        """
+        destino_dir = Path(destino_dir)
+        destino_dir.mkdir(parents=True, exist_ok=True)
+        return asyncio.run(
+            self._download_vulns_chunks_async(export_uuid, chunk_ids, destino_dir, max(1, max_concurrency))
+        )
+
+    def export_vulns_chunks(self, destino_dir, filters: dict = None, num_assets: int = 500, max_concurrency: int = 4):
+        """
+        Executa o fluxo completo da exportação em chunks: solicita, aguarda, descobre os
+        chunks disponíveis e baixa todos em paralelo para `destino_dir`.
+        Chunks de uma exportação anterior na mesma pasta são removidos antes do download.
+        """
+        export_uuid = self.request_vulns_export(filters, num_assets)
+        chunk_ids = self.wait_for_vulns_export(export_uuid)
+
+        destino_dir = Path(destino_dir)
+        if destino_dir.exists():
+            for chunk_antigo in destino_dir.glob("chunk_*.ndjson"):
+                chunk_antigo.unlink()
+        return self.download_vulns_export_chunks(export_uuid, chunk_ids, destino_dir, max_concurrency)
+
+    @staticmethod
+    def _salvar_ndjson(destino: Path, registros):
+        arquivo_temp = destino.with_name(destino.name + ".part")
+        with open(arquivo_temp, 'w', encoding='utf-8') as f:
+            for registro in registros:
+                f.write(json.dumps(registro, ensure_ascii=False))
+                f.write("\n")
+        os.replace(arquivo_temp, destino)
+
+    @staticmethod
+    def _salvar_json_scan(json_file_path: Path, scan_details):
+        with open(json_file_path, 'w', encoding='utf-8') as f:
+            json.dump(scan_details, f, ensure_ascii=False, indent=4)
+        escrever_manifesto(json_file_path.parent, scan_details)
\ No newline at end of file
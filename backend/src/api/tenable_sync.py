@@ -0,0 +1,254 @@
+# backend/src/api/tenable_sync.py
+
+import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from ..core.database import Database
+from ..core.metrics import ACTIVE_JOBS
+from ..core.logging_config import obter_logger
+from ..core.work_queue import FilaTrabalhos, TrabalhadorFila, LEASE_PADRAO_SEGUNDOS, identificador_no
+
+logger = obter_logger(__name__)
+
+# Coleção que guarda, por scan, o estado da última sincronização com o Tenable
+COLECAO_SCANS_SINCRONIZADOS = "scans_sincronizados"
+
+# A sincronização periódica é um trabalho único na fila (core.work_queue): um nó por vez
+TIPO_TRABALHO_SYNC = "tenable_sync"
+ID_TRABALHO_SYNC = "tenable_sync_periodico"
+
+# Caracteres mantidos no nome da pasta de um scan; os demais (inclusive "/" e "\\") viram "-"
+_CARACTERES_INVALIDOS_PASTA = re.compile(r'[^\w .()-]+')
+TAMANHO_MAXIMO_NOME_PASTA = 100
+
+
+class TenableScanSync:
+    """
+    Mantém um espelho local dos scans do Tenable na pasta de scans (caminho_scans_base).
+
+    A cada sincronização, a lista de scans do Tenable é comparada com o estado salvo no
+    MongoDB (last_modification_date e history_id de cada scan). Só são baixados os scans
+    novos ou com um novo histórico; os demais são ignorados sem nenhuma chamada extra à API.
+    """
+
+    def __init__(self, tenable_api, caminho_scans_base: str, max_concurrency: int = 4):
+        self.tenable_api = tenable_api
+        self.caminho_scans_base = Path(caminho_scans_base)
+        self.max_concurrency = max_concurrency
+        self._lock = threading.Lock()
+        self._trabalhador = None
+        self.ultimo_resultado = None
+
+    @staticmethod
+    def _tipo_scan(scan: dict) -> str:
+        return 'was' if scan.get('type') == 'webapp' else 'vm'
+
+    @staticmethod
+    def _nome_pasta(scan: dict) -> str:
+        """
+        "<nome do scan>-<id>": scans homônimos não compartilham a pasta, e nomes como ".." ou
+        iniciados por "." (ignorados pela fingerprint e pelos manifestos) não escapam da base.
+        """
+        nome = _CARACTERES_INVALIDOS_PASTA.sub('-', str(scan.get('name') or ''))
+        nome = nome[:TAMANHO_MAXIMO_NOME_PASTA].strip(' .-')
+        return f"{nome}-{scan['id']}" if nome else str(scan['id'])
+
+    @staticmethod
+    def _historico_mais_recente(scan_details: dict):
+        """history_id da execução concluída mais recente (execuções em andamento ou abortadas não têm export completo)."""
+        historico = [h for h in scan_details.get('history') or [] if h.get('status') == 'completed']
+        if not historico:
+            return None
+        mais_recente = max(historico, key=lambda h: (h.get('creation_date') or 0, h.get('history_id') or 0))
+        return mais_recente.get('history_id')
+
+    def _pasta_scan(self, scan_type: str, nome_pasta: str) -> Path:
+        subpasta = "WebAppScans" if scan_type == 'was' else "VMScans"
+        return self.caminho_scans_base / subpasta / nome_pasta
+
+    @staticmethod
+    def _remover_pasta_anterior(pasta_anterior, pasta: Path) -> None:
+        """
+        Remove a pasta do espelho com o nome antigo do scan. Só uma pasta dentro da mesma
+        subpasta (WebAppScans/VMScans): nomes antigos como ".." apontavam para fora dela.
+        """
+        if not pasta_anterior or pasta_anterior == str(pasta):
+            return
+        anterior = Path(pasta_anterior).resolve()
+        if anterior.parent == pasta.parent.resolve() and anterior.is_dir():
+            shutil.rmtree(anterior, ignore_errors=True)
+
+    def sincronizar(self) -> dict:
+        """
+        Executa uma sincronização incremental. Retorna um resumo com os scans baixados,
+        ignorados (sem mudanças) e com erro. Execuções concorrentes são serializadas.
+        """
+        with self._lock, ACTIVE_JOBS.em_andamento(kind="tenable_sync"):
+            inicio = time.monotonic()
+            db_instance = Database()
+            try:
+                resposta = self.tenable_api.get_scans(use_cache=False)
+                scans = resposta.get('scans') or []
+
+                estados = {
+                    doc["scan_id"]: doc
+                    for doc in db_instance.find(COLECAO_SCANS_SINCRONIZADOS)
+                }
+
+                jobs = []
+                ignorados = 0
+                for scan in scans:
+                    scan_id = scan.get('id')
+                    if scan_id is None:
+                        continue
+                    estado = estados.get(scan_id)
+                    modificado_em = scan.get('last_modification_date')
+                    scan_type = self._tipo_scan(scan)
+                    nome_pasta = self._nome_pasta(scan)
+                    pasta = self._pasta_scan(scan_type, nome_pasta)
+
+                    # Pasta já sincronizada com o nome atual (scans sincronizados antes do id no nome são baixados de novo)
+                    mesma_pasta = bool(estado) and estado.get("folder_path") == str(pasta) and pasta.exists()
+                    if mesma_pasta and estado.get("last_modification_date") == modificado_em:
+                        ignorados += 1
+                        continue
+
+                    # O scan mudou (ou é novo): consulta os detalhes para descobrir se há um novo histórico
+                    scan_details = self.tenable_api.get_scan_details(scan_id, use_cache=False)
+                    history_id = self._historico_mais_recente(scan_details)
+                    if history_id is None:
+                        # Nenhuma execução concluída ainda: o estado não é salvo e o scan é verificado de novo na próxima vez
+                        logger.debug(f"Scan {scan_id} sem execução concluída; sincronização adiada.")
+                        ignorados += 1
+                        continue
+
+                    if mesma_pasta and estado.get("history_id") == history_id:
+                        # Mesmo histórico (ex.: scan apenas renomeado ou reagendado): só atualiza o estado
+                        db_instance.update_one(
+                            COLECAO_SCANS_SINCRONIZADOS, {"scan_id": scan_id},
+                            {"last_modification_date": modificado_em, "synced_at": datetime.utcnow()}
+                        )
+                        ignorados += 1
+                        continue
+
+                    jobs.append({
+                        "scan_id": scan_id,
+                        "scan_name": nome_pasta,
+                        "scan_type": scan_type,
+                        "history_id": history_id,
+                        "scan_directory": pasta,
+                        "last_modification_date": modificado_em,
+                        "pasta_anterior": estado.get("folder_path") if estado else None
+                    })
+
+                baixados = []
+                erros = []
+                if jobs:
+                    resultados = self.tenable_api.download_scans_bulk(jobs, self.max_concurrency)
+                    for job, resultado in zip(jobs, resultados):
+                        self.tenable_api.invalidate_cache(job["scan_id"])
+                        if resultado["status"] != "done":
+                            erros.append({"scanId": job["scan_id"], "scanName": job["scan_name"], "error": resultado.get("error")})
+                            continue
+                        db_instance.update_one(
+                            COLECAO_SCANS_SINCRONIZADOS, {"scan_id": job["scan_id"]},
+                            {
+                                "scan_id": job["scan_id"],
+                                "scan_name": job["scan_name"],
+                                "scan_type": job["scan_type"],
+                                "history_id": job["history_id"],
+                                "last_modification_date": job["last_modification_date"],
+                                "folder_path": str(job["scan_directory"]),
+                                "synced_at": datetime.utcnow()
+                            },
+                            upsert=True
+                        )
+                        self._remover_pasta_anterior(job["pasta_anterior"], job["scan_directory"])
+                        baixados.append(job["scan_name"])
+
+                self.ultimo_resultado = {
+                    "total_tenable": len(scans),
+                    "downloaded": baixados,
+                    "unchanged": ignorados,
+                    "errors": erros,
+                    "duration_seconds": round(time.monotonic() - inicio, 2),
+                    "finished_at": datetime.utcnow().isoformat()
+                }
+                logger.info(f"Sincronização de scans concluída: {len(baixados)} baixados, {ignorados} sem mudanças, {len(erros)} com erro.")
+                return self.ultimo_resultado
+            finally:
+                db_instance.close()
+
+    def iniciar_periodico(self, intervalo_segundos: float, fila: Optional[FilaTrabalhos] = None):
+        """
+        Sincroniza a cada `intervalo_segundos` em um único nó por vez, mesmo com vários nós
+        compartilhando o MongoDB e o shared_data: a sincronização é um trabalho de id fixo na
+        fila de trabalhos, reagendado ao terminar. O nó que o reivindica renova o lease
+        enquanto sincroniza; se ele morrer, outro nó retoma quando o lease vencer.
+        """
+        if self._trabalhador is not None:
+            return
+        fila = fila or FilaTrabalhos()
+        fila.garantir_trabalho_unico(ID_TRABALHO_SYNC, TIPO_TRABALHO_SYNC)
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tenable-scan-sync")
+
+        def ao_terminar(trabalho, futuro):
+            erro = None
+            try:
+                futuro.result()
+            except Exception as e:
+                logger.error(f"Erro na sincronização periódica de scans do Tenable: {e}")
+                erro = str(e)
+            if not fila.reagendar(trabalho, intervalo_segundos, erro=erro):
+                logger.warning("Lease da sincronização periódica do Tenable perdido; o próximo agendamento fica com outro nó.")
+
+        self._trabalhador = TrabalhadorFila(
+            fila,
+            [TIPO_TRABALHO_SYNC],
+            submeter=lambda trabalho: executor.submit(self.sincronizar),
+            ao_terminar=ao_terminar,
+            max_concorrentes=1,
+            intervalo_busca=min(30.0, float(intervalo_segundos))
+        )
+        self._trabalhador.iniciar()
+
+    def sincronizar_exclusivo(self, fila: Optional[FilaTrabalhos] = None) -> Optional[dict]:
+        """
+        Sincronização sob demanda sob o mesmo lease da periódica: reivindica o trabalho da
+        sincronização agora e o reagenda ao terminar. None se outro nó estiver sincronizando.
+        """
+        fila = fila or FilaTrabalhos()
+        fila.garantir_trabalho_unico(ID_TRABALHO_SYNC, TIPO_TRABALHO_SYNC)
+        trabalho = fila.reivindicar_trabalho(ID_TRABALHO_SYNC, identificador_no())
+        if trabalho is None:
+            return None
+
+        terminou = threading.Event()
+
+        def renovar_lease():
+            while not terminou.wait(LEASE_PADRAO_SEGUNDOS / 3):
+                if not fila.renovar_lease(trabalho):
+                    logger.warning("Lease da sincronização sob demanda do Tenable perdido.")
+                    return
+
+        threading.Thread(target=renovar_lease, daemon=True, name="tenable-scan-sync-lease").start()
+        erro = None
+        try:
+            return self.sincronizar()
+        except Exception as e:
+            erro = str(e)
+            raise
+        finally:
+            terminou.set()
+            fila.reagendar(trabalho, float(os.getenv("TENABLE_SYNC_INTERVAL_SECONDS", "0")), erro=erro)
+
+    def parar(self):
+        if self._trabalhador is not None:
+            self._trabalhador.parar()
@@ -1,8 +1,10 @@
 # backend/src/core/database.py
-from pymongo import MongoClient
-from typing import Any, Dict, List
+from pymongo import MongoClient, ReturnDocument
+from typing import Any, Dict, List, Optional, Tuple
 from bson.objectid import ObjectId
 import os # NOVO: Importa o módulo os
+import threading
+from .metrics import MONGO_OPERATION_SECONDS
 
 class Database:
     def __init__(self, db_name: str = "mydatabase"):
@@ -16,37 +18,79 @@ class Database:
 
         # Conecta usando as credenciais
         #self.client = MongoClient("mongodb://mongodb:27017/") # LINHA ANTIGA
-        self.client = MongoClient(
-            f"mongodb://{mongo_user}:{mongo_password}@{mongo_host}:{mongo_port}/{db_name}?authSource=admin"
-        )
-        self.db = self.client[db_name]
+        self.db_name = db_name
+        # MONGO_URI substitui a URI montada acima (ex.: um MongoDB local sem autenticação nos testes)
+        self._uri = os.getenv("MONGO_URI") or f"mongodb://{mongo_user}:{mongo_password}@{mongo_host}:{mongo_port}/{db_name}?authSource=admin"
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self) -> MongoClient:
+        # A conexão só é aberta no primeiro uso: instâncias criadas na importação dos módulos
+        # (rotas, app_logger) não conectam antes do fork dos workers do gunicorn
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = MongoClient(self._uri)
+        return self._client
+
+    @property
+    def db(self):
+        return self.client[self.db_name]
 
     def insert_one(self, collection_name: str, data: Dict[str, Any]):
-        return self.db[collection_name].insert_one(data)
+        with MONGO_OPERATION_SECONDS.time(operation="insert_one", collection=collection_name):
+            return self.db[collection_name].insert_one(data)
 
     def insert_many(self, collection_name: str, data_list: List[Dict[str, Any]]):
-        return self.db[collection_name].insert_many(data_list)
+        with MONGO_OPERATION_SECONDS.time(operation="insert_many", collection=collection_name):
+            return self.db[collection_name].insert_many(data_list)
 
     def find_one(self, collection_name: str, query: Dict[str, Any]):
-        return self.db[collection_name].find_one(query)
+        with MONGO_OPERATION_SECONDS.time(operation="find_one", collection=collection_name):
+            return self.db[collection_name].find_one(query)
 
     def find(self, collection_name: str, query: Dict[str, Any] = {}):
-        return list(self.db[collection_name].find(query))
+        with MONGO_OPERATION_SECONDS.time(operation="find", collection=collection_name):
+            return list(self.db[collection_name].find(query))
+
+    def update_one(self, collection_name: str, query: Dict[str, Any], update: Dict[str, Any], upsert: bool = False):
+        with MONGO_OPERATION_SECONDS.time(operation="update_one", collection=collection_name):
+            return self.db[collection_name].update_one(query, {"$set": update}, upsert=upsert)
+
+    def find_one_and_update(self, collection_name: str, query: Dict[str, Any], update: Dict[str, Any], sort: Optional[List[Tuple[str, int]]] = None, upsert: bool = False):
+        """
+        Atualiza o primeiro documento de `query` (na ordem de `sort`) e o retorna já
+        atualizado, em uma única operação atômica; None se nenhum documento corresponder.
+        Ao contrário de update_one, `update` é o documento de atualização completo, com os
+        operadores (ex.: {"$set": {...}, "$inc": {...}}).
+        """
+        with MONGO_OPERATION_SECONDS.time(operation="find_one_and_update", collection=collection_name):
+            return self.db[collection_name].find_one_and_update(query, update, sort=sort, upsert=upsert, return_document=ReturnDocument.AFTER)
 
-    def update_one(self, collection_name: str, query: Dict[str, Any], update: Dict[str, Any]):
-        return self.db[collection_name].update_one(query, {"$set": update})
+    def create_index(self, collection_name: str, keys: List[Tuple[str, int]], **kwargs):
+        # Idempotente: um índice igual já existente não é recriado
+        with MONGO_OPERATION_SECONDS.time(operation="create_index", collection=collection_name):
+            return self.db[collection_name].create_index(keys, **kwargs)
 
     def delete_one(self, collection_name: str, query: Dict[str, Any]):
-        return self.db[collection_name].delete_one(query)
+        with MONGO_OPERATION_SECONDS.time(operation="delete_one", collection=collection_name):
+            return self.db[collection_name].delete_one(query)
 
     def delete_many(self, collection_name: str, query: Dict[str, Any]):
-        return self.db[collection_name].delete_many(query)
+        with MONGO_OPERATION_SECONDS.time(operation="delete_many", collection=collection_name):
+            return self.db[collection_name].delete_many(query)
 
     def count_documents(self, collection_name: str, query: Dict[str, Any] = {}):
-        return self.db[collection_name].count_documents(query)
+        with MONGO_OPERATION_SECONDS.time(operation="count_documents", collection=collection_name):
+            return self.db[collection_name].count_documents(query)
 
     def close(self):
-        self.client.close()
+        # Depois de fechada, a instância volta a conectar no próximo uso
+        with self._client_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
 
     def get_object_id(self, id_string: str) -> ObjectId:
         """Converte uma string de ID em um ObjectId do MongoDB."""
@@ -0,0 +1,189 @@
+# backend/src/core/host_set.py
+
+"""
+Conjunto compacto de hosts afetados por uma vulnerabilidade.
+
+Endereços IPv4 ficam em um array NumPy ordenado de uint32 e IPv6 em um array estruturado
+(metade alta e baixa em uint64), sem repetição; nomes de host ficam à parte, internados
+(sys.intern), já que se repetem entre vulnerabilidades. União e pertinência são feitas sobre
+os arrays ordenados, a iteração segue a ordem natural dos endereços (IPv4, IPv6 e depois os
+nomes) e `faixas()` agrupa endereços consecutivos em CIDRs ou intervalos, para que o
+relatório não precise de um item por host em redes inteiras.
+
+Os módulos que usam ConjuntoHosts o importam dentro das funções: o NumPy só é carregado na
+geração de relatórios, não na inicialização do backend.
+"""
+
+import ipaddress
+import socket
+import sys
+from typing import Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+DTYPE_IPV6 = np.dtype([("alto", "u8"), ("baixo", "u8")])
+MASCARA_64 = (1 << 64) - 1
+
+
+def _ipv4_para_int(host: str):
+    try:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET, host), "big")
+    except OSError:
+        return None
+
+
+def _ipv6_para_int(host: str):
+    try:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET6, host), "big")
+    except OSError:
+        return None
+
+
+class ConjuntoHosts:
+    __slots__ = ("_ipv4", "_ipv6", "_nomes")
+
+    def __init__(self, ipv4=None, ipv6=None, nomes: Iterable[str] = ()):
+        self._ipv4 = np.unique(np.asarray(ipv4 if ipv4 is not None else [], dtype=np.uint32))
+        self._ipv6 = np.unique(np.asarray(ipv6 if ipv6 is not None else [], dtype=DTYPE_IPV6))
+        self._nomes = tuple(sorted({sys.intern(nome) for nome in nomes}))
+
+    @classmethod
+    def de_hosts(cls, hosts: Iterable[str]) -> "ConjuntoHosts":
+        """Cria o conjunto a partir dos hosts como aparecem nos scans (IPs ou nomes). Um ConjuntoHosts é retornado como está."""
+        if isinstance(hosts, cls):
+            return hosts
+        ipv4, ipv6, nomes = [], [], set()
+        for host in hosts:
+            host = str(host).strip()
+            if not host:
+                continue
+            valor = _ipv4_para_int(host)
+            if valor is not None:
+                ipv4.append(valor)
+                continue
+            valor = _ipv6_para_int(host)
+            if valor is not None:
+                ipv6.append((valor >> 64, valor & MASCARA_64))
+            else:
+                nomes.add(host)
+        return cls(ipv4, ipv6, nomes)
+
+    @classmethod
+    def uniao(cls, conjuntos: Iterable["ConjuntoHosts"]) -> "ConjuntoHosts":
+        """União de vários conjuntos de uma vez (uma concatenação e uma ordenação por tipo)."""
+        conjuntos = list(conjuntos)
+        if not conjuntos:
+            return cls()
+        return cls(
+            np.concatenate([c._ipv4 for c in conjuntos]),
+            np.concatenate([c._ipv6 for c in conjuntos]),
+            (nome for c in conjuntos for nome in c._nomes)
+        )
+
+    def __or__(self, outro: "ConjuntoHosts") -> "ConjuntoHosts":
+        return ConjuntoHosts.uniao([self, outro])
+
+    def __len__(self) -> int:
+        return len(self._ipv4) + len(self._ipv6) + len(self._nomes)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __contains__(self, host: str) -> bool:
+        host = str(host).strip()
+        valor = _ipv4_para_int(host)
+        if valor is not None:
+            return _contem(self._ipv4, np.uint32(valor))
+        valor = _ipv6_para_int(host)
+        if valor is not None:
+            return _contem(self._ipv6, np.array((valor >> 64, valor & MASCARA_64), dtype=DTYPE_IPV6))
+        return host in self._nomes
+
+    def __iter__(self) -> Iterator[str]:
+        """Hosts na ordem natural: IPv4 e IPv6 por endereço, depois os nomes em ordem alfabética."""
+        for valor in self._ipv4.tolist():
+            yield str(ipaddress.IPv4Address(valor))
+        for alto, baixo in self._ipv6.tolist():
+            yield str(ipaddress.IPv6Address((alto << 64) | baixo))
+        yield from self._nomes
+
+    def __eq__(self, outro) -> bool:
+        if not isinstance(outro, ConjuntoHosts):
+            return NotImplemented
+        return (np.array_equal(self._ipv4, outro._ipv4) and np.array_equal(self._ipv6, outro._ipv6)
+                and self._nomes == outro._nomes)
+
+    def __repr__(self) -> str:
+        return f"ConjuntoHosts(ipv4={len(self._ipv4)}, ipv6={len(self._ipv6)}, nomes={len(self._nomes)})"
+
+    def __getstate__(self):
+        return self._ipv4, self._ipv6, self._nomes
+
+    def __setstate__(self, estado):
+        self._ipv4, self._ipv6, nomes = estado
+        self._nomes = tuple(sys.intern(nome) for nome in nomes)
+
+    @staticmethod
+    def posicoes_em(conjuntos: List["ConjuntoHosts"], universo: "ConjuntoHosts") -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Posições dos hosts de cada conjunto na ordem de iteração de `universo`, que precisa
+        conter todos eles (ex.: a união dos conjuntos). Retorna dois arrays paralelos: a
+        posição do host no universo e o índice do conjunto em `conjuntos`. Cada tipo de
+        endereço é buscado com um único searchsorted para todos os conjuntos.
+        """
+        posicoes, origens = [], []
+        deslocamento = 0
+        for atributo, valores_universo in (("_ipv4", universo._ipv4), ("_ipv6", universo._ipv6),
+                                           ("_nomes", np.array(universo._nomes, dtype=object))):
+            partes = [np.asarray(getattr(c, atributo), dtype=valores_universo.dtype) for c in conjuntos]
+            tamanhos = np.fromiter((len(parte) for parte in partes), dtype=np.int64, count=len(partes))
+            if partes and tamanhos.sum():
+                posicoes.append(deslocamento + np.searchsorted(valores_universo, np.concatenate(partes)))
+                origens.append(np.repeat(np.arange(len(partes)), tamanhos))
+            deslocamento += len(valores_universo)
+        if not posicoes:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(posicoes).astype(np.int64), np.concatenate(origens).astype(np.int64)
+
+    def _intervalos_ipv4(self) -> List[Tuple[int, int]]:
+        """Sequências de endereços IPv4 consecutivos, como (primeiro, último)."""
+        if not len(self._ipv4):
+            return []
+        valores = self._ipv4.astype(np.int64)
+        quebras = np.flatnonzero(np.diff(valores) != 1) + 1
+        inicios = valores[np.concatenate(([0], quebras))]
+        fins = valores[np.concatenate((quebras - 1, [len(valores) - 1]))]
+        return list(zip(inicios.tolist(), fins.tolist()))
+
+    def _intervalos_ipv6(self) -> List[Tuple[int, int]]:
+        intervalos = []
+        for alto, baixo in self._ipv6.tolist():
+            valor = (alto << 64) | baixo
+            if intervalos and intervalos[-1][1] + 1 == valor:
+                intervalos[-1] = (intervalos[-1][0], valor)
+            else:
+                intervalos.append((valor, valor))
+        return intervalos
+
+    def faixas(self) -> List[str]:
+        """
+        Hosts com os endereços consecutivos agrupados, na ordem natural: um endereço isolado
+        fica como está, uma sequência que forma exatamente uma rede vira CIDR (10.0.0.0/24) e
+        as demais viram intervalo (10.0.0.5-10.0.0.20). Os nomes de host vêm no final.
+        """
+        faixas = []
+        for intervalos, classe in ((self._intervalos_ipv4(), ipaddress.IPv4Address), (self._intervalos_ipv6(), ipaddress.IPv6Address)):
+            for primeiro, ultimo in intervalos:
+                inicio, fim = classe(primeiro), classe(ultimo)
+                if primeiro == ultimo:
+                    faixas.append(str(inicio))
+                    continue
+                redes = list(ipaddress.summarize_address_range(inicio, fim))
+                faixas.append(str(redes[0]) if len(redes) == 1 else f"{inicio}-{fim}")
+        faixas.extend(self._nomes)
+        return faixas
+
+
+def _contem(valores: np.ndarray, valor) -> bool:
+    posicao = np.searchsorted(valores, valor)
+    return bool(posicao < len(valores) and valores[posicao] == valor)
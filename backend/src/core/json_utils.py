@@ -1,5 +1,6 @@
 import json
 import os
+import threading
 
 def carregar_json(caminho_arquivo_json: str) -> str:
     """
@@ -17,6 +18,25 @@ def carregar_json_utf(caminho_arquivo_json: str) -> str:
     with open(caminho_arquivo_json, 'r', encoding='utf-8') as arquivo:
         return json.load(arquivo)
 
+# (caminho) -> ((tamanho, mtime_ns), dados) dos JSONs carregados por carregar_json_memorizado
+_JSONS_MEMORIZADOS = {}
+_LOCK_JSONS_MEMORIZADOS = threading.Lock()
+
+def carregar_json_memorizado(caminho_arquivo_json: str):
+    """
+    Carrega um JSON UTF-8 uma vez por processo e o reaproveita enquanto o arquivo não mudar
+    (tamanho e mtime), como o catálogo e os descritivos de vulnerabilidades, lidos em toda
+    geração de relatório. O objeto retornado é compartilhado: não deve ser alterado.
+    """
+    stat = os.stat(caminho_arquivo_json)
+    versao = (stat.st_size, stat.st_mtime_ns)
+    with _LOCK_JSONS_MEMORIZADOS:
+        memorizado = _JSONS_MEMORIZADOS.get(caminho_arquivo_json)
+        if memorizado is None or memorizado[0] != versao:
+            memorizado = (versao, carregar_json_utf(caminho_arquivo_json))
+            _JSONS_MEMORIZADOS[caminho_arquivo_json] = memorizado
+        return memorizado[1]
+
 def salvar_json(caminho_arquivo_json:str, dados:str) -> None:
     """
     Função para salvar dados em um arquivo JSON.
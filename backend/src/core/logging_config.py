@@ -0,0 +1,187 @@
+# backend/src/core/logging_config.py
+
+"""
+Logging da aplicação (saída de diagnóstico). O registro de ações de usuário no MongoDB
+continua em core.logger (app_logger.log_action).
+
+Todos os loggers ficam sob o logger "auditex" (ex.: auditex.report_generation.latex_compiler)
+e são obtidos com `obter_logger(__name__)`. Os registros são enfileirados por um
+QueueHandler e escritos por uma thread (QueueListener), então a requisição não espera
+pela escrita no stdout.
+
+Variáveis de ambiente:
+- LOG_LEVEL: nível padrão (INFO).
+- LOG_LEVELS: níveis por módulo/pacote, ex. "report_generation=DEBUG,routes.auth=WARNING".
+- LOG_FORMAT: "texto" (padrão) ou "json" (uma linha JSON por registro).
+- LOG_DEBUG_POR_SEGUNDO: máximo de mensagens DEBUG por segundo por ponto de chamada (10).
+- LOG_DEBUG_AMOSTRAGEM: fração das mensagens DEBUG mantidas, entre 0 e 1 (1.0).
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+LOGGER_RAIZ = "auditex"
+
+# Atributos padrão de um LogRecord; o restante vem de `extra=` e vai para a saída estruturada
+_ATRIBUTOS_PADRAO = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_configurado = False
+_configuracao_lock = threading.Lock()
+_listener = None
+
+
+def obter_logger(nome_modulo: str) -> logging.Logger:
+    """
+    Logger do módulo sob "auditex", independente de como o pacote foi importado
+    (src.routes.reports e backend.src.routes.reports viram auditex.routes.reports).
+    """
+    partes = nome_modulo.split(".")
+    if "src" in partes:
+        partes = partes[partes.index("src") + 1:]
+    return logging.getLogger(".".join([LOGGER_RAIZ] + [p for p in partes if p]))
+
+
+class FiltroDebug(logging.Filter):
+    """
+    Limita mensagens DEBUG por ponto de chamada (arquivo:linha): no máximo `por_segundo`
+    mensagens a cada segundo, após a amostragem. A quantidade descartada é informada na
+    próxima mensagem emitida pelo mesmo ponto. Outros níveis passam sem alteração.
+    """
+
+    def __init__(self, por_segundo: int = 10, amostragem: float = 1.0):
+        super().__init__()
+        self.por_segundo = por_segundo
+        self.amostragem = amostragem
+        self._janelas = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.DEBUG:
+            return True
+
+        chave = (record.pathname, record.lineno)
+        agora = time.monotonic()
+        with self._lock:
+            inicio, emitidas, suprimidas = self._janelas.get(chave, (agora, 0, 0))
+            if agora - inicio >= 1.0:
+                inicio, emitidas = agora, 0
+
+            permitido = (self.amostragem >= 1.0 or random.random() < self.amostragem) and \
+                (self.por_segundo <= 0 or emitidas < self.por_segundo)
+            if not permitido:
+                self._janelas[chave] = (inicio, emitidas, suprimidas + 1)
+                return False
+            self._janelas[chave] = (inicio, emitidas + 1, 0)
+
+        if suprimidas:
+            record.suprimidas = suprimidas
+        return True
+
+
+class FormatadorJson(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        dados = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for chave, valor in vars(record).items():
+            if chave not in _ATRIBUTOS_PADRAO and not chave.startswith("_"):
+                dados[chave] = valor
+        if record.exc_info:
+            dados["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class FormatadorTexto(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        texto = super().format(record)
+        extras = [f"{chave}={valor}" for chave, valor in vars(record).items()
+                  if chave not in _ATRIBUTOS_PADRAO and not chave.startswith("_")]
+        if extras:
+            primeira_linha, _, resto = texto.partition("\n")
+            texto = f"{primeira_linha} [{' '.join(extras)}]" + (f"\n{resto}" if resto else "")
+        return texto
+
+
+def _niveis_por_modulo(valor: str) -> dict:
+    niveis = {}
+    for item in filter(None, (parte.strip() for parte in valor.split(","))):
+        modulo, _, nivel = item.partition("=")
+        if modulo.strip() and nivel.strip():
+            niveis[modulo.strip()] = nivel.strip().upper()
+    return niveis
+
+
+def configurar_logging() -> None:
+    """
+    Configura o logger "auditex" a partir das variáveis de ambiente. Chamadas repetidas
+    não têm efeito.
+    """
+    global _configurado, _listener
+    with _configuracao_lock:
+        if _configurado:
+            return
+
+        raiz = logging.getLogger(LOGGER_RAIZ)
+        raiz.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+        raiz.propagate = False
+        for modulo, nivel in _niveis_por_modulo(os.getenv("LOG_LEVELS", "")).items():
+            nome = modulo if modulo.startswith(LOGGER_RAIZ) else f"{LOGGER_RAIZ}.{modulo}"
+            logging.getLogger(nome).setLevel(nivel)
+
+        saida = logging.StreamHandler(sys.stdout)
+        saida.setFormatter(FormatadorJson() if os.getenv("LOG_FORMAT", "texto").lower() == "json" else FormatadorTexto())
+
+        fila = queue.SimpleQueue()
+        handler_fila = logging.handlers.QueueHandler(fila)
+        handler_fila.addFilter(FiltroDebug(
+            por_segundo=int(os.getenv("LOG_DEBUG_POR_SEGUNDO", "10")),
+            amostragem=float(os.getenv("LOG_DEBUG_AMOSTRAGEM", "1.0"))
+        ))
+        raiz.addHandler(handler_fila)
+
+        _listener = logging.handlers.QueueListener(fila, saida, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_parar_listener)
+        # A thread do listener não sobrevive ao fork (workers do gunicorn com preload_app):
+        # cada processo filho cria a sua, com uma fila nova
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=lambda: _reiniciar_listener(handler_fila))
+        _configurado = True
+
+
+def _reiniciar_listener(handler_fila: logging.handlers.QueueHandler) -> None:
+    global _listener
+    fila = queue.SimpleQueue()
+    handler_fila.queue = fila
+    _listener = logging.handlers.QueueListener(fila, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def _parar_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def encerrar_logging() -> None:
+    """
+    Escreve os registros ainda na fila e para a thread do listener. Para processos que
+    terminam sem passar pelo atexit (ex.: multiprocessing.Process, que sai com os._exit).
+    """
+    _parar_listener()
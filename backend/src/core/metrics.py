@@ -0,0 +1,186 @@
+# backend/src/core/metrics.py
+
+"""
+Métricas da aplicação expostas no formato texto do Prometheus em GET /metrics, com o
+prometheus_client (só a biblioteca; o Prometheus, ou qualquer coletor compatível, faz scrape
+do endpoint).
+
+Sob o gunicorn (ver gunicorn.conf.py), PROMETHEUS_MULTIPROC_DIR ativa o modo multiprocesso:
+cada processo (workers, o processo dos serviços de fundo e os processos da geração em lote)
+grava as métricas em arquivos desse diretório e /metrics soma todos, em qualquer worker. Sem
+a variável (servidor de desenvolvimento), valem só as métricas do próprio processo.
+"""
+
+import os
+import re
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Tuple
+
+import prometheus_client
+from prometheus_client import multiprocess
+
+from .report_progress import publicar_progresso
+
+# Buckets (segundos) para operações rápidas (MongoDB, requisições HTTP) e para etapas longas do relatório
+BUCKETS_RAPIDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_ETAPAS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+class _Metrica:
+    """Métrica do prometheus_client com os labels passados como argumentos nomeados (os ausentes ficam vazios)."""
+
+    def __init__(self, metrica, labels: Iterable[str]):
+        self._metrica = metrica
+        self.labels = tuple(labels)
+
+    def _serie(self, labels: Dict[str, str]):
+        if not self.labels:
+            return self._metrica
+        return self._metrica.labels(*(str(labels.get(nome, "")) for nome in self.labels))
+
+
+class Counter(_Metrica):
+    def __init__(self, nome: str, descricao: str, labels: Iterable[str] = ()):
+        super().__init__(prometheus_client.Counter(nome, descricao, tuple(labels)), labels)
+
+    def inc(self, valor: float = 1.0, **labels):
+        self._serie(labels).inc(valor)
+
+
+class Gauge(_Metrica):
+    def __init__(self, nome: str, descricao: str, labels: Iterable[str] = ()):
+        # livesum: no modo multiprocesso, soma os valores dos processos vivos
+        super().__init__(prometheus_client.Gauge(nome, descricao, tuple(labels), multiprocess_mode="livesum"), labels)
+
+    def set(self, valor: float, **labels):
+        self._serie(labels).set(valor)
+
+    def inc(self, valor: float = 1.0, **labels):
+        self._serie(labels).inc(valor)
+
+    def dec(self, valor: float = 1.0, **labels):
+        self._serie(labels).dec(valor)
+
+    @contextmanager
+    def em_andamento(self, **labels):
+        """Incrementa o gauge enquanto o bloco executa (ex.: jobs ativos)."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metrica):
+    def __init__(self, nome: str, descricao: str, labels: Iterable[str] = (), buckets: Tuple[float, ...] = BUCKETS_RAPIDOS):
+        super().__init__(prometheus_client.Histogram(nome, descricao, tuple(labels), buckets=tuple(sorted(buckets))), labels)
+
+    def observe(self, valor: float, **labels):
+        self._serie(labels).observe(valor)
+
+    @contextmanager
+    def time(self, **labels):
+        """Mede a duração do bloco (também quando ele termina com exceção)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - inicio, **labels)
+
+
+# --- Métricas da aplicação ---
+
+REPORT_STAGE_SECONDS = Histogram(
+    "auditex_report_stage_seconds",
+    "Duração de cada etapa da geração de relatórios.",
+    ("stage", "source"), BUCKETS_ETAPAS
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "auditex_http_request_duration_seconds",
+    "Latência das requisições HTTP por blueprint e rota.",
+    ("blueprint", "route", "method", "status")
+)
+MONGO_OPERATION_SECONDS = Histogram(
+    "auditex_mongo_operation_seconds",
+    "Latência das operações do MongoDB feitas via core.database.",
+    ("operation", "collection")
+)
+TENABLE_REQUEST_SECONDS = Histogram(
+    "auditex_tenable_request_seconds",
+    "Latência das chamadas à API do Tenable (cada tentativa).",
+    ("method", "endpoint", "status")
+)
+ACTIVE_JOBS = Gauge(
+    "auditex_active_jobs",
+    "Jobs em execução por tipo.",
+    ("kind",)
+)
+QUEUE_DEPTH = Gauge(
+    "auditex_queue_depth",
+    "Itens aguardando processamento por fila.",
+    ("queue",)
+)
+
+# IDs numéricos e UUIDs no caminho viram {id}, para não criar uma série por scan/export
+_PADRAO_ID = re.compile(r'/(?:\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})(?=/|$)')
+
+
+def normalizar_endpoint(caminho: str) -> str:
+    return _PADRAO_ID.sub('/{id}', caminho.split('?', 1)[0])
+
+
+@contextmanager
+def medir_etapa(stage: str, source: str = ""):
+    """
+    Mede uma etapa do relatório: `with medir_etapa("ingest", "webapp"): ...`. O início e o
+    fim da etapa também são publicados no progresso da geração em andamento (SSE).
+    """
+    publicar_progresso("stage", stage=stage, source=source, status="started")
+    inicio = time.perf_counter()
+    status = "error"
+    try:
+        yield
+        status = "finished"
+    finally:
+        duracao = time.perf_counter() - inicio
+        REPORT_STAGE_SECONDS.observe(duracao, stage=stage, source=source)
+        publicar_progresso("stage", stage=stage, source=source, status=status, seconds=round(duracao, 3))
+
+
+def exportar_metricas() -> bytes:
+    """Todas as métricas no formato de exposição texto do Prometheus, somadas entre os processos no modo multiprocesso."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registro = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+    else:
+        registro = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registro)
+
+
+def marcar_processo_encerrado(pid: int) -> None:
+    """Descarta os gauges de um processo encerrado (modo multiprocesso; chamado pelo gunicorn.conf.py)."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
+
+
+def registrar_metricas_http(app):
+    """Registra os hooks do Flask que medem a latência de cada requisição por blueprint e rota."""
+    from flask import g, request
+
+    @app.before_request
+    def _iniciar_cronometro():
+        g._metricas_inicio = time.perf_counter()
+
+    @app.after_request
+    def _registrar_latencia(response):
+        inicio = getattr(g, "_metricas_inicio", None)
+        if inicio is not None and request.endpoint != "metrics":
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - inicio,
+                blueprint=request.blueprint or "",
+                route=request.url_rule.rule if request.url_rule else "<não encontrada>",
+                method=request.method,
+                status=response.status_code
+            )
+        return response
@@ -0,0 +1,109 @@
+# backend/src/core/profiling.py
+
+"""
+Profiling sob demanda de requisições individuais com cProfile.
+
+Só fica disponível quando a variável de ambiente PROFILING_TOKEN está definida; sem ela
+nenhum hook é registrado e as requisições não têm custo extra. Com o token configurado,
+uma requisição é perfilada quando envia o cabeçalho `X-Profile-Token: <token>` ou o
+parâmetro `?_profile=<token>`. Como a aplicação ainda não tem autenticação real, o token
+funciona como a credencial de administrador para esse recurso.
+
+O perfil é salvo em formato pstats (.prof, compatível com snakeviz, flameprof e
+gprof2dot) em <caminho_shared_relatorios>/<id do relatório>/profiles/. Requisições que
+não pertencem a um relatório vão para a pasta "sem_relatorio". O nome do arquivo volta
+no cabeçalho X-Profile-File da resposta.
+"""
+
+import cProfile
+import hmac
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from .logging_config import obter_logger
+
+logger = obter_logger(__name__)
+
+PASTA_PROFILES = "profiles"
+ID_SEM_RELATORIO = "sem_relatorio"
+
+# O cProfile não suporta dois perfis ativos ao mesmo tempo de forma confiável; requisições
+# concorrentes com o flag são atendidas sem profiling (X-Profile-Status: busy)
+_perfil_lock = threading.Lock()
+
+
+def token_profiling() -> Optional[str]:
+    return os.getenv("PROFILING_TOKEN") or None
+
+
+def token_profiling_valido(token_recebido: Optional[str]) -> bool:
+    token = token_profiling()
+    return bool(token and token_recebido and hmac.compare_digest(token, token_recebido))
+
+
+def pasta_profiles(caminho_shared_relatorios: str, relatorio_id: str) -> Path:
+    # O id vira nome de pasta: só letras, números, hífen e sublinhado
+    relatorio_id = re.sub(r'[^A-Za-z0-9_-]', '_', str(relatorio_id)) or ID_SEM_RELATORIO
+    return Path(caminho_shared_relatorios) / relatorio_id / PASTA_PROFILES
+
+
+def registrar_profiling(app, caminho_shared_relatorios: str) -> bool:
+    """
+    Registra os hooks de profiling no app se PROFILING_TOKEN estiver definido.
+    Retorna True se o profiling foi habilitado.
+    """
+    if not token_profiling():
+        return False
+
+    from flask import g, request
+
+    @app.before_request
+    def _iniciar_profiling():
+        token_recebido = request.headers.get("X-Profile-Token") or request.args.get("_profile")
+        if not token_profiling_valido(token_recebido):
+            return None
+        if not _perfil_lock.acquire(blocking=False):
+            g._profiling_ocupado = True
+            return None
+        g._profiler = cProfile.Profile()
+        g._profiler.enable()
+        return None
+
+    @app.after_request
+    def _salvar_profiling(response):
+        profiler = g.pop("_profiler", None)
+        if profiler is None:
+            if g.pop("_profiling_ocupado", False):
+                response.headers["X-Profile-Status"] = "busy"
+            return response
+        try:
+            profiler.disable()
+            # As rotas de relatório informam o id em g.relatorio_id; as demais usam o id da URL, se houver
+            relatorio_id = getattr(g, "relatorio_id", None) or (request.view_args or {}).get("relatorio_id") or ID_SEM_RELATORIO
+            destino = pasta_profiles(caminho_shared_relatorios, relatorio_id)
+            destino.mkdir(parents=True, exist_ok=True)
+            nome_arquivo = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}_{request.endpoint or 'desconhecido'}.prof"
+            profiler.dump_stats(str(destino / nome_arquivo))
+            response.headers["X-Profile-File"] = f"{destino.parent.name}/{nome_arquivo}"
+            response.headers["X-Profile-Status"] = "saved"
+            logger.info(f"Perfil da requisição {request.method} {request.path} salvo em {destino / nome_arquivo}")
+        except Exception as e:
+            logger.error(f"Erro ao salvar perfil da requisição {request.path}: {e}")
+        finally:
+            _perfil_lock.release()
+        return response
+
+    @app.teardown_request
+    def _encerrar_profiling(exc):
+        # Garante que o profiler é desligado se a resposta não passou pelo after_request
+        profiler = g.pop("_profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            _perfil_lock.release()
+
+    logger.info("Profiling sob demanda habilitado (PROFILING_TOKEN definido).")
+    return True
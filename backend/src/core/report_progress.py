@@ -0,0 +1,162 @@
+# backend/src/core/report_progress.py
+
+"""
+Progresso da geração de relatórios, publicado como eventos para o stream SSE em
+GET /reports/progress/<id>.
+
+A geração roda dentro de `acompanhar_relatorio(...)`, que define o acompanhamento da
+thread atual (contextvar). O pipeline publica eventos com `publicar_progresso(...)` sem
+precisar receber o id do relatório; fora de uma geração a chamada não faz nada. Cada
+acompanhamento fica acessível pelo id do relatório e, opcionalmente, por um id de
+progresso (o id do relatório só é conhecido depois do insert). Para se inscrever antes de a
+geração começar, o cliente registra o id de progresso neste processo (POST
+/reports/progress/) e o envia na geração; o stream nunca cria acompanhamentos.
+"""
+
+import contextvars
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, Optional
+
+# Acompanhamentos finalizados (ou nunca iniciados) são descartados após esse tempo
+RETENCAO_SEGUNDOS = 600
+# Id de progresso registrado cuja geração não começou nesse tempo: o stream termina com "failed"
+ESPERA_INICIO_SEGUNDOS = 60
+# Eventos parciais (ex.: arquivo N de M) de um mesmo tipo são publicados no máximo a cada intervalo
+INTERVALO_PARCIAIS_SEGUNDOS = 0.25
+EVENTOS_FINAIS = ("done", "failed")
+
+
+class Acompanhamento:
+    def __init__(self):
+        self.eventos = []
+        self.finalizado = False
+        self.criado_em = self.atualizado_em = time.monotonic()
+        self._condicao = threading.Condition()
+        self._ultimo_parcial = {}
+
+    def publicar(self, evento: str, parcial: bool = False, **dados) -> None:
+        agora = time.monotonic()
+        with self._condicao:
+            if self.finalizado:
+                return
+            if parcial:
+                if agora - self._ultimo_parcial.get(evento, 0.0) < INTERVALO_PARCIAIS_SEGUNDOS:
+                    return
+                self._ultimo_parcial[evento] = agora
+            self.eventos.append({
+                "seq": len(self.eventos) + 1,
+                "evento": evento,
+                "ts": datetime.utcnow().isoformat(),
+                **dados
+            })
+            self.finalizado = evento in EVENTOS_FINAIS
+            self.atualizado_em = agora
+            self._condicao.notify_all()
+
+    def aguardar(self, desde: int, timeout: float) -> tuple:
+        """
+        Eventos com seq > `desde`, esperando até `timeout` segundos se ainda não houver
+        nenhum. Retorna (eventos, finalizado).
+        """
+        with self._condicao:
+            if len(self.eventos) <= desde and not self.finalizado:
+                self._condicao.wait(timeout)
+            return self.eventos[desde:], self.finalizado
+
+
+class ProgressoRelatorios:
+    """Registro em memória dos acompanhamentos, indexados por id do relatório ou id de progresso."""
+
+    def __init__(self):
+        self._acompanhamentos = {}
+        self._lock = threading.Lock()
+
+    def _limpar_expirados(self) -> None:
+        limite = time.monotonic() - RETENCAO_SEGUNDOS
+        for chave in [c for c, a in self._acompanhamentos.items() if a.atualizado_em < limite]:
+            del self._acompanhamentos[chave]
+
+    def obter(self, chave: str, criar: bool = False) -> Optional[Acompanhamento]:
+        with self._lock:
+            acompanhamento = self._acompanhamentos.get(chave)
+            if acompanhamento is None and criar:
+                self._limpar_expirados()
+                acompanhamento = self._acompanhamentos[chave] = Acompanhamento()
+            return acompanhamento
+
+    def registrar(self) -> str:
+        """Registra um id de progresso novo, ao qual o cliente pode se inscrever antes de a geração começar."""
+        id_progresso = uuid.uuid4().hex
+        self.obter(id_progresso, criar=True)
+        return id_progresso
+
+    def vincular(self, chave: str, acompanhamento: Acompanhamento) -> None:
+        with self._lock:
+            self._acompanhamentos[chave] = acompanhamento
+
+    def eventos(self, chave: str, desde: int = 0, intervalo_keepalive: float = 15.0) -> Iterator[Optional[dict]]:
+        """
+        Gera os eventos do acompanhamento a partir de `desde`, até o evento final. Quando não
+        há eventos novos dentro de `intervalo_keepalive`, gera None (para o keep-alive do SSE).
+        Não gera nada para uma chave desconhecida neste processo.
+        """
+        acompanhamento = self.obter(chave)
+        if acompanhamento is None:
+            return
+        while True:
+            novos, finalizado = acompanhamento.aguardar(desde, intervalo_keepalive)
+            if not novos and not finalizado:
+                agora = time.monotonic()
+                if not acompanhamento.eventos and agora - acompanhamento.criado_em > ESPERA_INICIO_SEGUNDOS:
+                    # Id registrado que nenhuma geração usou
+                    acompanhamento.publicar("failed", error="A geração do relatório não foi iniciada.")
+                    continue
+                if agora - acompanhamento.atualizado_em > RETENCAO_SEGUNDOS:
+                    # Geração abandonada: encerra o stream
+                    return
+                yield None
+                continue
+            for evento in novos:
+                yield evento
+            desde += len(novos)
+            if finalizado and desde >= len(acompanhamento.eventos):
+                return
+
+
+PROGRESSO_RELATORIOS = ProgressoRelatorios()
+
+_acompanhamento_atual = contextvars.ContextVar("acompanhamento_relatorio", default=None)
+
+
+@contextmanager
+def acompanhar_relatorio(id_progresso: Optional[str] = None):
+    """Define o acompanhamento da geração executada no bloco (registrado também sob `id_progresso`, se informado)."""
+    acompanhamento = PROGRESSO_RELATORIOS.obter(id_progresso, criar=True) if id_progresso else None
+    if acompanhamento is None or acompanhamento.finalizado:
+        # Sem id de progresso, ou id reutilizado de uma geração anterior: começa um acompanhamento novo
+        acompanhamento = Acompanhamento()
+        if id_progresso:
+            PROGRESSO_RELATORIOS.vincular(id_progresso, acompanhamento)
+    token = _acompanhamento_atual.set(acompanhamento)
+    try:
+        yield acompanhamento
+    finally:
+        _acompanhamento_atual.reset(token)
+
+
+def vincular_relatorio(relatorio_id: str) -> None:
+    """Torna o acompanhamento atual acessível pelo id do relatório."""
+    acompanhamento = _acompanhamento_atual.get()
+    if acompanhamento is not None:
+        PROGRESSO_RELATORIOS.vincular(str(relatorio_id), acompanhamento)
+        acompanhamento.publicar("started", report_id=str(relatorio_id))
+
+
+def publicar_progresso(evento: str, parcial: bool = False, **dados) -> None:
+    acompanhamento = _acompanhamento_atual.get()
+    if acompanhamento is not None:
+        acompanhamento.publicar(evento, parcial=parcial, **dados)
@@ -0,0 +1,146 @@
+# backend/src/core/scan_manifest.py
+
+"""
+Manifesto (arquivo sidecar) das pastas de scans salvos.
+
+Cada pasta de scan (<base>/WebAppScans/<nome> ou <base>/VMScans/<nome>) recebe um
+pequeno arquivo .scan_manifest.json com os campos que as listagens precisam (uuid do
+scan e history_id mais recente), além do tamanho e mtime do JSON do scan no momento em
+que o manifesto foi gerado. As listagens leem só o manifesto; o JSON completo do scan
+(que pode ter vários MB) só é aberto quando o manifesto não existe ou está desatualizado.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .logging_config import obter_logger
+
+logger = obter_logger(__name__)
+
+MANIFESTO_NOME = ".scan_manifest.json"
+MANIFESTO_VERSAO = 1
+
+
+def _caminho_json_scan(scan_folder: Path) -> Path:
+    return scan_folder / f"{scan_folder.name}.json"
+
+
+def escrever_manifesto(scan_folder, scan_details: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Gera o manifesto de uma pasta de scan. Se `scan_details` for informado (ex.: logo após
+    salvar o scan), o JSON não é relido do disco.
+    Retorna o manifesto gerado ou None se a pasta não tiver o JSON do scan.
+    """
+    scan_folder = Path(scan_folder)
+    json_file_path = _caminho_json_scan(scan_folder)
+    try:
+        stat_json = json_file_path.stat()
+    except FileNotFoundError:
+        return None
+
+    if scan_details is None:
+        with open(json_file_path, 'r', encoding='utf-8') as f:
+            scan_details = json.load(f)
+
+    latest_history_id = None
+    if scan_details.get('history'):
+        latest_history_id = scan_details['history'][0].get('history_id')
+
+    manifesto = {
+        "versao": MANIFESTO_VERSAO,
+        "id": scan_details.get('info', {}).get('uuid', ''),
+        "history_id": latest_history_id,
+        "json_size": stat_json.st_size,
+        "json_mtime_ns": stat_json.st_mtime_ns,
+    }
+
+    caminho_temp = scan_folder / (MANIFESTO_NOME + ".tmp")
+    with open(caminho_temp, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f)
+    os.replace(caminho_temp, scan_folder / MANIFESTO_NOME)
+    return manifesto
+
+
+def _manifesto_atualizado(scan_folder: Path, stat_json: os.stat_result) -> Optional[Dict[str, Any]]:
+    """Manifesto gravado na pasta, se existir e corresponder ao JSON do scan (tamanho e mtime)."""
+    try:
+        with open(scan_folder / MANIFESTO_NOME, 'r', encoding='utf-8') as f:
+            manifesto = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if (manifesto.get("versao") == MANIFESTO_VERSAO
+            and manifesto.get("json_size") == stat_json.st_size
+            and manifesto.get("json_mtime_ns") == stat_json.st_mtime_ns):
+        return manifesto
+    return None
+
+
+def ler_manifesto(scan_folder) -> Optional[Dict[str, Any]]:
+    """
+    Retorna o manifesto da pasta de scan, regenerando-o se não existir ou se o JSON do
+    scan tiver mudado (tamanho ou mtime diferentes). Retorna None se não houver JSON do scan.
+    """
+    scan_folder = Path(scan_folder)
+    try:
+        stat_json = _caminho_json_scan(scan_folder).stat()
+    except FileNotFoundError:
+        return None
+
+    return _manifesto_atualizado(scan_folder, stat_json) or escrever_manifesto(scan_folder)
+
+
+def listar_pastas_scans(base_path, com_manifesto: bool = True) -> List[Dict[str, Any]]:
+    """
+    Lista as pastas de scans de `base_path` com seus manifestos, sem abrir os JSONs dos
+    scans quando os manifestos estão atualizados. Pastas sem JSON do scan vêm com
+    manifesto None. Erros ao ler um scan são registrados e a pasta é tratada como sem manifesto.
+
+    - com_manifesto: se False, só verifica (stat) se o JSON do scan existe ("tem_json"), sem
+      ler nem gerar manifestos.
+    """
+    base_path = Path(base_path)
+    if not base_path.exists():
+        return []
+
+    pastas = []
+    with os.scandir(base_path) as entradas:
+        for entrada in entradas:
+            if not entrada.is_dir():
+                continue
+            scan_folder = Path(entrada.path)
+            pasta = {"name": entrada.name, "path": scan_folder, "tem_json": _caminho_json_scan(scan_folder).is_file()}
+            if com_manifesto:
+                pasta["manifest"] = None
+                if pasta["tem_json"]:
+                    try:
+                        pasta["manifest"] = ler_manifesto(scan_folder)
+                    except json.JSONDecodeError:
+                        logger.error(f"Erro ao decodificar JSON em {_caminho_json_scan(scan_folder)}")
+                    except Exception as e:
+                        logger.error(f"Erro ao processar scan salvo {_caminho_json_scan(scan_folder)}: {e}")
+            pastas.append(pasta)
+    return pastas
+
+
+def atualizar_manifestos(*bases) -> int:
+    """
+    Gera os manifestos ausentes ou desatualizados das pastas de scans de cada base (ex.: scans
+    copiados à mão ou salvos antes dos manifestos). Roda em segundo plano na inicialização,
+    para que as listagens não precisem reler os JSONs. Retorna quantos manifestos foram gerados.
+    """
+    gerados = 0
+    for base_path in bases:
+        for pasta in listar_pastas_scans(base_path, com_manifesto=False):
+            if not pasta["tem_json"]:
+                continue
+            scan_folder = pasta["path"]
+            try:
+                if _manifesto_atualizado(scan_folder, _caminho_json_scan(scan_folder).stat()) is not None:
+                    continue
+                if escrever_manifesto(scan_folder) is not None:
+                    gerados += 1
+            except Exception as e:
+                logger.error(f"Erro ao gerar o manifesto de {_caminho_json_scan(scan_folder)}: {e}")
+    return gerados
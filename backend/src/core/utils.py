@@ -1,6 +1,5 @@
 from collections import defaultdict
 import os
-import pandas as pd
 import re # Adicionado: Importar regex
 import unicodedata # Adicionado: Importar unicodedata
 
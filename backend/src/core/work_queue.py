@@ -0,0 +1,368 @@
+# backend/src/core/work_queue.py
+
+"""
+Fila de trabalhos no MongoDB, compartilhada por todas as instâncias do backend que usam o
+mesmo banco (e o mesmo shared_data).
+
+- Um trabalho é reivindicado com find_one_and_update: a escolha do próximo trabalho (maior
+  prioridade e, entre iguais, o mais antigo) e a marcação como "executando" pelo nó são uma
+  única operação atômica, então dois nós nunca recebem o mesmo trabalho.
+- Quem reivindica recebe um lease até `leaseAte` e o renova enquanto executa (heartbeat).
+  Se o nó parar, o lease vence e o trabalho volta a poder ser reivindicado por qualquer nó.
+- Cada reivindicação gera um token de lease (`lease`) novo. Renovar, concluir e falhar só têm
+  efeito com o token atual: um nó que perdeu o lease não sobrescreve o resultado de quem
+  reivindicou o trabalho depois.
+- Falhas são repetidas, com espera crescente, até `maxTentativas`; um lease vencido conta
+  como uma tentativa.
+- Uma tarefa periódica que deve rodar em um único nó por vez (ex.: a sincronização do
+  Tenable) é um trabalho de id fixo (garantir_trabalho_unico), devolvido à fila com
+  reagendar ao terminar.
+
+Os leases usam o relógio de cada nó: os relógios devem estar sincronizados (NTP), com
+diferença bem menor que a duração do lease.
+"""
+
+import os
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from .database import Database
+from .logging_config import obter_logger
+
+logger = obter_logger(__name__)
+
+COLECAO_FILA_TRABALHOS = "fila_trabalhos"
+
+STATUS_PENDENTE = "pendente"
+STATUS_EXECUTANDO = "executando"
+STATUS_CONCLUIDO = "concluido"
+STATUS_ERRO = "erro"
+
+LEASE_PADRAO_SEGUNDOS = 120
+MAX_TENTATIVAS_PADRAO = 3
+# Espera antes de repetir um trabalho que falhou: 30 s, 60 s, 120 s... até 15 min
+ESPERA_REPETICAO_SEGUNDOS = 30
+ESPERA_REPETICAO_MAXIMA_SEGUNDOS = 900
+
+
+class LeaseVencido(Exception):
+    """Trabalho retomado de um lease vencido depois de esgotar as tentativas."""
+
+
+def identificador_no() -> str:
+    """Identificador deste nó nos trabalhos reivindicados (FILA_NO_ID; padrão: o hostname)."""
+    return os.getenv("FILA_NO_ID") or socket.gethostname()
+
+
+class FilaTrabalhos:
+    """Operações da fila (coleção fila_trabalhos por padrão)."""
+
+    def __init__(self, colecao: str = COLECAO_FILA_TRABALHOS, db_instance: Optional[Database] = None):
+        self.colecao = colecao
+        # Instância de longa duração: o consumidor consulta a fila a cada poucos segundos
+        self.db = db_instance or Database()
+
+    def garantir_indices(self) -> None:
+        self.db.create_index(self.colecao, [("status", 1), ("tipo", 1), ("prioridade", -1), ("criadoEm", 1)])
+        self.db.create_index(self.colecao, [("status", 1), ("leaseAte", 1)])
+
+    @staticmethod
+    def _novo_trabalho(tipo: str, payload: dict, prioridade: int, max_tentativas: int, agora: datetime) -> dict:
+        return {
+            "tipo": tipo,
+            "payload": payload,
+            "prioridade": int(prioridade),
+            "status": STATUS_PENDENTE,
+            "tentativas": 0,
+            "maxTentativas": max(1, int(max_tentativas)),
+            "criadoEm": agora,
+            "disponivelEm": agora,
+            "no": None,
+            "lease": None,
+            "leaseAte": None,
+            "erro": None,
+        }
+
+    def enfileirar(self, tipo: str, payload: dict, prioridade: int = 0, max_tentativas: int = MAX_TENTATIVAS_PADRAO) -> str:
+        """Enfileira um trabalho; maior `prioridade` é executada antes. Retorna o id do trabalho."""
+        trabalho = self._novo_trabalho(tipo, payload, prioridade, max_tentativas, datetime.utcnow())
+        return str(self.db.insert_one(self.colecao, trabalho).inserted_id)
+
+    def enfileirar_varios(self, tipo: str, payloads: Sequence[dict], prioridade: int = 0, max_tentativas: int = MAX_TENTATIVAS_PADRAO) -> List[str]:
+        agora = datetime.utcnow()
+        trabalhos = [self._novo_trabalho(tipo, payload, prioridade, max_tentativas, agora) for payload in payloads]
+        if not trabalhos:
+            return []
+        return [str(id_trabalho) for id_trabalho in self.db.insert_many(self.colecao, trabalhos).inserted_ids]
+
+    def garantir_trabalho_unico(self, id_trabalho: str, tipo: str, payload: Optional[dict] = None,
+                                max_tentativas: int = MAX_TENTATIVAS_PADRAO) -> None:
+        """
+        Cria o trabalho de id `id_trabalho`, se ainda não existir (idempotente entre os nós).
+        Um trabalho existente que terminou (concluído ou com erro) volta a ficar pendente.
+        """
+        agora = datetime.utcnow()
+        trabalho = self._novo_trabalho(tipo, payload or {}, 0, max_tentativas, agora)
+        try:
+            self.db.find_one_and_update(self.colecao, {"_id": id_trabalho}, {"$setOnInsert": trabalho}, upsert=True)
+        except DuplicateKeyError:
+            pass # Criado ao mesmo tempo por outro nó
+        self.db.update_one(
+            self.colecao,
+            {"_id": id_trabalho, "status": {"$nin": [STATUS_PENDENTE, STATUS_EXECUTANDO]}},
+            {"status": STATUS_PENDENTE, "tentativas": 0, "disponivelEm": agora, "no": None, "leaseAte": None}
+        )
+
+    def reivindicar(self, no: str, tipos: Sequence[str], lease_segundos: float = LEASE_PADRAO_SEGUNDOS) -> Optional[dict]:
+        """
+        Reivindica o próximo trabalho disponível de um dos `tipos`: pendente (e já liberado
+        para nova tentativa) ou em execução com o lease vencido. Retorna o trabalho já
+        atualizado (com `lease` e `tentativas`) ou None se não houver nenhum.
+        """
+        agora = datetime.utcnow()
+        return self.db.find_one_and_update(
+            self.colecao,
+            {
+                "tipo": {"$in": list(tipos)},
+                "$or": [
+                    {"status": STATUS_PENDENTE, "disponivelEm": {"$lte": agora}},
+                    {"status": STATUS_EXECUTANDO, "leaseAte": {"$lt": agora}},
+                ],
+            },
+            self._atualizacao_reivindicacao(no, lease_segundos, agora),
+            sort=[("prioridade", -1), ("criadoEm", 1)]
+        )
+
+    def reivindicar_trabalho(self, id_trabalho, no: str, lease_segundos: float = LEASE_PADRAO_SEGUNDOS) -> Optional[dict]:
+        """
+        Reivindica um trabalho específico agora, mesmo antes de `disponivelEm` (ex.: uma tarefa
+        periódica executada sob demanda). None se ele estiver em execução com lease válido.
+        """
+        agora = datetime.utcnow()
+        return self.db.find_one_and_update(
+            self.colecao,
+            {
+                "_id": id_trabalho,
+                "$or": [
+                    {"status": STATUS_PENDENTE},
+                    {"status": STATUS_EXECUTANDO, "leaseAte": {"$lt": agora}},
+                ],
+            },
+            self._atualizacao_reivindicacao(no, lease_segundos, agora)
+        )
+
+    @staticmethod
+    def _atualizacao_reivindicacao(no: str, lease_segundos: float, agora: datetime) -> dict:
+        return {
+            "$set": {
+                "status": STATUS_EXECUTANDO,
+                "no": no,
+                "lease": ObjectId(),
+                "leaseAte": agora + timedelta(seconds=lease_segundos),
+                "iniciadoEm": agora,
+            },
+            "$inc": {"tentativas": 1},
+        }
+
+    @staticmethod
+    def _filtro_lease(trabalho: dict) -> dict:
+        return {"_id": trabalho["_id"], "lease": trabalho["lease"], "status": STATUS_EXECUTANDO}
+
+    def renovar_lease(self, trabalho: dict, lease_segundos: float = LEASE_PADRAO_SEGUNDOS) -> bool:
+        """Heartbeat: estende o lease. False se o lease foi perdido (vencido e reivindicado por outro nó)."""
+        lease_ate = datetime.utcnow() + timedelta(seconds=lease_segundos)
+        if self.db.update_one(self.colecao, self._filtro_lease(trabalho), {"leaseAte": lease_ate}).matched_count != 1:
+            return False
+        trabalho["leaseAte"] = lease_ate
+        return True
+
+    def anotar(self, trabalho: dict, campos: dict) -> bool:
+        """
+        Grava campos da tentativa atual no trabalho (ex.: o que ela criou, para que a próxima
+        tentativa possa desfazer). False se o lease foi perdido.
+        """
+        if self.db.update_one(self.colecao, self._filtro_lease(trabalho), campos).matched_count != 1:
+            return False
+        trabalho.update(campos)
+        return True
+
+    def concluir(self, trabalho: dict, resultado: Any = None) -> bool:
+        """Marca o trabalho como concluído. False se o lease foi perdido (o resultado é descartado)."""
+        return self.db.update_one(
+            self.colecao,
+            self._filtro_lease(trabalho),
+            {"status": STATUS_CONCLUIDO, "resultado": resultado, "erro": None, "concluidoEm": datetime.utcnow(), "leaseAte": None}
+        ).matched_count == 1
+
+    def reagendar(self, trabalho: dict, espera_segundos: float, resultado: Any = None, erro: Optional[str] = None) -> bool:
+        """
+        Devolve um trabalho periódico à fila, disponível de novo em `espera_segundos` e com as
+        tentativas zeradas. False se o lease foi perdido.
+        """
+        agora = datetime.utcnow()
+        return self.db.update_one(
+            self.colecao,
+            self._filtro_lease(trabalho),
+            {"status": STATUS_PENDENTE, "resultado": resultado, "erro": erro, "tentativas": 0, "concluidoEm": agora,
+             "disponivelEm": agora + timedelta(seconds=espera_segundos), "no": None, "leaseAte": None}
+        ).matched_count == 1
+
+    def falhar(self, trabalho: dict, erro: str, repetir: bool = True) -> Optional[str]:
+        """
+        Registra a falha de uma tentativa. Com `repetir` e tentativas restantes, o trabalho
+        volta a ficar pendente depois de uma espera crescente; senão termina com erro.
+        Retorna o novo status (pendente ou erro) ou None se o lease foi perdido.
+        """
+        agora = datetime.utcnow()
+        tentativas = trabalho.get("tentativas", 1)
+        if repetir and tentativas < trabalho.get("maxTentativas", 1):
+            espera = min(ESPERA_REPETICAO_MAXIMA_SEGUNDOS, ESPERA_REPETICAO_SEGUNDOS * 2 ** (tentativas - 1))
+            status = STATUS_PENDENTE
+            campos = {"status": status, "erro": erro, "disponivelEm": agora + timedelta(seconds=espera), "no": None, "leaseAte": None}
+        else:
+            status = STATUS_ERRO
+            campos = {"status": status, "erro": erro, "concluidoEm": agora, "leaseAte": None}
+        if self.db.update_one(self.colecao, self._filtro_lease(trabalho), campos).matched_count != 1:
+            return None
+        return status
+
+
+class TrabalhadorFila:
+    """
+    Consome trabalhos da fila em uma thread: reivindica enquanto houver vaga (no máximo
+    `max_concorrentes` trabalhos deste consumidor ao mesmo tempo), renova os leases dos
+    trabalhos em execução e repassa os terminados.
+
+    - submeter(trabalho) -> Future: inicia a execução (ex.: em um ProcessPoolExecutor).
+    - ao_terminar(trabalho, futuro): registra o resultado com fila.concluir / fila.falhar.
+      Um trabalho retomado de um lease vencido sem tentativas restantes não é executado:
+      chega aqui com um futuro que falhou com LeaseVencido.
+
+    O limite vale por consumidor; para limitar por nó, cada nó deve ter um único consumidor
+    (ver main.iniciar_servicos_de_fundo).
+    """
+
+    def __init__(self, fila: FilaTrabalhos, tipos: Sequence[str],
+                 submeter: Callable[[dict], Future], ao_terminar: Callable[[dict, Future], None],
+                 no: Optional[str] = None, max_concorrentes: int = 1,
+                 lease_segundos: float = LEASE_PADRAO_SEGUNDOS, intervalo_busca: float = 5.0):
+        self.fila = fila
+        self.tipos = list(tipos)
+        self.submeter = submeter
+        self.ao_terminar = ao_terminar
+        self.no = no or identificador_no()
+        self.max_concorrentes = max(1, int(max_concorrentes))
+        self.lease_segundos = lease_segundos
+        self.intervalo_busca = intervalo_busca
+        # Três renovações por lease: uma falha isolada do banco não faz o lease vencer
+        self.intervalo_heartbeat = lease_segundos / 3
+        self._em_execucao: Dict[Future, dict] = {}
+        self._leases_perdidos = set()
+        self._thread = None
+        self._parar = threading.Event()
+        self._encerrando = threading.Event()
+
+    @property
+    def em_execucao(self) -> int:
+        return len(self._em_execucao)
+
+    def iniciar(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._parar.clear()
+        self._encerrando.clear()
+        self._thread = threading.Thread(target=self._executar, name=f"fila-{'-'.join(self.tipos)}", daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout: Optional[float] = None) -> None:
+        """
+        Para de reivindicar trabalhos. Os que estão em execução não são mais acompanhados:
+        seus leases vencem e eles são retomados por outro nó.
+        """
+        self._parar.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def encerrar(self, timeout: Optional[float] = None) -> bool:
+        """
+        Encerramento gracioso: para de reivindicar, mas continua renovando os leases e
+        registrando os trabalhos em execução até que todos terminem ou `timeout` segundos
+        se passem (depois disso, como em parar). Retorna True se todos terminaram.
+        """
+        self._encerrando.set()
+        if self._thread:
+            self._thread.join(timeout)
+        terminou = not self._em_execucao
+        self.parar()
+        return terminou
+
+    def _reivindicar_disponiveis(self) -> None:
+        while (len(self._em_execucao) < self.max_concorrentes
+               and not self._parar.is_set() and not self._encerrando.is_set()):
+            trabalho = self.fila.reivindicar(self.no, self.tipos, self.lease_segundos)
+            if trabalho is None:
+                return
+            if trabalho["tentativas"] > trabalho["maxTentativas"]:
+                futuro = Future()
+                futuro.set_exception(LeaseVencido(
+                    f"Lease vencido no nó {trabalho.get('no')} depois de {trabalho['maxTentativas']} tentativa(s)."
+                ))
+            else:
+                logger.info(f"Trabalho {trabalho['_id']} ({trabalho['tipo']}) reivindicado pelo nó {self.no} (tentativa {trabalho['tentativas']}).")
+                try:
+                    futuro = self.submeter(trabalho)
+                except Exception as e:
+                    futuro = Future()
+                    futuro.set_exception(e)
+            self._em_execucao[futuro] = trabalho
+
+    def _renovar_leases(self) -> None:
+        for trabalho in self._em_execucao.values():
+            if trabalho["_id"] in self._leases_perdidos:
+                continue
+            if not self.fila.renovar_lease(trabalho, self.lease_segundos):
+                # O processo continua ocupando a vaga até terminar, mas o resultado será descartado
+                self._leases_perdidos.add(trabalho["_id"])
+                logger.warning(f"Lease do trabalho {trabalho['_id']} perdido pelo nó {self.no}; o resultado desta execução será descartado.")
+
+    def _repassar_terminados(self, terminados) -> None:
+        for futuro in terminados:
+            trabalho = self._em_execucao.pop(futuro)
+            self._leases_perdidos.discard(trabalho["_id"])
+            try:
+                self.ao_terminar(trabalho, futuro)
+            except Exception as e:
+                logger.exception(f"Erro ao registrar o término do trabalho {trabalho['_id']}: {e}")
+
+    def executar_ciclo(self, timeout: float = 0) -> None:
+        """
+        Um ciclo do consumidor: reivindica trabalhos até preencher as vagas e espera até
+        `timeout` segundos que algum termine. Usado pela thread e por ferramentas de teste.
+        """
+        self._reivindicar_disponiveis()
+        if self._em_execucao:
+            terminados, _ = wait(list(self._em_execucao), timeout=timeout, return_when=FIRST_COMPLETED)
+            self._repassar_terminados(terminados)
+        elif timeout:
+            self._parar.wait(timeout)
+
+    def _executar(self) -> None:
+        logger.info(f"Consumidor da fila ({', '.join(self.tipos)}) iniciado no nó {self.no}, até {self.max_concorrentes} trabalho(s) simultâneo(s).")
+        proximo_heartbeat = time.monotonic() + self.intervalo_heartbeat
+        while not self._parar.is_set() and not (self._encerrando.is_set() and not self._em_execucao):
+            try:
+                self.executar_ciclo(timeout=min(self.intervalo_busca, self.intervalo_heartbeat))
+                if time.monotonic() >= proximo_heartbeat:
+                    self._renovar_leases()
+                    proximo_heartbeat = time.monotonic() + self.intervalo_heartbeat
+            except Exception as e:
+                # Ex.: MongoDB indisponível; os leases ainda têm margem até a próxima renovação
+                logger.error(f"Erro no consumidor da fila no nó {self.no}: {e}")
+                self._parar.wait(self.intervalo_busca)
@@ -0,0 +1,213 @@
+"""
+Cache persistente dos agregados parciais de cada arquivo de scan (JSON de web app ou
+CSV de servidores), usado para regenerar relatórios de forma incremental.
+
+O cache fica na própria pasta dos scans, em um arquivo JSON comprimido com zlib (só
+dados: hosts, URIs e riscos como listas, nunca objetos serializados, já que a pasta fica no
+volume compartilhado), e guarda um agregado por arquivo, identificado por
+(nome, tamanho, mtime). Ao regenerar um relatório, só os arquivos novos ou alterados
+são lidos; os demais vêm do cache e os parciais são unidos no mesmo formato que as
+funções de json_parser/csv_parser retornam.
+"""
+
+from collections import defaultdict
+import json
+import os
+import tempfile
+import zlib
+from typing import Callable, Dict, List, Tuple
+
+from ..core.json_utils import carregar_json
+from ..core.report_progress import publicar_progresso
+from ..core.utils import contar_riscos
+from .json_parser import agrupar_vulnerabilidades_scan, extrair_dados_vulnerabilidades
+from .csv_parser import agregar_csv
+from ..core.logging_config import obter_logger
+
+logger = obter_logger(__name__)
+
+CACHE_NOME = ".agregados_cache.json.z"
+# 2: hosts dos CSVs como ConjuntoHosts; 3: URIs dos JSONs como conjuntos; 4: JSON em vez de pickle
+CACHE_VERSAO = 4
+
+
+def _codificar_json(parcial: dict) -> dict:
+    return {
+        "riscos": parcial["riscos"],
+        "vulnerabilidades": [[nome, plugin_id, sorted(uris)] for (nome, plugin_id), uris in parcial["vulnerabilidades"].items()],
+        "target": parcial["target"],
+        "linha_site": parcial["linha_site"]
+    }
+
+
+def _decodificar_json(dados: dict) -> dict:
+    return {
+        "riscos": {risco: int(quantidade) for risco, quantidade in dados["riscos"].items()},
+        "vulnerabilidades": {(nome, plugin_id): set(uris) for nome, plugin_id, uris in dados["vulnerabilidades"]},
+        "target": dados["target"],
+        "linha_site": dados["linha_site"]
+    }
+
+
+def _codificar_csv(parcial: Tuple[dict, object]) -> list:
+    vulnerabilidades, hosts = parcial
+    return [
+        [[nome, list(hosts_vuln), sorted(riscos_vuln)] for nome, (hosts_vuln, riscos_vuln) in vulnerabilidades.items()],
+        list(hosts)
+    ]
+
+
+def _decodificar_csv(dados: list) -> Tuple[dict, object]:
+    from ..core.host_set import ConjuntoHosts
+
+    vulnerabilidades, hosts = dados
+    return (
+        {nome: (ConjuntoHosts.de_hosts(hosts_vuln), set(riscos_vuln)) for nome, hosts_vuln, riscos_vuln in vulnerabilidades},
+        ConjuntoHosts.de_hosts(hosts)
+    )
+
+
+# tipo -> (codificar, decodificar) dos agregados parciais gravados no cache
+CODIFICACAO = {
+    "json": (_codificar_json, _decodificar_json),
+    "csv": (_codificar_csv, _decodificar_csv),
+}
+
+
+def _carregar_cache(diretorio: str) -> dict:
+    caminho_cache = os.path.join(diretorio, CACHE_NOME)
+    try:
+        with open(caminho_cache, 'rb') as f:
+            cache = json.loads(zlib.decompress(f.read()))
+        if isinstance(cache, dict) and cache.get("versao") == CACHE_VERSAO:
+            return cache
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Cache de agregados '{caminho_cache}' inválido, será recriado: {e}")
+    return {"versao": CACHE_VERSAO, "json": {}, "csv": {}}
+
+
+def _salvar_cache(diretorio: str, cache: dict) -> None:
+    """Grava o cache em um arquivo temporário e o substitui atomicamente."""
+    dados = zlib.compress(json.dumps(cache, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    fd, caminho_temp = tempfile.mkstemp(dir=diretorio, prefix=CACHE_NOME, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(dados)
+        os.replace(caminho_temp, os.path.join(diretorio, CACHE_NOME))
+    except OSError as e:
+        logger.warning(f"Não foi possível salvar o cache de agregados em '{diretorio}': {e}")
+        if os.path.exists(caminho_temp):
+            os.remove(caminho_temp)
+
+
+def _agregados(arquivos: List[str], tipo: str, agregar: Callable[[str], object]) -> List[object]:
+    """
+    Retorna o agregado parcial de cada arquivo (na mesma ordem de `arquivos`), calculando
+    com `agregar` apenas os que não estão no cache ou mudaram desde a última leitura.
+    Entradas de arquivos que não existem mais são descartadas.
+    """
+    if not arquivos:
+        return []
+
+    codificar, decodificar = CODIFICACAO[tipo]
+    diretorio = os.path.dirname(arquivos[0])
+    cache = _carregar_cache(diretorio)
+    entradas = cache.get(tipo)
+    if not isinstance(entradas, dict):
+        entradas = {}
+    novas_entradas = {}
+    parciais = []
+    alterado = False
+
+    for indice, arquivo in enumerate(arquivos, start=1):
+        publicar_progresso("parsing", parcial=indice < len(arquivos), kind=tipo, current=indice, total=len(arquivos))
+        nome = os.path.basename(arquivo)
+        stat_arquivo = os.stat(arquivo)
+        assinatura = [stat_arquivo.st_size, stat_arquivo.st_mtime_ns]
+
+        parcial = None
+        entrada = entradas.get(nome)
+        if isinstance(entrada, dict) and entrada.get("assinatura") == assinatura:
+            try:
+                parcial = decodificar(entrada["parcial"])
+            except Exception as e:
+                # Entrada corrompida: vale como ausente do cache
+                logger.warning(f"Entrada '{nome}' inválida no cache de agregados de '{diretorio}': {e}")
+        if parcial is None:
+            parcial = agregar(arquivo)
+            entrada = {"assinatura": assinatura, "parcial": codificar(parcial)}
+            alterado = True
+        novas_entradas[nome] = entrada
+        parciais.append(parcial)
+
+    if alterado or len(novas_entradas) != len(entradas):
+        cache[tipo] = novas_entradas
+        _salvar_cache(diretorio, cache)
+    return parciais
+
+
+def _agregar_json(json_file: str) -> dict:
+    data = carregar_json(json_file)
+    target = data.get('scan', {}).get('target', 'Não disponível')
+    return {
+        "riscos": contar_riscos(data.get('findings', [])),
+        "vulnerabilidades": agrupar_vulnerabilidades_scan(data),
+        "target": target if target != 'Não disponível' else None,
+        "linha_site": extrair_dados_vulnerabilidades(data)
+    }
+
+
+def agregados_json(json_files: List[str]) -> List[dict]:
+    """Agregados parciais (riscos, vulnerabilidades, target e linha por site) de cada scan JSON."""
+    return _agregados(json_files, "json", _agregar_json)
+
+
+def unir_agregados_json(parciais: List[dict]) -> Tuple[dict, dict, List[str]]:
+    """
+    Une os agregados dos scans JSON. Retorna, nessa ordem, os mesmos resultados de
+    contar_vulnerabilidades, obter_vulnerabilidades_comum e extrair_targets.
+    """
+    contagem = {'High': 0, 'Critical': 0, 'Low': 0, 'Medium': 0}
+    vulnerabilidades = defaultdict(set)
+    targets = set()
+    for parcial in parciais:
+        for risco, quantidade in parcial["riscos"].items():
+            contagem[risco] += quantidade
+        for chave, uris in parcial["vulnerabilidades"].items():
+            vulnerabilidades[chave].update(uris)
+        if parcial["target"] is not None:
+            targets.add(parcial["target"])
+    return contagem, vulnerabilidades, list(targets)
+
+
+def agregados_csv(csv_files: List[str]) -> List[Tuple[dict, object]]:
+    """Agregados parciais (vulnerabilidades e hosts) de cada CSV de servidores."""
+    return _agregados(csv_files, "csv", agregar_csv)
+
+
+def unir_agregados_csv(parciais: List[Tuple[dict, object]]) -> Tuple[Dict[str, dict], List[str]]:
+    """
+    Une os agregados dos CSVs (agregar_csv de cada arquivo): vulnerabilidades comuns
+    (Name -> {"hosts", "risks"}) e hosts na ordem natural. obter_vulnerabilidades_comum_csv e
+    extrair_hosts_csv delegam para cá.
+    """
+    from ..core.host_set import ConjuntoHosts
+
+    # Os conjuntos de cada arquivo são unidos de uma vez por vulnerabilidade
+    hosts_por_vulnerabilidade = defaultdict(list)
+    riscos_por_vulnerabilidade = defaultdict(set)
+    for vulnerabilidades_parciais, _ in parciais:
+        for nome, (hosts_vuln, riscos_vuln) in vulnerabilidades_parciais.items():
+            hosts_por_vulnerabilidade[nome].append(hosts_vuln)
+            riscos_por_vulnerabilidade[nome].update(riscos_vuln)
+
+    vulnerabilidades_comuns = {
+        nome: {
+            "hosts": ConjuntoHosts.uniao(conjuntos),
+            "risks": list(riscos_por_vulnerabilidade[nome])
+        }
+        for nome, conjuntos in hosts_por_vulnerabilidade.items()
+    }
+    return vulnerabilidades_comuns, list(ConjuntoHosts.uniao(hosts for _, hosts in parciais))
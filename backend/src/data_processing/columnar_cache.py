@@ -0,0 +1,178 @@
+"""
+Cópia colunar (Parquet) dos CSVs de servidores exportados do Tenable.
+
+O servidores_scan.csv tem dezenas de colunas (descrição, solução, saída do plugin...), mas
+os relatórios só usam Name, Host e Risk. Ao salvar o scan, essas três colunas também são
+gravadas em `.<nome do csv>.parquet`, ao lado do CSV, com codificação por dicionário (cada
+nome de vulnerabilidade, host e severidade é guardado uma vez por bloco), o que deixa a
+cópia muito menor que o CSV e dispensa o parser de texto do pandas na leitura.
+
+A cópia guarda nos metadados o SHA-256 do CSV de origem (além do tamanho e mtime, para não
+recalcular o hash a cada leitura) e só é usada se ainda corresponder ao CSV; caso contrário
+o CSV é lido normalmente e a cópia é refeita. O pyarrow é opcional: sem ele, os leitores
+continuam usando o CSV.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Optional, Sequence
+
+from ..core.logging_config import obter_logger
+
+logger = obter_logger(__name__)
+
+# Colunas do CSV usadas pelos relatórios (as únicas gravadas na cópia)
+COLUNAS_CSV = ('Name', 'Host', 'Risk')
+
+# Chave dos metadados do Parquet com a origem da cópia
+CHAVE_METADADOS = b"auditex.origem_csv"
+
+# Incrementar quando o formato da cópia mudar
+COPIA_VERSAO = 1
+
+
+def caminho_copia_colunar(caminho_csv: str) -> str:
+    """Arquivo oculto ao lado do CSV: fica fora da busca por *.csv e da fingerprint dos relatórios."""
+    diretorio, nome = os.path.split(str(caminho_csv))
+    return os.path.join(diretorio, f".{nome}.parquet")
+
+
+def _pyarrow_disponivel() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _sha256_csv(caminho_csv: str) -> str:
+    """
+    SHA-256 do CSV. O checksum gravado no download (`<csv>.sha256`) é usado se não for mais
+    antigo que o próprio CSV; senão o arquivo é lido em blocos.
+    """
+    caminho_checksum = f"{caminho_csv}.sha256"
+    try:
+        if os.stat(caminho_checksum).st_mtime_ns >= os.stat(caminho_csv).st_mtime_ns:
+            with open(caminho_checksum, 'r', encoding='utf-8') as f:
+                checksum = f.read().split()[0]
+            if len(checksum) == 64:
+                return checksum
+    except (OSError, IndexError):
+        pass
+
+    sha256 = hashlib.sha256()
+    with open(caminho_csv, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(bloco)
+    return sha256.hexdigest()
+
+
+def _origem(caminho_csv: str, checksum: Optional[str] = None) -> dict:
+    stat_csv = os.stat(caminho_csv)
+    return {
+        "versao": COPIA_VERSAO,
+        "sha256": checksum or _sha256_csv(caminho_csv),
+        "tamanho": stat_csv.st_size,
+        "mtime_ns": stat_csv.st_mtime_ns,
+    }
+
+
+def _gravar_copia(caminho_csv: str, df, origem: dict) -> bool:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tabela = pa.Table.from_pandas(df.astype('category'), preserve_index=False)
+    tabela = tabela.replace_schema_metadata({
+        **(tabela.schema.metadata or {}),
+        CHAVE_METADADOS: json.dumps(origem).encode('utf-8')
+    })
+
+    diretorio = os.path.dirname(str(caminho_csv)) or '.'
+    fd, caminho_temp = tempfile.mkstemp(dir=diretorio, prefix=".colunar", suffix=".tmp")
+    os.close(fd)
+    try:
+        pq.write_table(tabela, caminho_temp, compression='zstd')
+        os.replace(caminho_temp, caminho_copia_colunar(caminho_csv))
+        return True
+    except Exception as e:
+        logger.warning(f"Não foi possível gravar a cópia colunar de '{caminho_csv}': {e}")
+        return False
+    finally:
+        if os.path.exists(caminho_temp):
+            os.remove(caminho_temp)
+
+
+def _ler_csv_projetado(caminho_csv: str, colunas: Sequence[str]):
+    import pandas as pd
+    # dtype=str: as colunas ficam como texto (os valores ausentes continuam NaN), como na cópia colunar
+    return pd.read_csv(caminho_csv, usecols=list(colunas), dtype=str, encoding='utf-8', on_bad_lines='skip')
+
+
+def escrever_copia_colunar(caminho_csv, checksum: Optional[str] = None) -> bool:
+    """
+    Grava a cópia colunar de um CSV de servidores recém-salvo. `checksum` é o SHA-256 do CSV,
+    quando já conhecido (ex.: calculado durante o download). Retorna False se o pyarrow não
+    estiver instalado ou o CSV não puder ser lido; os leitores então usam o CSV.
+    """
+    if not _pyarrow_disponivel():
+        return False
+    caminho_csv = str(caminho_csv)
+    try:
+        origem = _origem(caminho_csv, checksum)
+        df = _ler_csv_projetado(caminho_csv, COLUNAS_CSV)
+    except Exception as e:
+        logger.warning(f"Cópia colunar de '{caminho_csv}' não gerada: {e}")
+        return False
+    return _gravar_copia(caminho_csv, df, origem)
+
+
+def _copia_valida(caminho_csv: str, caminho_copia: str) -> bool:
+    import pyarrow.parquet as pq
+
+    try:
+        # Só o rodapé do arquivo é lido
+        metadados = pq.read_schema(caminho_copia).metadata or {}
+        origem = json.loads(metadados[CHAVE_METADADOS])
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning(f"Cópia colunar '{caminho_copia}' inválida, será refeita: {e}")
+        return False
+
+    if origem.get("versao") != COPIA_VERSAO:
+        return False
+    stat_csv = os.stat(caminho_csv)
+    if (origem.get("tamanho"), origem.get("mtime_ns")) == (stat_csv.st_size, stat_csv.st_mtime_ns):
+        return True
+    # CSV tocado (ex.: copiado de outra pasta): vale se o conteúdo for o mesmo
+    return origem.get("tamanho") == stat_csv.st_size and origem.get("sha256") == _sha256_csv(caminho_csv)
+
+
+def ler_colunas_csv(caminho_csv: str, colunas: Sequence[str] = COLUNAS_CSV):
+    """
+    Lê as `colunas` (subconjunto de COLUNAS_CSV) de um CSV de servidores como DataFrame,
+    pela cópia colunar quando ela existe e corresponde ao CSV. As colunas da cópia chegam
+    como categóricas; as do CSV, como texto. Sem a cópia (ou com uma desatualizada), o CSV é
+    lido e a cópia é refeita. Erros de leitura do CSV (ex.: EmptyDataError) são propagados.
+    """
+    caminho_csv = str(caminho_csv)
+    if not _pyarrow_disponivel() or not set(colunas) <= set(COLUNAS_CSV):
+        return _ler_csv_projetado(caminho_csv, colunas)
+
+    import pandas as pd
+
+    caminho_copia = caminho_copia_colunar(caminho_csv)
+    if os.path.exists(caminho_copia) and _copia_valida(caminho_csv, caminho_copia):
+        try:
+            return pd.read_parquet(caminho_copia, columns=list(colunas), engine='pyarrow')
+        except Exception as e:
+            logger.warning(f"Falha ao ler a cópia colunar '{caminho_copia}', usando o CSV: {e}")
+
+    try:
+        df = _ler_csv_projetado(caminho_csv, COLUNAS_CSV)
+    except ValueError:
+        # CSV sem alguma das colunas da cópia: lê só as pedidas, sem gravar a cópia
+        return _ler_csv_projetado(caminho_csv, colunas)
+    _gravar_copia(caminho_csv, df, _origem(caminho_csv))
+    return df[list(colunas)]
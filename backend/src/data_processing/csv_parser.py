@@ -3,45 +3,73 @@ import json
 import os
 import re
 from typing import List
-import pandas as pd
-from ..core.json_utils import carregar_json_utf
+# pandas é importado dentro das funções: só a geração de relatórios lê os CSVs,
+# e o import (~0,4 s) não precisa pesar na inicialização do backend
+from ..core.logging_config import obter_logger
+from .columnar_cache import ler_colunas_csv
+
+logger = obter_logger(__name__)
+
+RISCOS_VALIDOS = ('critical', 'high', 'medium', 'low')
+
+
+def _texto(valor) -> str:
+    return str(valor).strip()
 
 
 def obter_vulnerabilidades_comum_csv(csv_files: List[str]) -> dict:
     """
     Obtém as vulnerabilidades comuns entre os arquivos CSV, agrupando-as por Name,
-    listando os hosts afetados e a severidade (Risk).
+    com os hosts afetados (ConjuntoHosts) e a severidade (Risk). Mesmo caminho da geração
+    de relatórios (agregar_csv por arquivo, unidos por aggregate_cache.unir_agregados_csv).
     """
-    common_vulnerabilities = defaultdict(lambda: {"hosts": set(), "risks": set()})
-
-    if not csv_files:
-        return {}
-    for csv_file in csv_files:
-        try:
-            df = pd.read_csv(csv_file, usecols=['Name', 'Host', 'Risk'], encoding='utf-8', on_bad_lines='skip')
-            df = df.dropna(subset=['Name', 'Host', 'Risk'])
-
-            for _, row in df.iterrows():
-                name = str(row['Name']).strip()
-                host = str(row['Host']).strip()
-                risk = str(row['Risk']).strip().lower()
-
-                if risk in {'critical', 'high', 'medium', 'low'}:
-                    common_vulnerabilities[name]["hosts"].add(host)
-                    common_vulnerabilities[name]["risks"].add(risk)
-        except pd.errors.EmptyDataError:
-            print(f"Aviso: O arquivo CSV '{csv_file}' está vazio ou não possui dados.")
-        except Exception as e:
-            print(f"Erro ao processar {csv_file}: {e}")
-
-    return {
-        name: {
-            "hosts": list(data["hosts"]),
-            "risks": list(data["risks"])
-        }
-        for name, data in common_vulnerabilities.items()
+    from .aggregate_cache import unir_agregados_csv
+
+    vulnerabilidades_comuns, _ = unir_agregados_csv([agregar_csv(csv_file) for csv_file in csv_files])
+    return vulnerabilidades_comuns
+
+def agregar_csv(csv_file: str) -> tuple:
+    """
+    Lê um único arquivo CSV uma vez e retorna as vulnerabilidades parciais
+    (Name -> (ConjuntoHosts, riscos)) e o ConjuntoHosts do arquivo. Única implementação dos
+    critérios de leitura dos CSVs (linhas sem Name/Host/Risk e riscos fora de RISCOS_VALIDOS
+    são descartadas).
+    """
+    import pandas as pd
+    from ..core.host_set import ConjuntoHosts
+
+    vulnerabilidades = defaultdict(lambda: (set(), set()))
+    hosts = set()
+    try:
+        df = ler_colunas_csv(csv_file, ['Name', 'Host', 'Risk'])
+
+        # Em colunas categóricas (cópia colunar) o map normaliza cada valor distinto uma vez só
+        for host in df['Host'].map(_texto).unique():
+            if host:
+                hosts.add(host)
+
+        df = df.dropna(subset=['Name', 'Host', 'Risk'])
+        df = pd.DataFrame({
+            'Name': df['Name'].map(_texto).astype(object),
+            'Host': df['Host'].map(_texto).astype(object),
+            'Risk': df['Risk'].map(lambda risco: _texto(risco).lower()).astype(object)
+        })
+        df = df[df['Risk'].isin(RISCOS_VALIDOS)].drop_duplicates()
+        for name, host, risk in zip(df['Name'], df['Host'], df['Risk']):
+            hosts_vuln, riscos_vuln = vulnerabilidades[name]
+            hosts_vuln.add(host)
+            riscos_vuln.add(risk)
+    except pd.errors.EmptyDataError:
+        logger.warning(f"O arquivo CSV '{csv_file}' está vazio ou não possui dados.")
+    except Exception as e:
+        logger.error(f"Erro ao processar {csv_file}: {e}")
+
+    vulnerabilidades = {
+        nome: (ConjuntoHosts.de_hosts(hosts_vuln), riscos_vuln)
+        for nome, (hosts_vuln, riscos_vuln) in vulnerabilidades.items()
     }
-    
+    return vulnerabilidades, ConjuntoHosts.de_hosts(hosts)
+
 def contar_vulnerabilidades_csv(vulnerabilidades: dict) -> dict:
     """
     Conta a quantidade total de vulnerabilidades por nível de risco.
@@ -58,28 +86,16 @@ def contar_vulnerabilidades_csv(vulnerabilidades: dict) -> dict:
                 if risco in contagem:
                     contagem[risco] += len(hosts_afetados)
             else:
-                print(f"Atenção: Múltiplos níveis de risco encontrados para a vulnerabilidade '{list(vulnerabilidades.keys())[0]}': {riscos}. Contando pelo risco mais alto.")
+                logger.warning(f"Múltiplos níveis de risco encontrados para a vulnerabilidade '{list(vulnerabilidades.keys())[0]}': {riscos}. Contando pelo risco mais alto.")
                 
     return contagem
 
 def extrair_hosts_csv(csv_files: List[str]) -> List[str]:
     """
-    Extrai os hosts únicos a partir dos arquivos CSV exportados do Tenable.
+    Extrai os hosts únicos a partir dos arquivos CSV exportados do Tenable, na ordem natural
+    dos endereços (mesmo caminho de obter_vulnerabilidades_comum_csv).
     """
-    hosts = set()
-
-    for csv_file in csv_files:
-        try:
-            df = pd.read_csv(csv_file, usecols=['Host'], encoding='utf-8', on_bad_lines='skip')
-            df['Host'] = df['Host'].astype(str).str.strip()
-
-            for host in df['Host'].dropna():
-                if host:
-                    hosts.add(host)
-        except pd.errors.EmptyDataError:
-            print(f"Aviso: O arquivo CSV '{csv_file}' está vazio ou não possui dados de hosts.")
-        except Exception as e:
-            print(f"Erro ao processar {csv_file}: {e}")
-
-    return list(hosts)
+    from .aggregate_cache import unir_agregados_csv
 
+    _, hosts = unir_agregados_csv([agregar_csv(csv_file) for csv_file in csv_files])
+    return hosts
@@ -0,0 +1,122 @@
+"""
+Matriz esparsa hosts × vulnerabilidades dos scans de servidores.
+
+As vulnerabilidades agregadas (nome -> {"hosts", "risks"}) respondem bem a "quais hosts têm
+a vulnerabilidade X", mas não às perguntas por host: quantas vulnerabilidades cada host
+tem, quais hosts compartilham um conjunto de vulnerabilidades, quais são os hosts mais
+expostos. A MatrizHostsVulnerabilidades guarda essas mesmas informações em uma matriz CSR
+do SciPy (uma linha por host, uma coluna por vulnerabilidade), com o código da severidade
+da vulnerabilidade em cada célula, e responde a essas perguntas com operações vetorizadas.
+
+NumPy e SciPy são importados aqui no topo; quem usa a matriz importa este módulo dentro
+da função, para não carregá-los na inicialização do backend.
+"""
+
+from typing import Dict, Iterable, List
+
+import numpy as np
+from scipy import sparse
+
+from ..core.host_set import ConjuntoHosts
+
+# Código de severidade gravado na matriz (0 = célula vazia)
+CODIGOS_SEVERIDADE = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
+NOMES_SEVERIDADE = {1: 'Low', 2: 'Medium', 3: 'High', 4: 'Critical'}
+
+
+class MatrizHostsVulnerabilidades:
+    def __init__(self, hosts: List[str], vulnerabilidades: List[str], matriz: sparse.csr_matrix):
+        self.hosts = hosts
+        self.vulnerabilidades = vulnerabilidades
+        self.matriz = matriz
+        self._indice_hosts = {host: indice for indice, host in enumerate(hosts)}
+        self._indice_vulnerabilidades = {nome: indice for indice, nome in enumerate(vulnerabilidades)}
+
+    @classmethod
+    def de_vulnerabilidades(cls, vulnerabilidades_comuns: Dict[str, dict]) -> "MatrizHostsVulnerabilidades":
+        """
+        Monta a matriz a partir do formato de obter_vulnerabilidades_comum_csv (o mesmo do
+        cache de agregados e dos chunks NDJSON). A severidade de cada vulnerabilidade é a
+        maior entre as registradas para ela.
+        """
+        nomes = sorted(vulnerabilidades_comuns)
+        conjuntos = [ConjuntoHosts.de_hosts(vulnerabilidades_comuns[nome]["hosts"]) for nome in nomes]
+        universo = ConjuntoHosts.uniao(conjuntos)
+
+        linhas, colunas = ConjuntoHosts.posicoes_em(conjuntos, universo)
+        severidades = np.fromiter(
+            (max((CODIGOS_SEVERIDADE.get(str(risco).lower(), 0) for risco in vulnerabilidades_comuns[nome]["risks"]), default=0)
+             for nome in nomes),
+            dtype=np.int8, count=len(nomes)
+        )
+
+        matriz = sparse.csr_matrix(
+            (severidades[colunas], (linhas, colunas)),
+            shape=(len(universo), len(nomes)),
+            dtype=np.int8
+        )
+        matriz.eliminate_zeros()
+        return cls(list(universo), nomes, matriz)
+
+    def __len__(self) -> int:
+        return len(self.hosts)
+
+    def _linhas_das_celulas(self) -> np.ndarray:
+        """Índice do host de cada célula preenchida, na ordem de `matriz.data`."""
+        return np.repeat(np.arange(self.matriz.shape[0]), np.diff(self.matriz.indptr))
+
+    def vulnerabilidades_por_host(self) -> np.ndarray:
+        """Quantidade de vulnerabilidades de cada host, na ordem de `hosts`."""
+        return np.diff(self.matriz.indptr)
+
+    def contagem_por_severidade(self) -> np.ndarray:
+        """Matriz densa (hosts × 5) com a quantidade de vulnerabilidades de cada código de severidade por host."""
+        chaves = self._linhas_das_celulas() * 5 + self.matriz.data.astype(np.int64)
+        return np.bincount(chaves, minlength=self.matriz.shape[0] * 5).reshape(-1, 5)
+
+    def ranking_hosts(self, quantidade: int = 10) -> List[dict]:
+        """
+        Hosts mais expostos: ordenados pela quantidade de vulnerabilidades críticas, depois
+        altas, médias e baixas. Cada item tem Host, Critical, High, Medium, Low e Total.
+        """
+        if not len(self):
+            return []
+        contagens = self.contagem_por_severidade()
+        # lexsort usa a última chave como a principal; empates ficam na ordem natural dos hosts
+        ordem = np.lexsort((-contagens[:, 1], -contagens[:, 2], -contagens[:, 3], -contagens[:, 4]))[:quantidade]
+        return [
+            {
+                'Host': self.hosts[indice],
+                **{NOMES_SEVERIDADE[codigo]: int(contagens[indice, codigo]) for codigo in (4, 3, 2, 1)},
+                'Total': int(contagens[indice, 1:].sum())
+            }
+            for indice in ordem.tolist()
+        ]
+
+    def vulnerabilidades_do_host(self, host: str) -> List[str]:
+        indice = self._indice_hosts.get(host)
+        if indice is None:
+            return []
+        inicio, fim = self.matriz.indptr[indice], self.matriz.indptr[indice + 1]
+        return [self.vulnerabilidades[coluna] for coluna in self.matriz.indices[inicio:fim].tolist()]
+
+    def hosts_com_vulnerabilidades(self, nomes: Iterable[str]) -> List[str]:
+        """Hosts que têm todas as vulnerabilidades informadas."""
+        colunas = [self._indice_vulnerabilidades[nome] for nome in set(nomes) if nome in self._indice_vulnerabilidades]
+        if not colunas:
+            return []
+        presentes = np.asarray((self.matriz[:, colunas] != 0).sum(axis=1)).ravel()
+        return [self.hosts[indice] for indice in np.flatnonzero(presentes == len(colunas)).tolist()]
+
+    def hosts_com_mesmo_perfil(self, host: str) -> List[str]:
+        """Outros hosts com exatamente o mesmo conjunto de vulnerabilidades de `host`."""
+        indice = self._indice_hosts.get(host)
+        if indice is None:
+            return []
+        binaria = (self.matriz != 0).astype(np.int32)
+        linha = binaria[indice]
+        compartilhadas = np.asarray((binaria @ linha.T).todense()).ravel()
+        total = linha.nnz
+        mesmos = (compartilhadas == total) & (self.vulnerabilidades_por_host() == total)
+        mesmos[indice] = False
+        return [self.hosts[i] for i in np.flatnonzero(mesmos).tolist()]
@@ -16,7 +16,6 @@ Funções presentes:
 from collections import defaultdict
 import json
 import re
-from urllib.parse import urlparse, urljoin
 import glob
 import os
 from typing import List
@@ -24,7 +23,11 @@ from pathlib import Path
 
 # Importa as funções de utilidade genéricas e as funções de JSON do módulo core
 from ..core.utils import contar_riscos, limpar_protocolos_url
-from ..core.json_utils import carregar_json, carregar_json_utf # Importa as funções específicas de carregar JSON
+from ..core.json_utils import carregar_json # Importa a função específica de carregar JSON
+from ..core.logging_config import obter_logger
+from .uri_canonicalizer import extrair_dominio, formatar_uri
+
+logger = obter_logger(__name__)
 
 
 ##FUNÇÕES
@@ -39,13 +42,13 @@ def localizar_arquivos(diretorio_path: str, formato: str) -> List[str]:
     """
     # Verifica se o diretório existe
     if not os.path.exists(diretorio_path):
-        print(f"O diretório {diretorio_path} não existe.")
+        logger.warning(f"O diretório {diretorio_path} não existe.")
         return []
     
     # Encontrar todos os arquivos no diretório
     files = glob.glob(os.path.join(diretorio_path, "*." + formato))
     if not files:
-        print(f"Nenhum arquivo com a extensão .{formato} encontrado no diretório {diretorio_path}.")
+        logger.warning(f"Nenhum arquivo com a extensão .{formato} encontrado no diretório {diretorio_path}.")
         return []
     
     # Converter os caminhos para o formato POSIX (com forward slashes)
@@ -81,42 +84,33 @@ def obter_vulnerabilidades_comum(json_files: List[str]) -> dict:
     - json_files (List[str]): Lista com os caminhos dos arquivos JSON.
 
     Retorna:
-    - dict: Dicionário com vulnerabilidades agrupadas por (nome, plugin_id) e as URIs afetadas.
+    - dict: Dicionário com vulnerabilidades agrupadas por (nome, plugin_id) e o conjunto das URIs afetadas.
     """
-    common_vulnerabilities = defaultdict(list)
+    common_vulnerabilities = defaultdict(set)
     for json_file in json_files:
         data = carregar_json(json_file)
-        target = data.get('scan', {}).get('target', 'Não disponível')
-        
-        for finding in data.get('findings', []):
-            risk_factor = finding.get('risk_factor', 'Não disponível')
-            uri = finding.get('uri', 'Não disponível')
-            name = finding.get('name', 'Não disponível')
-            plugin_id = finding.get('plugin_id', 'Não disponível')
-            if "info" not in risk_factor:
-                formatted_uri = formatar_uri(target, uri)
-                common_vulnerabilities[(name, plugin_id)].append(formatted_uri)
+        for chave, uris in agrupar_vulnerabilidades_scan(data).items():
+            common_vulnerabilities[chave].update(uris)
     return common_vulnerabilities
 
-def extrair_dominio(target: str) -> str:
-    """
-    A função recebe um endereço URL (target) e retorna o domínio base.
+def agrupar_vulnerabilidades_scan(data: dict) -> dict:
     """
-    parsed_url = urlparse(target)
-    return f"{parsed_url.scheme}://{parsed_url.netloc}"
-    
-def formatar_uri(target: str, uri: str) -> str:
-    """
-    A função recebe o target (uma URL base) e uma URI, e retorna a URL completa.
+    Agrupa as vulnerabilidades (exceto as informativas) de um único scan JSON já carregado
+    por (nome, plugin_id), com as URIs afetadas já formatadas e sem repetição.
     """
-    target_domain = extrair_dominio(target)
-    parsed_uri = urlparse(uri)
-    
-    if not parsed_uri.netloc:
-        return urljoin(target_domain, uri)
-    else:
-        return target_domain
-    
+    vulnerabilidades = defaultdict(set)
+    target = data.get('scan', {}).get('target', 'Não disponível')
+
+    for finding in data.get('findings', []):
+        risk_factor = finding.get('risk_factor', 'Não disponível')
+        uri = finding.get('uri', 'Não disponível')
+        name = finding.get('name', 'Não disponível')
+        plugin_id = finding.get('plugin_id', 'Não disponível')
+        if "info" not in risk_factor:
+            formatted_uri = formatar_uri(target, uri)
+            vulnerabilidades[(name, plugin_id)].add(formatted_uri)
+    return dict(vulnerabilidades)
+
 def contar_vulnerabilidades(json_files: List[str]) -> dict:
     """
     Conta o número de vulnerabilidades por tipo (Critical, High, Medium, Low) em arquivos JSON.
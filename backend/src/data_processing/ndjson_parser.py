@@ -0,0 +1,124 @@
+"""
+Arquivo destinado à leitura dos chunks NDJSON da exportação de vulnerabilidades do
+Tenable (API /vulns/export), como fonte alternativa ao servidores_scan.csv.
+
+Cada chunk é agregado em um processo separado e os resultados parciais são unidos
+no final, no mesmo formato retornado por obter_vulnerabilidades_comum_csv.
+"""
+
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+from typing import List, Tuple
+from ..core.logging_config import obter_logger
+
+logger = obter_logger(__name__)
+
+RISCOS_CONSIDERADOS = {'critical', 'high', 'medium', 'low'}
+
+# Subpasta (dentro da pasta de scans da lista) onde ficam os chunks NDJSON da exportação de vulnerabilidades
+PASTA_VULNS_EXPORT = "vulns_export"
+
+
+def _host_do_registro(registro: dict) -> str:
+    """
+    Retorna o identificador do host de uma vulnerabilidade exportada, priorizando o IPv4,
+    como na coluna 'Host' do CSV do Nessus.
+    """
+    asset = registro.get('asset', {})
+    host = asset.get('ipv4') or asset.get('ipv6') or asset.get('fqdn') or asset.get('hostname') or ''
+    if isinstance(host, list):
+        host = host[0] if host else ''
+    return str(host).strip()
+
+
+def _agregar_chunk(caminho_chunk: str) -> Tuple[dict, object]:
+    """
+    Agrega um único chunk NDJSON. Retorna o dicionário parcial nome -> (ConjuntoHosts, riscos)
+    e o ConjuntoHosts do chunk (incluindo os hosts de severidade info). Os conjuntos compactos
+    também reduzem o que volta de cada processo.
+    """
+    from ..core.host_set import ConjuntoHosts
+
+    vulnerabilidades = defaultdict(lambda: (set(), set()))
+    hosts = set()
+    linhas_invalidas = 0
+    try:
+        with open(caminho_chunk, 'r', encoding='utf-8') as f:
+            for linha in f:
+                if not linha.strip():
+                    continue
+                # Uma linha malformada não pode descartar o restante do chunk
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError:
+                    linhas_invalidas += 1
+                    continue
+                host = _host_do_registro(registro)
+                if not host:
+                    continue
+                hosts.add(host)
+
+                nome = str(registro.get('plugin', {}).get('name', '')).strip()
+                risco = str(registro.get('severity', '')).strip().lower()
+                if nome and risco in RISCOS_CONSIDERADOS:
+                    hosts_vuln, riscos_vuln = vulnerabilidades[nome]
+                    hosts_vuln.add(host)
+                    riscos_vuln.add(risco)
+    except Exception as e:
+        logger.error(f"Erro ao processar {caminho_chunk}: {e}")
+    if linhas_invalidas:
+        logger.warning(f"{linhas_invalidas} linha(s) malformada(s) ignorada(s) no chunk '{caminho_chunk}'")
+    vulnerabilidades = {
+        nome: (ConjuntoHosts.de_hosts(hosts_vuln), riscos_vuln)
+        for nome, (hosts_vuln, riscos_vuln) in vulnerabilidades.items()
+    }
+    return vulnerabilidades, ConjuntoHosts.de_hosts(hosts)
+
+
+def _agregar_chunks(chunk_files: List[str]) -> Tuple[dict, object]:
+    """
+    Agrega todos os chunks em paralelo (um processo por chunk, até o número de CPUs)
+    e une os resultados parciais.
+    """
+    if len(chunk_files) > 1:
+        max_workers = min(len(chunk_files), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            parciais = list(executor.map(_agregar_chunk, chunk_files))
+    else:
+        parciais = [_agregar_chunk(chunk) for chunk in chunk_files]
+
+    from ..core.host_set import ConjuntoHosts
+
+    hosts_por_vulnerabilidade = defaultdict(list)
+    riscos_por_vulnerabilidade = defaultdict(set)
+    for vulnerabilidades_parciais, _ in parciais:
+        for nome, (hosts_vuln, riscos_vuln) in vulnerabilidades_parciais.items():
+            hosts_por_vulnerabilidade[nome].append(hosts_vuln)
+            riscos_por_vulnerabilidade[nome].update(riscos_vuln)
+
+    vulnerabilidades = {
+        nome: {"hosts": ConjuntoHosts.uniao(conjuntos), "risks": riscos_por_vulnerabilidade[nome]}
+        for nome, conjuntos in hosts_por_vulnerabilidade.items()
+    }
+    return vulnerabilidades, ConjuntoHosts.uniao(hosts for _, hosts in parciais)
+
+
+def obter_vulnerabilidades_e_hosts_ndjson(chunk_files: List[str]) -> Tuple[dict, List[str]]:
+    """
+    Obtém as vulnerabilidades comuns (agrupadas por nome do plugin, com hosts afetados e
+    severidades) e a lista de hosts únicos a partir dos chunks NDJSON, lendo cada chunk uma única vez.
+    """
+    if not chunk_files:
+        return {}, []
+
+    vulnerabilidades, hosts = _agregar_chunks(chunk_files)
+    vulnerabilidades_comuns = {
+        nome: {
+            "hosts": dados["hosts"],
+            "risks": list(dados["risks"])
+        }
+        for nome, dados in vulnerabilidades.items()
+    }
+    return vulnerabilidades_comuns, list(hosts)
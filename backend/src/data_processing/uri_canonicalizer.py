@@ -0,0 +1,79 @@
+"""
+Canonicalização das URIs afetadas dos scans de Web App.
+
+- `extrair_dominio` e `formatar_uri` são memorizadas: o target de um scan se repete em
+  todos os findings dele, e a mesma URI aparece em vários plugins.
+- `modelo_da_uri` troca segmentos do caminho que são identificadores (números, UUIDs,
+  hashes) e os valores da query por marcadores, e `agrupar_em_modelos` junta as URIs que
+  só diferem nesses pontos, ex.: https://site/produto/{id} ×312.
+"""
+
+from collections import Counter
+from functools import lru_cache
+import re
+from typing import Iterable, List, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+PADRAO_NUMERICO = re.compile(r"^\d+$")
+PADRAO_UUID = re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
+PADRAO_HASH = re.compile(r"^[0-9a-fA-F]{16,}$")
+
+# Um grupo só vira modelo a partir dessa quantidade de URIs
+MINIMO_URIS_POR_MODELO = 2
+
+
+@lru_cache(maxsize=1024)
+def extrair_dominio(target: str) -> str:
+    """
+    A função recebe um endereço URL (target) e retorna o domínio base.
+    """
+    parsed_url = urlsplit(target)
+    return f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+
+@lru_cache(maxsize=65536)
+def formatar_uri(target: str, uri: str) -> str:
+    """
+    A função recebe o target (uma URL base) e uma URI, e retorna a URL completa.
+    """
+    target_domain = extrair_dominio(target)
+    if not urlsplit(uri).netloc:
+        return urljoin(target_domain, uri)
+    return target_domain
+
+
+def _modelo_do_segmento(segmento: str) -> str:
+    if PADRAO_NUMERICO.match(segmento):
+        return "{id}"
+    if PADRAO_UUID.match(segmento):
+        return "{uuid}"
+    if PADRAO_HASH.match(segmento):
+        return "{hash}"
+    return segmento
+
+
+@lru_cache(maxsize=65536)
+def modelo_da_uri(uri: str) -> str:
+    """
+    Modelo da URI: segmentos do caminho que são identificadores viram {id}, {uuid} ou {hash}
+    e os valores da query viram {valor}. O fragmento é descartado.
+    """
+    partes = urlsplit(uri)
+    caminho = "/".join(_modelo_do_segmento(segmento) for segmento in partes.path.split("/"))
+    query = "&".join(
+        f"{parametro.partition('=')[0]}={{valor}}" if "=" in parametro else parametro
+        for parametro in partes.query.split("&") if parametro
+    )
+    return urlunsplit((partes.scheme, partes.netloc, caminho, query, ""))
+
+
+def agrupar_em_modelos(uris: Iterable[str], minimo: int = MINIMO_URIS_POR_MODELO) -> List[Tuple[str, int]]:
+    """
+    Agrupa URIs (já sem repetição) pelo modelo. Retorna (modelo, quantidade) para os grupos
+    com pelo menos `minimo` URIs e (uri, 1) para as demais, em ordem alfabética.
+    """
+    uris = list(uris)
+    contagem = Counter(modelo_da_uri(uri) for uri in uris)
+    agrupadas = [(modelo, quantidade) for modelo, quantidade in contagem.items() if quantidade >= minimo]
+    avulsas = [(uri, 1) for uri in uris if contagem[modelo_da_uri(uri)] < minimo]
+    return sorted(agrupadas + avulsas)
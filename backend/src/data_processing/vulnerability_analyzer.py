@@ -1,42 +1,55 @@
 import csv
 import json
-from collections import defaultdict
-import sys
 import os
+from typing import Optional
 
 # Importa as funções de parsing do json_parser e csv_parser
-from .json_parser import localizar_arquivos, extrair_targets, obter_vulnerabilidades_comum, contar_vulnerabilidades, extrair_dados_vulnerabilidades
-from .csv_parser import obter_vulnerabilidades_comum_csv, contar_vulnerabilidades_csv, extrair_hosts_csv
+from .json_parser import localizar_arquivos
+from .csv_parser import contar_vulnerabilidades_csv
+from .ndjson_parser import obter_vulnerabilidades_e_hosts_ndjson
+from .aggregate_cache import agregados_json, unir_agregados_json, agregados_csv, unir_agregados_csv
 
 # Importa as funções de geração de relatório (builders e compiler)
-from ..report_generation.report_builder import gerar_relatorio_txt, gerar_relatorio_txt_csv, montar_conteudo_latex, montar_conteudo_latex_csv
+from ..report_generation.report_aggregates import resumir_webapp, resumir_servidores
+from ..report_generation.report_builder import gerar_relatorio_txt, gerar_relatorio_txt_csv, montar_conteudo_latex, montar_conteudo_latex_csv, montar_tabela_ranking_hosts_latex
 # A função terminar_relatorio_preprocessado e compilar_latex serão chamadas nas rotas ou em outro orquestrador
 
 # Importa a função de verificação de ausências do core.utils
 from ..core.utils import verificar_e_salvar_vulnerabilidades_ausentes
 # Importa a classe Config
 from ..core.config import Config
+from ..core.metrics import medir_etapa
+from ..core.logging_config import obter_logger
+
+logger = obter_logger(__name__)
 
 # Inicializa a configuração
 config = Config("config.json") # config.json está em AudiTex/backend/
 
+# Quantidade de hosts na tabela e no gráfico de hosts mais expostos
+TAMANHO_RANKING_HOSTS = int(os.getenv("RANKING_HOSTS_TAMANHO", "15"))
+
 
-def processar_relatorio_json(caminho_arquivos_json: str, caminho_salvar_relatorio_preprocessado: str) -> None:
+def processar_relatorio_json(caminho_arquivos_json: str, caminho_salvar_relatorio_preprocessado: str, agrupar_uris: bool = False) -> Optional[dict]:
     """
     Função que encontra os arquivos JSON de relatórios, conta as vulnerabilidades e gera o relatório TXT e LaTeX.
     
     Parâmetros:
     - caminho_arquivos_json (str): Caminho para o diretório onde os arquivos JSON dos scans web app estão.
     - caminho_salvar_relatorio_preprocessado (str): Caminho para o diretório onde os relatórios TXT e LaTeX pré-processados serão salvos.
+    - agrupar_uris (bool): No LaTeX, lista as URIs que só diferem em identificadores como um modelo com a quantidade.
+
+    Retorna os agregados compactos dos scans (report_aggregates.resumir_webapp), ou None se não houver arquivos.
     """
     caminhos_relatorios_json = localizar_arquivos(caminho_arquivos_json, "json")
 
     if caminhos_relatorios_json:
-        # Contar as vulnerabilidades dividindo-as por criticas, altas, médias e baixas
-        quantidade_vulnerabilidades_por_risco = contar_vulnerabilidades(caminhos_relatorios_json)
-
-        # Obter vulnerabilidades comuns entre sites
-        vulnerabilidades_comuns = obter_vulnerabilidades_comum(caminhos_relatorios_json)
+        # Agregados por arquivo vêm do cache da pasta; só os scans novos ou alterados são lidos.
+        # Contagem por risco (criticas, altas, médias e baixas), vulnerabilidades comuns entre sites e targets
+        with medir_etapa("ingest", "webapp"):
+            agregados = agregados_json(caminhos_relatorios_json)
+        with medir_etapa("aggregation", "webapp"):
+            quantidade_vulnerabilidades_por_risco, vulnerabilidades_comuns, targets = unir_agregados_json(agregados)
 
         # Obter Vulnerabilidades não categorizadas
         nome_arquivo_ausentes = "vulnerabilidades_sites_ausentes.txt"
@@ -44,54 +57,90 @@ def processar_relatorio_json(caminho_arquivos_json: str, caminho_salvar_relatori
         # O caminho para o JSON de descrições vem da Config
         caminho_json_descricoes_webapp = os.path.join(config.caminho_report_templates_descriptions, "vulnerabilities_webapp.json")
         
-        verificar_e_salvar_vulnerabilidades_ausentes(
-            vulnerabilidades_comuns,
-            caminho_json_descricoes_webapp,
-            caminho_salvar_relatorio_preprocessado,
-            nome_arquivo_ausentes
-        )
-
-        # Obter os targets
-        targets = extrair_targets(caminhos_relatorios_json)
+        with medir_etapa("aggregation", "webapp"):
+            verificar_e_salvar_vulnerabilidades_ausentes(
+                vulnerabilidades_comuns,
+                caminho_json_descricoes_webapp,
+                caminho_salvar_relatorio_preprocessado,
+                nome_arquivo_ausentes
+            )
 
         # Gerar o relatório TXT
-        gerar_relatorio_txt(
-            f"{caminho_salvar_relatorio_preprocessado}/Sites_agrupados_por_vulnerabilidades.txt",
-            quantidade_vulnerabilidades_por_risco,
-            vulnerabilidades_comuns,
-            targets
-        )
+        with medir_etapa("txt_render", "webapp"):
+            gerar_relatorio_txt(
+                f"{caminho_salvar_relatorio_preprocessado}/Sites_agrupados_por_vulnerabilidades.txt",
+                quantidade_vulnerabilidades_por_risco,
+                vulnerabilidades_comuns,
+                targets
+            )
 
         # Gerar o relatório em LaTeX (parte da lógica de construção)
         caminho_dados_vulnerabilidades_webapp = os.path.join(config.caminho_report_templates_descriptions, "vulnerabilities_webapp.json")
         caminho_descritivo_webapp = os.path.join(config.caminho_report_templates_descriptions, "descritivo_webapp.json")
 
-        montar_conteudo_latex(
-            f"{caminho_salvar_relatorio_preprocessado}/(LATEX)Sites_agrupados_por_vulnerabilidades.txt",
-            f"{caminho_salvar_relatorio_preprocessado}/Sites_agrupados_por_vulnerabilidades.txt", # Arquivo TXT gerado
-            caminho_dados_vulnerabilidades_webapp, # Dados detalhados das vulnerabilidades
-            caminho_descritivo_webapp # Descritivo de categorias/subcategorias
-        )
+        with medir_etapa("latex_render", "webapp"):
+            montar_conteudo_latex(
+                f"{caminho_salvar_relatorio_preprocessado}/(LATEX)Sites_agrupados_por_vulnerabilidades.txt",
+                f"{caminho_salvar_relatorio_preprocessado}/Sites_agrupados_por_vulnerabilidades.txt", # Arquivo TXT gerado
+                caminho_dados_vulnerabilidades_webapp, # Dados detalhados das vulnerabilidades
+                caminho_descritivo_webapp, # Descritivo de categorias/subcategorias
+                agrupar_uris=agrupar_uris
+            )
+
+        return resumir_webapp(quantidade_vulnerabilidades_por_risco, vulnerabilidades_comuns, [parcial["linha_site"] for parcial in agregados])
+    return None
 
-def processar_relatorio_csv(caminho_arquivos_csv: str, caminho_salvar_relatorio_preprocessado: str) -> None:
+def processar_relatorio_csv(caminho_arquivos_csv: str, caminho_salvar_relatorio_preprocessado: str) -> Optional[dict]:
     """
     Função que encontra os arquivos CSV de relatórios, conta as vulnerabilidades e gera o relatório TXT e LaTeX.
     
     Parâmetros:
     - caminho_arquivos_csv (str): Caminho para o diretório onde os arquivos CSV dos scans de servidores estão.
     - caminho_salvar_relatorio_preprocessado (str): Caminho para o diretório onde os relatórios TXT e LaTeX pré-processados serão salvos.
+
+    Retorna os agregados compactos dos scans (report_aggregates.resumir_servidores), ou None se não houver arquivos.
     """
     caminhos_relatorios_csv = localizar_arquivos(caminho_arquivos_csv, "csv")
     if caminhos_relatorios_csv:
-        # Obter vulnerabilidades comuns entre hosts
-        vulnerabilidades_comuns_csv = obter_vulnerabilidades_comum_csv(caminhos_relatorios_csv)
-        
-        # Obter Vulnerabilidades não categorizadas
-        nome_arquivo_ausentes = "vulnerabilidades_servidores_ausentes.txt"
-        
-        # O caminho para o JSON de descrições vem da Config
-        caminho_json_descricoes_servers = os.path.join(config.caminho_report_templates_descriptions, "vulnerabilities_servers.json")
-        
+        # Obter vulnerabilidades comuns entre hosts e os hosts (cada CSV é lido uma vez e o agregado fica em cache)
+        with medir_etapa("ingest", "servers"):
+            agregados = agregados_csv(caminhos_relatorios_csv)
+        with medir_etapa("aggregation", "servers"):
+            vulnerabilidades_comuns_csv, targets = unir_agregados_csv(agregados)
+
+        return _gerar_relatorios_servidores(vulnerabilidades_comuns_csv, targets, caminho_salvar_relatorio_preprocessado)
+    return None
+
+def processar_relatorio_ndjson(caminho_chunks_ndjson: str, caminho_salvar_relatorio_preprocessado: str) -> Optional[dict]:
+    """
+    Equivalente a processar_relatorio_csv para a exportação de vulnerabilidades em chunks
+    do Tenable: agrega os chunks NDJSON em paralelo e gera o mesmo relatório TXT e LaTeX de servidores.
+
+    Parâmetros:
+    - caminho_chunks_ndjson (str): Caminho para o diretório com os arquivos chunk_<id>.ndjson.
+    - caminho_salvar_relatorio_preprocessado (str): Caminho para o diretório onde os relatórios TXT e LaTeX pré-processados serão salvos.
+    """
+    caminhos_chunks = localizar_arquivos(caminho_chunks_ndjson, "ndjson")
+    if caminhos_chunks:
+        # Leitura e agregação dos chunks acontecem juntas nos processos de obter_vulnerabilidades_e_hosts_ndjson
+        with medir_etapa("ingest", "servers_ndjson"):
+            vulnerabilidades_comuns, targets = obter_vulnerabilidades_e_hosts_ndjson(caminhos_chunks)
+        return _gerar_relatorios_servidores(vulnerabilidades_comuns, targets, caminho_salvar_relatorio_preprocessado)
+    return None
+
+def _gerar_relatorios_servidores(vulnerabilidades_comuns_csv: dict, targets: list, caminho_salvar_relatorio_preprocessado: str) -> dict:
+    """
+    Gera os arquivos de vulnerabilidades ausentes, TXT e LaTeX de servidores a partir das
+    vulnerabilidades já agregadas (seja do CSV ou dos chunks NDJSON) e retorna os agregados
+    compactos para persistir com o relatório.
+    """
+    # Obter Vulnerabilidades não categorizadas
+    nome_arquivo_ausentes = "vulnerabilidades_servidores_ausentes.txt"
+
+    # O caminho para o JSON de descrições vem da Config
+    caminho_json_descricoes_servers = os.path.join(config.caminho_report_templates_descriptions, "vulnerabilities_servers.json")
+
+    with medir_etapa("aggregation", "servers"):
         verificar_e_salvar_vulnerabilidades_ausentes(
             vulnerabilidades_comuns_csv,
             caminho_json_descricoes_servers,
@@ -101,11 +150,13 @@ def processar_relatorio_csv(caminho_arquivos_csv: str, caminho_salvar_relatorio_
 
         # Contar as vulnerabilidades dividindo-as por criticas, altas, médias e baixas
         quantidade_vulnerabilidades_por_risco = contar_vulnerabilidades_csv(vulnerabilidades_comuns_csv)
-        
-        # Obter os hosts
-        targets = extrair_hosts_csv(caminhos_relatorios_csv)
 
-        # Gerar o relatório TXT
+    # Ranking dos hosts mais expostos (tabela e gráfico da seção de servidores)
+    with medir_etapa("host_matrix", "servers"):
+        gerar_ranking_hosts(vulnerabilidades_comuns_csv, caminho_salvar_relatorio_preprocessado)
+
+    # Gerar o relatório TXT
+    with medir_etapa("txt_render", "servers"):
         gerar_relatorio_txt_csv(
             f"{caminho_salvar_relatorio_preprocessado}/Servidores_agrupados_por_vulnerabilidades.txt",
             quantidade_vulnerabilidades_por_risco,
@@ -113,10 +164,11 @@ def processar_relatorio_csv(caminho_arquivos_csv: str, caminho_salvar_relatorio_
             targets
         )
 
-        # Gerar o relatório em LaTeX (parte da lógica de construção)
-        caminho_dados_vulnerabilidades_servers = os.path.join(config.caminho_report_templates_descriptions, "vulnerabilities_servers.json")
-        caminho_descritivo_servers = os.path.join(config.caminho_report_templates_descriptions, "descritivo_servers.json")
-        
+    # Gerar o relatório em LaTeX (parte da lógica de construção)
+    caminho_dados_vulnerabilidades_servers = os.path.join(config.caminho_report_templates_descriptions, "vulnerabilities_servers.json")
+    caminho_descritivo_servers = os.path.join(config.caminho_report_templates_descriptions, "descritivo_servers.json")
+
+    with medir_etapa("latex_render", "servers"):
         montar_conteudo_latex_csv(
             f"{caminho_salvar_relatorio_preprocessado}/(LATEX)Servidores_agrupados_por_vulnerabilidades.txt",
             f"{caminho_salvar_relatorio_preprocessado}/Servidores_agrupados_por_vulnerabilidades.txt", # Arquivo TXT gerado
@@ -124,6 +176,36 @@ def processar_relatorio_csv(caminho_arquivos_csv: str, caminho_salvar_relatorio_
             caminho_descritivo_servers # Descritivo de categorias/subcategorias
         )
 
+    return resumir_servidores(quantidade_vulnerabilidades_por_risco, vulnerabilidades_comuns_csv, len(targets))
+
+def gerar_ranking_hosts(vulnerabilidades_comuns_csv: dict, caminho_salvar_relatorio_preprocessado: str) -> None:
+    """
+    Monta a matriz hosts × vulnerabilidades e grava o ranking dos hosts mais expostos em
+    ranking_hosts_servidores.csv (usado pelo gráfico) e na tabela LaTeX
+    (LATEX)Ranking_hosts_servidores.txt.
+
+    Parâmetros:
+    - vulnerabilidades_comuns_csv (dict): Vulnerabilidades agregadas dos servidores (nome -> hosts e severidades).
+    - caminho_salvar_relatorio_preprocessado (str): Caminho para o diretório onde os relatórios pré-processados são salvos.
+    """
+    # NumPy/SciPy só são carregados aqui, na geração do relatório
+    from .host_matrix import MatrizHostsVulnerabilidades
+
+    matriz = MatrizHostsVulnerabilidades.de_vulnerabilidades(vulnerabilidades_comuns_csv)
+    ranking = matriz.ranking_hosts(TAMANHO_RANKING_HOSTS)
+    logger.info(f"Matriz de servidores: {len(matriz)} hosts x {len(matriz.vulnerabilidades)} vulnerabilidades ({matriz.matriz.nnz} ocorrências).")
+
+    with open(f"{caminho_salvar_relatorio_preprocessado}/ranking_hosts_servidores.csv", 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=['Host', 'Critical', 'High', 'Medium', 'Low', 'Total'])
+        writer.writeheader()
+        writer.writerows(ranking)
+
+    montar_tabela_ranking_hosts_latex(
+        f"{caminho_salvar_relatorio_preprocessado}/(LATEX)Ranking_hosts_servidores.txt",
+        ranking,
+        len(matriz)
+    )
+
 def extrair_quantidades_vulnerabilidades_por_site(output_path: str, caminhos_json_scans: str) -> None:
     """
     Extrai dados de vulnerabilidades por site a partir de arquivos JSON,
@@ -137,14 +219,15 @@ def extrair_quantidades_vulnerabilidades_por_site(output_path: str, caminhos_jso
         files = localizar_arquivos(caminhos_json_scans, "json")
 
         new_rows = []
-        print("Iniciando extração de vulnerabilidades...")
+        logger.info("Iniciando extração de vulnerabilidades...")
 
-        for file in files:
-            with open(file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+        # As linhas por site já fazem parte dos agregados em cache dos scans JSON
+        with medir_etapa("ingest", "webapp_sites"):
+            agregados = agregados_json(files)
 
-            extracted_data = extrair_dados_vulnerabilidades(data)
-            print(f"Dados extraídos para o arquivo {file}: {extracted_data}")
+        for file, parcial in zip(files, agregados):
+            extracted_data = parcial["linha_site"]
+            logger.debug("Dados extraídos para o arquivo %s: %s", file, extracted_data)
 
             if extracted_data:
                 new_rows.append(extracted_data)
@@ -160,7 +243,7 @@ def extrair_quantidades_vulnerabilidades_por_site(output_path: str, caminhos_jso
             for row in sorted_rows:
                 writer.writerow(row)
 
-        print(f"Relatório de vulnerabilidades agrupadas por site gerado com sucesso em: {output_path}")
+        logger.info(f"Relatório de vulnerabilidades agrupadas por site gerado com sucesso em: {output_path}")
 
     except Exception as e:
-        print(f"Erro ao extrair dados para o CSV de vulnerabilidades por site: {e}")
\ No newline at end of file
+        logger.error(f"Erro ao extrair dados para o CSV de vulnerabilidades por site: {e}")
\ No newline at end of file
@@ -1,14 +1,24 @@
 # backend/src/main.py
 
-from flask import Flask, current_app # Importa current_app
+from flask import Flask, Response
 from flask_cors import CORS
 from .core.config import Config
 from .core.database import Database
+from .core.logging_config import configurar_logging, encerrar_logging, obter_logger
+from .core.metrics import exportar_metricas, registrar_metricas_http
+from .core.profiling import registrar_profiling
+from .core.scan_manifest import atualizar_manifestos
 from .api.tenable import TenableApi
+from .api.tenable_sync import TenableScanSync
+from .report_generation.report_batch import GeradorRelatoriosEmLote
 from .models.user import User
 from .models.settings import SystemSettings
+from datetime import datetime
 import os
-import time
+from pathlib import Path
+import signal
+import tempfile
+import threading
 
 from .routes.scans import scans_bp
 from .routes.lists import lists_bp
@@ -17,22 +27,13 @@ from .routes.vulnerabilities_manager import vulnerabilities_manager_bp
 from .routes.auth import auth_bp
 from .routes.settings import settings_bp
 
-# Config será inicializada aqui, mas anexada ao app.extensions
-config = Config("config.json")
+logger = obter_logger(__name__)
 
-# A instância de tenable_api será inicializada dentro do app_context e anexada
-# Removido: global tenable_api # Não é mais necessário
+# Incrementar quando o bootstrap ganhar novos passos, para que rode de novo em bancos já inicializados
+BOOTSTRAP_VERSAO = 1
+COLECAO_APP_META = "app_meta"
 
-app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": "http://localhost:3000"}}, supports_credentials=True) # ou use uma lista se tiver mais origens
-app.register_blueprint(scans_bp)
-app.register_blueprint(lists_bp)
-app.register_blueprint(reports_bp)
-app.register_blueprint(vulnerabilities_manager_bp)
-app.register_blueprint(auth_bp)
-app.register_blueprint(settings_bp)
-
-images_folder_path = os.path.join(
+IMAGES_FOLDER_PATH = os.path.join(
     os.path.dirname(os.path.abspath(__file__)),
     '..',
     'shared_data',
@@ -41,8 +42,10 @@ images_folder_path = os.path.join(
     'assets'
 )
 
-app.static_folder = images_folder_path
-app.static_url_path = '/backend_assets'
+_bootstrap_lock = threading.Lock()
+_bootstrap_concluido = False
+# Locks de arquivo dos serviços de fundo deste processo (ver _lock_exclusivo_do_no)
+_locks_servicos = {}
 
 # --- NOVO: Lógica para criar usuário admin da APLICAÇÃO na coleção 'users', se vazia ---
 def create_default_admin_user_if_not_exists():
@@ -82,7 +85,8 @@ def create_default_admin_user_if_not_exists():
 def ensure_logs_collection_exists():
     db_instance = Database()
     try:
-        db_instance.db.create_collection('logs')
+        if 'logs' not in db_instance.db.list_collection_names():
+            db_instance.db.create_collection('logs')
         print("Coleção 'logs' assegurada.")
     except Exception as e:
         print(f"Erro ao assegurar coleção 'logs': {e}")
@@ -92,7 +96,8 @@ def ensure_logs_collection_exists():
 def ensure_settings_collection_and_default_tenable_config():
     db_instance = Database()
     try:
-        db_instance.db.create_collection('settings')
+        if 'settings' not in db_instance.db.list_collection_names():
+            db_instance.db.create_collection('settings')
         print("Coleção 'settings' assegurada.")
 
         existing_settings = db_instance.find_one("settings", {})
@@ -107,16 +112,196 @@ def ensure_settings_collection_and_default_tenable_config():
     finally:
         db_instance.close()
 
-# Executa a configuração inicial do banco de dados da aplicação quando o Flask inicia
-with app.app_context():
-    create_default_admin_user_if_not_exists()
-    ensure_logs_collection_exists()
-    ensure_settings_collection_and_default_tenable_config()
+def bootstrap_banco():
+    """
+    Configuração inicial do banco (usuário admin, coleções e configurações padrão).
+    Roda uma vez por processo e, entre processos, é pulada quando o marcador da versão
+    atual já está no banco: com vários workers só o primeiro faz o trabalho.
+    """
+    global _bootstrap_concluido
+    with _bootstrap_lock:
+        if _bootstrap_concluido:
+            return
+
+        db_instance = Database()
+        try:
+            marcador = db_instance.find_one(COLECAO_APP_META, {"_id": "bootstrap"})
+        except Exception as e:
+            # Como antes, a aplicação sobe mesmo sem o banco; o bootstrap é tentado no próximo processo
+            logger.error(f"Erro ao verificar o bootstrap do banco: {e}")
+            return
+        finally:
+            db_instance.close()
+        if marcador and marcador.get("versao", 0) >= BOOTSTRAP_VERSAO:
+            logger.info("Bootstrap do banco já realizado (versão %s).", marcador["versao"])
+            _bootstrap_concluido = True
+            return
+
+        # Os passos são idempotentes; se dois processos chegarem aqui ao mesmo tempo, o resultado é o mesmo
+        create_default_admin_user_if_not_exists()
+        ensure_logs_collection_exists()
+        ensure_settings_collection_and_default_tenable_config()
+
+        db_instance = Database()
+        try:
+            db_instance.update_one(
+                COLECAO_APP_META,
+                {"_id": "bootstrap"},
+                {"versao": BOOTSTRAP_VERSAO, "concluido_em": datetime.utcnow()},
+                upsert=True
+            )
+            _bootstrap_concluido = True
+        except Exception as e:
+            logger.error(f"Erro ao registrar o bootstrap do banco: {e}")
+        finally:
+            db_instance.close()
+
+
+def _lock_exclusivo_do_no(nome: str) -> bool:
+    """
+    Lock de arquivo que garante um único processo deste nó executando o serviço `nome`.
+    Fica aberto enquanto o processo viver e é liberado se o processo morrer.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return True # Sem fcntl (Windows): desenvolvimento com um único processo
+
+    arquivo_lock = open(os.path.join(tempfile.gettempdir(), f"auditex_{nome}.lock"), "w")
+    try:
+        fcntl.flock(arquivo_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        arquivo_lock.close()
+        return False
+    _locks_servicos[nome] = arquivo_lock
+    return True
+
+
+def _atualizar_manifestos_scans(config):
+    base = Path(config.caminho_scans_base)
+    try:
+        gerados = atualizar_manifestos(base / "WebAppScans", base / "VMScans")
+        logger.info("Manifestos de scans atualizados: %s gerado(s).", gerados)
+    except Exception as e:
+        logger.error(f"Erro ao atualizar os manifestos dos scans: {e}")
+
+
+def iniciar_servicos_de_fundo(app):
+    """
+    Inicia os serviços de fundo: a geração dos manifestos de scans ausentes ou
+    desatualizados, a sincronização periódica dos scans do Tenable, se
+    TENABLE_SYNC_INTERVAL_SECONDS estiver configurado, e o consumidor da fila de relatórios
+    em lote (desativado com FILA_CONSUMIR_RELATORIOS=0). Deve ser chamada no processo que
+    vai executá-los: threads iniciadas antes de um fork não existem no processo filho. No
+    gunicorn, esse processo é o dedicado de executar_servicos_de_fundo; no `flask run`, o
+    próprio processo da aplicação. Um lock de arquivo por serviço garante que só um processo
+    do nó o execute; no caso da fila, isso faz o limite de relatórios simultâneos valer para o nó.
+    A sincronização do Tenable é exclusiva entre todos os nós (lease no MongoDB, ver
+    TenableScanSync.iniciar_periodico), já que eles compartilham as pastas de scans.
+    """
+    iniciou = False
+    if _lock_exclusivo_do_no("manifestos_scans"):
+        # Manifestos ausentes ou desatualizados (scans copiados à mão, salvos antes dos manifestos)
+        # são gerados aqui, e não na primeira listagem
+        threading.Thread(target=_atualizar_manifestos_scans, args=(app.extensions['config'],), daemon=True, name="manifestos-scans").start()
+        iniciou = True
+
+    intervalo_sync = int(os.getenv("TENABLE_SYNC_INTERVAL_SECONDS", "0"))
+    if intervalo_sync > 0:
+        try:
+            app.extensions['tenable_sync'].iniciar_periodico(intervalo_sync)
+            logger.info("Sincronização periódica do Tenable iniciada (a cada %s s, um nó por vez).", intervalo_sync)
+            iniciou = True
+        except Exception as e:
+            logger.error(f"Não foi possível iniciar a sincronização periódica do Tenable: {e}")
+
+    if _lock_exclusivo_do_no("fila_relatorios"):
+        iniciou = app.extensions['relatorios_em_lote'].iniciar_consumo() or iniciou
+    else:
+        logger.info("Consumidor da fila de relatórios já está ativo em outro processo deste nó.")
+    return iniciou
+
+
+def executar_servicos_de_fundo(app) -> None:
+    """
+    Corpo do processo dedicado aos serviços de fundo (no gunicorn, criado pelo master em
+    when_ready, fora dos workers de requisições, que são reciclados por max_requests e
+    encerrados após graceful_timeout). Inicia os serviços e bloqueia até SIGTERM/SIGINT;
+    então para de reivindicar relatórios e espera os que estão em execução por até
+    SERVICOS_TEMPO_ENCERRAMENTO_SEGUNDOS (padrão 600) antes de sair.
+    """
+    encerrar = threading.Event()
+    for sinal in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sinal, lambda *_: encerrar.set())
+
+    iniciar_servicos_de_fundo(app)
+    logger.info("Processo de serviços de fundo iniciado (pid %s).", os.getpid())
+    encerrar.wait()
+
+    logger.info("Encerrando os serviços de fundo (pid %s).", os.getpid())
+    app.extensions['tenable_sync'].parar()
+    app.extensions['relatorios_em_lote'].parar(
+        aguardar_segundos=float(os.getenv("SERVICOS_TEMPO_ENCERRAMENTO_SEGUNDOS", "600"))
+    )
+    # O processo sai sem atexit: os registros pendentes são escritos aqui
+    encerrar_logging()
+
+
+def create_app(config_file: str = "config.json", iniciar_servicos: bool = True) -> Flask:
+    """
+    Cria a aplicação Flask. Importar este módulo não abre conexões nem altera o banco;
+    isso acontece aqui, no bootstrap (idempotente).
+
+    - iniciar_servicos: inicia as threads de fundo neste processo. O gunicorn passa False
+      e as executa em um processo dedicado, criado pelo master em when_ready (ver
+      gunicorn.conf.py e executar_servicos_de_fundo).
+    """
+    # Níveis, formato e amostragem do logging vêm das variáveis LOG_* (ver core/logging_config.py)
+    configurar_logging()
+    config = Config(config_file)
+
+    app = Flask(__name__)
+    CORS(app, resources={r"/*": {"origins": "http://localhost:3000"}}, supports_credentials=True) # ou use uma lista se tiver mais origens
+    app.register_blueprint(scans_bp)
+    app.register_blueprint(lists_bp)
+    app.register_blueprint(reports_bp)
+    app.register_blueprint(vulnerabilities_manager_bp)
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(settings_bp)
+
+    # Latência por blueprint/rota e endpoint /metrics no formato do Prometheus (somando todos os processos sob o gunicorn)
+    registrar_metricas_http(app)
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(exportar_metricas(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+    # Profiling sob demanda (cProfile) de requisições individuais; só é registrado se PROFILING_TOKEN estiver definido
+    registrar_profiling(app, config.caminho_shared_relatorios)
+
+    app.static_folder = IMAGES_FOLDER_PATH
+    app.static_url_path = '/backend_assets'
+
+    with app.app_context():
+        bootstrap_banco()
+
+        # Anexa as instâncias globais ao app.extensions
+        app.extensions['config'] = config # Anexa a instância de Config
+        app.extensions['tenable_api'] = TenableApi(Database()) # Anexa a instância de TenableApi
+
+        # Espelho incremental dos scans do Tenable; a sincronização periódica só é ativada se o intervalo for configurado
+        app.extensions['tenable_sync'] = TenableScanSync(app.extensions['tenable_api'], config.caminho_scans_base)
+
+        # Geração de relatórios em lote (/reports/gerarRelatoriosEmLote/) pela fila de trabalhos do MongoDB;
+        # os processos de geração só são criados no primeiro relatório reivindicado
+        app.extensions['relatorios_em_lote'] = GeradorRelatoriosEmLote(config, config_file)
+
+    if iniciar_servicos:
+        iniciar_servicos_de_fundo(app)
+    return app
 
-    # Anexa as instâncias globais ao app.extensions
-    app.extensions['config'] = config # Anexa a instância de Config
-    app.extensions['tenable_api'] = TenableApi(Database()) # Anexa a instância de TenableApi
 
 if __name__ == "__main__":
+    app = create_app()
     print(app.url_map)
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=5000)
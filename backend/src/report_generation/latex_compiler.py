@@ -2,17 +2,101 @@
 
 import subprocess
 import os
+from collections import deque
+from contextlib import nullcontext
 from pathlib import Path
+import logging
 import sys
 import re # Importar regex para análise de logs
+from typing import Optional, Tuple
 
-def compilar_latex(caminho_main_tex: str, diretorio_saida: str):
+from ..core.logging_config import obter_logger
+from ..core.metrics import medir_etapa
+from ..core.report_progress import publicar_progresso
+
+logger = obter_logger(__name__)
+
+# Padrões de regex para erros de imagem (sensíveis à saída do pdflatex)
+# Exemplo: `! LaTeX Error: File `assets/images-was/missing-image.png' not found.`
+# Exemplo: `! Package pdftex.def Error: File `assets/images-was/another.png' not found: using draft setting.`
+PADRAO_ERRO_IMAGEM = re.compile(r"^! (?:LaTeX Error|Package \S+ Error): File `(?P<filename>[^']+)' not found", re.IGNORECASE)
+# Páginas enviadas ao PDF aparecem como "[1]", "[2{/caminho/pdftex.map}]", "[3 <./imagem.png>]"
+PADRAO_PAGINA = re.compile(r"\[(\d+)(?=[\s\]{<]|$)")
+# Resumo ao final: "Output written on main.pdf (12 pages, 345678 bytes)."
+PADRAO_TOTAL_PAGINAS = re.compile(r"Output written on .*\((\d+) pages?")
+# Linhas finais da saída registradas quando a compilação falha
+LINHAS_SAIDA_EM_ERRO = 40
+
+# Semáforo que limita os pdflatex simultâneos entre processos (geração em lote, ver
+# report_batch); None = sem limite
+_limite_pdflatex = None
+
+
+def definir_limite_pdflatex(semaforo) -> None:
+    """
+    Define o semáforo (ex.: multiprocessing.BoundedSemaphore) adquirido durante cada
+    passada do pdflatex deste processo. None remove o limite.
+    """
+    global _limite_pdflatex
+    _limite_pdflatex = semaforo
+
+
+def executar_pdflatex(command: list, diretorio_saida: str, passada: int, image_errors: list, ultimas_linhas: deque,
+                      unidade: Optional[str] = None) -> Tuple[int, Optional[int]]:
+    """
+    Executa uma passada do pdflatex lendo a saída linha a linha, enquanto o processo roda:
+    publica no progresso a página atual e o total de páginas, acumula os erros de imagem em
+    `image_errors` e mantém o final da saída em `ultimas_linhas`. `unidade` identifica a
+    unidade nos eventos da compilação em unidades. Retorna (código de saída, total de páginas).
+    """
+    eventos_unidade = {"unit": unidade} if unidade else {}
+    pagina_atual = 0
+    total_paginas = None
+    saida_debug = [] if logger.isEnabledFor(logging.DEBUG) else None
+
+    with _limite_pdflatex or nullcontext(), subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        encoding='latin-1', # Usar latin-1 ou utf-8, dependendo da codificação real da saída do pdflatex
+        cwd=diretorio_saida
+    ) as processo:
+        for linha in processo.stdout:
+            ultimas_linhas.append(linha)
+            if saida_debug is not None:
+                saida_debug.append(linha)
+
+            match = PADRAO_ERRO_IMAGEM.search(linha)
+            if match:
+                image_errors.append(match.group("filename"))
+
+            # Só avança para a página seguinte, para não confundir com outros números entre colchetes
+            for numero in PADRAO_PAGINA.findall(linha):
+                if int(numero) == pagina_atual + 1:
+                    pagina_atual += 1
+                    publicar_progresso("pdflatex", parcial=True, pass_number=passada, page=pagina_atual, **eventos_unidade)
+
+            match = PADRAO_TOTAL_PAGINAS.search(linha)
+            if match:
+                total_paginas = int(match.group(1))
+        returncode = processo.wait()
+
+    publicar_progresso("pdflatex", pass_number=passada, page=pagina_atual, pages=total_paginas, returncode=returncode, **eventos_unidade)
+    if saida_debug is not None:
+        logger.debug("Saída do pdflatex (passada %s):\n%s", passada, "".join(saida_debug), extra={"returncode": returncode, **eventos_unidade})
+    return returncode, total_paginas
+
+
+def compilar_latex(caminho_main_tex: str, diretorio_saida: str, em_unidades: bool = False):
     """
     Compila um arquivo LaTeX (.tex) para gerar um PDF e verifica erros comuns.
 
     Args:
         caminho_main_tex (str): O caminho completo para o arquivo main.tex.
         diretorio_saida (str): O diretório onde o PDF e outros arquivos de saída serão gerados.
+        em_unidades (bool): Compila capa/sumário, Servidores, WebApp e anexos em processos
+            pdflatex paralelos e junta os PDFs (ver latex_split_compiler). Se o documento não
+            puder ser dividido, compila o documento inteiro.
     
     Returns:
         bool: True se a compilação foi bem-sucedida, False caso contrário.
@@ -26,6 +110,13 @@ def compilar_latex(caminho_main_tex: str, diretorio_saida: str):
         if not preambulo_path.exists():
             return False, f"Erro: Arquivo '{preambulo_path}' não encontrado no diretório de saída. Verifique se foi copiado corretamente do template."
 
+        if em_unidades:
+            # Import tardio: latex_split_compiler usa executar_pdflatex deste módulo
+            from .latex_split_compiler import compilar_latex_em_unidades
+            resultado = compilar_latex_em_unidades(caminho_main_tex, diretorio_saida)
+            if resultado is not None:
+                return resultado
+
         command = [
             'pdflatex',
             '-interaction=nonstopmode',
@@ -33,70 +124,29 @@ def compilar_latex(caminho_main_tex: str, diretorio_saida: str):
             main_tex_filename
         ]
 
-        full_log_output = ""
+        image_errors = []
+        ultimas_linhas = deque(maxlen=LINHAS_SAIDA_EM_ERRO)
 
         # Primeira passada
-        print(f"Executando primeira passada do pdflatex em {diretorio_saida}...")
-        result_1 = subprocess.run(
-            command,
-            capture_output=True,
-            encoding='latin-1', # Usar latin-1 ou utf-8, dependendo da codificação real da saída do pdflatex
-            check=False,
-            cwd=diretorio_saida
-        )
-        full_log_output += result_1.stdout
-        if result_1.stderr:
-            full_log_output += result_1.stderr
-
-        print("\n--- SAÍDA DO PDFLATEX (PRIMEIRA PASSADA) ---")
-        print(result_1.stdout)
-        if result_1.stderr:
-            print(result_1.stderr)
-        print("--- FIM SAÍDA DO PDFLATEX (PRIMEIRA PASSADA) ---\n")
+        logger.info("Executando primeira passada do pdflatex em %s...", diretorio_saida)
+        with medir_etapa("pdflatex_pass_1"):
+            executar_pdflatex(command, diretorio_saida, 1, image_errors, ultimas_linhas)
 
         # Segunda passada
-        print(f"Executando segunda passada do pdflatex em {diretorio_saida}...")
-        result_2 = subprocess.run(
-            command,
-            capture_output=True,
-            encoding='latin-1',
-            check=False,
-            cwd=diretorio_saida
-        )
-        full_log_output += result_2.stdout
-        if result_2.stderr:
-            full_log_output += result_2.stderr
-
-        print("\n--- SAÍDA DO PDFLATEX (SEGUNDA PASSADA) ---")
-        print(result_2.stdout)
-        if result_2.stderr:
-            print(result_2.stderr)
-        print("--- FIM SAÍDA DO PDFLATEX (SEGUNDA PASSADA) ---\n")
-
-        # Análise dos logs para erros específicos
-        # Padrões de regex para erros de imagem (sensíveis à saída do pdflatex)
-        # Exemplo: `! LaTeX Error: File `assets/images-was/missing-image.png' not found.`
-        # Exemplo: `! Package pdftex.def Error: File `assets/images-was/another.png' not found: using draft setting.`
-        image_error_pattern = re.compile(
-            r"!(?: LaTeX)? Error: (?:File `(?P<filename>[^']+)' not found|Package .+\.def Error: File `(?P<filename>[^']+)' not found)",
-            re.IGNORECASE
-        )
-        
-        image_errors = []
-        for line in full_log_output.splitlines():
-            match = image_error_pattern.search(line)
-            if match:
-                filename = match.group("filename")
-                image_errors.append(filename)
+        logger.info("Executando segunda passada do pdflatex em %s...", diretorio_saida)
+        with medir_etapa("pdflatex_pass_2"):
+            returncode, _ = executar_pdflatex(command, diretorio_saida, 2, image_errors, ultimas_linhas)
 
         if image_errors:
             error_message = "Erro de compilação: Imagens não encontradas no relatório LaTeX. Por favor, verifique as seguintes imagens e certifique-se de que estão presentes e com o nome correto: "
-            error_message += ", ".join(image_errors)
+            error_message += ", ".join(dict.fromkeys(image_errors)) # As duas passadas reportam as mesmas imagens
             return False, error_message
 
         # Verificação do código de retorno final (se não houver erros específicos de imagem)
-        if result_2.returncode != 0:
-            return False, f"Erro na compilação LaTeX. Código de retorno: {result_2.returncode}. Verifique os logs do backend para detalhes."
+        if returncode != 0:
+            # A mensagem de retorno remete aos logs: registra o final da saída mesmo sem DEBUG
+            logger.error("pdflatex falhou (código %s). Final da saída:\n%s", returncode, "".join(ultimas_linhas))
+            return False, f"Erro na compilação LaTeX. Código de retorno: {returncode}. Verifique os logs do backend para detalhes."
         else:
             pdf_path = Path(diretorio_saida) / main_tex_filename.replace('.tex', '.pdf')
             if not pdf_path.exists():
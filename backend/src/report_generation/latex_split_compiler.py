@@ -0,0 +1,384 @@
+# backend/src/report_generation/latex_split_compiler.py
+
+"""
+Compilação do relatório em unidades independentes, com um pdflatex por unidade em paralelo,
+e junção dos PDFs em um só (modo opcional de compilar_latex, para relatórios muito grandes).
+
+O main.tex é dividido nos marcadores "UNIDADE DE COMPILAÇÃO: <nome>" do template (capa e
+sumário, Servidores, WebApp) e no início de cada Anexo A gerado pelo report_builder. Cada
+unidade vira um documento completo, com o mesmo preâmbulo do main.tex, que começa dos
+contadores em que a unidade anterior terminou (página, seções, figuras e tabelas), então a numeração
+é a mesma do documento inteiro. O contador de âncoras do hyperref de cada unidade começa em
+uma faixa própria, para que âncoras como "section*.N" não se repitam entre unidades.
+
+Os rótulos de outras unidades (ex.: \\hyperref[anexoA]) e as entradas do sumário são
+injetados no .aux/.toc de cada unidade, com as páginas deslocadas. Os links apontam para
+destinos nomeados, que na junção passam a apontar para a unidade onde o rótulo existe.
+
+As unidades compilam em rodadas: a primeira rodada dá o número de páginas de cada unidade,
+que define onde cada uma começa na rodada seguinte. As rodadas se repetem (até MAX_RODADAS)
+até o número de páginas se estabilizar — normalmente duas, como as duas passadas da
+compilação única. Cada unidade começa em uma página nova.
+"""
+
+import contextvars
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ..core.logging_config import obter_logger
+from ..core.metrics import medir_etapa
+from .latex_compiler import LINHAS_SAIDA_EM_ERRO, executar_pdflatex
+
+logger = obter_logger(__name__)
+
+# Marcador de unidade no template: "%-------------- UNIDADE DE COMPILAÇÃO: webapp --------------"
+PADRAO_MARCADOR_UNIDADE = re.compile(r"^%-+ UNIDADE DE COMPILAÇÃO: (?P<nome>[\w-]+) -+\s*$")
+# Escrito pelo report_builder antes do anexo com as listas completas de URIs/hosts
+MARCADOR_INICIO_ANEXO = "%-------------- INÍCIO DO ANEXO A --------------"
+UNIDADE_INICIAL = "frente"
+
+# Contadores de seções e figuras que continuam de uma unidade para a seguinte
+PADRAO_ESTRUTURA = re.compile(r"\\(section|subsection|subsubsection)\s*(\*?)\s*[\[{]|\\caption\s*[\[{]|\\begin\{(figure|table)\*?\}")
+PADRAO_COMENTARIO = re.compile(r"(?<!\\)%.*")
+# Faixa do contador de âncoras do hyperref (Hy@linkcounter) reservada para cada unidade
+ANCORAS_POR_UNIDADE = 1_000_000
+
+MAX_RODADAS = 3
+
+
+class UnidadeLatex:
+    def __init__(self, indice: int, nome: str, corpo: str):
+        self.indice = indice
+        self.nome = nome
+        self.corpo = corpo
+        self.jobname = f"unidade_{indice:02d}_{nome}"
+        self.tem_sumario = "\\tableofcontents" in corpo
+        # Contadores de seção/figura no início da unidade (calculados a partir do texto)
+        self.contadores = {}
+        # Estado da última compilação
+        self.pagina_inicial = 1
+        self.paginas = None
+        self.returncode = None
+        self.image_errors = []
+        self.ultimas_linhas = deque()
+
+
+def dividir_documento(latex: str) -> Tuple[str, List[UnidadeLatex]]:
+    """
+    Divide o main.tex em preâmbulo e unidades de compilação. Retorna ("", []) se o documento
+    não tiver \\begin{document}/\\end{document}.
+    """
+    inicio = latex.find("\\begin{document}")
+    fim = latex.rfind("\\end{document}")
+    if inicio < 0 or fim < inicio:
+        return "", []
+    preambulo = latex[:inicio]
+    corpo = latex[inicio + len("\\begin{document}"):fim]
+
+    partes = [(UNIDADE_INICIAL, [])]
+    secao_atual = UNIDADE_INICIAL
+    for linha in corpo.splitlines(keepends=True):
+        match = PADRAO_MARCADOR_UNIDADE.match(linha)
+        if match:
+            secao_atual = match.group("nome")
+            partes.append((secao_atual, []))
+        elif linha.strip() == MARCADOR_INICIO_ANEXO:
+            partes.append((f"anexo_{secao_atual}", []))
+        partes[-1][1].append(linha)
+
+    unidades = []
+    for nome, linhas in partes:
+        texto = "".join(linhas)
+        # Unidades só com comentários/espaços (ex.: seção sem scans) não geram páginas
+        if PADRAO_COMENTARIO.sub("", texto).strip():
+            unidades.append(UnidadeLatex(len(unidades) + 1, nome, texto))
+
+    contadores = {"section": 0, "subsection": 0, "subsubsection": 0, "figure": 0, "table": 0}
+    for unidade in unidades:
+        unidade.contadores = dict(contadores)
+        contadores = _contadores_apos(unidade.corpo, contadores)
+    return preambulo, unidades
+
+
+def _contadores_apos(corpo: str, contadores: Dict[str, int]) -> Dict[str, int]:
+    """
+    Simula os \\section/\\subsection/\\subsubsection e \\caption do trecho sobre `contadores`
+    (o \\caption conta como figura ou tabela conforme o último ambiente aberto).
+    """
+    contadores = dict(contadores)
+    flutuante = "figure"
+    for match in PADRAO_ESTRUTURA.finditer(PADRAO_COMENTARIO.sub("", corpo)):
+        nivel, estrela, ambiente = match.group(1), match.group(2), match.group(3)
+        if ambiente is not None:
+            flutuante = ambiente
+        elif nivel is None:
+            contadores[flutuante] += 1
+        elif not estrela:
+            contadores[nivel] += 1
+            if nivel == "section":
+                contadores["subsection"] = contadores["subsubsection"] = 0
+            elif nivel == "subsection":
+                contadores["subsubsection"] = 0
+    return contadores
+
+
+def _fonte_unidade(preambulo: str, unidade: UnidadeLatex) -> str:
+    contadores = "".join(f"\\setcounter{{{nome}}}{{{valor}}}\n" for nome, valor in unidade.contadores.items())
+    return (
+        preambulo
+        + "\\begin{document}\n"
+        + f"\\setcounter{{page}}{{{unidade.pagina_inicial}}}\n"
+        + contadores
+        + f"\\makeatletter\\setcounter{{Hy@linkcounter}}{{{unidade.indice * ANCORAS_POR_UNIDADE}}}\\makeatother\n"
+        + unidade.corpo
+        + "\n\\end{document}\n"
+    )
+
+
+def _grupos(texto: str, inicio: int, quantidade: int) -> List[Tuple[int, int]]:
+    """Posições (início, fim) do conteúdo dos próximos `quantidade` grupos {...} a partir de `inicio`."""
+    grupos = []
+    i = inicio
+    while len(grupos) < quantidade:
+        while i < len(texto) and texto[i].isspace():
+            i += 1
+        if i >= len(texto) or texto[i] != "{":
+            break
+        nivel = 0
+        j = i
+        while j < len(texto):
+            if texto[j] == "\\":
+                j += 2
+                continue
+            if texto[j] == "{":
+                nivel += 1
+            elif texto[j] == "}":
+                nivel -= 1
+                if nivel == 0:
+                    break
+            j += 1
+        if nivel != 0:
+            break
+        grupos.append((i + 1, j))
+        i = j + 1
+    return grupos
+
+
+def _deslocar_pagina(linha: str, grupos: List[Tuple[int, int]], indice_pagina: int, indice_ancora: int,
+                     deslocamento: int) -> Tuple[str, Optional[str]]:
+    """Soma `deslocamento` ao número de página no grupo `indice_pagina`. Retorna (linha, âncora)."""
+    if len(grupos) <= max(indice_pagina, indice_ancora):
+        return linha, None
+    ancora = linha[grupos[indice_ancora][0]:grupos[indice_ancora][1]] or None
+    ini, fim = grupos[indice_pagina]
+    pagina = linha[ini:fim]
+    if deslocamento and pagina.isdigit():
+        linha = linha[:ini] + str(int(pagina) + deslocamento) + linha[fim:]
+    return linha, ancora
+
+
+def _deslocar_rotulo(linha: str, deslocamento: int) -> Tuple[str, Optional[str]]:
+    """\\newlabel{nome}{{ref}{página}{título}{âncora}{}} (formato do hyperref)."""
+    externos = _grupos(linha, len("\\newlabel"), 2)
+    if len(externos) < 2:
+        return linha, None
+    return _deslocar_pagina(linha, _grupos(linha, externos[1][0], 5), 1, 3, deslocamento)
+
+
+def _deslocar_entrada_sumario(linha: str, deslocamento: int) -> Tuple[str, Optional[str]]:
+    """\\contentsline {section}{título}{página}{âncora}"""
+    return _deslocar_pagina(linha, _grupos(linha, len("\\contentsline"), 4), 2, 3, deslocamento)
+
+
+def _ler_linhas(caminho: Path) -> List[str]:
+    if not caminho.exists():
+        return []
+    with open(caminho, "r", encoding="utf-8", errors="replace") as f:
+        return f.read().splitlines()
+
+
+def _preparar_referencias(unidades: List[UnidadeLatex], diretorio_saida: Path, novos_inicios: Dict[str, int]) -> Dict[str, set]:
+    """
+    Reescreve o .aux de cada unidade com os rótulos de todas as unidades e o .toc das unidades
+    com sumário com as entradas de todas, com as páginas deslocadas para os novos inícios.
+    Em rótulos repetidos (o anexoA de Servidores e o de WebApp) prevalece o da própria unidade
+    e depois o da unidade mais próxima, preferindo a seguinte: cada seção aponta para o próprio
+    anexo. Retorna, por unidade, as âncoras que ficam em outras unidades.
+    """
+    rotulos = {}
+    sumario = []
+    for unidade in unidades:
+        deslocamento = novos_inicios[unidade.jobname] - unidade.pagina_inicial
+        rotulos[unidade.jobname] = []
+        for linha in _ler_linhas(diretorio_saida / f"{unidade.jobname}.aux"):
+            if linha.startswith("\\newlabel{"):
+                rotulos[unidade.jobname].append(_deslocar_rotulo(linha, deslocamento))
+        for linha in _ler_linhas(diretorio_saida / f"{unidade.jobname}.toc"):
+            if linha.startswith("\\contentsline"):
+                sumario.append((unidade.jobname,) + _deslocar_entrada_sumario(linha, deslocamento))
+
+    ancoras_externas = {}
+    for unidade in unidades:
+        # O LaTeX usa a última definição de um rótulo: as unidades mais próximas vão por último
+        outras = sorted((u for u in unidades if u is not unidade),
+                        key=lambda u: (-abs(u.indice - unidade.indice), u.indice > unidade.indice))
+        externos = [(linha, ancora) for outra in outras for linha, ancora in rotulos[outra.jobname]]
+        proprios = [linha for linha, _ in rotulos[unidade.jobname]]
+        ancoras_proprias = {ancora for _, ancora in rotulos[unidade.jobname]}
+        ancoras = {ancora for _, ancora in externos if ancora and ancora not in ancoras_proprias}
+
+        with open(diretorio_saida / f"{unidade.jobname}.aux", "w", encoding="utf-8") as f:
+            f.write("\\relax\n")
+            f.write("\n".join([linha for linha, _ in externos] + proprios) + "\n")
+        if unidade.tem_sumario:
+            with open(diretorio_saida / f"{unidade.jobname}.toc", "w", encoding="utf-8") as f:
+                f.write("\n".join(linha for _, linha, _ in sumario) + "\n")
+            ancoras.update(ancora for jobname, _, ancora in sumario if ancora and jobname != unidade.jobname)
+        ancoras_externas[unidade.jobname] = ancoras
+    return ancoras_externas
+
+
+def _compilar_unidade(preambulo: str, unidade: UnidadeLatex, diretorio_saida: Path, rodada: int) -> None:
+    from pypdf import PdfReader
+
+    caminho_tex = diretorio_saida / f"{unidade.jobname}.tex"
+    with open(caminho_tex, "w", encoding="utf-8") as f:
+        f.write(_fonte_unidade(preambulo, unidade))
+
+    command = ['pdflatex', '-interaction=nonstopmode', '-output-directory', str(diretorio_saida), caminho_tex.name]
+    unidade.image_errors = []
+    unidade.ultimas_linhas = deque(maxlen=LINHAS_SAIDA_EM_ERRO)
+    with medir_etapa(f"pdflatex_pass_{rodada}", unidade.nome):
+        unidade.returncode, _ = executar_pdflatex(
+            command, str(diretorio_saida), rodada, unidade.image_errors, unidade.ultimas_linhas, unidade=unidade.nome
+        )
+
+    # O total de páginas vem do próprio PDF: a linha "Output written on ..." do pdflatex é
+    # quebrada em 79 colunas quando o caminho é longo
+    caminho_pdf = diretorio_saida / f"{unidade.jobname}.pdf"
+    unidade.paginas = len(PdfReader(str(caminho_pdf)).pages) if caminho_pdf.exists() else None
+
+
+def _compilar_rodada(preambulo: str, unidades: List[UnidadeLatex], diretorio_saida: Path, rodada: int, max_processos: int) -> None:
+    with ThreadPoolExecutor(max_workers=max_processos) as executor:
+        # copy_context: o progresso (SSE) da geração em andamento fica numa contextvar
+        futuros = [
+            executor.submit(contextvars.copy_context().run, _compilar_unidade, preambulo, unidade, diretorio_saida, rodada)
+            for unidade in unidades
+        ]
+        for futuro in futuros:
+            futuro.result()
+
+
+def _juntar_pdfs(unidades: List[UnidadeLatex], diretorio_saida: Path, caminho_pdf: Path, ancoras_externas: Dict[str, set]) -> None:
+    """
+    Junta os PDFs das unidades, mantendo marcadores e links. O pdfTeX cria um destino
+    provisório para cada âncora referenciada que não existe na unidade; na junção, cada
+    destino nomeado passa a apontar para a unidade que realmente contém a âncora.
+    """
+    from pypdf import PdfReader, PdfWriter
+    from pypdf.generic import ArrayObject, NameObject, NumberObject, TextStringObject
+
+    writer = PdfWriter()
+    # Os links só são copiados se o destino nomeado já existir no PDF final: registra todas as
+    # âncoras externas antes e corrige os destinos depois
+    todas_externas = set().union(*ancoras_externas.values()) if ancoras_externas else set()
+    for ancora in sorted(todas_externas):
+        writer.add_named_destination_array(TextStringObject(ancora), ArrayObject([NumberObject(0), NameObject("/Fit")]))
+
+    destinos_reais = {}
+    for unidade in unidades:
+        reader = PdfReader(str(diretorio_saida / f"{unidade.jobname}.pdf"))
+        primeira_pagina = len(writer.pages)
+        for nome, destino in reader.named_destinations.items():
+            if nome in todas_externas and nome not in ancoras_externas[unidade.jobname] and nome not in destinos_reais:
+                destinos_reais[nome] = (primeira_pagina + reader.get_destination_page_number(destino), destino)
+        writer.append(reader, import_outline=True)
+
+    nomes = writer.get_named_dest_root()
+    i = 0
+    while i < len(nomes):
+        nome = str(nomes[i])
+        if nome in todas_externas:
+            if nome not in destinos_reais:
+                # Referência a um rótulo que não existe em nenhuma unidade
+                del nomes[i:i + 2]
+                continue
+            pagina, destino = destinos_reais[nome]
+            array = ArrayObject(destino.dest_array)
+            array[0] = writer.pages[pagina].indirect_reference
+            nomes[i + 1] = array
+        i += 2
+
+    with open(caminho_pdf, "wb") as f:
+        writer.write(f)
+
+
+def compilar_latex_em_unidades(caminho_main_tex: str, diretorio_saida: str, max_processos: Optional[int] = None) -> Optional[Tuple[bool, str]]:
+    """
+    Compila o main.tex em unidades paralelas e junta o resultado em main.pdf. Retorna o mesmo
+    (sucesso, mensagem) de compilar_latex, ou None se o documento não puder ser dividido
+    (menos de duas unidades) ou o pypdf não estiver instalado — nesses casos o chamador
+    compila o documento inteiro.
+    """
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        logger.warning("pypdf não instalado: compilação em unidades indisponível, usando a compilação única.")
+        return None
+
+    diretorio = Path(diretorio_saida)
+    with open(caminho_main_tex, "r", encoding="utf-8") as f:
+        preambulo, unidades = dividir_documento(f.read())
+    if len(unidades) < 2:
+        logger.info("main.tex sem marcadores de unidade suficientes: usando a compilação única.")
+        return None
+
+    max_processos = max_processos or int(os.getenv("LATEX_PROCESSOS_PARALELOS", "0")) or min(len(unidades), os.cpu_count() or 1)
+    logger.info("Compilando %s unidades em paralelo (%s processos): %s", len(unidades), max_processos,
+                ", ".join(unidade.nome for unidade in unidades))
+
+    ancoras_externas = {unidade.jobname: set() for unidade in unidades}
+    for rodada in range(1, MAX_RODADAS + 1):
+        if rodada > 1:
+            novos_inicios = {}
+            pagina = 1
+            for unidade in unidades:
+                novos_inicios[unidade.jobname] = pagina
+                pagina += unidade.paginas
+            ancoras_externas = _preparar_referencias(unidades, diretorio, novos_inicios)
+            for unidade in unidades:
+                unidade.pagina_inicial = novos_inicios[unidade.jobname]
+
+        paginas_anteriores = [unidade.paginas for unidade in unidades]
+        _compilar_rodada(preambulo, unidades, diretorio, rodada, max_processos)
+
+        falhas = [unidade for unidade in unidades if unidade.returncode != 0 or not unidade.paginas]
+        if falhas:
+            break
+        if rodada > 1 and paginas_anteriores == [unidade.paginas for unidade in unidades]:
+            break
+    else:
+        logger.warning("Número de páginas das unidades não estabilizou em %s rodadas; a numeração pode estar deslocada.", MAX_RODADAS)
+
+    image_errors = [erro for unidade in unidades for erro in unidade.image_errors]
+    if image_errors:
+        error_message = "Erro de compilação: Imagens não encontradas no relatório LaTeX. Por favor, verifique as seguintes imagens e certifique-se de que estão presentes e com o nome correto: "
+        error_message += ", ".join(dict.fromkeys(image_errors))
+        return False, error_message
+
+    for unidade in falhas:
+        logger.error("pdflatex falhou na unidade %s (código %s). Final da saída:\n%s",
+                     unidade.nome, unidade.returncode, "".join(unidade.ultimas_linhas))
+    if falhas:
+        return False, (f"Erro na compilação LaTeX das unidades {', '.join(u.nome for u in falhas)}. "
+                       "Verifique os logs do backend para detalhes.")
+
+    pdf_path = diretorio / Path(caminho_main_tex).name.replace('.tex', '.pdf')
+    with medir_etapa("pdf_merge"):
+        _juntar_pdfs(unidades, diretorio, pdf_path, ancoras_externas)
+    return True, f"PDF compilado com sucesso em: {pdf_path} ({len(unidades)} unidades em paralelo)"
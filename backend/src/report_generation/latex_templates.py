@@ -0,0 +1,156 @@
+"""
+Templates Jinja2 dos blocos LaTeX dos relatórios (seções de vulnerabilidades, anexo,
+figuras e tabela de ranking), na pasta templates_latex/.
+
+Os delimitadores do Jinja2 são trocados para não colidir com as chaves e o % do LaTeX:
+\\VAR{...} para expressões, \\BLOCK{...} e linhas começando com %% para comandos e
+\\#{...} para comentários. O ambiente é criado uma vez por processo e cada template é
+compilado na primeira renderização e mantido em cache.
+
+O escape de texto (filtro `latex`) e de caminhos de imagem (filtro `caminho_latex`) é feito
+em uma única passada (uma regex) e memorizado: categorias, descrições, soluções e
+imagens se repetem muitas vezes em um relatório.
+"""
+
+from functools import lru_cache
+import os
+import re
+import unicodedata
+from typing import Iterable, Optional, Tuple
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined
+
+PASTA_TEMPLATES_LATEX = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates_latex")
+
+ESCAPES_LATEX = {
+    '&': '\\&',
+    '%': '\\%',
+    '$': '\\$',
+    '#': '\\#',
+    '_': '\\_',
+    '{': '\\{',
+    '}': '\\}',
+    '~': '\\textasciitilde{}',
+    '^': '\\textasciicircum{}',
+}
+# Uma passada só pelo texto (e não uma cadeia de str.replace); a barra invertida não é
+# escapada: os textos do catálogo podem conter comandos LaTeX
+PADRAO_ESCAPE_LATEX = re.compile(r"[&%$#_{}~^]")
+# Em caminhos o '#' não é escapado (como antes, no \includegraphics)
+PADRAO_ESCAPE_CAMINHO = re.compile(r"[&%$_{}~^]")
+
+
+def _substituir_escape(match: re.Match) -> str:
+    return ESCAPES_LATEX[match.group()]
+
+
+EXTENSOES_IMAGEM = ('.png', '.jpg', '.jpeg', '.gif', '.pdf')
+
+
+@lru_cache(maxsize=8192)
+def escape_latex(text: str) -> str:
+    """
+    Escapes special LaTeX characters in a string.
+    """
+    return PADRAO_ESCAPE_LATEX.sub(_substituir_escape, text)
+
+
+@lru_cache(maxsize=4096)
+def escape_path_for_latex(path_str: str) -> str:
+    """
+    Escapa uma string de caminho de arquivo para inclusão segura em comandos \\includegraphics do LaTeX.
+    - Converte barras invertidas para barras normais.
+    - Translitera caracteres acentuados para ASCII.
+    - Substitui espaços por hífens.
+    - Escapa caracteres LaTeX problemáticos em nomes de arquivo/caminhos.
+    - Garante uma extensão de imagem válida e trata pontos dentro da parte do nome do arquivo.
+    """
+    if not isinstance(path_str, str):
+        return path_str
+
+    # Normaliza os separadores de caminho (Windows para Unix-like)
+    path_str = path_str.replace('\\', '/')
+
+    # Divide o caminho em diretório e nome base do arquivo
+    dir_name, base_name = os.path.split(path_str)
+
+    # 1. Limpa possíveis hífens ou caracteres malformados que antecedem a extensão
+    # Ex: 'image.png-' -> 'image.png'
+    base_name = re.sub(r'-(?=\.(png|jpg|jpeg|gif|pdf)$)', '', base_name, flags=re.IGNORECASE)
+    base_name = base_name.rstrip('-') # Remove outros hífens no final
+
+    # 2. Translitera caracteres acentuados para ASCII (ex: 'Configurações' -> 'Configuracoes')
+    base_name = unicodedata.normalize('NFKD', base_name).encode('ascii', 'ignore').decode('utf-8')
+
+    # 3. Substitui espaços por hífens
+    base_name = base_name.replace(' ', '-')
+
+    # 4. Garante uma extensão de arquivo apropriada e lida com pontos dentro do nome do arquivo
+    filename_stem, ext = os.path.splitext(base_name)
+
+    if ext and ext.lower() in EXTENSOES_IMAGEM:
+        # Se uma extensão válida for encontrada, mantém-na
+        final_ext = ext.lower()
+        # Substitui quaisquer outros pontos no 'filename_stem' por hífens
+        filename_stem = filename_stem.replace('.', '-')
+    else:
+        # Se nenhuma extensão válida for encontrada, ou for uma "extensão falsa" como ".0-pollution",
+        # substitui todos os pontos no 'base_name' original por hífens e adiciona .png
+        filename_stem = base_name.replace('.', '-')
+        final_ext = ".png"
+
+    # 5. Reúne o diretório e o nome base limpo e escapa os caracteres especiais do LaTeX
+    full_path_cleaned = os.path.join(dir_name, filename_stem + final_ext).replace('\\', '/')
+    return PADRAO_ESCAPE_CAMINHO.sub(_substituir_escape, full_path_cleaned)
+
+
+def itens_url(instancias: Iterable[Tuple[str, int]]) -> str:
+    """
+    Linhas \\item \\url{...} de uma lista de instâncias (uri ou host, quantidade), com o
+    ($\\times$N) dos modelos de URI. Filtro e não laço no template: o Anexo A pode ter dezenas
+    de milhares de itens.
+    """
+    return "".join(
+        f"    \\item \\url{{{texto}}} ($\\times${quantidade})\n" if quantidade > 1 else f"    \\item \\url{{{texto}}}\n"
+        for texto, quantidade in instancias
+    )
+
+
+@lru_cache(maxsize=1)
+def _ambiente() -> Environment:
+    ambiente = Environment(
+        loader=FileSystemLoader(PASTA_TEMPLATES_LATEX),
+        block_start_string='\\BLOCK{',
+        block_end_string='}',
+        variable_start_string='\\VAR{',
+        variable_end_string='}',
+        comment_start_string='\\#{',
+        comment_end_string='}',
+        line_statement_prefix='%%',
+        trim_blocks=True,
+        autoescape=False,
+        keep_trailing_newline=True,
+        undefined=StrictUndefined,
+        # Os templates só mudam com um novo deploy: não há por que verificar o mtime a cada uso
+        auto_reload=False,
+    )
+    ambiente.filters['latex'] = escape_latex
+    ambiente.filters['caminho_latex'] = escape_path_for_latex
+    ambiente.filters['itens_url'] = itens_url
+    return ambiente
+
+
+def renderizar_template(nome: str, **contexto) -> str:
+    """Renderiza um template de templates_latex/ (ex.: "vulnerabilidades.tex.j2")."""
+    return _ambiente().get_template(nome).render(**contexto)
+
+
+def renderizar_figura(caminho: str, largura: str, legenda: Optional[str] = None) -> str:
+    """Bloco \\begin{figure} ... \\FloatBarrier do macro `figura` (figura.tex.j2), terminado em quebra de linha."""
+    return str(_ambiente().get_template("figura.tex.j2").module.figura(caminho, largura, legenda)) + "\n"
+
+
+def compilar_templates(*nomes: str) -> None:
+    """Compila os templates antecipadamente (ex.: nos processos da geração em lote)."""
+    for nome in nomes:
+        _ambiente().get_template(nome)
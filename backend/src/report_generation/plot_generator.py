@@ -1,6 +1,21 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+import csv
 import os # Importar os para usar os.makedirs
+from ..core.logging_config import obter_logger
+
+logger = obter_logger(__name__)
+
+
+def _pyplot():
+    """
+    Importa o matplotlib.pyplot no primeiro gráfico gerado, e não na inicialização do backend.
+    O backend Agg (sem interface gráfica) é selecionado explicitamente: os gráficos só são
+    salvos em PNG e o servidor não tem display.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
 
 def gerar_Grafico_Quantitativo_Vulnerabilidades_Por_Site(input_file: str, graph_output_path: str, ordem: str = "descendente"):
     """
@@ -12,6 +27,9 @@ def gerar_Grafico_Quantitativo_Vulnerabilidades_Por_Site(input_file: str, graph_
         ordem (str): Ordem de classificação ('descendente' ou 'crescente').
     """
     try:
+        import pandas as pd
+        plt = _pyplot()
+
         # Carrega os dados do CSV em um DataFrame
         df = pd.read_csv(input_file)
 
@@ -44,9 +62,9 @@ def gerar_Grafico_Quantitativo_Vulnerabilidades_Por_Site(input_file: str, graph_
         # Salva o gráfico como arquivo PNG
         plt.savefig(graph_output_path)
         plt.close() # Fecha a figura para liberar memória
-        print(f"Gráfico salvo em: {graph_output_path}")
+        logger.info(f"Gráfico salvo em: {graph_output_path}")
     except Exception as e:
-        print(f"Erro ao gerar o gráfico de quantitativo de vulnerabilidades por site: {e}")
+        logger.error(f"Erro ao gerar o gráfico de quantitativo de vulnerabilidades por site: {e}")
     
     
 def gerar_grafico_donut(vulnerabilidades: dict, output_path: str): # Adicionado output_path
@@ -70,7 +88,7 @@ def gerar_grafico_donut(vulnerabilidades: dict, output_path: str): # Adicionado
 
     # If no data, exit the function to avoid an empty chart
     if not data:
-        print("Nenhuma vulnerabilidade para exibir no gráfico donut.")
+        logger.warning("Nenhuma vulnerabilidade para exibir no gráfico donut.")
         # Se não houver dados, criar um gráfico vazio com uma mensagem ou um placeholder.
         # Ou simplesmente não gerar o arquivo. Por agora, vamos não gerar.
         return False # Indica que o gráfico não foi gerado com sucesso
@@ -86,6 +104,7 @@ def gerar_grafico_donut(vulnerabilidades: dict, output_path: str): # Adicionado
         return f"{absolute}"
 
     # Criar gráfico de rosca
+    plt = _pyplot()
     fig, ax = plt.subplots(figsize=(8, 8)) # Aumenta o tamanho da figura
     wedges, texts, autotexts = ax.pie(
         sizes,
@@ -117,7 +136,7 @@ def gerar_grafico_donut(vulnerabilidades: dict, output_path: str): # Adicionado
 
     plt.savefig(output_path) # Salva o gráfico
     plt.close() # Fecha a figura para liberar memória
-    print(f"Gráfico donut salvo em: {output_path}")
+    logger.info(f"Gráfico donut salvo em: {output_path}")
     return True # Indica que o gráfico foi gerado com sucesso
 
 
@@ -141,7 +160,7 @@ def gerar_grafico_donut_webapp(vulnerabilidades: dict, output_path: str): # NOVO
         data.append(('Low', vulnerabilidades['Low'], '#87F1FF'))
 
     if not data:
-        print("Nenhuma vulnerabilidade de WebApp para exibir no gráfico donut.")
+        logger.warning("Nenhuma vulnerabilidade de WebApp para exibir no gráfico donut.")
         return False
 
     labels = [item[0] for item in data]
@@ -153,6 +172,7 @@ def gerar_grafico_donut_webapp(vulnerabilidades: dict, output_path: str): # NOVO
         absolute = int(round(pct / 100. * sum(allvals)))
         return f"{absolute}"
 
+    plt = _pyplot()
     fig, ax = plt.subplots(figsize=(8, 8))
     wedges, texts, autotexts = ax.pie(
         sizes,
@@ -178,5 +198,56 @@ def gerar_grafico_donut_webapp(vulnerabilidades: dict, output_path: str): # NOVO
     plt.tight_layout()
     plt.savefig(output_path)
     plt.close()
-    print(f"Gráfico donut de WebApp salvo em: {output_path}")
-    return True
\ No newline at end of file
+    logger.info(f"Gráfico donut de WebApp salvo em: {output_path}")
+    return True
+
+
+def gerar_grafico_ranking_hosts(input_file: str, output_path: str):
+    """
+    Gera um gráfico de barras horizontais empilhadas por severidade dos hosts mais expostos e salva em um arquivo PNG.
+
+    Args:
+        input_file (str): Caminho do arquivo CSV do ranking (ranking_hosts_servidores.csv).
+        output_path (str): Caminho para salvar o arquivo PNG do gráfico.
+
+    Returns:
+        bool: False se o ranking estiver vazio ou o gráfico não puder ser gerado.
+    """
+    try:
+        with open(input_file, 'r', newline='', encoding='utf-8') as f:
+            ranking = list(csv.DictReader(f))
+    except OSError as e:
+        logger.error(f"Erro ao ler o ranking de hosts '{input_file}': {e}")
+        return False
+
+    if not ranking:
+        logger.warning("Nenhum host para exibir no gráfico de ranking de hosts.")
+        return False
+
+    # Mais exposto no topo
+    ranking.reverse()
+    hosts = [item['Host'] for item in ranking]
+    severidades = (('Critical', '#8B0000'), ('High', '#FF3030'), ('Medium', '#FFE066'), ('Low', '#87F1FF'))
+
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(12, max(4, 0.45 * len(hosts) + 1.5)))
+    acumulado = [0] * len(hosts)
+    for severidade, cor in severidades:
+        valores = [int(item[severidade]) for item in ranking]
+        ax.barh(hosts, valores, left=acumulado, color=cor, label=severidade)
+        acumulado = [a + v for a, v in zip(acumulado, valores)]
+
+    ax.set_xlabel('Quantidade de Vulnerabilidades', fontsize=13)
+    ax.set_title('Hosts com mais vulnerabilidades por severidade', fontsize=15)
+    ax.tick_params(axis='y', labelsize=11)
+    ax.legend(title="Severidade", loc="lower right")
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+
+    plt.tight_layout()
+    plt.savefig(output_path)
+    plt.close(fig)
+    logger.info(f"Gráfico de ranking de hosts salvo em: {output_path}")
+    return True
@@ -0,0 +1,175 @@
+"""
+Agregados compactos de cada relatório gerado, persistidos no MongoDB para comparar
+relatórios (ex.: a auditoria deste trimestre de uma secretaria com a anterior) sem
+reprocessar os scans, que podem nem existir mais.
+
+Para cada fonte (webapp e servidores) o documento guarda: as contagens por severidade,
+os totais por site (webapp) ou a quantidade de hosts (servidores) e, por vulnerabilidade,
+a quantidade de instâncias (URIs ou hosts) e um hash do conjunto de instâncias, que diz se
+as instâncias afetadas mudaram sem precisar guardá-las.
+"""
+
+import hashlib
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+# Coleção do MongoDB com relatorio_id -> agregados
+COLECAO_AGREGADOS_RELATORIOS = "agregados_relatorios"
+
+# Incrementar quando o formato dos agregados mudar
+AGREGADOS_VERSAO = 1
+
+FONTES = ("webapp", "servidores")
+
+
+def hash_instancias(instancias: Iterable[str]) -> str:
+    """Hash do conjunto de instâncias, independente da ordem e de repetições."""
+    digest = hashlib.blake2b(digest_size=16)
+    for instancia in sorted(set(instancias)):
+        digest.update(instancia.encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def _resumo_vulnerabilidades(instancias_por_nome: Dict[str, Iterable[str]], severidades_por_nome: Dict[str, Iterable[str]]) -> List[dict]:
+    # Lista (e não dicionário nome -> dados): nomes de vulnerabilidade podem ter "." e "$", que o MongoDB não aceita em chaves
+    resumo = []
+    for nome in sorted(instancias_por_nome):
+        instancias = list(instancias_por_nome[nome])
+        resumo.append({
+            "nome": nome,
+            "instancias": len(instancias),
+            "hash_instancias": hash_instancias(instancias),
+            "severidades": sorted(severidades_por_nome.get(nome, ())),
+        })
+    return resumo
+
+
+def resumir_webapp(riscos: dict, vulnerabilidades_comuns: dict, linhas_sites: List[dict]) -> dict:
+    """
+    Agregados dos scans de Web App, a partir dos resultados de unir_agregados_json
+    (vulnerabilidades por (nome, plugin_id) -> URIs) e das linhas por site.
+    """
+    uris_por_nome = defaultdict(set)
+    for (nome, _plugin_id), uris in vulnerabilidades_comuns.items():
+        uris_por_nome[nome].update(uris)
+    return {
+        "riscos": {risco: int(quantidade) for risco, quantidade in riscos.items()},
+        "sites": [
+            {chave: linha[chave] for chave in ('Site', 'Critical', 'High', 'Medium', 'Low', 'Total')}
+            for linha in linhas_sites if linha
+        ],
+        "vulnerabilidades": _resumo_vulnerabilidades(uris_por_nome, {}),
+    }
+
+
+def resumir_servidores(riscos: dict, vulnerabilidades_comuns_csv: dict, total_hosts: int) -> dict:
+    """
+    Agregados dos scans de servidores, a partir do formato de obter_vulnerabilidades_comum_csv
+    (nome -> {"hosts", "risks"}).
+    """
+    return {
+        "riscos": {risco: int(quantidade) for risco, quantidade in riscos.items()},
+        "total_hosts": int(total_hosts),
+        "vulnerabilidades": _resumo_vulnerabilidades(
+            {nome: dados["hosts"] for nome, dados in vulnerabilidades_comuns_csv.items()},
+            {nome: dados["risks"] for nome, dados in vulnerabilidades_comuns_csv.items()}
+        ),
+    }
+
+
+def registrar_agregados_relatorio(db_instance, relatorio_id: str, agregados: dict) -> None:
+    """Grava os agregados do relatório (chaves de FONTES; fontes sem scans ficam como None)."""
+    db_instance.update_one(
+        COLECAO_AGREGADOS_RELATORIOS,
+        {"relatorio_id": str(relatorio_id)},
+        {
+            "relatorio_id": str(relatorio_id),
+            "versao": AGREGADOS_VERSAO,
+            **{fonte: agregados.get(fonte) for fonte in FONTES},
+            "criado_em": datetime.utcnow()
+        },
+        upsert=True
+    )
+
+
+def copiar_agregados_relatorio(db_instance, relatorio_origem_id: str, relatorio_novo_id: str) -> None:
+    """Relatório reaproveitado do cache: os agregados são os mesmos do relatório de origem."""
+    origem = buscar_agregados_relatorio(db_instance, relatorio_origem_id)
+    if origem:
+        registrar_agregados_relatorio(db_instance, relatorio_novo_id, origem)
+
+
+def buscar_agregados_relatorio(db_instance, relatorio_id: str) -> Optional[dict]:
+    documento = db_instance.find_one(COLECAO_AGREGADOS_RELATORIOS, {"relatorio_id": str(relatorio_id)})
+    if not documento or documento.get("versao") != AGREGADOS_VERSAO:
+        return None
+    return documento
+
+
+def excluir_agregados_relatorio(db_instance, relatorio_id: Optional[str] = None) -> None:
+    """Remove os agregados de um relatório (ou de todos, sem `relatorio_id`)."""
+    if relatorio_id is None:
+        db_instance.delete_many(COLECAO_AGREGADOS_RELATORIOS, {})
+    else:
+        db_instance.delete_one(COLECAO_AGREGADOS_RELATORIOS, {"relatorio_id": str(relatorio_id)})
+
+
+def _comparar_fonte(base: Optional[dict], atual: Optional[dict]) -> dict:
+    if base is None or atual is None:
+        # Fonte sem scans em um dos relatórios: não dá para dizer o que foi corrigido ou é novo
+        return {"comparavel": False, "base_com_scans": base is not None, "atual_com_scans": atual is not None}
+
+    vulns_base = {v["nome"]: v for v in base.get("vulnerabilidades", [])}
+    vulns_atual = {v["nome"]: v for v in atual.get("vulnerabilidades", [])}
+
+    persistentes = []
+    for nome in sorted(vulns_base.keys() & vulns_atual.keys()):
+        antes, depois = vulns_base[nome], vulns_atual[nome]
+        persistentes.append({
+            "nome": nome,
+            "instancias_antes": antes["instancias"],
+            "instancias_depois": depois["instancias"],
+            "instancias_alteradas": antes["hash_instancias"] != depois["hash_instancias"],
+        })
+
+    riscos_base, riscos_atual = base.get("riscos", {}), atual.get("riscos", {})
+    comparacao = {
+        "comparavel": True,
+        "novas": [
+            {"nome": nome, "instancias": vulns_atual[nome]["instancias"], "severidades": vulns_atual[nome]["severidades"]}
+            for nome in sorted(vulns_atual.keys() - vulns_base.keys())
+        ],
+        "corrigidas": [
+            {"nome": nome, "instancias": vulns_base[nome]["instancias"], "severidades": vulns_base[nome]["severidades"]}
+            for nome in sorted(vulns_base.keys() - vulns_atual.keys())
+        ],
+        "persistentes": persistentes,
+        "riscos": {
+            risco: {"antes": riscos_base.get(risco, 0), "depois": riscos_atual.get(risco, 0)}
+            for risco in sorted(riscos_base.keys() | riscos_atual.keys())
+        },
+    }
+
+    if "sites" in base or "sites" in atual:
+        totais_base = {linha["Site"]: linha["Total"] for linha in base.get("sites", [])}
+        totais_atual = {linha["Site"]: linha["Total"] for linha in atual.get("sites", [])}
+        comparacao["sites"] = [
+            {"site": site, "antes": totais_base.get(site), "depois": totais_atual.get(site)}
+            for site in sorted(totais_base.keys() | totais_atual.keys())
+        ]
+    if "total_hosts" in base or "total_hosts" in atual:
+        comparacao["total_hosts"] = {"antes": base.get("total_hosts", 0), "depois": atual.get("total_hosts", 0)}
+    return comparacao
+
+
+def comparar_agregados(base: dict, atual: dict) -> dict:
+    """
+    Compara os agregados de dois relatórios, por fonte: vulnerabilidades novas (só no
+    atual), corrigidas (só na base) e persistentes (nas duas, com a quantidade de
+    instâncias antes e depois e se o conjunto de instâncias mudou), além das contagens por
+    severidade e dos totais por site ou de hosts. Uma fonte sem scans em um dos relatórios
+    volta com "comparavel": False.
+    """
+    return {fonte: _comparar_fonte(base.get(fonte), atual.get(fonte)) for fonte in FONTES}
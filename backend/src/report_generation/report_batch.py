@@ -0,0 +1,358 @@
+"""
+Geração de relatórios em lote: os relatórios de várias listas (ex.: todas as secretarias de
+um ciclo de auditoria) em paralelo, distribuídos entre as instâncias do backend.
+
+Cada relatório do lote é um trabalho do tipo "relatorio" na fila do MongoDB
+(core.work_queue). O consumidor da fila de cada nó reivindica trabalhos até o limite do nó
+e os executa em processos separados (contexto spawn), criados uma vez e reaproveitados: cada
+um carrega o catálogo, os descritivos e os templates LaTeX ao iniciar e os mantém
+memorizados (report_pipeline.carregar_recursos_compartilhados). Um semáforo compartilhado
+entre os processos do nó limita os pdflatex simultâneos, inclusive os da compilação em
+unidades.
+
+A situação do lote e de cada lista fica na coleção lotes_relatorios, consultada por
+/reports/lotes/<id>. Quem registra o último relatório do lote (em qualquer nó) o finaliza e,
+se pedido, gera o zip com os PDFs.
+
+Cada tentativa cria o relatório com um id escolhido antes (gravado no trabalho da fila). Se
+ela falhar ou o resultado for descartado (lease perdido), o relatório criado é excluído; se
+o nó morrer no meio, a tentativa seguinte o exclui. Só falhas transitórias são repetidas
+(processo de geração encerrado, MongoDB indisponível): uma lista inexistente ou um LaTeX que
+não compila falhariam de novo.
+
+Variáveis de ambiente:
+- LOTE_RELATORIOS_PROCESSOS: relatórios gerados ao mesmo tempo por nó (padrão: número de CPUs).
+- LOTE_RELATORIOS_PDFLATEX: pdflatex simultâneos por nó (padrão: número de CPUs).
+- FILA_CONSUMIR_RELATORIOS: "0" faz o nó só enfileirar, sem gerar relatórios (padrão "1").
+- FILA_LEASE_SEGUNDOS (120), FILA_INTERVALO_BUSCA_SEGUNDOS (5), FILA_MAX_TENTATIVAS (3)
+  e FILA_NO_ID (padrão: o hostname).
+"""
+
+import multiprocessing
+import os
+import re
+import shutil
+import threading
+import zipfile
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+from bson.objectid import ObjectId
+
+from ..core.config import Config
+from ..core.logger import app_logger
+from ..core.logging_config import configurar_logging, obter_logger
+from ..core.metrics import ACTIVE_JOBS
+from ..core.work_queue import FilaTrabalhos, TrabalhadorFila, LeaseVencido, LEASE_PADRAO_SEGUNDOS, MAX_TENTATIVAS_PADRAO, identificador_no
+from .latex_compiler import definir_limite_pdflatex
+from .report_aggregates import excluir_agregados_relatorio
+
+logger = obter_logger(__name__)
+
+# Coleção com a situação dos lotes e de cada relatório do lote
+COLECAO_LOTES_RELATORIOS = "lotes_relatorios"
+
+# Tipo dos trabalhos de geração de relatório na fila
+TIPO_TRABALHO_RELATORIO = "relatorio"
+
+# Subpasta de caminho_shared_relatorios com os .zip dos lotes
+PASTA_LOTES = "lotes"
+
+MAX_RELATORIOS_POR_LOTE = 500
+
+# Campos do formulário de geração aceitos por relatório (os de report_pipeline.gerar_relatorio_de_lista)
+CAMPOS_FORMULARIO = (
+    "idLista", "nomeSecretaria", "siglaSecretaria", "dataInicio", "dataFim", "ano", "mes",
+    "linkGoogleDrive", "forcarRegeneracao", "compilacaoParalela", "agruparUris",
+)
+
+STATUS_PENDENTE = "pendente"
+STATUS_EXECUTANDO = "executando"
+STATUS_CONCLUIDO = "concluido"
+STATUS_CONCLUIDO_COM_ERROS = "concluido_com_erros"
+STATUS_ERRO = "erro"
+
+
+def _inicializar_processo(arquivo_config: str, semaforo_pdflatex) -> None:
+    """Inicialização de cada processo do lote: configuração, limite do pdflatex e recursos memorizados."""
+    from .report_pipeline import carregar_recursos_compartilhados
+
+    configurar_logging()
+    config = Config(arquivo_config)
+    definir_limite_pdflatex(semaforo_pdflatex)
+    carregar_recursos_compartilhados(config)
+
+
+def _gerar_relatorio_do_lote(dados: dict, relatorio_id: str) -> Tuple[Any, int]:
+    """Executado nos processos do lote."""
+    from .report_pipeline import gerar_relatorio_de_lista
+
+    return gerar_relatorio_de_lista(dados, Config(), relatorio_id=relatorio_id)
+
+
+def caminho_zip_lote(caminho_shared_relatorios: str, id_lote: str) -> Path:
+    return Path(caminho_shared_relatorios) / PASTA_LOTES / f"{id_lote}.zip"
+
+
+def _nome_pdf_no_zip(dados: dict, relatorio_id: str) -> str:
+    sigla = re.sub(r'[^A-Za-z0-9_-]+', '-', str(dados.get("siglaSecretaria") or "")).strip('-')
+    return f"Relatorio_Auditoria_{sigla}_{relatorio_id}.pdf" if sigla else f"Relatorio_Auditoria_{relatorio_id}.pdf"
+
+
+class GeradorRelatoriosEmLote:
+    """
+    Enfileira os lotes de relatórios e, com iniciar_consumo(), gera neste nó os relatórios
+    reivindicados da fila.
+
+    - max_processos: relatórios gerados ao mesmo tempo neste nó (LOTE_RELATORIOS_PROCESSOS).
+    - max_pdflatex: pdflatex simultâneos entre todos os processos do nó (LOTE_RELATORIOS_PDFLATEX).
+    """
+
+    def __init__(self, config, arquivo_config: str = "config.json", max_processos: Optional[int] = None,
+                 max_pdflatex: Optional[int] = None, fila: Optional[FilaTrabalhos] = None):
+        self.config = config
+        self.arquivo_config = arquivo_config
+        self.max_processos = max_processos or int(os.getenv("LOTE_RELATORIOS_PROCESSOS", "0")) or os.cpu_count() or 1
+        self.max_pdflatex = max_pdflatex or int(os.getenv("LOTE_RELATORIOS_PDFLATEX", "0")) or os.cpu_count() or 1
+        self.fila = fila or FilaTrabalhos()
+        self.db = self.fila.db
+        self._lock = threading.Lock()
+        self._executor = None
+        # Executor de cada execução em andamento, para descartar o executor certo se ele quebrar
+        self._executor_por_futuro = {}
+        self._trabalhador = None
+
+    def _obter_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: os processos não herdam o estado do servidor (threads, conexões do MongoClient)
+                contexto = multiprocessing.get_context("spawn")
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_processos,
+                    mp_context=contexto,
+                    initializer=_inicializar_processo,
+                    initargs=(self.arquivo_config, contexto.BoundedSemaphore(self.max_pdflatex))
+                )
+            return self._executor
+
+    def _descartar_executor(self, executor: ProcessPoolExecutor) -> None:
+        """Um processo encerrado inesperadamente inutiliza o executor: o próximo trabalho cria outro."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def iniciar_consumo(self) -> bool:
+        """
+        Inicia o consumidor da fila de relatórios neste processo. Deve haver um único
+        consumidor por nó (ver main.iniciar_servicos_de_fundo), para que o limite de
+        processos valha para o nó. Retorna False se FILA_CONSUMIR_RELATORIOS=0.
+        """
+        if os.getenv("FILA_CONSUMIR_RELATORIOS", "1") == "0":
+            return False
+        try:
+            self.fila.garantir_indices()
+        except Exception as e:
+            logger.warning(f"Não foi possível criar os índices da fila de trabalhos: {e}")
+
+        self._trabalhador = TrabalhadorFila(
+            self.fila,
+            [TIPO_TRABALHO_RELATORIO],
+            submeter=self._submeter,
+            ao_terminar=self._ao_terminar,
+            no=identificador_no(),
+            max_concorrentes=self.max_processos,
+            lease_segundos=float(os.getenv("FILA_LEASE_SEGUNDOS", LEASE_PADRAO_SEGUNDOS)),
+            intervalo_busca=float(os.getenv("FILA_INTERVALO_BUSCA_SEGUNDOS", "5"))
+        )
+        self._trabalhador.iniciar()
+        return True
+
+    def parar(self, aguardar_segundos: float = 0) -> None:
+        """
+        Para o consumidor. Com `aguardar_segundos`, espera até esse tempo que os relatórios
+        em execução terminem (com os leases renovados); os que não terminarem são
+        abandonados e retomados por outro nó quando o lease vencer.
+        """
+        if self._trabalhador is not None:
+            if aguardar_segundos > 0:
+                self._trabalhador.encerrar(aguardar_segundos)
+            else:
+                self._trabalhador.parar()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def iniciar_lote(self, relatorios: List[dict], gerar_zip: bool = False, prioridade: int = 0) -> str:
+        """
+        Registra o lote e enfileira um trabalho por relatório; lotes de maior `prioridade`
+        são gerados antes. `relatorios` traz os campos do formulário de cada lista (ver
+        CAMPOS_FORMULARIO). Retorna o id do lote.
+        """
+        itens = [{campo: dados[campo] for campo in CAMPOS_FORMULARIO if campo in dados} for dados in relatorios]
+
+        id_lote = self.db.insert_one(COLECAO_LOTES_RELATORIOS, {
+            "status": STATUS_PENDENTE,
+            "gerarZip": bool(gerar_zip),
+            "prioridade": int(prioridade),
+            "total": len(itens),
+            "finalizados": 0,
+            "criadoEm": datetime.utcnow(),
+            "itens": [
+                {
+                    "indice": indice,
+                    "idLista": dados.get("idLista"),
+                    "nomeSecretaria": dados.get("nomeSecretaria"),
+                    "siglaSecretaria": dados.get("siglaSecretaria"),
+                    "status": STATUS_PENDENTE,
+                    "relatorioId": None,
+                    "erro": None,
+                    "tentativas": 0,
+                }
+                for indice, dados in enumerate(itens)
+            ],
+        }).inserted_id
+
+        self.fila.enfileirar_varios(
+            TIPO_TRABALHO_RELATORIO,
+            [{"idLote": str(id_lote), "indice": indice, "dados": dados} for indice, dados in enumerate(itens)],
+            prioridade=prioridade,
+            max_tentativas=int(os.getenv("FILA_MAX_TENTATIVAS", MAX_TENTATIVAS_PADRAO))
+        )
+        return str(id_lote)
+
+    def _atualizar_item(self, payload: dict, campos: dict) -> None:
+        self.db.update_one(
+            COLECAO_LOTES_RELATORIOS,
+            {"_id": ObjectId(payload["idLote"])},
+            {f"itens.{payload['indice']}.{campo}": valor for campo, valor in campos.items()}
+        )
+
+    def _submeter(self, trabalho: dict) -> Future:
+        payload = trabalho["payload"]
+        agora = datetime.utcnow()
+        self._atualizar_item(payload, {"status": STATUS_EXECUTANDO, "no": trabalho["no"], "inicio": agora, "tentativas": trabalho["tentativas"]})
+        self.db.update_one(COLECAO_LOTES_RELATORIOS, {"_id": ObjectId(payload["idLote"]), "status": STATUS_PENDENTE}, {"status": STATUS_EXECUTANDO, "inicio": agora})
+
+        # Relatório de uma tentativa anterior interrompida (nó encerrado no meio da geração)
+        self._excluir_relatorio_tentativa(trabalho.get("relatorioTentativa"))
+        relatorio_id = str(ObjectId())
+        if not self.fila.anotar(trabalho, {"relatorioTentativa": relatorio_id}):
+            trabalho["relatorioTentativa"] = relatorio_id
+
+        executor = self._obter_executor()
+        futuro = executor.submit(_gerar_relatorio_do_lote, payload["dados"], relatorio_id)
+        self._executor_por_futuro[futuro] = executor
+        ACTIVE_JOBS.inc(kind="report_batch")
+        futuro.add_done_callback(lambda _: ACTIVE_JOBS.dec(kind="report_batch"))
+        return futuro
+
+    def _ao_terminar(self, trabalho: dict, futuro: Future) -> None:
+        payload = trabalho["payload"]
+        executor = self._executor_por_futuro.pop(futuro, None)
+        # Só falhas transitórias são repetidas; as da geração (ex.: "Falha na geração do PDF") se repetiriam
+        repetir = False
+        try:
+            resultado, status = futuro.result()
+        except BrokenProcessPool as e:
+            # Sem executor registrado, a falha foi na submissão: o quebrado é o atual
+            executor = executor or self._executor
+            if executor is not None:
+                self._descartar_executor(executor)
+            resultado, status = {"error": f"Processo de geração encerrado inesperadamente: {e}"}, 500
+            repetir = True
+        except LeaseVencido as e:
+            resultado, status = {"error": str(e)}, 500
+        except Exception as e:
+            logger.exception(f"Erro no relatório {payload['indice']} do lote {payload['idLote']}: {e}")
+            resultado, status = {"error": f"Erro interno ao gerar relatório: {str(e)}"}, 500
+            repetir = True
+
+        if status == 200:
+            if not self.fila.concluir(trabalho, {"relatorioId": resultado}):
+                logger.warning(f"Relatório {resultado} do lote {payload['idLote']} gerado após a perda do lease; descartado.")
+                self._excluir_relatorio_tentativa(trabalho.get("relatorioTentativa"))
+                return
+            self._finalizar_item(payload, {"status": STATUS_CONCLUIDO, "relatorioId": resultado, "erro": None, "fim": datetime.utcnow()})
+            return
+
+        self._excluir_relatorio_tentativa(trabalho.get("relatorioTentativa"))
+        erro = resultado.get("error")
+        novo_status = self.fila.falhar(trabalho, erro, repetir=repetir or status == 503)
+        if novo_status == STATUS_PENDENTE:
+            self._atualizar_item(payload, {"status": STATUS_PENDENTE, "erro": erro})
+        elif novo_status == STATUS_ERRO:
+            self._finalizar_item(payload, {"status": STATUS_ERRO, "erro": erro, "fim": datetime.utcnow()})
+
+    def _excluir_relatorio_tentativa(self, relatorio_id: Optional[str]) -> None:
+        """Exclui o relatório (documento, agregados e pasta) criado por uma tentativa que não foi aceita."""
+        if not relatorio_id:
+            return
+        try:
+            self.db.delete_one("relatorios", {"_id": ObjectId(relatorio_id)})
+            excluir_agregados_relatorio(self.db, relatorio_id)
+        except Exception as e:
+            # O id continua gravado no trabalho: uma nova tentativa tenta excluí-lo de novo
+            logger.warning(f"Não foi possível excluir o relatório {relatorio_id} da tentativa descartada: {e}")
+            return
+        shutil.rmtree(Path(self.config.caminho_shared_relatorios) / relatorio_id, ignore_errors=True)
+
+    def _finalizar_item(self, payload: dict, campos: dict) -> None:
+        """Registra o resultado final de um relatório; quem registra o último finaliza o lote."""
+        self._atualizar_item(payload, campos)
+        lote = self.db.find_one_and_update(
+            COLECAO_LOTES_RELATORIOS,
+            {"_id": ObjectId(payload["idLote"])},
+            {"$inc": {"finalizados": 1}}
+        )
+        if lote and lote["finalizados"] == lote["total"]:
+            self._finalizar_lote(lote)
+
+    def _finalizar_lote(self, lote: dict) -> None:
+        id_lote = lote["_id"]
+        concluidos = [
+            ({"siglaSecretaria": item.get("siglaSecretaria")}, item["relatorioId"])
+            for item in lote["itens"] if item.get("status") == STATUS_CONCLUIDO and item.get("relatorioId")
+        ]
+
+        final = {"fim": datetime.utcnow()}
+        if lote.get("gerarZip") and concluidos:
+            final["zip"] = self._gerar_zip(str(id_lote), concluidos)
+        if len(concluidos) == lote["total"]:
+            final["status"] = STATUS_CONCLUIDO
+        else:
+            final["status"] = STATUS_CONCLUIDO_COM_ERROS if concluidos else STATUS_ERRO
+        self.db.update_one(COLECAO_LOTES_RELATORIOS, {"_id": id_lote}, final)
+
+        app_logger.log_action(
+            action="REPORT_BATCH_GENERATED",
+            user_login="SYSTEM_USER_GENERATION",
+            details={"batch_id": str(id_lote), "total": lote["total"], "generated": len(concluidos), "status": final["status"]}
+        )
+
+    def _gerar_zip(self, id_lote: str, concluidos: List[Tuple[dict, str]]) -> Optional[str]:
+        """Junta os PDFs gerados em <caminho_shared_relatorios>/lotes/<id do lote>.zip."""
+        destino = caminho_zip_lote(self.config.caminho_shared_relatorios, id_lote)
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        temporario = destino.with_name(f".{destino.name}.tmp")
+        try:
+            # ZIP_STORED: os PDFs já são comprimidos
+            with zipfile.ZipFile(temporario, "w", compression=zipfile.ZIP_STORED) as arquivo_zip:
+                for dados, relatorio_id in concluidos:
+                    pdf_path = Path(self.config.caminho_shared_relatorios) / relatorio_id / "relatorio_preprocessado" / "RelatorioPronto" / "main.pdf"
+                    if pdf_path.exists():
+                        arquivo_zip.write(pdf_path, arcname=_nome_pdf_no_zip(dados, relatorio_id))
+                    else:
+                        logger.warning(f"PDF do relatório {relatorio_id} não encontrado; fora do zip do lote {id_lote}.")
+            os.replace(temporario, destino)
+            return str(destino)
+        except OSError as e:
+            logger.error(f"Não foi possível gerar o zip do lote {id_lote}: {e}")
+            return None
+        finally:
+            if temporario.exists():
+                temporario.unlink()
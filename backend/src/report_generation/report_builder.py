@@ -6,11 +6,19 @@ from typing import List, Dict, Any
 from pathlib import Path
 from datetime import datetime, date
 from babel.dates import format_date
-import unicodedata # Adicionado para transliteração de nomes de arquivo de imagem
 
 # Importa as funções de utilidade e JSON do core
-from ..core.json_utils import carregar_json_utf, _load_data_
+from ..core.json_utils import carregar_json_memorizado, _load_data_
 from ..core.config import Config
+from ..core.metrics import medir_etapa
+from ..core.logging_config import obter_logger
+from ..data_processing.uri_canonicalizer import agrupar_em_modelos
+from .latex_templates import escape_latex, renderizar_template, renderizar_figura
+
+logger = obter_logger(__name__)
+
+# Instâncias (URIs ou hosts) listadas no item da vulnerabilidade; acima disso, a lista completa vai para o Anexo A
+LIMITE_INSTANCIAS_NO_ITEM = 10
 
 # Inicializa a configuração
 config = Config("config.json")
@@ -133,9 +141,10 @@ def gerar_relatorio_txt(output_file: str, risk_factor_counts: dict, common_vulne
             output.write(f"\nTotal de sites: {len(targets)}\n")
             output.write("\n".join(targets))
             output.write("\n\nVulnerabilidades em comum, entre os sites/URI:\n\n")
-            sorted_vulnerabilities = sorted(common_vulnerabilities.items(), key=lambda x: len(set(x[1])), reverse=True)
+            # As URIs já chegam sem repetição (conjuntos montados na agregação)
+            sorted_vulnerabilities = sorted(common_vulnerabilities.items(), key=lambda x: len(x[1]), reverse=True)
             for (name, plugin_id), uris in sorted_vulnerabilities:
-                unique_uris = sorted(list(set(uris)))
+                unique_uris = sorted(uris)
                 output.write(f"\nVulnerabilidade: {name}\n")
                 # REMOVIDO: output.write(f"Plugin ID: {plugin_id}\n")
                 output.write(f"Total de URI Afetadas: {len(unique_uris)}\n") # CORRIGIDO: Sempre escreve o total
@@ -145,14 +154,16 @@ def gerar_relatorio_txt(output_file: str, risk_factor_counts: dict, common_vulne
                         output.write(f"{url}\n")
                 else: # Se não houver URIs, ainda indica
                     output.write("Nenhuma URI afetada.\n") # Ou deixe em branco se preferir
-        print(f"Relatório TXT para Web Apps gerado em: {output_file}")
+        logger.info(f"Relatório TXT para Web Apps gerado em: {output_file}")
     except Exception as e:
-        print(f"Erro ao gerar relatório TXT para Web Apps: {e}")
+        logger.error(f"Erro ao gerar relatório TXT para Web Apps: {e}")
                     
 def gerar_relatorio_txt_csv(output_file: str, risk_factor_counts: dict, common_vulnerabilities: dict, targets: List[str]):
     """
     Gera um relatório de texto com as vulnerabilidades de servidores e as informações coletadas.
     """
+    from ..core.host_set import ConjuntoHosts
+
     try:
         with open(output_file, 'w', encoding='utf-8') as output:
             output.write("Resumo das Vulnerabilidades por Risk Factor (Servidores):\n\n")
@@ -172,7 +183,8 @@ def gerar_relatorio_txt_csv(output_file: str, risk_factor_counts: dict, common_v
                 reverse=True
             )
             for name, data in sorted_vulnerabilities:
-                hosts_afetados = sorted(data['hosts'])
+                # Ordem natural dos endereços (10.0.0.9 antes de 10.0.0.10)
+                hosts_afetados = list(ConjuntoHosts.de_hosts(data['hosts']))
                 riscos = sorted(data['risks'])
                 output.write(f"\nVulnerabilidade: {name}\n")
                 output.write(f"Severidade: {', '.join(riscos).capitalize()}\n")
@@ -180,9 +192,9 @@ def gerar_relatorio_txt_csv(output_file: str, risk_factor_counts: dict, common_v
                 output.write("Hosts Afetados:\n")
                 for host in hosts_afetados:
                     output.write(f"{host}\n")
-        print(f"Relatório TXT para Servidores gerado em: {output_file}")
+        logger.info(f"Relatório TXT para Servidores gerado em: {output_file}")
     except Exception as e:
-        print(f"Erro ao gerar relatório TXT para Servidores: {e}")
+        logger.error(f"Erro ao gerar relatório TXT para Servidores: {e}")
 
 def carregar_descritivo_vulnerabilidades(caminho_arquivo: str) -> List[Dict[str, Any]]:
     """
@@ -206,77 +218,20 @@ def carregar_descritivo_vulnerabilidades(caminho_arquivo: str) -> List[Dict[str,
             })
     return descritivo
 
-def escape_path_for_latex(path_str: str) -> str:
-    """
-    Escapa uma string de caminho de arquivo para inclusão segura em comandos \includegraphics do LaTeX.
-    - Converte barras invertidas para barras normais.
-    - Translitera caracteres acentuados para ASCII.
-    - Substitui espaços por hífens.
-    - Escapa caracteres LaTeX problemáticos em nomes de arquivo/caminhos.
-    - Garante uma extensão de imagem válida e trata pontos dentro da parte do nome do arquivo.
-    """
-    if not isinstance(path_str, str):
-        return path_str
-
-    # Normaliza os separadores de caminho (Windows para Unix-like)
-    path_str = path_str.replace('\\', '/')
-
-    # Divide o caminho em diretório e nome base do arquivo
-    dir_name, base_name = os.path.split(path_str)
-
-    # 1. Limpa possíveis hífens ou caracteres malformados que antecedem a extensão
-    # Ex: 'image.png-' -> 'image.png'
-    base_name = re.sub(r'-(?=\.(png|jpg|jpeg|gif|pdf)$)', '', base_name, flags=re.IGNORECASE)
-    base_name = base_name.rstrip('-') # Remove outros hífens no final
-
-    # 2. Translitera caracteres acentuados para ASCII (ex: 'Configurações' -> 'Configuracoes')
-    base_name = unicodedata.normalize('NFKD', base_name).encode('ascii', 'ignore').decode('utf-8')
-
-    # 3. Substitui espaços por hífens
-    base_name = base_name.replace(' ', '-')
-
-    # 4. Garante uma extensão de arquivo apropriada e lida com pontos dentro do nome do arquivo
-    filename_stem, ext = os.path.splitext(base_name)
-    valid_extensions = ['.png', '.jpg', '.jpeg', '.gif', '.pdf']
-
-    if ext and ext.lower() in valid_extensions:
-        # Se uma extensão válida for encontrada, mantém-na
-        final_ext = ext.lower()
-        # Substitui quaisquer outros pontos no 'filename_stem' por hífens
-        filename_stem = filename_stem.replace('.', '-')
-    else:
-        # Se nenhuma extensão válida for encontrada, ou for uma "extensão falsa" como ".0-pollution",
-        # substitui todos os pontos no 'base_name' original por hífens e adiciona .png
-        filename_stem = base_name.replace('.', '-')
-        final_ext = ".png"
-
-    # Reconstrói o nome base do arquivo limpo
-    base_name_cleaned = filename_stem + final_ext
-
-    # 5. Escapa caracteres especiais do LaTeX no caminho completo (incluindo o diretório)
-    # Reúne o diretório e o nome base limpo para o caminho completo antes do escape final
-    full_path_cleaned = os.path.join(dir_name, base_name_cleaned).replace('\\', '/')
-
-    # Escapa caracteres especiais do LaTeX
-    full_path_escaped = full_path_cleaned.replace('_', '\\_')
-    full_path_escaped = full_path_escaped.replace('%', '\\%')
-    full_path_escaped = full_path_escaped.replace('$', '\\$')
-    full_path_escaped = full_path_escaped.replace('&', '\\&')
-    full_path_escaped = full_path_escaped.replace('~', '\\textasciitilde{}')
-    full_path_escaped = full_path_escaped.replace('^', '\\textasciicircum{}')
-    full_path_escaped = full_path_escaped.replace('{', '\\{')
-    full_path_escaped = full_path_escaped.replace('}', '\\}')
-
-    return full_path_escaped
-
 def gerar_conteudo_latex_para_vulnerabilidades(
     vulnerabilidades_do_relatorio_txt: List[Dict[str, Any]],
     vulnerabilidades_detalhes_json: List[Dict[str, Any]],
     descritivo_vulnerabilidades_json: Dict[str, Any],
-    tipo_vulnerabilidade: str
+    tipo_vulnerabilidade: str,
+    agrupar_uris: bool = False
 ) -> str:
-    conteudo = ""
-    anexo_conteudo = ""
+    """
+    Gera o LaTeX das vulnerabilidades agrupadas por categoria e subcategoria. Com
+    `agrupar_uris`, as URIs de Web App que só diferem em identificadores do caminho ou em
+    valores da query são listadas como um modelo com a quantidade (ex.: /produto/{id} ×312).
+    """
+    from ..core.host_set import ConjuntoHosts
+
     categorias_agrupadas: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
     categorias_formatadas: Dict[str, str] = {}
     vulnerabilidades_sem_categoria: List[str] = []
@@ -315,7 +270,7 @@ def gerar_conteudo_latex_para_vulnerabilidades(
                 "Imagem": imagem,
             }
             if tipo_vulnerabilidade == "webapp":
-                item_para_agrupar["Total de URIs Afetadas"] = v.get("Total de URIs Afetadas", 0)
+                item_para_agrupar["Total de URIs Afetadas"] = v.get("Total de URI Afetadas") or len(v.get("URI Afetadas", []))
                 item_para_agrupar["URIs Afetadas"] = v.get("URI Afetadas", [])
             else:
                 item_para_agrupar["Total de Hosts Afetados"] = v.get("Total de Hosts Afetados", 0)
@@ -330,6 +285,7 @@ def gerar_conteudo_latex_para_vulnerabilidades(
         categorias_ordenadas.remove(outras_criticas_key)
         categorias_ordenadas.append(outras_criticas_key)
 
+    categorias = []
     for categoria_padronizada in categorias_ordenadas:
         categoria_formatada = categorias_formatadas.get(categoria_padronizada, categoria_padronizada)
         # Primeiro, encontre a descrição da categoria principal
@@ -338,8 +294,8 @@ def gerar_conteudo_latex_para_vulnerabilidades(
              if item.get("categoria") == categoria_padronizada and "subcategoria" not in item),
             "Descrição não disponível."
         )
-        conteudo += f"%-------------- INÍCIO DA CATEGORIA {categoria_formatada} --------------\n"
-        conteudo += f"\\subsection{{{categoria_formatada}}}\n{escape_latex(descricao_categoria)}\n\n"
+        categoria_latex = {"nome": categoria_formatada, "descricao": descricao_categoria, "subcategorias": []}
+        categorias.append(categoria_latex)
 
         subcategorias = categorias_agrupadas.get(categoria_padronizada, {})
         for subcategoria_padronizada in sorted(subcategorias.keys(), key=lambda x: categorias_formatadas.get(x, x)):
@@ -363,11 +319,11 @@ def gerar_conteudo_latex_para_vulnerabilidades(
                 for item_sub_desc in categoria_do_descritivo["subcategorias"]:
                     item_desc_subcategoria_name = item_sub_desc.get("subcategoria")
 
-                    # ADD THESE PRINT STATEMENTS for debugging
-                    print(f"Comparing SUB: target_cat='{target_categoria_padded}' (found in descritivo_list)")
-                    print(f"Comparing SUB: target_sub='{target_subcategoria_padded}' vs item_desc_sub_name='{item_desc_subcategoria_name}'")
-                    print(f"Types SUB: target_sub={type(target_subcategoria_padded)}, item_desc_sub_name={type(item_desc_subcategoria_name)}")
-
+                    # Argumentos só são formatados se DEBUG estiver habilitado para este módulo
+                    logger.debug(
+                        "Comparando subcategoria: categoria=%r alvo=%r descritivo=%r",
+                        target_categoria_padded, target_subcategoria_padded, item_desc_subcategoria_name
+                    )
 
                     if item_desc_subcategoria_name == target_subcategoria_padded:
                         descricao_subcategoria = item_sub_desc["descricao"]
@@ -375,124 +331,85 @@ def gerar_conteudo_latex_para_vulnerabilidades(
                         break
 
             if not found_match_in_descritivo:
-                print(f"WARNING: No description found for category '{target_categoria_padded}' and subcategory '{target_subcategoria_padded}'")
-
-
-            conteudo += f"%-------------- INÍCIO DA SUBCATEGORIA {subcategoria_formatada} --------------\n"
-            conteudo += f"\\subsubsection{{{subcategoria_formatada}}}\n{escape_latex(descricao_subcategoria)}\n\n"
-            conteudo += "\\begin{enumerate}\n"
+                logger.warning(f"No description found for category '{target_categoria_padded}' and subcategory '{target_subcategoria_padded}'")
 
+            vulnerabilidades_latex = []
             vulns_ordenadas = sorted(subcategorias[subcategoria_padronizada], key=lambda x: x['Vulnerabilidade'])
             for v in vulns_ordenadas:
-                conteudo += f"%-------------- INÍCIO DA VULNERABILIDADE {v['Vulnerabilidade']} --------------\n"
-                conteudo += f"\\item \\textbf{{\\texttt{{{escape_latex(v['Vulnerabilidade'])}}}}}\n"
-                if v["Imagem"]:
-                    caminho_imagem_latex = escape_path_for_latex(v["Imagem"])
-                    conteudo += (
-                        r"""
-                        \begin{figure}[h!]
-                        \centering
-                        \includegraphics[width=0.8\textwidth]{""" + caminho_imagem_latex + r"""}
-                        \end{figure}
-                        \FloatBarrier
-                        """
-                    )
-                conteudo += f"\\textbf{{Descrição:}} {escape_latex(v['Descricao'])}\n\n"
-                conteudo += f"\\textbf{{Solução:}} {escape_latex(v['Solucao'])}\n\n"
-
                 if tipo_vulnerabilidade == "webapp":
-                    conteudo += f"\\textbf{{Total de URIs Afetadas:}} {v.get('Total de URIs Afetadas', 0)}\n\n"
-                    instancias_afetadas = v.get("URIs Afetadas", [])
-                    label_instancias = "URIs Afetadas"
+                    if agrupar_uris:
+                        instancias_afetadas = agrupar_em_modelos(v.get("URIs Afetadas", []))
+                    else:
+                        instancias_afetadas = [(uri, 1) for uri in v.get("URIs Afetadas", [])]
+                    rotulo_total, total = "Total de URIs Afetadas", v.get('Total de URIs Afetadas', 0)
+                    rotulo_instancias = "URIs Afetadas"
                 else:
-                    conteudo += f"\\textbf{{Total de Hosts Afetados:}} {v.get('Total de Hosts Afetados', 0)}\n\n"
-                    instancias_afetadas = v.get("Hosts Afetados", [])
-                    label_instancias = "Hosts Afetados"
-
-                if len(instancias_afetadas) > 10:
-                    conteudo += f"\\textbf{{{label_instancias} (parcial):}}\n\\begin{{itemize}}\n"
-                    for instancia in instancias_afetadas[:10]:
-                        conteudo += f"    \\item \\url{{{instancia}}}\n"
-                    conteudo += "\\end{itemize}\n"
-                    conteudo += (
-                        "A lista completa das instâncias que possuem esta vulnerabilidade pode ser "
-                        f"encontrada no \\hyperref[anexoA]{{Anexo A}}.\\\\[0.5em]\n\n"
-                    )
-
-                    conteudo_anexo_vuln_nome = escape_latex(v['Vulnerabilidade'])
-                    anexo_conteudo += f"%-------------- INÍCIO DO ANEXO PARA {conteudo_anexo_vuln_nome} --------------\n"
-                    anexo_conteudo += f"\\subsubsection*{{{conteudo_anexo_vuln_nome} }}\n"
-                    anexo_conteudo += "\\begin{multicols}{3}\n\\small\n\\begin{itemize}\n"
-                    for instancia in instancias_afetadas:
-                        anexo_conteudo += f"    \\item \\url{{{instancia}}}\n"
-                    anexo_conteudo += "\\end{itemize}\n\\end{multicols}\n\n"
-                else:
-                    conteudo += f"\\textbf{{{label_instancias}:}}\n\\begin{{itemize}}\n"
-                    for instancia in instancias_afetadas:
-                        conteudo += f"    \\item \\url{{{instancia}}}\n"
-                    conteudo += "\\end{itemize}\n\n"
-                conteudo += f"%-------------- FIM DA VULNERABILIDADE {v['Vulnerabilidade']} --------------\n"
-
-            conteudo += "\\end{enumerate}\n"
-            conteudo += f"%-------------- FIM DA SUBCATEGORIA {subcategoria_formatada} --------------\n"
-
-        conteudo += f"%-------------- FIM DA CATEGORIA {categoria_formatada} --------------\n"
-
-    if anexo_conteudo:
-        conteudo += "%-------------- INÍCIO DO ANEXO A --------------\n"
-        conteudo += "\\section*{Anexo A}\n\\label{anexoA}\n"
-        conteudo += anexo_conteudo
-        conteudo += "%-------------- FIM DO ANEXO A --------------\n"
-
-    return conteudo
-
+                    # Endereços consecutivos viram um item só (CIDR ou intervalo), não um por host
+                    instancias_afetadas = [(faixa, 1) for faixa in ConjuntoHosts.de_hosts(v.get("Hosts Afetados", [])).faixas()]
+                    rotulo_total, total = "Total de Hosts Afetados", v.get('Total de Hosts Afetados', 0)
+                    rotulo_instancias = "Hosts Afetados"
+
+                vulnerabilidades_latex.append({
+                    "nome": v["Vulnerabilidade"],
+                    "imagem": v["Imagem"],
+                    "descricao": v["Descricao"],
+                    "solucao": v["Solucao"],
+                    "rotulo_total": rotulo_total,
+                    "total": total,
+                    "rotulo_instancias": rotulo_instancias,
+                    "instancias": instancias_afetadas,
+                })
+
+            categoria_latex["subcategorias"].append({
+                "nome": subcategoria_formatada,
+                "descricao": descricao_subcategoria,
+                "vulnerabilidades": vulnerabilidades_latex,
+            })
 
-def escape_latex(text: str) -> str:
-    """
-    Escapes special LaTeX characters in a string.
-    """
-    text = text.replace('&', '\\&')
-    text = text.replace('%', '\\%')
-    text = text.replace('$', '\\$')
-    text = text.replace('#', '\\#')
-    text = text.replace('_', '\\_')
-    text = text.replace('{', '\\{')
-    text = text.replace('}', '\\}')
-    text = text.replace('~', '\\textasciitilde{}')
-    text = text.replace('^', '\\textasciicircum{}')
-    # REMOVA A LINHA ABAIXO:
-    # text = text.replace('\\', '\\textbackslash{}')
-    return text
+    # Vulnerabilidades com mais instâncias do que cabem no item têm a lista completa no Anexo A
+    anexo = [
+        v for categoria in categorias for subcategoria in categoria["subcategorias"]
+        for v in subcategoria["vulnerabilidades"] if len(v["instancias"]) > LIMITE_INSTANCIAS_NO_ITEM
+    ]
+    return renderizar_template(
+        "vulnerabilidades.tex.j2",
+        categorias=categorias,
+        anexo=anexo,
+        limite_instancias=LIMITE_INSTANCIAS_NO_ITEM
+    )
 
 
 def montar_conteudo_latex(
     caminho_saida_latex_temp: str,
     caminho_relatorio_txt_webapp: str,
     caminho_dados_vulnerabilidades_webapp_json: str, # Este será o caminho para o JSON ORIGINAL
-    caminho_descritivo_webapp_json: str # Este será o caminho para o JSON ORIGINAL
+    caminho_descritivo_webapp_json: str, # Este será o caminho para o JSON ORIGINAL
+    agrupar_uris: bool = False
 ):
     """
-    Monta o conteúdo LaTeX para o relatório de vulnerabilidades de Web Apps.
+    Monta o conteúdo LaTeX para o relatório de vulnerabilidades de Web Apps. Com
+    `agrupar_uris`, URIs que só diferem em identificadores são listadas como modelos.
     """
     try:
         vulnerabilidades_do_txt = carregar_vulnerabilidades_do_relatorio(caminho_relatorio_txt_webapp)
         # Carrega o JSON LIMPO (SEM O _cleaned.json, pois o usuário manteve o mesmo nome)
-        vulnerabilidades_dados_json = carregar_json_utf(caminho_dados_vulnerabilidades_webapp_json)
+        vulnerabilidades_dados_json = carregar_json_memorizado(caminho_dados_vulnerabilidades_webapp_json)
         # Carrega o JSON LIMPO (SEM O _cleaned.json, pois o usuário manteve o mesmo nome)
-        descritivo_json = carregar_json_utf(caminho_descritivo_webapp_json)
+        descritivo_json = carregar_json_memorizado(caminho_descritivo_webapp_json)
 
         conteudo_latex_final = gerar_conteudo_latex_para_vulnerabilidades(
             vulnerabilidades_do_txt,
             vulnerabilidades_dados_json,
             descritivo_json,
-            "webapp"
+            "webapp",
+            agrupar_uris=agrupar_uris
         )
 
         with open(caminho_saida_latex_temp, 'w', encoding='utf-8') as file:
             file.write(conteudo_latex_final)
-        print(f"Conteúdo LaTeX para Web Apps gerado em: {caminho_saida_latex_temp}")
+        logger.info(f"Conteúdo LaTeX para Web Apps gerado em: {caminho_saida_latex_temp}")
     except Exception as e:
-        print(f"Erro ao montar conteúdo LaTeX para Web Apps: {e}")
+        logger.error(f"Erro ao montar conteúdo LaTeX para Web Apps: {e}")
 
 def montar_conteudo_latex_csv(
     caminho_saida_latex_temp: str,
@@ -506,9 +423,9 @@ def montar_conteudo_latex_csv(
     try:
         vulnerabilidades_do_txt_csv = carregar_vulnerabilidades_do_relatorio_csv(caminho_relatorio_txt_servers)
         
-        vulnerabilidades_dados_json = carregar_json_utf(caminho_dados_vulnerabilidades_servers_json)
+        vulnerabilidades_dados_json = carregar_json_memorizado(caminho_dados_vulnerabilidades_servers_json)
         
-        descritivo_json = carregar_json_utf(caminho_descritivo_servers_json)
+        descritivo_json = carregar_json_memorizado(caminho_descritivo_servers_json)
 
         conteudo_latex_final = gerar_conteudo_latex_para_vulnerabilidades(
             vulnerabilidades_do_txt_csv,
@@ -519,9 +436,23 @@ def montar_conteudo_latex_csv(
 
         with open(caminho_saida_latex_temp, 'w', encoding='utf-8') as file:
             file.write(conteudo_latex_final)
-        print(f"Conteúdo LaTeX para Servidores gerado em: {caminho_saida_latex_temp}")
+        logger.info(f"Conteúdo LaTeX para Servidores gerado em: {caminho_saida_latex_temp}")
+    except Exception as e:
+        logger.error(f"Erro ao montar conteúdo LaTeX para Servidores: {e}")
+
+def montar_tabela_ranking_hosts_latex(caminho_saida_latex_temp: str, ranking: List[Dict[str, Any]], total_hosts: int):
+    """
+    Monta a tabela LaTeX dos hosts mais expostos (MatrizHostsVulnerabilidades.ranking_hosts).
+    Sem hosts, o arquivo fica vazio e a seção não mostra a tabela.
+    """
+    conteudo = renderizar_template("ranking_hosts.tex.j2", ranking=ranking, total_hosts=total_hosts)
+
+    try:
+        with open(caminho_saida_latex_temp, 'w', encoding='utf-8') as file:
+            file.write(conteudo)
+        logger.info(f"Tabela LaTeX do ranking de hosts gerada em: {caminho_saida_latex_temp}")
     except Exception as e:
-        print(f"Erro ao montar conteúdo LaTeX para Servidores: {e}")
+        logger.error(f"Erro ao montar a tabela LaTeX do ranking de hosts: {e}")
 
 
 def copiar_relatorio_exemplo(caminho_relatorio_exemplo: str, caminho_saida: str):
@@ -534,18 +465,18 @@ def copiar_relatorio_exemplo(caminho_relatorio_exemplo: str, caminho_saida: str)
         if dst.exists():
             shutil.rmtree(dst)
         shutil.copytree(src, dst)
-        print(f"Estrutura base do relatório copiada de '{src}' para '{dst}'")
+        logger.info(f"Estrutura base do relatório copiada de '{src}' para '{dst}'")
 
         # --- NOVO: Verificação explícita do arquivo preambulo.tex após a cópia ---
         copied_preambulo_path = dst / "preambulo.tex"
         if copied_preambulo_path.exists():
-            print(f"DEBUG: 'preambulo.tex' foi copiado com sucesso para: {copied_preambulo_path}")
+            logger.debug(f"'preambulo.tex' foi copiado com sucesso para: {copied_preambulo_path}")
         else:
-            print(f"ERRO: 'preambulo.tex' NÃO foi encontrado em: {copied_preambulo_path} APÓS a cópia.")
+            logger.error(f"'preambulo.tex' NÃO foi encontrado em: {copied_preambulo_path} APÓS a cópia.")
         # --- FIM NOVO ---
 
     except Exception as e:
-        print(f"Erro ao copiar a estrutura de exemplo do relatório: {e}")
+        logger.error(f"Erro ao copiar a estrutura de exemplo do relatório: {e}")
 
 
 def substituir_placeholders(conteudo: str, substituicoes_globais: Dict[str, str]) -> str:
@@ -580,17 +511,26 @@ def terminar_relatorio_preprocessado(
     criado_por_vm_scan: str,
     graph_output_vm_donut: str, 
     graph_output_webapp_donut: str,
-    graph_output_webapp_x_site: str # NOVO: Adicione este parâmetro aqui
+    graph_output_webapp_x_site: str, # NOVO: Adicione este parâmetro aqui
+    graph_output_vm_ranking: str = ""
 ):
     """
     Finaliza o relatório LaTeX, inserindo os conteúdos preprocessados e placeholders.
     """
     caminho_relatorio_pronto = os.path.join(caminho_relatorio_preprocessado, "RelatorioPronto")
 
-    copiar_relatorio_exemplo(
-        os.path.join(config.caminho_report_templates_base),
-        caminho_relatorio_pronto
-    )
+    with medir_etapa("template_copy"):
+        copiar_relatorio_exemplo(
+            os.path.join(config.caminho_report_templates_base),
+            caminho_relatorio_pronto
+        )
+
+    # O main.tex do template inclui images-was/vulnerabilidades-x-site.png direto (relativo a
+    # assets/): o gráfico deste relatório substitui o da cópia do template
+    if graph_output_webapp_x_site and os.path.exists(graph_output_webapp_x_site):
+        pasta_imagens_was = os.path.join(caminho_relatorio_pronto, "assets", "images-was")
+        os.makedirs(pasta_imagens_was, exist_ok=True)
+        shutil.copyfile(graph_output_webapp_x_site, os.path.join(pasta_imagens_was, "vulnerabilidades-x-site.png"))
 
     with open(os.path.join(caminho_relatorio_pronto, 'main.tex'), 'r', encoding='utf-8') as f:
         latex_code = f.read()
@@ -601,7 +541,7 @@ def terminar_relatorio_preprocessado(
         with open(caminho_sites_vulnerabilidades_latex, "r", encoding='utf-8') as file:
             relatorio_sites_conteudo = file.readlines()
     else:
-        print(f"Aviso: Arquivo '{caminho_sites_vulnerabilidades_latex}' não encontrado.")
+        logger.warning(f"Arquivo '{caminho_sites_vulnerabilidades_latex}' não encontrado.")
     relatorio_sites_final = ''.join(relatorio_sites_conteudo)
 
     relatorio_servidores_conteudo = []
@@ -610,42 +550,33 @@ def terminar_relatorio_preprocessado(
         with open(caminho_servidores_vulnerabilidades_latex, "r", encoding='utf-8') as file:
             relatorio_servidores_conteudo = file.readlines()
     else:
-        print(f"Aviso: Arquivo '{caminho_servidores_vulnerabilidades_latex}' não encontrado.")
+        logger.warning(f"Arquivo '{caminho_servidores_vulnerabilidades_latex}' não encontrado.")
     relatorio_servidores_final = ''.join(relatorio_servidores_conteudo)
 
+    # Tabela e gráfico dos hosts mais expostos (arquivo vazio quando não há hosts)
+    ranking_hosts_latex = ""
+    caminho_ranking_hosts_latex = os.path.join(caminho_relatorio_preprocessado, "(LATEX)Ranking_hosts_servidores.txt")
+    if os.path.exists(caminho_ranking_hosts_latex):
+        with open(caminho_ranking_hosts_latex, "r", encoding='utf-8') as file:
+            ranking_hosts_latex = file.read()
+    if ranking_hosts_latex and graph_output_vm_ranking and os.path.exists(graph_output_vm_ranking):
+        ranking_hosts_latex += renderizar_figura(graph_output_vm_ranking, "0.9", "Hosts com mais vulnerabilidades por severidade")
+
     total_vulnerabilidades_combinado = int(total_vulnerabilidades_web) + int(total_vulnerabilidade_vm)
 
     # NOVO: Placeholder para o gráfico de donut de servidores
     vm_donut_graph_latex = ""
     if graph_output_vm_donut:
-        vm_donut_graph_latex = (
-            r"""
-            \begin{figure}[h!]
-            \centering
-            \includegraphics[width=0.5\textwidth]{""" + escape_path_for_latex(graph_output_vm_donut) + r"""}
-            \caption{Distribuição de Vulnerabilidades de Servidores por Severidade}
-            \end{figure}
-            \FloatBarrier
-            """
-        )
+        vm_donut_graph_latex = renderizar_figura(graph_output_vm_donut, "0.5", "Distribuição de Vulnerabilidades de Servidores por Severidade")
     else:
-        print("Aviso: Caminho do gráfico donut de servidores não fornecido ou vazio, não será incluído no LaTeX.")
+        logger.warning("Caminho do gráfico donut de servidores não fornecido ou vazio, não será incluído no LaTeX.")
 
     # NOVO: Placeholder para o gráfico de donut de WebApp
     webapp_donut_graph_latex = ""
     if graph_output_webapp_donut:
-        webapp_donut_graph_latex = (
-            r"""
-            \begin{figure}[h!]
-            \centering
-            \includegraphics[width=0.5\textwidth]{""" + escape_path_for_latex(graph_output_webapp_donut) + r"""}
-            \caption{Distribuição total de vulnerabilidades por severidade}
-            \end{figure}
-            \FloatBarrier
-            """
-        )
+        webapp_donut_graph_latex = renderizar_figura(graph_output_webapp_donut, "0.5", "Distribuição total de vulnerabilidades por severidade")
     else:
-        print("Aviso: Caminho do gráfico donut de WebApp não fornecido ou vazio, não será incluído no LaTeX.")
+        logger.warning("Caminho do gráfico donut de WebApp não fornecido ou vazio, não será incluído no LaTeX.")
 
     # Escapar caracteres especiais para LaTeX
     nome_secretaria_escaped = escape_latex(nome_secretaria)
@@ -676,15 +607,9 @@ def terminar_relatorio_preprocessado(
         'TOTAL_SITES': total_sites,
         'CRIADO_POR_VM_SCAN': criado_por_vm_scan,
         'GRAFICO_DONUT_SERVIDORES': vm_donut_graph_latex, 
+        'RANKING HOSTS SERVIDORES': ranking_hosts_latex,
         'GRAFICO_DONUT_WEBAPP': webapp_donut_graph_latex, 
-        'GRAFICO_WEBAPP_X_SITE': r"""
-            \begin{figure}[h!]
-            \centering
-            \includegraphics[width=1.0\textwidth]{""" + escape_path_for_latex(graph_output_webapp_x_site) + r"""}
-            \caption{Total de vulnerabilidades por site}
-            \end{figure}
-            \FloatBarrier
-            """, # NOVO: Adicione este placeholder
+        'GRAFICO_WEBAPP_X_SITE': renderizar_figura(graph_output_webapp_x_site, "1.0", "Total de vulnerabilidades por site"),
     }
 
     latex_editado = substituir_placeholders(
@@ -694,4 +619,4 @@ def terminar_relatorio_preprocessado(
 
     with open(os.path.join(caminho_relatorio_pronto, "main.tex"), "w", encoding="utf-8") as f:
         f.write(latex_editado)
-    print(f"Relatório LaTeX final (main.tex) salvo em: {os.path.join(caminho_relatorio_pronto, 'main.tex')}")
\ No newline at end of file
+    logger.info(f"Relatório LaTeX final (main.tex) salvo em: {os.path.join(caminho_relatorio_pronto, 'main.tex')}")
\ No newline at end of file
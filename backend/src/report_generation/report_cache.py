@@ -0,0 +1,173 @@
+"""
+Cache de relatórios completos (PDF já compilado), indexado por uma impressão digital
+(fingerprint) de todas as entradas da geração.
+
+A fingerprint cobre: o conteúdo dos arquivos de scan da lista (JSONs, CSV de servidores
+e chunks NDJSON), o catálogo e os descritivos de vulnerabilidades, a árvore do template
+LaTeX, os templates Jinja2 dos blocos LaTeX (templates_latex/), o código-fonte que processa
+os scans e monta o relatório (report_generation/ e data_processing/) e os campos do
+formulário (com as opções que têm padrão em variáveis de ambiente já resolvidas). Mudar o
+código da geração invalida o cache sem precisar lembrar de nada. Se um relatório for
+gerado de novo com exatamente as mesmas entradas, a pasta do relatório anterior é
+reaproveitada via hardlinks, sem reprocessar os scans nem rodar o pdflatex.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from .latex_templates import PASTA_TEMPLATES_LATEX
+
+# Coleção do MongoDB com fingerprint -> relatório que a gerou
+COLECAO_CACHE_RELATORIOS = "cache_relatorios"
+
+# Mudanças no código de report_generation/ e data_processing/ já mudam a fingerprint.
+# Incrementar só quando algo fora dele mudar o resultado (ex.: versão do pdflatex ou das
+# bibliotecas na imagem, formato da fingerprint)
+# 2 a 5: mudanças no código da geração, antes de ele entrar na fingerprint
+# 6: código-fonte da geração na fingerprint
+FINGERPRINT_VERSAO = 6
+
+# Extensões dos arquivos de scan considerados na fingerprint
+EXTENSOES_SCANS = ('.json', '.csv', '.ndjson')
+
+# Código-fonte que processa os scans e monta o relatório (os .py destes pacotes)
+PASTAS_CODIGO_GERACAO = (
+    os.path.dirname(os.path.abspath(__file__)),
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data_processing"),
+)
+
+@lru_cache(maxsize=16384)
+def _hash_conteudo(caminho: str, tamanho: int, mtime_ns: int) -> str:
+    """
+    Hash do conteúdo de um arquivo, memorizado por (caminho, tamanho, mtime) para não reler
+    arquivos grandes (scans, imagens do template) a cada geração. Versões antigas de um
+    arquivo regravado saem do cache pelo LRU.
+    """
+    sha256 = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(bloco)
+    return sha256.hexdigest()
+
+
+def _hash_arquivo(caminho: str) -> str:
+    stat_arquivo = os.stat(caminho)
+    return _hash_conteudo(caminho, stat_arquivo.st_size, stat_arquivo.st_mtime_ns)
+
+
+def _arquivos_arvore(raiz: str, extensoes: Optional[tuple] = None):
+    """
+    Lista, em ordem determinística, os arquivos de `raiz` (recursivamente) como pares
+    (caminho relativo, caminho absoluto). Arquivos ocultos (caches, manifestos) são ignorados.
+    """
+    arquivos = []
+    for diretorio, subpastas, nomes in os.walk(raiz):
+        subpastas[:] = sorted(p for p in subpastas if not p.startswith('.'))
+        for nome in sorted(nomes):
+            if nome.startswith('.'):
+                continue
+            if extensoes and not nome.lower().endswith(extensoes):
+                continue
+            caminho = os.path.join(diretorio, nome)
+            arquivos.append((os.path.relpath(caminho, raiz).replace(os.sep, '/'), caminho))
+    return arquivos
+
+
+def _atualizar_com_arvore(sha256, rotulo: str, raiz: Optional[str], **kwargs) -> None:
+    sha256.update(f"[{rotulo}]\n".encode('utf-8'))
+    if not raiz or not os.path.isdir(raiz):
+        return
+    for relativo, caminho in _arquivos_arvore(raiz, **kwargs):
+        sha256.update(f"{relativo}\0{_hash_arquivo(caminho)}\n".encode('utf-8'))
+
+
+def calcular_fingerprint_relatorio(lista_doc: dict, parametros: dict, config) -> str:
+    """
+    Calcula a fingerprint determinística de uma geração de relatório.
+
+    Parâmetros:
+    - lista_doc (dict): Documento da lista (pasta de scans e fonte dos dados de servidores).
+    - parametros (dict): Campos do formulário de geração (JSON da requisição).
+    - config: Instância de Config (caminhos do template e das descrições).
+    """
+    sha256 = hashlib.sha256()
+    sha256.update(f"fingerprint-v{FINGERPRINT_VERSAO}\n".encode('utf-8'))
+
+    dados_lista = {
+        "pastas_scans_webapp": lista_doc.get("pastas_scans_webapp"),
+        "fonte_scan_servidores": lista_doc.get("fonte_scan_servidores", "csv"),
+        "id_scan": lista_doc.get("id_scan"),
+        "historyid_scanservidor": lista_doc.get("historyid_scanservidor"),
+        "scanStoryIdCriadoPor": lista_doc.get("scanStoryIdCriadoPor"),
+    }
+    sha256.update(json.dumps(dados_lista, sort_keys=True, default=str).encode('utf-8'))
+    sha256.update(json.dumps(parametros, sort_keys=True, default=str).encode('utf-8'))
+
+    _atualizar_com_arvore(sha256, "scans", lista_doc.get("pastas_scans_webapp"), extensoes=EXTENSOES_SCANS)
+    _atualizar_com_arvore(sha256, "descricoes", config.caminho_report_templates_descriptions)
+    _atualizar_com_arvore(sha256, "template", config.caminho_report_templates_base)
+    _atualizar_com_arvore(sha256, "templates_latex", PASTA_TEMPLATES_LATEX)
+    for pasta in PASTAS_CODIGO_GERACAO:
+        _atualizar_com_arvore(sha256, f"codigo:{os.path.basename(pasta)}", pasta, extensoes=('.py',))
+    return sha256.hexdigest()
+
+
+def _caminho_pdf(caminho_shared_relatorios: str, relatorio_id: str) -> Path:
+    return Path(caminho_shared_relatorios) / str(relatorio_id) / "relatorio_preprocessado" / "RelatorioPronto" / "main.pdf"
+
+
+def buscar_relatorio_em_cache(db_instance, fingerprint: str, caminho_shared_relatorios: str) -> Optional[dict]:
+    """
+    Retorna a entrada do cache para a fingerprint se o PDF do relatório de origem ainda
+    existir. Entradas cujo relatório foi excluído são removidas.
+    """
+    entrada = db_instance.find_one(COLECAO_CACHE_RELATORIOS, {"fingerprint": fingerprint})
+    if not entrada:
+        return None
+    if not _caminho_pdf(caminho_shared_relatorios, entrada["relatorio_id"]).exists():
+        db_instance.delete_one(COLECAO_CACHE_RELATORIOS, {"fingerprint": fingerprint})
+        return None
+    return entrada
+
+
+def registrar_relatorio_em_cache(db_instance, fingerprint: str, relatorio_id: str, total_vulnerabilidades: int) -> None:
+    db_instance.update_one(
+        COLECAO_CACHE_RELATORIOS,
+        {"fingerprint": fingerprint},
+        {
+            "fingerprint": fingerprint,
+            "relatorio_id": str(relatorio_id),
+            "total_vulnerabilities": total_vulnerabilidades,
+            "updated_at": datetime.utcnow()
+        },
+        upsert=True
+    )
+
+
+def _hardlink_ou_copia(origem: str, destino: str) -> None:
+    try:
+        os.link(origem, destino)
+    except OSError:
+        # Sistemas de arquivos diferentes ou sem suporte a hardlink
+        shutil.copy2(origem, destino)
+
+
+def reaproveitar_relatorio(caminho_shared_relatorios: str, relatorio_origem_id: str, relatorio_novo_id: str) -> Path:
+    """
+    Cria a pasta relatorio_preprocessado do novo relatório com hardlinks para os arquivos
+    do relatório de origem (PDF, TXTs e arquivos de vulnerabilidades ausentes).
+    Retorna o caminho da pasta criada.
+    """
+    origem = Path(caminho_shared_relatorios) / str(relatorio_origem_id) / "relatorio_preprocessado"
+    destino = Path(caminho_shared_relatorios) / str(relatorio_novo_id) / "relatorio_preprocessado"
+    if destino.exists():
+        shutil.rmtree(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copytree(origem, destino, copy_function=_hardlink_ou_copia)
+    return destino
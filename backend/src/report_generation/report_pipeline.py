@@ -0,0 +1,351 @@
+"""
+Geração de um relatório a partir de uma lista, independente da requisição HTTP: usada pelo
+endpoint /reports/gerarRelatorioDeLista/ e pela geração em lote (report_batch), que executa
+várias listas em processos separados.
+
+Os gráficos de cada relatório são gravados na pasta do próprio relatório (graficos/) e não
+mais dentro do template base, que é compartilhado: duas gerações simultâneas não
+sobrescrevem os gráficos uma da outra.
+"""
+
+import csv
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+from bson.objectid import ObjectId
+from flask import g, has_request_context
+from pymongo.errors import PyMongoError
+
+from ..core.database import Database
+from ..core.json_utils import carregar_json_memorizado
+from ..core.logger import app_logger
+from ..core.logging_config import obter_logger
+from ..core.metrics import medir_etapa
+from ..core.report_progress import vincular_relatorio
+from ..data_processing.ndjson_parser import PASTA_VULNS_EXPORT
+from ..data_processing.vulnerability_analyzer import TAMANHO_RANKING_HOSTS, processar_relatorio_csv, processar_relatorio_ndjson, processar_relatorio_json, extrair_quantidades_vulnerabilidades_por_site
+from .latex_compiler import compilar_latex
+from .latex_templates import compilar_templates
+from .plot_generator import gerar_Grafico_Quantitativo_Vulnerabilidades_Por_Site, gerar_grafico_donut, gerar_grafico_donut_webapp, gerar_grafico_ranking_hosts
+from .report_aggregates import copiar_agregados_relatorio, registrar_agregados_relatorio
+from .report_builder import terminar_relatorio_preprocessado
+from .report_cache import calcular_fingerprint_relatorio, buscar_relatorio_em_cache, registrar_relatorio_em_cache, reaproveitar_relatorio
+
+logger = obter_logger(__name__)
+
+# Nomes dos gráficos, gravados em <pasta do relatório>/relatorio_preprocessado/graficos/
+GRAFICO_VM_DONUT = "total-vulnerabilidades-vm-donut.png"
+GRAFICO_WEBAPP_DONUT = "total-vulnerabilidades-was-donut.png"
+GRAFICO_WEBAPP_X_SITE = "vulnerabilidades-x-site.png"
+GRAFICO_VM_RANKING = "ranking-hosts-vm.png"
+
+# Catálogos e descritivos lidos em toda geração (pasta caminho_report_templates_descriptions)
+ARQUIVOS_DESCRICOES = ("vulnerabilities_webapp.json", "descritivo_webapp.json", "vulnerabilities_servers.json", "descritivo_servers.json")
+TEMPLATES_LATEX = ("vulnerabilidades.tex.j2", "ranking_hosts.tex.j2", "figura.tex.j2")
+
+
+def carregar_recursos_compartilhados(config) -> None:
+    """
+    Carrega o catálogo, os descritivos e os templates LaTeX deste processo antes da primeira
+    geração (ficam memorizados enquanto os arquivos não mudarem).
+    """
+    for nome_arquivo in ARQUIVOS_DESCRICOES:
+        caminho = os.path.join(config.caminho_report_templates_descriptions, nome_arquivo)
+        try:
+            carregar_json_memorizado(caminho)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Não foi possível pré-carregar '{caminho}': {e}")
+    compilar_templates(*TEMPLATES_LATEX)
+
+
+def gerar_relatorio_de_lista(data: dict, config, relatorio_id: Optional[str] = None) -> Tuple[Any, int]:
+    """
+    Gera (ou reaproveita do cache) o relatório de uma lista com os campos do formulário de
+    geração (idLista, nomeSecretaria, siglaSecretaria, dataInicio, dataFim, ano, mes,
+    linkGoogleDrive e as opções forcarRegeneracao, compilacaoParalela e agruparUris).
+    `relatorio_id` fixa o id do relatório criado (a geração em lote o escolhe antes, para
+    poder excluir o relatório de uma tentativa que falhou).
+
+    Retorna (id do relatório, 200) ou ({"error": ...}, status HTTP); 503 indica uma falha
+    transitória (MongoDB indisponível), que pode dar certo numa nova tentativa.
+    """
+    try:
+        if not data:
+            return {"error": "Dados não fornecidos"}, 400
+
+        id_lista = data.get("idLista")
+        nome_secretaria = data.get("nomeSecretaria")
+        sigla_secretaria = data.get("siglaSecretaria")
+        data_inicio = data.get("dataInicio")
+        data_fim = data.get("dataFim")
+        ano = data.get("ano")
+        mes = data.get("mes")
+        google_drive_link = data.get("linkGoogleDrive")
+        # Permite ignorar o cache de relatórios e forçar a regeneração completa
+        forcar_regeneracao = bool(data.get("forcarRegeneracao", False))
+        # Compila as seções do relatório em processos pdflatex paralelos (relatórios muito grandes)
+        compilacao_paralela = bool(data.get("compilacaoParalela", os.getenv("LATEX_COMPILACAO_PARALELA", "0") == "1"))
+        # Lista URIs de Web App que só diferem em identificadores como modelos (ex.: /produto/{id} ×312)
+        agrupar_uris = bool(data.get("agruparUris", os.getenv("RELATORIO_AGRUPAR_URIS", "0") == "1"))
+
+        db_instance = Database()
+
+        try:
+            objeto_id = ObjectId(id_lista)
+        except Exception:
+            db_instance.close()
+            return {"error": "ID de lista inválido."}, 400
+
+        lista_doc = db_instance.find_one("listas", {"_id": objeto_id})
+
+        if not lista_doc:
+            db_instance.close()
+            return {"error": "Lista não encontrada."}, 404
+
+        criado_por_vm_scan = lista_doc.get("scanStoryIdCriadoPor", "Não informado")
+
+        # Fingerprint de todas as entradas (scans, catálogo, template e formulário)
+        parametros_relatorio = {k: v for k, v in data.items() if k not in ("forcarRegeneracao", "idProgresso")}
+        # Opções com padrão vindo de variáveis de ambiente entram já resolvidas: mudar o padrão
+        # não pode reaproveitar um relatório gerado com o valor anterior
+        parametros_relatorio.update({
+            "compilacaoParalela": compilacao_paralela,
+            "agruparUris": agrupar_uris,
+            "tamanhoRankingHosts": TAMANHO_RANKING_HOSTS,
+        })
+        with medir_etapa("fingerprint"):
+            fingerprint = calcular_fingerprint_relatorio(lista_doc, parametros_relatorio, config)
+        relatorio_em_cache = None
+        if not forcar_regeneracao:
+            relatorio_em_cache = buscar_relatorio_em_cache(db_instance, fingerprint, config.caminho_shared_relatorios)
+
+        # Inicializa o ID do novo relatório e o destino de pré-processamento
+        documento_relatorio = {"_id": ObjectId(relatorio_id)} if relatorio_id else {}
+        novo_relatorio_id = db_instance.insert_one(
+            "relatorios",
+            {**documento_relatorio, "nome": nome_secretaria, "id_lista": id_lista, "destino_relatorio_preprocessado" : None, "siglaSecretaria": sigla_secretaria, "timestamp": datetime.utcnow()}
+        ).inserted_id
+        if has_request_context():
+            # Usado pelo profiling sob demanda para salvar o perfil na pasta deste relatório
+            g.relatorio_id = str(novo_relatorio_id)
+        vincular_relatorio(novo_relatorio_id)
+
+        if relatorio_em_cache:
+            # Mesmas entradas de um relatório já compilado: reaproveita a pasta dele (hardlinks) sem reprocessar nem compilar
+            pasta_reaproveitada = reaproveitar_relatorio(config.caminho_shared_relatorios, relatorio_em_cache["relatorio_id"], novo_relatorio_id)
+            db_instance.update_one(
+                "relatorios",
+                {"_id": novo_relatorio_id},
+                {"destino_relatorio_preprocessado": str(pasta_reaproveitada), "relatorio_origem_cache": relatorio_em_cache["relatorio_id"]}
+            )
+            registrar_relatorio_em_cache(db_instance, fingerprint, novo_relatorio_id, relatorio_em_cache.get("total_vulnerabilities", 0))
+            copiar_agregados_relatorio(db_instance, relatorio_em_cache["relatorio_id"], novo_relatorio_id)
+            logger.info(f"Relatório {novo_relatorio_id} reaproveitado do relatório {relatorio_em_cache['relatorio_id']} (entradas idênticas).")
+
+            app_logger.log_action(
+                action="REPORT_GENERATED",
+                user_login="SYSTEM_USER_GENERATION",
+                details={
+                    "report_id": str(novo_relatorio_id),
+                    "list_id": id_lista,
+                    "secretaria": nome_secretaria,
+                    "sigla": sigla_secretaria,
+                    "total_vulnerabilities": relatorio_em_cache.get("total_vulnerabilities", 0),
+                    "cached_from": relatorio_em_cache["relatorio_id"]
+                }
+            )
+
+            db_instance.update_one("listas", {"_id": objeto_id}, {"relatorioGerado": True})
+            db_instance.close()
+            return str(novo_relatorio_id), 200
+
+        pasta_destino_relatorio_temp_base = Path(config.caminho_shared_relatorios) / str(novo_relatorio_id) / "relatorio_preprocessado"
+        pasta_destino_relatorio_temp_base.mkdir(parents=True, exist_ok=True)
+
+        pasta_graficos = pasta_destino_relatorio_temp_base / "graficos"
+        pasta_graficos.mkdir(exist_ok=True)
+        vm_donut_output_path = str(pasta_graficos / GRAFICO_VM_DONUT)
+        webapp_donut_output_path = str(pasta_graficos / GRAFICO_WEBAPP_DONUT)
+        webapp_x_site_output_path = str(pasta_graficos / GRAFICO_WEBAPP_X_SITE)
+        vm_ranking_output_path = str(pasta_graficos / GRAFICO_VM_RANKING)
+
+        db_instance.update_one(
+            "relatorios",
+            {"_id": novo_relatorio_id},
+            {"destino_relatorio_preprocessado": str(pasta_destino_relatorio_temp_base)}
+        )
+
+        # Agregados compactos por fonte, persistidos para comparar relatórios (/reports/compararRelatorios/)
+        agregados_relatorio = {"webapp": None, "servidores": None}
+
+        # Processamento de WebApp Scans
+        webapp_report_txt_path = pasta_destino_relatorio_temp_base / "Sites_agrupados_por_vulnerabilidades.txt"
+        webapp_risk_counts = {'Critical': '0', 'High': '0', 'Medium': '0', 'Low': '0'}
+        total_sites = '0'
+        total_vulnerabilidades_web = '0'
+
+        if lista_doc.get("pastas_scans_webapp") and os.path.exists(lista_doc["pastas_scans_webapp"]) and len(os.listdir(lista_doc["pastas_scans_webapp"])) > 0:
+            pasta_scans_da_lista_webapp = lista_doc["pastas_scans_webapp"]
+            agregados_relatorio["webapp"] = processar_relatorio_json(pasta_scans_da_lista_webapp, str(pasta_destino_relatorio_temp_base), agrupar_uris=agrupar_uris)
+            output_csv_path = str(pasta_destino_relatorio_temp_base / "vulnerabilidades_agrupadas_por_site.csv")
+            extrair_quantidades_vulnerabilidades_por_site(output_csv_path, pasta_scans_da_lista_webapp)
+
+            with open(webapp_report_txt_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+                total_sites_match = re.search(r'Total de sites:\s*(\d+)', content)
+                total_vulnerabilidades_web_match = re.search(r'Total de Vulnerabilidades:\s*(\d+)', content)
+                critical_match = re.search(r'Critical:\s*(\d+)', content)
+                high_match = re.search(r'High:\s*(\d+)', content)
+                medium_match = re.search(r'Medium:\s*(\d+)', content)
+                low_match = re.search(r'Low:\s*(\d+)', content)
+
+                if total_sites_match: total_sites = total_sites_match.group(1)
+                if total_vulnerabilidades_web_match: total_vulnerabilidades_web = total_vulnerabilidades_web_match.group(1)
+                if critical_match: webapp_risk_counts['Critical'] = critical_match.group(1)
+                if high_match: webapp_risk_counts['High'] = high_match.group(1)
+                if medium_match: webapp_risk_counts['Medium'] = medium_match.group(1)
+                if low_match: webapp_risk_counts['Low'] = low_match.group(1)
+
+            webapp_risk_counts_int = {k: int(v) for k, v in webapp_risk_counts.items()}
+            with medir_etapa("chart_render", "webapp"):
+                if not gerar_grafico_donut_webapp(webapp_risk_counts_int, webapp_donut_output_path):
+                    logger.warning(f"Gráfico donut para WebApp não foi gerado (sem dados ou erro). O arquivo {webapp_donut_output_path} pode não existir.")
+
+                gerar_Grafico_Quantitativo_Vulnerabilidades_Por_Site(
+                    str(pasta_destino_relatorio_temp_base / "vulnerabilidades_agrupadas_por_site.csv"),
+                    webapp_x_site_output_path,
+                    "descendente"
+                )
+            logger.info(f"Gráfico (Vulnerabilidades por Site) salvo em: {webapp_x_site_output_path}")
+
+        else:
+            logger.warning(f"Não há scans WebApp na pasta {lista_doc.get('pastas_scans_webapp')} ou a pasta está vazia. Pulando processamento WebApp.")
+            # Só o cabeçalho (o mesmo CSV vazio que o pandas escreveria, sem importá-lo aqui)
+            with open(pasta_destino_relatorio_temp_base / "vulnerabilidades_agrupadas_por_site.csv", "w", newline="", encoding="utf-8") as f:
+                csv.writer(f, lineterminator="\n").writerow(['Site', 'Critical', 'High', 'Medium', 'Low', 'Total'])
+            webapp_report_txt_path.touch()
+            (pasta_destino_relatorio_temp_base / "(LATEX)Sites_agrupados_por_vulnerabilidades.txt").touch()
+
+        # Processamento de Server Scans (VM)
+        servers_report_txt_path = pasta_destino_relatorio_temp_base / "Servidores_agrupados_por_vulnerabilidades.txt"
+        servers_risk_counts = {'critical': '0', 'high': '0', 'medium': '0', 'low': '0'}
+        total_vulnerabilidade_vm = '0'
+
+        csv_servidor_path = None
+        pasta_chunks_servidores = None
+        if lista_doc.get("pastas_scans_webapp"): # 'pastas_scans_webapp' é o diretório onde o CSV do VM scan é salvo
+            csv_servidor_path = Path(lista_doc["pastas_scans_webapp"]) / "servidores_scan.csv"
+            pasta_chunks_servidores = Path(lista_doc["pastas_scans_webapp"]) / PASTA_VULNS_EXPORT
+
+        # A fonte dos dados de servidores é escolhida por lista: o CSV do scan (padrão) ou os chunks da exportação de vulnerabilidades
+        servidores_processados = False
+        if lista_doc.get("fonte_scan_servidores") == "vulns_export":
+            if pasta_chunks_servidores and any(pasta_chunks_servidores.glob("*.ndjson")):
+                agregados_relatorio["servidores"] = processar_relatorio_ndjson(str(pasta_chunks_servidores), str(pasta_destino_relatorio_temp_base))
+                servidores_processados = True
+        elif lista_doc.get("historyid_scanservidor") and lista_doc.get("id_scan") and csv_servidor_path and csv_servidor_path.exists():
+            pasta_scans_da_lista_vm = lista_doc["pastas_scans_webapp"]
+            agregados_relatorio["servidores"] = processar_relatorio_csv(pasta_scans_da_lista_vm, str(pasta_destino_relatorio_temp_base))
+            servidores_processados = True
+
+        if servidores_processados:
+            with open(servers_report_txt_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+                total_vulnerabilidade_vm_match = re.search(r'Total de Vulnerabilidades:\s*(\d+)', content)
+                critical_match = re.search(r'Critical:\s*(\d+)', content)
+                high_match = re.search(r'High:\s*(\d+)', content)
+                medium_match = re.search(r'Medium:\s*(\d+)', content)
+                low_match = re.search(r'Low:\s*(\d+)', content)
+
+                if total_vulnerabilidade_vm_match: total_vulnerabilidade_vm = total_vulnerabilidade_vm_match.group(1)
+                if critical_match: servers_risk_counts['critical'] = critical_match.group(1)
+                if high_match: servers_risk_counts['high'] = high_match.group(1)
+                if medium_match: servers_risk_counts['medium'] = medium_match.group(1)
+                if low_match: servers_risk_counts['low'] = low_match.group(1)
+
+            vm_risk_counts_int = {k: int(v) for k, v in servers_risk_counts.items()}
+            with medir_etapa("chart_render", "servers"):
+                if not gerar_grafico_donut(vm_risk_counts_int, vm_donut_output_path):
+                    logger.warning(f"Gráfico donut para servidores não foi gerado (sem dados ou erro). O arquivo {vm_donut_output_path} pode não existir.")
+                if not gerar_grafico_ranking_hosts(str(pasta_destino_relatorio_temp_base / "ranking_hosts_servidores.csv"), vm_ranking_output_path):
+                    logger.warning(f"Gráfico de ranking de hosts não foi gerado (sem dados ou erro). O arquivo {vm_ranking_output_path} pode não existir.")
+        else:
+            logger.warning("Não há scans de Servidores associados a esta lista ou o arquivo CSV/chunks não foram encontrados. Pulando processamento de Servidores.")
+            servers_report_txt_path.touch()
+            (pasta_destino_relatorio_temp_base / "(LATEX)Servidores_agrupados_por_vulnerabilidades.txt").touch()
+            (pasta_destino_relatorio_temp_base / "(LATEX)Ranking_hosts_servidores.txt").touch()
+
+        pasta_final_latex = pasta_destino_relatorio_temp_base / "RelatorioPronto"
+
+        total_vulnerabilidades_combinado = int(total_vulnerabilidades_web) + int(total_vulnerabilidade_vm)
+
+        terminar_relatorio_preprocessado(
+            nome_secretaria,
+            sigla_secretaria,
+            data_inicio,
+            data_fim,
+            ano,
+            mes,
+            str(pasta_destino_relatorio_temp_base),
+            str(pasta_final_latex / "main.tex"),
+            google_drive_link,
+            total_vulnerabilidades_web,
+            total_vulnerabilidade_vm,
+            webapp_risk_counts['Critical'],
+            webapp_risk_counts['High'],
+            webapp_risk_counts['Medium'],
+            webapp_risk_counts['Low'],
+            servers_risk_counts['critical'],
+            servers_risk_counts['high'],
+            servers_risk_counts['medium'],
+            servers_risk_counts['low'],
+            total_sites,
+            criado_por_vm_scan,
+            vm_donut_output_path,
+            webapp_donut_output_path,
+            webapp_x_site_output_path,
+            vm_ranking_output_path
+        )
+
+        success, message = compilar_latex(os.path.join(str(pasta_final_latex), "main.tex"), str(pasta_final_latex), em_unidades=compilacao_paralela)
+
+        user_login = "SYSTEM_USER_GENERATION"
+
+        app_logger.log_action(
+            action="REPORT_GENERATED",
+            user_login=user_login,
+            details={
+                "report_id": str(novo_relatorio_id),
+                "list_id": id_lista,
+                "secretaria": nome_secretaria,
+                "sigla": sigla_secretaria,
+                "total_vulnerabilities": total_vulnerabilidades_combinado
+            }
+        )
+
+        if not success:
+            db_instance.close()
+            return {"error": f"Falha na geração do PDF: {message}"}, 500
+
+        registrar_relatorio_em_cache(db_instance, fingerprint, novo_relatorio_id, total_vulnerabilidades_combinado)
+        registrar_agregados_relatorio(db_instance, novo_relatorio_id, agregados_relatorio)
+        db_instance.update_one("listas", {"_id": objeto_id}, {"relatorioGerado": True})
+        db_instance.close()
+
+        return str(novo_relatorio_id), 200
+
+    except PyMongoError as e:
+        logger.exception(f"Erro de banco de dados ao gerar relatório de lista: {str(e)}")
+        if 'db_instance' in locals():
+            db_instance.close()
+        return {"error": f"Banco de dados indisponível: {str(e)}"}, 503
+
+    except Exception as e:
+        logger.exception(f"Erro ao gerar relatório de lista: {str(e)}")
+        # close() só fecha uma conexão já aberta; `client` abriria uma só para fechá-la
+        if 'db_instance' in locals():
+            db_instance.close()
+        return {"error": f"Erro interno ao gerar relatório: {str(e)}"}, 500
@@ -5,13 +5,12 @@ from flask_cors import CORS
 from ..core.database import Database
 from ..models.user import User
 from bson.objectid import ObjectId
-import logging
+from ..core.logging_config import obter_logger
 from ..core.logger import app_logger 
 from datetime import datetime, timedelta 
 
 # Configura o logger para este módulo
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+logger = obter_logger(__name__)
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 CORS(auth_bp, supports_credentials=True)
@@ -81,7 +80,7 @@ def get_all_users():
         users_list = [User.from_dict(u).to_dict() for u in users_data]
         return jsonify(users_list), 200
     except Exception as e:
-        print(f"Erro ao buscar usuários: {e}")
+        logger.error(f"Erro ao buscar usuários: {e}")
         return jsonify({"error": "Erro interno ao buscar usuários."}), 500
 
 @auth_bp.route('/register', methods=['POST'])
@@ -123,7 +122,7 @@ def register_user():
 
         return jsonify({"message": "Usuário registrado com sucesso!", "user_id": str(result.inserted_id)}), 201
     except Exception as e:
-        print(f"Erro ao registrar usuário: {e}")
+        logger.error(f"Erro ao registrar usuário: {e}")
         return jsonify({"error": "Erro interno ao registrar usuário."}), 500
 
 @auth_bp.route('/users/<string:user_id>', methods=['PUT'])
@@ -167,7 +166,7 @@ def update_user(user_id):
         )
         return jsonify({"message": "Usuário atualizado com sucesso."}), 200
     except Exception as e:
-        print(f"Erro ao atualizar usuário {user_id}: {e}")
+        logger.error(f"Erro ao atualizar usuário {user_id}: {e}")
         return jsonify({"error": "Erro interno ao atualizar usuário."}), 500
 
 @auth_bp.route('/users/<string:user_id>', methods=['DELETE'])
@@ -190,7 +189,7 @@ def delete_user(user_id):
 
         return jsonify({"message": "Usuário deletado com sucesso."}), 200
     except Exception as e:
-        print(f"Erro ao deletar usuário: {e}")
+        logger.error(f"Erro ao deletar usuário: {e}")
         return jsonify({"error": "Erro interno ao deletar usuário."}), 500
 
 @auth_bp.route('/logs', methods=['GET'])
@@ -251,7 +250,7 @@ def get_logs():
 
         return jsonify(logs_list), 200
     except Exception as e:
-        print(f"Erro ao buscar logs: {e}")
+        logger.error(f"Erro ao buscar logs: {e}")
         return jsonify({"error": "Erro interno ao buscar logs."}), 500
     finally:
         db_instance.close()
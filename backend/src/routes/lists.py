@@ -3,11 +3,15 @@
 from pathlib import Path
 from flask import Blueprint, request, jsonify, current_app # Importa current_app
 from ..core.database import Database
+from ..core.scan_manifest import ler_manifesto, listar_pastas_scans
 from bson.objectid import ObjectId
 import json
 import os
 import shutil
 import time
+from ..core.logging_config import obter_logger
+
+logger = obter_logger(__name__)
 
 # Removido: from ..main import tenable_api # Não é mais necessário
 # Removido: from ..main import config # Não é mais necessário
@@ -33,12 +37,13 @@ def getLists():
                 "pastas_scans_vm": lista.get("pastas_scans_vm"), # Corrigido para vm de servers
                 "id_scan": lista.get("id_scan"),
                 "historyid_scanservidor": lista.get("historyid_scanservidor"),
+                "fonte_scan_servidores": lista.get("fonte_scan_servidores", "csv"),
                 "relatorioGerado": lista.get("relatorioGerado", False)
             })
         db_instance.close()
         return jsonify(lists_list), 200
     except Exception as e:
-        print(f"Erro ao obter listas: {e}")
+        logger.error(f"Erro ao obter listas: {e}")
         return jsonify({"error": str(e)}), 500
 
 @lists_bp.route('/createList/', methods=['POST'])
@@ -54,7 +59,7 @@ def createList():
         db_instance.close()
         return jsonify({"message": "Lista criada com sucesso!", "idLista": str(result.inserted_id)}), 201
     except Exception as e:
-        print(f"Erro ao criar lista: {e}")
+        logger.error(f"Erro ao criar lista: {e}")
         db_instance.close()
         return jsonify({"error": str(e)}), 500
 
@@ -82,6 +87,11 @@ def updateList(id_lista):
         update_fields['id_scan'] = data['id_scan']
     if 'historyid_scanservidor' in data:
         update_fields['historyid_scanservidor'] = data['historyid_scanservidor']
+    if 'fonte_scan_servidores' in data:
+        if data['fonte_scan_servidores'] not in ('csv', 'vulns_export'):
+            db_instance.close()
+            return jsonify({"error": "fonte_scan_servidores inválida. Use 'csv' ou 'vulns_export'."}), 400
+        update_fields['fonte_scan_servidores'] = data['fonte_scan_servidores']
     
     if not update_fields:
         db_instance.close()
@@ -95,7 +105,7 @@ def updateList(id_lista):
         db_instance.close()
         return jsonify({"message": "Lista atualizada com sucesso!"}), 200
     except Exception as e:
-        print(f"Erro ao atualizar lista: {e}")
+        logger.error(f"Erro ao atualizar lista: {e}")
         db_instance.close()
         return jsonify({"error": str(e)}), 500
 
@@ -119,13 +129,13 @@ def deleteList(id_lista):
                 webapp_folder_path = Path(lista_doc["pastas_scans_webapp"])
                 if webapp_folder_path.exists() and webapp_folder_path.is_dir():
                     shutil.rmtree(webapp_folder_path)
-                    print(f"DEBUG: Pasta de scans WebApp excluída: {webapp_folder_path}")
+                    logger.debug(f"Pasta de scans WebApp excluída: {webapp_folder_path}")
             
             if lista_doc.get("pastas_scans_vm"): # Corrigido para vm
                 vm_folder_path = Path(lista_doc["pastas_scans_vm"])
                 if vm_folder_path.exists() and vm_folder_path.is_dir():
                     shutil.rmtree(vm_folder_path)
-                    print(f"DEBUG: Pasta de scans VM excluída: {vm_folder_path}")
+                    logger.debug(f"Pasta de scans VM excluída: {vm_folder_path}")
 
             # Deleta os relatórios gerados a partir desta lista
             relatorios_gerados = db_instance.find("relatorios", {"id_lista": id_lista})
@@ -134,10 +144,10 @@ def deleteList(id_lista):
                 report_folder_path = Path(config.caminho_shared_relatorios) / relatorio_id
                 if report_folder_path.exists() and report_folder_path.is_dir():
                     shutil.rmtree(report_folder_path)
-                    print(f"DEBUG: Pasta do relatório associado excluída: {report_folder_path}")
+                    logger.debug(f"Pasta do relatório associado excluída: {report_folder_path}")
             
             db_instance.delete_many("relatorios", {"id_lista": id_lista})
-            print(f"DEBUG: Relatórios associados à lista {id_lista} excluídos.")
+            logger.debug(f"Relatórios associados à lista {id_lista} excluídos.")
 
 
         result = db_instance.delete_one("listas", {"_id": objeto_id})
@@ -147,7 +157,7 @@ def deleteList(id_lista):
         db_instance.close()
         return jsonify({"message": "Lista deletada com sucesso!"}), 200
     except Exception as e:
-        print(f"Erro ao deletar lista: {e}")
+        logger.error(f"Erro ao deletar lista: {e}")
         db_instance.close()
         return jsonify({"error": str(e)}), 500
 
@@ -163,26 +173,14 @@ def getFolders(scan_type):
     else:
         return jsonify({"error": "Tipo de scan inválido. Use 'was' ou 'vm'."}), 400
 
-    if not base_path.exists():
-        return jsonify([]), 200
-
     folders = []
-    for item in base_path.iterdir():
-        if item.is_dir():
-            # Verifica se a pasta contém o arquivo JSON correspondente ao nome da pasta
-            json_file = item / f"{item.name}.json"
-            if json_file.exists():
-                folders.append({
-                    "name": item.name,
-                    "path": str(item),
-                    "is_empty": False
-                })
-            else:
-                folders.append({
-                    "name": item.name,
-                    "path": str(item),
-                    "is_empty": True # Sinaliza que a pasta pode estar vazia ou mal formada
-                })
+    # Só verifica se o JSON do scan existe; os manifestos não são lidos nem gerados aqui
+    for pasta in listar_pastas_scans(base_path, com_manifesto=False):
+        folders.append({
+            "name": pasta["name"],
+            "path": str(pasta["path"]),
+            "is_empty": not pasta["tem_json"] # Sinaliza que a pasta pode estar vazia ou mal formada
+        })
     return jsonify(folders), 200
 
 @lists_bp.route('/getScanInfo/<string:scan_type>/<string:scan_name>', methods=['GET'])
@@ -200,19 +198,16 @@ def getScanInfo(scan_type, scan_name):
         return jsonify({"error": "Tipo de scan inválido. Use 'was' ou 'vm'."}), 400
 
     scan_folder_path = base_path / scan_name
-    json_file_path = scan_folder_path / f"{scan_name}.json"
-
-    if not json_file_path.exists():
-        return jsonify({"error": "Arquivo JSON do scan não encontrado na pasta."}), 404
 
     try:
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            scan_data = json.load(f)
-        
-        scan_id = scan_data.get('info', {}).get('uuid')
+        manifesto = ler_manifesto(scan_folder_path)
+        if manifesto is None:
+            return jsonify({"error": "Arquivo JSON do scan não encontrado na pasta."}), 404
+
+        scan_id = manifesto.get('id')
         history_id = None
-        if scan_type == 'vm' and scan_data.get('history'): # Apenas VM scans tem history_id
-            history_id = scan_data['history'][0]['history_id']
+        if scan_type == 'vm': # Apenas VM scans tem history_id
+            history_id = manifesto.get('history_id')
             
         # Opcional: buscar mais detalhes da API Tenable se necessário, mas evite chamadas desnecessárias.
         # tenable_details = tenable_api.get_scan_details(scan_id)
@@ -226,5 +221,5 @@ def getScanInfo(scan_type, scan_name):
         }), 200
 
     except Exception as e:
-        print(f"Erro ao obter informações do scan '{scan_name}': {e}")
+        logger.error(f"Erro ao obter informações do scan '{scan_name}': {e}")
         return jsonify({"error": f"Erro interno ao obter informações do scan: {e}"}), 500
\ No newline at end of file
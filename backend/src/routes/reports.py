@@ -1,36 +1,35 @@
 # backend/src/routes/reports.py
 
+import json
 import re
-from flask import Blueprint, config, request, jsonify, send_file, current_app # Importa current_app
+from flask import Blueprint, config, g, request, jsonify, send_file, current_app, Response # Importa current_app
 from flask_cors import CORS, cross_origin
 import os
 from pathlib import Path
 import shutil
 from bson.objectid import ObjectId
-import pandas as pd
-import traceback 
-from datetime import datetime # Importa datetime para timestamp
 
 # Importa a classe Config (removida a importação de main, pois será acessada via current_app)
 # from ..core.config import Config
 # Importa o Database
 from ..core.database import Database
-# Importa as funções de processamento de dados
-from ..data_processing.vulnerability_analyzer import processar_relatorio_csv, processar_relatorio_json, extrair_quantidades_vulnerabilidades_por_site
-# Importa as funções de construção de relatório e compilação
-from ..report_generation.report_builder import terminar_relatorio_preprocessado
-from ..report_generation.latex_compiler import compilar_latex
-from ..report_generation.plot_generator import gerar_Grafico_Quantitativo_Vulnerabilidades_Por_Site, gerar_grafico_donut, gerar_grafico_donut_webapp 
+# Importa a geração de relatórios (processamento dos scans, construção e compilação)
+from ..report_generation.report_pipeline import gerar_relatorio_de_lista
+from ..report_generation.report_batch import COLECAO_LOTES_RELATORIOS, MAX_RELATORIOS_POR_LOTE, caminho_zip_lote
+from ..report_generation.report_aggregates import buscar_agregados_relatorio, comparar_agregados, excluir_agregados_relatorio
 
 from ..core.logger import app_logger # Importa o logger
+from ..core.metrics import ACTIVE_JOBS, medir_etapa
+from ..core.profiling import pasta_profiles, token_profiling, token_profiling_valido
+from ..core.report_progress import PROGRESSO_RELATORIOS, acompanhar_relatorio
+from ..core.logging_config import obter_logger
+
+logger = obter_logger(__name__)
+
 # Removido: from ..main import config
 # Removido: from ..main import tenable_api
 
 
-# Inicializa a configuração e o banco de dados (removido inicialização local)
-# config = Config("config.json")
-db = Database() 
-
 reports_bp = Blueprint('reports', __name__, url_prefix='/reports')
 
 @reports_bp.route('/getRelatoriosGerados/', methods=['GET'])
@@ -49,8 +48,7 @@ def getRelatoriosGerados():
         db_instance.close()
         return jsonify(relatorios_list), 200
     except Exception as e:
-        print(f"Erro ao obter relatórios gerados: {e}")
-        traceback.print_exc() 
+        logger.exception(f"Erro ao obter relatórios gerados: {e}")
         return jsonify({"error": str(e)}), 500
 
 @reports_bp.route('/deleteRelatorio/<string:relatorio_id>', methods=['DELETE'])
@@ -66,14 +64,15 @@ def deleteRelatorio(relatorio_id):
         if delete_result.deleted_count == 0:
             db_instance.close()
             return jsonify({"message": "Relatório não encontrado no banco de dados."}), 404
+        excluir_agregados_relatorio(db_instance, relatorio_id)
 
         report_folder_path = Path(config.caminho_shared_relatorios) / relatorio_id
         
         if report_folder_path.exists() and report_folder_path.is_dir():
             shutil.rmtree(report_folder_path)
-            print(f"DEBUG: Pasta do relatório excluída: {report_folder_path}")
+            logger.debug(f"Pasta do relatório excluída: {report_folder_path}")
         else:
-            print(f"DEBUG: Pasta do relatório não encontrada ou não é um diretório: {report_folder_path}")
+            logger.debug(f"Pasta do relatório não encontrada ou não é um diretório: {report_folder_path}")
 
         if report_doc:
             app_logger.log_action(
@@ -86,8 +85,7 @@ def deleteRelatorio(relatorio_id):
         return jsonify({"message": "Relatório excluído com sucesso."}), 200
 
     except Exception as e:
-        print(f"Erro ao excluir relatório {relatorio_id}: {str(e)}")
-        traceback.print_exc() 
+        logger.exception(f"Erro ao excluir relatório {relatorio_id}: {str(e)}")
         return jsonify({"error": f"Erro interno ao excluir relatório: {str(e)}"}), 500
 
 @reports_bp.route('/deleteAllRelatorios/', methods=['DELETE'])
@@ -99,6 +97,7 @@ def deleteAllRelatorios():
         all_relatorios = db_instance.find("relatorios")
         
         delete_db_result = db_instance.delete_many("relatorios", {})
+        excluir_agregados_relatorio(db_instance)
         
         deleted_folders_count = 0
         for relatorio in all_relatorios:
@@ -110,9 +109,9 @@ def deleteAllRelatorios():
                     shutil.rmtree(report_folder_path)
                     deleted_folders_count += 1
                 except Exception as folder_e:
-                    print(f"ATENÇÃO: Não foi possível excluir a pasta {report_folder_path}: {str(folder_e)}")
+                    logger.warning(f"Não foi possível excluir a pasta {report_folder_path}: {str(folder_e)}")
             else:
-                print(f"DEBUG: Pasta {report_folder_path} não encontrada ou não é um diretório.")
+                logger.debug(f"Pasta {report_folder_path} não encontrada ou não é um diretório.")
 
         app_logger.log_action(
             action="ALL_REPORTS_DELETED",
@@ -126,208 +125,192 @@ def deleteAllRelatorios():
         }), 200
 
     except Exception as e:
-        print(f"Erro ao excluir todos os relatórios: {str(e)}")
-        traceback.print_exc() 
+        logger.exception(f"Erro ao excluir todos os relatórios: {str(e)}")
         return jsonify({"error": f"Erro interno ao excluir todos os relatórios: {str(e)}"}), 500
 
 @reports_bp.route('/gerarRelatorioDeLista/', methods=['POST'])
 def gerarRelatorioDeLista():
-    try:
-        data = request.get_json()
-
-        if not data:
-            return jsonify({"error": "Dados não fornecidos"}), 400
-
-        id_lista = data.get("idLista")
-        nome_secretaria = data.get("nomeSecretaria")
-        sigla_secretaria = data.get("siglaSecretaria")
-        data_inicio = data.get("dataInicio")
-        data_fim = data.get("dataFim")
-        ano = data.get("ano")
-        mes = data.get("mes")
-        google_drive_link = data.get("linkGoogleDrive")
-
-        db_instance = Database()
-        config = current_app.extensions['config'] # Acessa config
-
-        try:
-            objeto_id = ObjectId(id_lista)
-        except Exception:
-            db_instance.close()
-            return jsonify({"error": "ID de lista inválido."}), 400
-
-        lista_doc = db_instance.find_one("listas", {"_id": objeto_id})
-
-        if not lista_doc:
-            db_instance.close()
-            return jsonify({"error": "Lista não encontrada."}), 404
-
-        criado_por_vm_scan = lista_doc.get("scanStoryIdCriadoPor", "Não informado")
-
-        base_report_template_path = Path(config.caminho_report_templates_base)
-        static_vm_donut_output_path = str(base_report_template_path / "assets" / "images-vmscan" / "total-vulnerabilidades-vm-donut.png")
-        static_webapp_donut_output_path = str(base_report_template_path / "assets" / "images-was" / "total-vulnerabilidades-was-donut.png")
-        static_webapp_x_site_output_path = str(base_report_template_path / "assets" / "images-was" / "vulnerabilidades-x-site.png")
-
-        # Inicializa o ID do novo relatório e o destino de pré-processamento
-        novo_relatorio_id = db_instance.insert_one(
-            "relatorios",
-            {"nome": nome_secretaria, "id_lista": id_lista, "destino_relatorio_preprocessado" : None, "siglaSecretaria": sigla_secretaria, "timestamp": datetime.utcnow()}
-        ).inserted_id
-
-        pasta_destino_relatorio_temp_base = Path(config.caminho_shared_relatorios) / str(novo_relatorio_id) / "relatorio_preprocessado"
-        pasta_destino_relatorio_temp_base.mkdir(parents=True, exist_ok=True)
-
-        db_instance.update_one(
-            "relatorios",
-            {"_id": novo_relatorio_id},
-            {"destino_relatorio_preprocessado": str(pasta_destino_relatorio_temp_base)}
-        )
-
-        # Processamento de WebApp Scans
-        webapp_report_txt_path = pasta_destino_relatorio_temp_base / "Sites_agrupados_por_vulnerabilidades.txt"
-        webapp_risk_counts = {'Critical': '0', 'High': '0', 'Medium': '0', 'Low': '0'}
-        total_sites = '0'
-        total_vulnerabilidades_web = '0'
-
-        if lista_doc.get("pastas_scans_webapp") and os.path.exists(lista_doc["pastas_scans_webapp"]) and len(os.listdir(lista_doc["pastas_scans_webapp"])) > 0:
-            pasta_scans_da_lista_webapp = lista_doc["pastas_scans_webapp"]
-            processar_relatorio_json(pasta_scans_da_lista_webapp, str(pasta_destino_relatorio_temp_base))
-            output_csv_path = str(pasta_destino_relatorio_temp_base / "vulnerabilidades_agrupadas_por_site.csv")
-            extrair_quantidades_vulnerabilidades_por_site(output_csv_path, pasta_scans_da_lista_webapp)
-
-            with open(webapp_report_txt_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                total_sites_match = re.search(r'Total de sites:\s*(\d+)', content)
-                total_vulnerabilidades_web_match = re.search(r'Total de Vulnerabilidades:\s*(\d+)', content)
-                critical_match = re.search(r'Critical:\s*(\d+)', content)
-                high_match = re.search(r'High:\s*(\d+)', content)
-                medium_match = re.search(r'Medium:\s*(\d+)', content)
-                low_match = re.search(r'Low:\s*(\d+)', content)
-
-                if total_sites_match: total_sites = total_sites_match.group(1)
-                if total_vulnerabilidades_web_match: total_vulnerabilidades_web = total_vulnerabilidades_web_match.group(1)
-                if critical_match: webapp_risk_counts['Critical'] = critical_match.group(1)
-                if high_match: webapp_risk_counts['High'] = high_match.group(1)
-                if medium_match: webapp_risk_counts['Medium'] = medium_match.group(1)
-                if low_match: webapp_risk_counts['Low'] = low_match.group(1)
-
-            webapp_risk_counts_int = {k: int(v) for k, v in webapp_risk_counts.items()}
-            if not gerar_grafico_donut_webapp(webapp_risk_counts_int, static_webapp_donut_output_path):
-                print(f"Aviso: Gráfico donut para WebApp não foi gerado (sem dados ou erro). O arquivo {static_webapp_donut_output_path} pode não existir.")
-
-            gerar_Grafico_Quantitativo_Vulnerabilidades_Por_Site(
-                str(pasta_destino_relatorio_temp_base / "vulnerabilidades_agrupadas_por_site.csv"),
-                static_webapp_x_site_output_path,
-                "descendente"
-            )
-            print(f"Gráfico (Vulnerabilidades por Site) salvo em: {static_webapp_x_site_output_path}")
-
-        else:
-            print(f"Aviso: Não há scans WebApp na pasta {lista_doc.get('pastas_scans_webapp')} ou a pasta está vazia. Pulando processamento WebApp.")
-            pd.DataFrame(columns=['Site', 'Critical', 'High', 'Medium', 'Low', 'Total']).to_csv(str(pasta_destino_relatorio_temp_base / "vulnerabilidades_agrupadas_por_site.csv"), index=False)
-            webapp_report_txt_path.touch()
-            (pasta_destino_relatorio_temp_base / "(LATEX)Sites_agrupados_por_vulnerabilidades.txt").touch()
-
-        # Processamento de Server Scans (VM)
-        servers_report_txt_path = pasta_destino_relatorio_temp_base / "Servidores_agrupados_por_vulnerabilidades.txt"
-        servers_risk_counts = {'critical': '0', 'high': '0', 'medium': '0', 'low': '0'}
-        total_vulnerabilidade_vm = '0'
-
-        csv_servidor_path = None
-        if lista_doc.get("pastas_scans_webapp"): # 'pastas_scans_webapp' é o diretório onde o CSV do VM scan é salvo
-            csv_servidor_path = Path(lista_doc["pastas_scans_webapp"]) / "servidores_scan.csv"
-
-        if lista_doc.get("historyid_scanservidor") and lista_doc.get("id_scan") and csv_servidor_path and csv_servidor_path.exists():
-            pasta_scans_da_lista_vm = lista_doc["pastas_scans_webapp"]
-            processar_relatorio_csv(pasta_scans_da_lista_vm, str(pasta_destino_relatorio_temp_base))
-
-            with open(servers_report_txt_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                total_vulnerabilidade_vm_match = re.search(r'Total de Vulnerabilidades:\s*(\d+)', content)
-                critical_match = re.search(r'Critical:\s*(\d+)', content)
-                high_match = re.search(r'High:\s*(\d+)', content)
-                medium_match = re.search(r'Medium:\s*(\d+)', content)
-                low_match = re.search(r'Low:\s*(\d+)', content)
-
-                if total_vulnerabilidade_vm_match: total_vulnerabilidade_vm = total_vulnerabilidade_vm_match.group(1)
-                if critical_match: servers_risk_counts['critical'] = critical_match.group(1)
-                if high_match: servers_risk_counts['high'] = high_match.group(1)
-                if medium_match: servers_risk_counts['medium'] = medium_match.group(1)
-                if low_match: servers_risk_counts['low'] = low_match.group(1)
-
-            vm_risk_counts_int = {k: int(v) for k, v in servers_risk_counts.items()}
-            if not gerar_grafico_donut(vm_risk_counts_int, static_vm_donut_output_path):
-                print(f"Aviso: Gráfico donut para servidores não foi gerado (sem dados ou erro). O arquivo {static_vm_donut_output_path} pode não existir.")
+    # "idProgresso" (opcional, registrado antes em POST /reports/progress/) permite acompanhar a
+    # geração em /reports/progress/<idProgresso> antes de a resposta trazer o id do relatório
+    id_progresso = (request.get_json(silent=True) or {}).get("idProgresso")
+    if not isinstance(id_progresso, str) or not re.fullmatch(r'[A-Za-z0-9_-]{1,64}', id_progresso):
+        id_progresso = None
+
+    with acompanhar_relatorio(id_progresso) as acompanhamento:
+        with ACTIVE_JOBS.em_andamento(kind="report_generation"), medir_etapa("total"):
+            resultado, status = gerar_relatorio_de_lista(request.get_json(silent=True), current_app.extensions['config'])
+        if status == 200:
+            acompanhamento.publicar("done", report_id=resultado)
         else:
-            print("Aviso: Não há scans de Servidores associados a esta lista ou o arquivo CSV não foi encontrado. Pulando processamento de Servidores.")
-            servers_report_txt_path.touch()
-            (pasta_destino_relatorio_temp_base / "(LATEX)Servidores_agrupados_por_vulnerabilidades.txt").touch()
-
-        pasta_final_latex = pasta_destino_relatorio_temp_base / "RelatorioPronto"
-
-        total_vulnerabilidades_combinado = int(total_vulnerabilidades_web) + int(total_vulnerabilidade_vm)
-
-        terminar_relatorio_preprocessado(
-            nome_secretaria,
-            sigla_secretaria,
-            data_inicio,
-            data_fim,
-            ano,
-            mes,
-            str(pasta_destino_relatorio_temp_base),
-            str(pasta_final_latex / "main.tex"),
-            google_drive_link,
-            total_vulnerabilidades_web,
-            total_vulnerabilidade_vm,
-            webapp_risk_counts['Critical'],
-            webapp_risk_counts['High'],
-            webapp_risk_counts['Medium'],
-            webapp_risk_counts['Low'],
-            servers_risk_counts['critical'],
-            servers_risk_counts['high'],
-            servers_risk_counts['medium'],
-            servers_risk_counts['low'],
-            total_sites,
-            criado_por_vm_scan,
-            static_vm_donut_output_path,
-            static_webapp_donut_output_path,
-            static_webapp_x_site_output_path
-        )
+            acompanhamento.publicar("failed", status=status, error=resultado.get("error"))
+        return jsonify(resultado), status
+
+@reports_bp.route('/gerarRelatoriosEmLote/', methods=['POST'])
+def gerarRelatoriosEmLote():
+    """
+    Enfileira os relatórios de várias listas para geração em segundo plano, em paralelo e
+    distribuída entre as instâncias do backend (ver report_batch).
+    Corpo: {"relatorios": [{"idLista", "nomeSecretaria", "siglaSecretaria", ...}, ...],
+    "camposComuns": {campos aplicados a todas as listas, ex. dataInicio, dataFim, ano, mes},
+    "gerarZip": bool, "prioridade": int (maior é gerado antes; padrão 0)}. Os campos de cada
+    lista têm precedência sobre os comuns. Responde 202 com o idLote, acompanhado em
+    /reports/lotes/<idLote>.
+    """
+    data = request.get_json(silent=True) or {}
+    relatorios = data.get("relatorios")
+    campos_comuns = data.get("camposComuns") or {}
+
+    if not isinstance(relatorios, list) or not relatorios:
+        return jsonify({"error": "Informe ao menos uma lista em 'relatorios'."}), 400
+    if len(relatorios) > MAX_RELATORIOS_POR_LOTE:
+        return jsonify({"error": f"Um lote aceita no máximo {MAX_RELATORIOS_POR_LOTE} relatórios."}), 400
+    if not isinstance(campos_comuns, dict):
+        return jsonify({"error": "'camposComuns' deve ser um objeto."}), 400
+    try:
+        prioridade = int(data.get("prioridade", 0))
+    except (TypeError, ValueError):
+        return jsonify({"error": "'prioridade' deve ser um número inteiro."}), 400
 
-        success, message = compilar_latex(os.path.join(str(pasta_final_latex), "main.tex"), str(pasta_final_latex))
+    itens = []
+    for indice, relatorio in enumerate(relatorios):
+        if not isinstance(relatorio, dict) or not ObjectId.is_valid(str(relatorio.get("idLista"))):
+            return jsonify({"error": f"ID de lista inválido no relatório {indice}."}), 400
+        itens.append({**campos_comuns, **relatorio})
 
-        user_login = "SYSTEM_USER_GENERATION"
+    try:
+        id_lote = current_app.extensions['relatorios_em_lote'].iniciar_lote(itens, gerar_zip=bool(data.get("gerarZip", False)), prioridade=prioridade)
+    except Exception as e:
+        logger.exception(f"Erro ao iniciar o lote de relatórios: {e}")
+        return jsonify({"error": f"Erro interno ao iniciar o lote: {str(e)}"}), 500
 
-        app_logger.log_action(
-            action="REPORT_GENERATED",
-            user_login=user_login,
-            details={
-                "report_id": str(novo_relatorio_id),
-                "list_id": id_lista,
-                "secretaria": nome_secretaria,
-                "sigla": sigla_secretaria,
-                "total_vulnerabilities": total_vulnerabilidades_combinado
-            }
-        )
+    return jsonify({"idLote": id_lote, "total": len(itens)}), 202
 
-        if not success:
-            db_instance.close()
-            return jsonify({"error": f"Falha na geração do PDF: {message}"}), 500
+@reports_bp.route('/lotes/<string:id_lote>', methods=['GET'])
+def situacaoLoteRelatorios(id_lote):
+    """Situação do lote e de cada relatório (pendente, executando, concluido ou erro)."""
+    if not ObjectId.is_valid(id_lote):
+        return jsonify({"error": "ID de lote inválido."}), 400
 
-        db_instance.update_one("listas", {"_id": objeto_id}, {"relatorioGerado": True})
+    db_instance = Database()
+    try:
+        lote = db_instance.find_one(COLECAO_LOTES_RELATORIOS, {"_id": ObjectId(id_lote)})
+    finally:
         db_instance.close()
+    if not lote:
+        return jsonify({"error": "Lote não encontrado."}), 404
+
+    def _data(valor):
+        return valor.isoformat() if valor else None
+
+    itens = [
+        {
+            "indice": item.get("indice"),
+            "idLista": item.get("idLista"),
+            "nomeSecretaria": item.get("nomeSecretaria"),
+            "siglaSecretaria": item.get("siglaSecretaria"),
+            "status": item.get("status"),
+            "relatorioId": item.get("relatorioId"),
+            "erro": item.get("erro"),
+            "tentativas": item.get("tentativas", 0),
+            "no": item.get("no"),
+            "inicio": _data(item.get("inicio")),
+            "fim": _data(item.get("fim")),
+        }
+        for item in lote.get("itens", [])
+    ]
+    return jsonify({
+        "idLote": id_lote,
+        "status": lote.get("status"),
+        "prioridade": lote.get("prioridade", 0),
+        "total": lote.get("total", len(itens)),
+        "concluidos": sum(1 for item in itens if item["status"] == "concluido"),
+        "comErro": sum(1 for item in itens if item["status"] == "erro"),
+        "zipDisponivel": bool(lote.get("zip")),
+        "erro": lote.get("erro"),
+        "criadoEm": _data(lote.get("criadoEm")),
+        "inicio": _data(lote.get("inicio")),
+        "fim": _data(lote.get("fim")),
+        "itens": itens,
+    }), 200
+
+@reports_bp.route('/lotes/<string:id_lote>/zip', methods=['GET'])
+def baixarZipLoteRelatorios(id_lote):
+    if not ObjectId.is_valid(id_lote):
+        return jsonify({"error": "ID de lote inválido."}), 400
+
+    db_instance = Database()
+    try:
+        lote = db_instance.find_one(COLECAO_LOTES_RELATORIOS, {"_id": ObjectId(id_lote)})
+    finally:
+        db_instance.close()
+    if not lote:
+        return jsonify({"error": "Lote não encontrado."}), 404
+    if not lote.get("gerarZip"):
+        return jsonify({"error": "O zip não foi solicitado para este lote."}), 404
+
+    config = current_app.extensions['config']
+    caminho = caminho_zip_lote(config.caminho_shared_relatorios, id_lote)
+    if not lote.get("zip") or not caminho.is_file():
+        return jsonify({"error": "O zip do lote ainda não está disponível."}), 409
+
+    return send_file(str(caminho), mimetype='application/zip', as_attachment=True, download_name=f"Relatorios_Auditoria_{id_lote}.zip")
+
+@reports_bp.route('/progress/', methods=['POST'])
+def registrarProgresso():
+    """
+    Registra um idProgresso neste processo: o cliente se inscreve em /reports/progress/<idProgresso>
+    e o envia em /reports/gerarRelatorioDeLista/. Sem a geração, o stream termina com "failed"
+    depois de report_progress.ESPERA_INICIO_SEGUNDOS.
+    """
+    return jsonify({"idProgresso": PROGRESSO_RELATORIOS.registrar()}), 201
+
+@reports_bp.route('/progress/<string:relatorio_id>', methods=['GET'])
+def progressoRelatorio(relatorio_id):
+    """
+    Stream SSE (text/event-stream) com o progresso da geração do relatório: etapas
+    (event: stage), arquivos lidos (parsing), páginas do pdflatex (pdflatex) e o evento
+    final done/failed. Aceita o id do relatório ou o idProgresso enviado na geração. Ao
+    reconectar, o EventSource envia Last-Event-ID e recebe só os eventos seguintes.
+    O progresso fica na memória do processo que executa a geração; um relatório de outro
+    processo (ex.: do lote) recebe só o evento final conhecido e um id desconhecido, 404.
+    """
+    try:
+        desde = max(0, int(request.headers.get("Last-Event-ID") or 0))
+    except ValueError:
+        desde = 0
 
-        return jsonify(str(novo_relatorio_id)), 200
-
-    except Exception as e:
-        print(f"Erro ao gerar relatório de lista: {str(e)}")
-        traceback.print_exc()
-        if 'db_instance' in locals() and db_instance.client:
+    eventos = None
+    if PROGRESSO_RELATORIOS.obter(relatorio_id) is None and ObjectId.is_valid(relatorio_id):
+        # Relatório gerado antes (ou por outro processo): responde só com a situação final conhecida
+        db_instance = Database()
+        try:
+            relatorio = db_instance.find_one("relatorios", {"_id": ObjectId(relatorio_id)})
+        finally:
             db_instance.close()
-        return jsonify({"error": f"Erro interno ao gerar relatório: {str(e)}"}), 500
-    
-    
+        if relatorio:
+            config = current_app.extensions['config']
+            pdf_path = Path(config.caminho_shared_relatorios) / relatorio_id / "relatorio_preprocessado" / "RelatorioPronto" / "main.pdf"
+            final = "done" if pdf_path.exists() else "unknown"
+            eventos = [{"seq": 1, "evento": final, "report_id": relatorio_id}]
+    if eventos is None:
+        if PROGRESSO_RELATORIOS.obter(relatorio_id) is None:
+            return jsonify({"error": "Relatório ou id de progresso não encontrado."}), 404
+        eventos = PROGRESSO_RELATORIOS.eventos(relatorio_id, desde)
+
+    def gerar_eventos():
+        yield "retry: 3000\n\n"
+        for evento in eventos:
+            if evento is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {evento['seq']}\nevent: {evento['evento']}\ndata: {json.dumps(evento, ensure_ascii=False, default=str)}\n\n"
+
+    return Response(
+        gerar_eventos(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @reports_bp.route('/baixarRelatorioPdf/', methods=['POST'])
 def baixarRelatorioPdf():
     try:
@@ -342,7 +325,7 @@ def baixarRelatorioPdf():
         pdf_path = Path(config.caminho_shared_relatorios) / relatorio_id / "relatorio_preprocessado" / "RelatorioPronto" / "main.pdf"
 
         if not pdf_path.exists():
-            print(f"Erro: PDF não encontrado no caminho: {pdf_path}")
+            logger.error(f"PDF não encontrado no caminho: {pdf_path}")
             return jsonify({"error": "PDF do relatório não encontrado."}), 404
         
         db_instance = Database()
@@ -363,11 +346,41 @@ def baixarRelatorioPdf():
             download_name=f"Relatorio_Auditoria_{relatorio_id}.pdf"
         )
     except Exception as e:
-        print(f"Erro ao baixar relatório PDF: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Erro ao baixar relatório PDF: {str(e)}")
         return jsonify({"error": f"Erro interno ao baixar o PDF: {str(e)}"}), 500
     
+@reports_bp.route('/compararRelatorios/', methods=['GET'])
+def compararRelatorios():
+    """
+    Compara dois relatórios pelos agregados salvos na geração (sem ler os scans nem as
+    pastas dos relatórios): vulnerabilidades novas, corrigidas e persistentes por fonte.
+    Parâmetros: relatorioBaseId (o mais antigo) e relatorioAtualId.
+    """
+    try:
+        relatorio_base_id = request.args.get('relatorioBaseId')
+        relatorio_atual_id = request.args.get('relatorioAtualId')
+        if not relatorio_base_id or not relatorio_atual_id:
+            return jsonify({"error": "Parâmetros 'relatorioBaseId' e 'relatorioAtualId' são obrigatórios."}), 400
+
+        db_instance = Database()
+        agregados_base = buscar_agregados_relatorio(db_instance, relatorio_base_id)
+        agregados_atual = buscar_agregados_relatorio(db_instance, relatorio_atual_id)
+        db_instance.close()
+
+        ausentes = [relatorio_id for relatorio_id, agregados in ((relatorio_base_id, agregados_base), (relatorio_atual_id, agregados_atual)) if not agregados]
+        if ausentes:
+            return jsonify({"error": f"Agregados não encontrados para o(s) relatório(s): {', '.join(ausentes)}. Relatórios gerados antes desta versão precisam ser gerados novamente."}), 404
+
+        return jsonify({
+            "relatorioBaseId": relatorio_base_id,
+            "relatorioAtualId": relatorio_atual_id,
+            **comparar_agregados(agregados_base, agregados_atual)
+        }), 200
+
+    except Exception as e:
+        logger.exception(f"Erro ao comparar relatórios: {str(e)}")
+        return jsonify({"error": f"Erro interno ao comparar relatórios: {str(e)}"}), 500
+
 @reports_bp.route('/getRelatorioMissingVulnerabilities/', methods=['GET'])
 def getRelatorioMissingVulnerabilities():
     try:
@@ -395,7 +408,51 @@ def getRelatorioMissingVulnerabilities():
         return jsonify({"content": content_lines}), 200
 
     except Exception as e:
-        print(f"Erro ao obter vulnerabilidades ausentes: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({"error": f"Erro interno ao buscar vulnerabilidades ausentes: {str(e)}"}), 500
\ No newline at end of file
+        logger.exception(f"Erro ao obter vulnerabilidades ausentes: {str(e)}")
+        return jsonify({"error": f"Erro interno ao buscar vulnerabilidades ausentes: {str(e)}"}), 500
+
+
+def _profiling_autorizado():
+    """Os perfis só ficam acessíveis com o mesmo token usado para ativar o profiling."""
+    if not token_profiling():
+        return jsonify({"error": "Profiling não habilitado (PROFILING_TOKEN não definido)."}), 404
+    token_recebido = request.headers.get("X-Profile-Token") or request.args.get("_profile")
+    if not token_profiling_valido(token_recebido):
+        return jsonify({"error": "Token de profiling inválido."}), 403
+    return None
+
+
+@reports_bp.route('/profiles/<string:relatorio_id>', methods=['GET'])
+def listarProfilesRelatorio(relatorio_id):
+    erro = _profiling_autorizado()
+    if erro:
+        return erro
+
+    config = current_app.extensions['config']
+    pasta = pasta_profiles(config.caminho_shared_relatorios, relatorio_id)
+    if not pasta.is_dir():
+        return jsonify([]), 200
+
+    perfis = [
+        {"nome": arquivo.name, "tamanho": arquivo.stat().st_size}
+        for arquivo in sorted(pasta.glob("*.prof"), reverse=True)
+    ]
+    return jsonify(perfis), 200
+
+
+@reports_bp.route('/profiles/<string:relatorio_id>/<string:nome_arquivo>', methods=['GET'])
+def baixarProfileRelatorio(relatorio_id, nome_arquivo):
+    erro = _profiling_autorizado()
+    if erro:
+        return erro
+
+    # Apenas nomes simples de arquivos .prof, sem caminhos
+    if not re.fullmatch(r'[A-Za-z0-9_.-]+\.prof', nome_arquivo):
+        return jsonify({"error": "Nome de arquivo inválido."}), 400
+
+    config = current_app.extensions['config']
+    caminho = pasta_profiles(config.caminho_shared_relatorios, relatorio_id) / nome_arquivo
+    if not caminho.is_file():
+        return jsonify({"error": "Perfil não encontrado."}), 404
+
+    return send_file(str(caminho), as_attachment=True, download_name=nome_arquivo, mimetype="application/octet-stream")
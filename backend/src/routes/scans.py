@@ -2,11 +2,21 @@
 
 import json
 from pathlib import Path
+import queue
 import shutil
-from flask import Blueprint, request, jsonify, current_app # Importa current_app
+import tempfile
+import threading
+from flask import Blueprint, request, jsonify, current_app, Response # Importa current_app
 import os
 import time
 from ..core.database import Database # Mantém para uso local
+from ..core.scan_manifest import escrever_manifesto, listar_pastas_scans
+from ..data_processing.columnar_cache import escrever_copia_colunar
+from ..data_processing.ndjson_parser import PASTA_VULNS_EXPORT
+from bson.objectid import ObjectId
+from ..core.logging_config import obter_logger
+
+logger = obter_logger(__name__)
 
 # Removido: from ..main import tenable_api
 # Removido: from ..main import config
@@ -17,6 +27,9 @@ from ..core.database import Database # Mantém para uso local
 
 scans_bp = Blueprint('scans', __name__, url_prefix='/scans')
 
+# Limite de downloads simultâneos aceitos pelo endpoint de download em lote
+MAX_BULK_CONCURRENCY = 8
+
 @scans_bp.route('/getScansFromTenable', methods=['GET'])
 def getScansFromTenable():
     try:
@@ -26,7 +39,7 @@ def getScansFromTenable():
     except ValueError as ve:
         return jsonify({"error": str(ve)}), 400
     except Exception as e:
-        print(f"Erro ao obter scans do Tenable: {e}")
+        logger.error(f"Erro ao obter scans do Tenable: {e}")
         return jsonify({"error": "Erro ao obter scans do Tenable."}), 500
 
 @scans_bp.route('/saveScanToDirectory', methods=['POST'])
@@ -55,27 +68,175 @@ def saveScanToDirectory():
 
     try:
         tenable_api = current_app.extensions['tenable_api']
-        scan_details = tenable_api.get_scan_details(scan_id)
+        scan_details = tenable_api.get_scan_details(scan_id, use_cache=False)
+        tenable_api.invalidate_cache(scan_id)
 
         with open(json_file_path, 'w', encoding='utf-8') as f:
             json.dump(scan_details, f, ensure_ascii=False, indent=4)
+        escrever_manifesto(scan_directory, scan_details)
         
         if scan_type == 'vm' and 'history_id' in data:
             history_id = data['history_id']
-            csv_content = tenable_api.export_scan_csv(scan_id, history_id)
-            if csv_content:
-                csv_file_path = scan_directory / "servidores_scan.csv"
-                with open(csv_file_path, 'wb') as f:
-                    f.write(csv_content)
+            export_info = tenable_api.export_scan_csv(scan_id, history_id, scan_directory / "servidores_scan.csv")
+            escrever_copia_colunar(export_info["path"], export_info["sha256"])
                 
         return jsonify({"message": f"Scan '{scan_name}' salvo com sucesso em {scan_directory}"}), 200
 
     except ValueError as ve:
         return jsonify({"error": str(ve)}), 400
     except Exception as e:
-        print(f"Erro ao salvar scan '{scan_name}': {e}")
+        logger.error(f"Erro ao salvar scan '{scan_name}': {e}")
         return jsonify({"error": f"Erro interno ao salvar scan: {e}"}), 500
 
+@scans_bp.route('/saveScansToDirectory', methods=['POST'])
+def saveScansToDirectory():
+    """
+    Baixa vários scans do Tenable de uma vez, em paralelo. A resposta é um stream
+    NDJSON com uma linha por evento de progresso de cada scan e uma linha final de resumo.
+    """
+    data = request.get_json()
+    if not data or not isinstance(data.get('scans'), list) or not data['scans']:
+        return jsonify({"error": "Uma lista não vazia 'scans' é obrigatória."}), 400
+
+    config = current_app.extensions['config']
+    base_scan_path = Path(config.caminho_scans_base)
+
+    try:
+        max_concurrency = int(data.get('maxConcurrency', 4))
+    except (TypeError, ValueError):
+        return jsonify({"error": "maxConcurrency deve ser um número inteiro."}), 400
+    max_concurrency = max(1, min(max_concurrency, MAX_BULK_CONCURRENCY))
+
+    jobs = []
+    for scan in data['scans']:
+        if not isinstance(scan, dict) or 'scanId' not in scan or 'scanName' not in scan:
+            return jsonify({"error": "Cada scan precisa de scanId e scanName."}), 400
+        scan_type = scan.get('scanType')
+        if scan_type == 'was':
+            scan_directory = base_scan_path / "WebAppScans" / scan['scanName']
+        elif scan_type == 'vm':
+            scan_directory = base_scan_path / "VMScans" / scan['scanName']
+        else:
+            return jsonify({"error": f"scanType inválido para o scan '{scan['scanName']}'. Use 'was' ou 'vm'."}), 400
+        jobs.append({
+            "scan_id": scan['scanId'],
+            "scan_name": scan['scanName'],
+            "scan_type": scan_type,
+            "history_id": scan.get('history_id'),
+            "scan_directory": scan_directory
+        })
+
+    tenable_api = current_app.extensions['tenable_api']
+    try:
+        tenable_api._get_headers() # Falha cedo se as credenciais não estiverem configuradas
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+
+    eventos = queue.Queue()
+    fim = object()
+
+    def executar_downloads():
+        try:
+            resultados = tenable_api.download_scans_bulk(jobs, max_concurrency, eventos.put)
+            for job in jobs:
+                tenable_api.invalidate_cache(job["scan_id"])
+            concluidos = sum(1 for r in resultados if r["status"] == "done")
+            eventos.put({"status": "finished", "total": len(jobs), "succeeded": concluidos, "failed": len(jobs) - concluidos})
+        except Exception as e:
+            logger.error(f"Erro no download em lote de scans: {e}")
+            eventos.put({"status": "failed", "error": str(e)})
+        finally:
+            eventos.put(fim)
+
+    threading.Thread(target=executar_downloads, daemon=True).start()
+
+    def gerar_eventos():
+        processados = 0
+        while True:
+            evento = eventos.get()
+            if evento is fim:
+                break
+            if evento.get("status") in ("done", "error"):
+                processados += 1
+                evento = {**evento, "completed": processados, "total": len(jobs)}
+            yield json.dumps(evento, ensure_ascii=False) + "\n"
+
+    return Response(gerar_eventos(), mimetype='application/x-ndjson')
+
+@scans_bp.route('/exportVulnsToList/<string:id_lista>', methods=['POST'])
+def exportVulnsToList(id_lista):
+    """
+    Baixa a exportação de vulnerabilidades em chunks do Tenable para a pasta da lista e
+    marca a lista para usar os chunks como fonte dos dados de servidores.
+    Corpo opcional: {"filters": {...}, "numAssets": 500, "maxConcurrency": 4}.
+    """
+    data = request.get_json(silent=True) or {}
+
+    try:
+        objeto_id = ObjectId(id_lista)
+    except Exception:
+        return jsonify({"error": "ID de lista inválido."}), 400
+
+    try:
+        num_assets = int(data.get('numAssets', 500))
+        max_concurrency = max(1, min(int(data.get('maxConcurrency', 4)), MAX_BULK_CONCURRENCY))
+    except (TypeError, ValueError):
+        return jsonify({"error": "numAssets e maxConcurrency devem ser números inteiros."}), 400
+
+    db_instance = Database()
+    try:
+        lista_doc = db_instance.find_one("listas", {"_id": objeto_id})
+        if not lista_doc:
+            return jsonify({"error": "Lista não encontrada."}), 404
+        if not lista_doc.get("pastas_scans_webapp"):
+            return jsonify({"error": "A lista não possui pasta de scans associada."}), 400
+
+        pasta_chunks = Path(lista_doc["pastas_scans_webapp"]) / PASTA_VULNS_EXPORT
+        tenable_api = current_app.extensions['tenable_api']
+        chunks = tenable_api.export_vulns_chunks(pasta_chunks, data.get('filters'), num_assets, max_concurrency)
+
+        db_instance.update_one("listas", {"_id": objeto_id}, {"fonte_scan_servidores": "vulns_export"})
+        return jsonify({
+            "message": f"{len(chunks)} chunks de vulnerabilidades salvos em {pasta_chunks}",
+            "chunks": len(chunks),
+            "folder_path": str(pasta_chunks)
+        }), 200
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    except Exception as e:
+        logger.error(f"Erro ao exportar vulnerabilidades para a lista {id_lista}: {e}")
+        return jsonify({"error": f"Erro interno ao exportar vulnerabilidades: {e}"}), 500
+    finally:
+        db_instance.close()
+
+@scans_bp.route('/syncFromTenable', methods=['POST'])
+def syncFromTenable():
+    """
+    Sincroniza a pasta de scans com o Tenable, baixando apenas scans novos ou alterados.
+    409 se a sincronização (periódica ou sob demanda) já estiver em andamento em algum nó.
+    """
+    try:
+        tenable_sync = current_app.extensions['tenable_sync']
+        resultado = tenable_sync.sincronizar_exclusivo()
+        if resultado is None:
+            return jsonify({"error": "Uma sincronização com o Tenable já está em andamento."}), 409
+        return jsonify(resultado), 200
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    except Exception as e:
+        logger.error(f"Erro ao sincronizar scans do Tenable: {e}")
+        return jsonify({"error": f"Erro interno ao sincronizar scans: {e}"}), 500
+
+@scans_bp.route('/syncStatus', methods=['GET'])
+def syncStatus():
+    tenable_sync = current_app.extensions['tenable_sync']
+    return jsonify({"last_result": tenable_sync.ultimo_resultado}), 200
+
+@scans_bp.route('/cacheStats', methods=['GET'])
+def cacheStats():
+    tenable_api = current_app.extensions['tenable_api']
+    return jsonify(tenable_api.cache_stats()), 200
+
 @scans_bp.route('/getSavedScans/<string:scan_type>', methods=['GET'])
 def getSavedScans(scan_type):
     config = current_app.extensions['config']
@@ -88,34 +249,18 @@ def getSavedScans(scan_type):
     else: # vm
         target_directory = base_scan_path / "VMScans"
 
-    if not target_directory.exists():
-        return jsonify([]), 200
-
+    # Lê apenas os manifestos das pastas; o JSON do scan só é aberto se o manifesto estiver desatualizado
     saved_scans_list = []
-    for scan_folder in target_directory.iterdir():
-        if scan_folder.is_dir():
-            scan_name = scan_folder.name
-            json_file_path = scan_folder / f"{scan_name}.json"
-            if json_file_path.exists():
-                try:
-                    with open(json_file_path, 'r', encoding='utf-8') as f:
-                        scan_data = json.load(f)
-                    
-                    scan_id = scan_data.get('info', {}).get('uuid', '')
-                    latest_history_id = None
-                    if scan_data.get('history'):
-                        latest_history_id = scan_data['history'][0]['history_id']
-
-                    saved_scans_list.append({
-                        "id": scan_id,
-                        "name": scan_name,
-                        "folder_path": str(scan_folder),
-                        "history_id": latest_history_id
-                    })
-                except json.JSONDecodeError:
-                    print(f"Erro ao decodificar JSON em {json_file_path}")
-                except Exception as e:
-                    print(f"Erro ao processar scan salvo {json_file_path}: {e}")
+    for pasta in listar_pastas_scans(target_directory):
+        manifesto = pasta["manifest"]
+        if manifesto is None:
+            continue
+        saved_scans_list.append({
+            "id": manifesto["id"],
+            "name": pasta["name"],
+            "folder_path": str(pasta["path"]),
+            "history_id": manifesto["history_id"]
+        })
     return jsonify(saved_scans_list), 200
 
 
@@ -138,7 +283,7 @@ def deleteScanFromDirectory(scan_type, scan_name):
         shutil.rmtree(scan_directory)
         return jsonify({"message": f"Scan '{scan_name}' excluído com sucesso."}), 200
     except Exception as e:
-        print(f"Erro ao excluir pasta do scan '{scan_name}': {e}")
+        logger.error(f"Erro ao excluir pasta do scan '{scan_name}': {e}")
         return jsonify({"error": f"Erro interno ao excluir scan: {e}"}), 500
 
 
@@ -151,20 +296,49 @@ def getScanDetails(scan_id):
     except ValueError as ve:
         return jsonify({"error": str(ve)}), 400
     except Exception as e:
-        print(f"Erro ao obter detalhes do scan {scan_id} do Tenable: {e}")
+        logger.error(f"Erro ao obter detalhes do scan {scan_id} do Tenable: {e}")
         return jsonify({"error": "Erro ao obter detalhes do scan."}), 500
 
 @scans_bp.route('/exportScanCsv/<string:scan_id>/<string:history_id>', methods=['GET'])
 def exportScanCsv(scan_id, history_id):
+    """
+    Exporta o CSV de um scan e o devolve como text/csv em stream. O arquivo passa por
+    um diretório temporário em disco e nunca é carregado inteiro em memória.
+    """
+    pasta_temp = Path(tempfile.mkdtemp(prefix="export_scan_"))
+    csv_file_path = pasta_temp / f"scan_{scan_id}_{history_id}.csv"
     try:
         tenable_api = current_app.extensions['tenable_api']
-        csv_content = tenable_api.export_scan_csv(scan_id, history_id)
-        if csv_content:
-            return jsonify({"csv_content": csv_content.decode('utf-8')}), 200
-        else:
-            return jsonify({"error": "Nenhum conteúdo CSV retornado."}), 404
+        export_info = tenable_api.export_scan_csv(scan_id, history_id, csv_file_path)
     except ValueError as ve:
+        shutil.rmtree(pasta_temp, ignore_errors=True)
         return jsonify({"error": str(ve)}), 400
     except Exception as e:
-        print(f"Erro ao exportar CSV do scan {scan_id}: {e}")
-        return jsonify({"error": "Erro ao exportar CSV do scan."}), 500
\ No newline at end of file
+        shutil.rmtree(pasta_temp, ignore_errors=True)
+        logger.error(f"Erro ao exportar CSV do scan {scan_id}: {e}")
+        return jsonify({"error": "Erro ao exportar CSV do scan."}), 500
+
+    if export_info["bytes"] == 0:
+        shutil.rmtree(pasta_temp, ignore_errors=True)
+        return jsonify({"error": "Nenhum conteúdo CSV retornado."}), 404
+
+    def enviar_csv():
+        try:
+            with open(csv_file_path, 'rb') as f:
+                while True:
+                    chunk = f.read(64 * 1024)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            shutil.rmtree(pasta_temp, ignore_errors=True)
+
+    return Response(
+        enviar_csv(),
+        mimetype='text/csv',
+        headers={
+            "Content-Disposition": f"attachment; filename=scan_{scan_id}_{history_id}.csv",
+            "Content-Length": str(export_info["bytes"]),
+            "X-Content-SHA256": export_info["sha256"]
+        }
+    )
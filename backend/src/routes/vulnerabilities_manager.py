@@ -5,6 +5,9 @@ from flask_cors import CORS
 from ..core.json_utils import get_all_vulnerabilities, add_vulnerability, update_vulnerability, delete_vulnerability, _load_data_, salvar_json # Import necessary json utilities
 from ..core.config import Config
 import os # Needed for path joining
+from ..core.logging_config import obter_logger
+
+logger = obter_logger(__name__)
 
 vulnerabilities_manager_bp = Blueprint('vulnerabilities_manager', __name__, url_prefix='/vulnerabilities')
 CORS(vulnerabilities_manager_bp, supports_credentials=True) # Added supports_credentials=True
@@ -25,7 +28,7 @@ def get_vulnerabilities(vuln_type):
         vulnerabilities = get_all_vulnerabilities(file_path) # This assumes get_all_vulnerabilities returns a list
         return jsonify(vulnerabilities), 200
     except Exception as e:
-        print(f"Erro ao buscar vulnerabilidades de {vuln_type}: {e}")
+        logger.error(f"Erro ao buscar vulnerabilidades de {vuln_type}: {e}")
         return jsonify({"error": "Erro interno ao buscar vulnerabilidades."}), 500
 
 @vulnerabilities_manager_bp.route('/add/<string:vuln_type>', methods=['POST'])
@@ -52,7 +55,7 @@ def add_vulnerability(vuln_type):
             return jsonify({"error": message}), 409 # Conflict if already exists
 
     except Exception as e:
-        print(f"Erro ao adicionar vulnerabilidade de {vuln_type}: {e}")
+        logger.error(f"Erro ao adicionar vulnerabilidade de {vuln_type}: {e}")
         return jsonify({"error": "Erro interno ao adicionar vulnerabilidade."}), 500
 
 @vulnerabilities_manager_bp.route('/update/<string:vuln_type>/<string:vuln_name>', methods=['PUT']) # Changed vuln_id to vuln_name
@@ -79,7 +82,7 @@ def update_vulnerability(vuln_type, vuln_name): # Changed vuln_id to vuln_name
             return jsonify({"error": message}), 404 # Not found or other update issue
 
     except Exception as e:
-        print(f"Erro ao atualizar vulnerabilidade {vuln_name} de {vuln_type}: {e}")
+        logger.error(f"Erro ao atualizar vulnerabilidade {vuln_name} de {vuln_type}: {e}")
         return jsonify({"error": "Erro interno ao atualizar vulnerabilidade."}), 500
 
 @vulnerabilities_manager_bp.route('/delete/<string:vuln_type>/<string:vuln_name>', methods=['DELETE']) # Changed vuln_id to vuln_name
@@ -102,7 +105,7 @@ def delete_vulnerability(vuln_type, vuln_name): # Changed vuln_id to vuln_name
             return jsonify({"error": message}), 404 # Not found
 
     except Exception as e:
-        print(f"Erro ao deletar vulnerabilidade {vuln_name} de {vuln_type}: {e}")
+        logger.error(f"Erro ao deletar vulnerabilidade {vuln_name} de {vuln_type}: {e}")
         return jsonify({"error": "Erro interno ao deletar vulnerabilidade."}), 500
 
 @vulnerabilities_manager_bp.route('/descriptions/<string:vuln_type>', methods=['GET'])
@@ -125,7 +128,7 @@ def get_vulnerability_descriptions(vuln_type):
             return jsonify([]), 200 # Return empty list if format is unexpected or file is empty
 
     except Exception as e:
-        print(f"Erro ao buscar descrições de vulnerabilidades de {vuln_type}: {e}")
+        logger.error(f"Erro ao buscar descrições de vulnerabilidades de {vuln_type}: {e}")
         return jsonify({"error": "Erro interno ao buscar descrições."}), 500
 
 @vulnerabilities_manager_bp.route('/descriptions/<string:vuln_type>', methods=['PUT'])
@@ -149,5 +152,5 @@ def update_vulnerability_description(vuln_type):
         
         return jsonify({"message": "Descrição de vulnerabilidade atualizada com sucesso!"}), 200
     except Exception as e:
-        print(f"Erro ao atualizar descrição de vulnerabilidade de {vuln_type}: {e}")
+        logger.error(f"Erro ao atualizar descrição de vulnerabilidade de {vuln_type}: {e}")
         return jsonify({"error": "Erro interno ao atualizar descrição de vulnerabilidade."}), 500
\ No newline at end of file
@@ -0,0 +1,10 @@
+# backend/src/wsgi.py
+
+"""
+Ponto de entrada WSGI para servidores de produção (gunicorn -c gunicorn.conf.py).
+Os serviços de fundo rodam em um processo dedicado criado pelo gunicorn.conf.py, não aqui.
+"""
+
+from .main import create_app
+
+app = create_app(iniciar_servicos=False)
@@ -0,0 +1,335 @@
+# backend/tools/benchmark_pipeline.py
+"""
+Benchmark do pipeline de geração de relatórios, etapa por etapa, sobre dados sintéticos
+(ver gerar_scans_sinteticos.py).
+
+Cada etapa é executada `--repeticoes` vezes para medir o tempo (mediana, mínimo e máximo)
+e mais uma vez com o tracemalloc ligado para medir o pico de memória alocada pelo Python
+(a execução com tracemalloc não entra nos tempos). O resultado é gravado em JSON e pode
+ser comparado com um resultado anterior com --comparar, que falha (código de saída 1)
+se alguma etapa ficar mais lenta que a tolerância.
+
+Etapas: parsers JSON/CSV (leitura completa e via cache de agregados), linhas por site,
+gerar_relatorio_txt(_csv), ranking de hosts (matriz hosts × vulnerabilidades),
+gerar_conteudo_latex_para_vulnerabilidades, montagem do
+template (terminar_relatorio_preprocessado), gráficos e compilar_latex (ignorada se o
+pdflatex não estiver instalado).
+
+Uso:
+    python tools/benchmark_pipeline.py --escala media --saida-json bench_media.json
+    python tools/benchmark_pipeline.py --escala media --comparar bench_media.json --tolerancia 0.2
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = TOOLS_DIR.parent
+TEMPLATES_DIR = BACKEND_DIR.parent / "shared_data" / "report_templates"
+
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(TOOLS_DIR))
+
+from gerar_scans_sinteticos import ESCALAS, gerar_lista_sintetica  # noqa: E402
+
+# Diferença mínima (s) para uma etapa ser considerada regressão, evitando ruído em etapas muito rápidas
+REGRESSAO_MINIMA_SEGUNDOS = 0.005
+
+
+def _configurar_ambiente(pasta_trabalho: Path):
+    """
+    Aponta o Config para os templates do repositório e para uma pasta temporária de
+    relatórios. Precisa acontecer antes de importar os módulos de src (o Config é lido
+    uma única vez).
+    """
+    os.environ.setdefault("CAMINHO_REPORT_TEMPLATES_BASE", str(TEMPLATES_DIR / "base_report"))
+    os.environ.setdefault("CAMINHO_REPORT_TEMPLATES_DESCRIPTIONS", str(TEMPLATES_DIR / "descriptions"))
+    os.environ.setdefault("CAMINHO_SHARED_RELATORIOS", str(pasta_trabalho / "relatorios"))
+    os.environ.setdefault("MPLBACKEND", "Agg")
+
+
+def _montar_etapas(ctx: dict):
+    """Retorna a lista de etapas (nome, função, preparação opcional). As etapas usam e preenchem `ctx`."""
+    from src.core.json_utils import carregar_json_utf
+    from src.data_processing import aggregate_cache
+    from src.data_processing.json_parser import localizar_arquivos, contar_vulnerabilidades, obter_vulnerabilidades_comum, extrair_targets
+    from src.data_processing.csv_parser import agregar_csv, contar_vulnerabilidades_csv
+    from src.data_processing.vulnerability_analyzer import extrair_quantidades_vulnerabilidades_por_site, gerar_ranking_hosts
+    from src.report_generation.report_builder import (
+        gerar_relatorio_txt, gerar_relatorio_txt_csv, gerar_conteudo_latex_para_vulnerabilidades,
+        carregar_vulnerabilidades_do_relatorio, carregar_vulnerabilidades_do_relatorio_csv,
+        terminar_relatorio_preprocessado
+    )
+    from src.report_generation.plot_generator import gerar_grafico_donut, gerar_grafico_donut_webapp, gerar_Grafico_Quantitativo_Vulnerabilidades_Por_Site, gerar_grafico_ranking_hosts
+    from src.report_generation.latex_compiler import compilar_latex
+
+    pasta_scans = ctx["pasta_scans"]
+    pasta_relatorio = ctx["pasta_relatorio"]
+    descricoes = Path(os.environ["CAMINHO_REPORT_TEMPLATES_DESCRIPTIONS"])
+
+    def remover_cache_agregados():
+        caminho_cache = Path(pasta_scans) / aggregate_cache.CACHE_NOME
+        if caminho_cache.exists():
+            caminho_cache.unlink()
+
+    def parse_json():
+        arquivos = localizar_arquivos(pasta_scans, "json")
+        ctx["riscos_web"] = contar_vulnerabilidades(arquivos)
+        ctx["vulns_web"] = obter_vulnerabilidades_comum(arquivos)
+        ctx["targets_web"] = extrair_targets(arquivos)
+
+    def parse_csv():
+        arquivos = localizar_arquivos(pasta_scans, "csv")
+        ctx["vulns_srv"], ctx["hosts_srv"] = aggregate_cache.unir_agregados_csv([agregar_csv(a) for a in arquivos])
+
+    def agregados():
+        aggregate_cache.unir_agregados_json(aggregate_cache.agregados_json(localizar_arquivos(pasta_scans, "json")))
+        aggregate_cache.unir_agregados_csv(aggregate_cache.agregados_csv(localizar_arquivos(pasta_scans, "csv")))
+
+    def linhas_por_site():
+        extrair_quantidades_vulnerabilidades_por_site(str(pasta_relatorio / "vulnerabilidades_agrupadas_por_site.csv"), pasta_scans)
+
+    def txt_webapp():
+        gerar_relatorio_txt(str(pasta_relatorio / "Sites_agrupados_por_vulnerabilidades.txt"),
+                            ctx["riscos_web"], ctx["vulns_web"], ctx["targets_web"])
+
+    def txt_servidores():
+        gerar_relatorio_txt_csv(str(pasta_relatorio / "Servidores_agrupados_por_vulnerabilidades.txt"),
+                                contar_vulnerabilidades_csv(ctx["vulns_srv"]), ctx["vulns_srv"], ctx["hosts_srv"])
+
+    def ranking_hosts():
+        gerar_ranking_hosts(ctx["vulns_srv"], str(pasta_relatorio))
+
+    def preparar_latex():
+        ctx["latex_web_txt"] = carregar_vulnerabilidades_do_relatorio(str(pasta_relatorio / "Sites_agrupados_por_vulnerabilidades.txt"))
+        ctx["latex_srv_txt"] = carregar_vulnerabilidades_do_relatorio_csv(str(pasta_relatorio / "Servidores_agrupados_por_vulnerabilidades.txt"))
+        ctx["catalogo_web"] = carregar_json_utf(str(descricoes / "vulnerabilities_webapp.json"))
+        ctx["descritivo_web"] = carregar_json_utf(str(descricoes / "descritivo_webapp.json"))
+        ctx["catalogo_srv"] = carregar_json_utf(str(descricoes / "vulnerabilities_servers.json"))
+        ctx["descritivo_srv"] = carregar_json_utf(str(descricoes / "descritivo_servers.json"))
+
+    def latex_webapp():
+        conteudo = gerar_conteudo_latex_para_vulnerabilidades(ctx["latex_web_txt"], ctx["catalogo_web"], ctx["descritivo_web"], "webapp")
+        with open(pasta_relatorio / "(LATEX)Sites_agrupados_por_vulnerabilidades.txt", 'w', encoding='utf-8') as f:
+            f.write(conteudo)
+
+    def latex_servidores():
+        conteudo = gerar_conteudo_latex_para_vulnerabilidades(ctx["latex_srv_txt"], ctx["catalogo_srv"], ctx["descritivo_srv"], "servers")
+        with open(pasta_relatorio / "(LATEX)Servidores_agrupados_por_vulnerabilidades.txt", 'w', encoding='utf-8') as f:
+            f.write(conteudo)
+
+    def graficos():
+        riscos_web = {k: int(v) for k, v in ctx["riscos_web"].items()}
+        gerar_grafico_donut_webapp(riscos_web, ctx["grafico_donut_web"])
+        gerar_grafico_donut(contar_vulnerabilidades_csv(ctx["vulns_srv"]), ctx["grafico_donut_vm"])
+        gerar_Grafico_Quantitativo_Vulnerabilidades_Por_Site(
+            str(pasta_relatorio / "vulnerabilidades_agrupadas_por_site.csv"), ctx["grafico_sites"], "descendente"
+        )
+        gerar_grafico_ranking_hosts(str(pasta_relatorio / "ranking_hosts_servidores.csv"), ctx["grafico_ranking_vm"])
+
+    def montagem_template():
+        riscos_web = ctx["riscos_web"]
+        riscos_srv = contar_vulnerabilidades_csv(ctx["vulns_srv"])
+        terminar_relatorio_preprocessado(
+            "Secretaria Sintética", "SSI", "01/01/2025", "31/01/2025", "2025", "Janeiro",
+            str(pasta_relatorio), str(pasta_relatorio / "RelatorioPronto" / "main.tex"), "https://example.invalid",
+            str(sum(riscos_web.values())), str(sum(riscos_srv.values())),
+            str(riscos_web['Critical']), str(riscos_web['High']), str(riscos_web['Medium']), str(riscos_web['Low']),
+            str(riscos_srv['critical']), str(riscos_srv['high']), str(riscos_srv['medium']), str(riscos_srv['low']),
+            str(len(ctx["targets_web"])), "benchmark",
+            ctx["grafico_donut_vm"], ctx["grafico_donut_web"], ctx["grafico_sites"], ctx["grafico_ranking_vm"]
+        )
+
+    def compilacao_latex():
+        pasta_final = pasta_relatorio / "RelatorioPronto"
+        sucesso, mensagem = compilar_latex(str(pasta_final / "main.tex"), str(pasta_final))
+        ctx["compilacao"] = {"sucesso": sucesso, "mensagem": mensagem}
+
+    etapas = [
+        ("parse_json", parse_json, None),
+        ("parse_csv", parse_csv, None),
+        ("agregados_cache_frio", agregados, remover_cache_agregados),
+        ("agregados_cache_quente", agregados, None),
+        ("linhas_por_site", linhas_por_site, None),
+        ("gerar_relatorio_txt", txt_webapp, None),
+        ("gerar_relatorio_txt_csv", txt_servidores, None),
+        ("ranking_hosts", ranking_hosts, None),
+        ("latex_webapp", latex_webapp, preparar_latex),
+        ("latex_servidores", latex_servidores, preparar_latex),
+        ("graficos", graficos, None),
+        ("montagem_template", montagem_template, None),
+    ]
+    if shutil.which("pdflatex"):
+        etapas.append(("compilar_latex", compilacao_latex, None))
+    else:
+        ctx["ignoradas"].append({"etapa": "compilar_latex", "motivo": "pdflatex não encontrado no PATH"})
+    return etapas
+
+
+def _executar_etapa(funcao, preparar, repeticoes: int, silencioso: bool) -> dict:
+    destino_saida = open(os.devnull, 'w') if silencioso else sys.stdout
+    tempos = []
+    try:
+        with redirect_stdout(destino_saida):
+            for _ in range(repeticoes):
+                if preparar:
+                    preparar()
+                inicio = time.perf_counter()
+                funcao()
+                tempos.append(time.perf_counter() - inicio)
+
+            # Execução extra só para medir o pico de memória (o tracemalloc deixa o código mais lento)
+            if preparar:
+                preparar()
+            tracemalloc.start()
+            funcao()
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    finally:
+        if silencioso:
+            destino_saida.close()
+
+    return {
+        "mediana_s": round(statistics.median(tempos), 6),
+        "min_s": round(min(tempos), 6),
+        "max_s": round(max(tempos), 6),
+        "execucoes_s": [round(t, 6) for t in tempos],
+        "pico_memoria_python_mb": round(pico / (1024 * 1024), 2),
+    }
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=BACKEND_DIR, check=False).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def comparar_resultados(atual: dict, base: dict, tolerancia: float) -> list:
+    """Retorna as etapas cuja mediana ficou mais de `tolerancia` (fração) acima da base."""
+    regressoes = []
+    for etapa, dados in atual["etapas"].items():
+        anterior = base.get("etapas", {}).get(etapa)
+        if not anterior:
+            continue
+        limite = anterior["mediana_s"] * (1 + tolerancia)
+        if dados["mediana_s"] > limite and dados["mediana_s"] - anterior["mediana_s"] > REGRESSAO_MINIMA_SEGUNDOS:
+            regressoes.append({
+                "etapa": etapa,
+                "base_s": anterior["mediana_s"],
+                "atual_s": dados["mediana_s"],
+                "variacao": round(dados["mediana_s"] / anterior["mediana_s"] - 1, 3) if anterior["mediana_s"] else None,
+            })
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark por etapa do pipeline de relatórios sobre dados sintéticos.")
+    parser.add_argument("--escala", choices=sorted(ESCALAS), default="pequena")
+    parser.add_argument("--sites", type=int)
+    parser.add_argument("--findings", type=int)
+    parser.add_argument("--hosts", type=int)
+    parser.add_argument("--csv-findings", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=3, help="Execuções cronometradas por etapa.")
+    parser.add_argument("--etapas", help="Lista de etapas separadas por vírgula (padrão: todas).")
+    parser.add_argument("--pasta-dados", help="Reaproveita/gera os dados sintéticos nesta pasta em vez de uma pasta temporária.")
+    parser.add_argument("--saida-json", default="benchmark_resultados.json")
+    parser.add_argument("--comparar", help="JSON de um resultado anterior para detectar regressões.")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Aumento relativo da mediana aceito na comparação.")
+    parser.add_argument("--verbose", action="store_true", help="Mostra a saída (prints) das etapas.")
+    args = parser.parse_args()
+
+    parametros = dict(ESCALAS[args.escala])
+    for campo in ("sites", "findings", "hosts", "csv_findings"):
+        if getattr(args, campo) is not None:
+            parametros[campo] = getattr(args, campo)
+
+    pasta_trabalho = Path(tempfile.mkdtemp(prefix="auditex_bench_"))
+    _configurar_ambiente(pasta_trabalho)
+    try:
+        pasta_scans = Path(args.pasta_dados) if args.pasta_dados else pasta_trabalho / "scans"
+        if not (pasta_scans.exists() and any(pasta_scans.glob("*.json"))):
+            print(f"Gerando dados sintéticos em {pasta_scans}: {parametros}")
+            gerar_lista_sintetica(pasta_scans, seed=args.seed, **parametros)
+
+        pasta_relatorio = pasta_trabalho / "relatorio_preprocessado"
+        pasta_relatorio.mkdir(parents=True)
+        pasta_graficos = pasta_trabalho / "graficos"
+        pasta_graficos.mkdir()
+        ctx = {
+            "pasta_scans": str(pasta_scans),
+            "pasta_relatorio": pasta_relatorio,
+            "grafico_donut_vm": str(pasta_graficos / "total-vulnerabilidades-vm-donut.png"),
+            "grafico_donut_web": str(pasta_graficos / "total-vulnerabilidades-was-donut.png"),
+            "grafico_sites": str(pasta_graficos / "vulnerabilidades-x-site.png"),
+            "grafico_ranking_vm": str(pasta_graficos / "ranking-hosts-vm.png"),
+            "ignoradas": [],
+        }
+
+        etapas = _montar_etapas(ctx)
+        selecionadas = set(args.etapas.split(",")) if args.etapas else None
+
+        resultados = {}
+        for nome, funcao, preparar in etapas:
+            # Etapas não selecionadas ainda rodam uma vez, sem medição, porque as seguintes dependem delas
+            if selecionadas is not None and nome not in selecionadas:
+                with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+                    if preparar:
+                        preparar()
+                    funcao()
+                continue
+            resultados[nome] = _executar_etapa(funcao, preparar, args.repeticoes, not args.verbose)
+            print(f"{nome:<26} mediana {resultados[nome]['mediana_s']:>10.4f}s   pico {resultados[nome]['pico_memoria_python_mb']:>9.2f} MB")
+
+        relatorio = {
+            "meta": {
+                "data": datetime.utcnow().isoformat(),
+                "commit": _commit_atual(),
+                "python": platform.python_version(),
+                "plataforma": platform.platform(),
+                "escala": args.escala,
+                "parametros": parametros,
+                "repeticoes": args.repeticoes,
+                "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+            },
+            "etapas": resultados,
+            "ignoradas": ctx["ignoradas"],
+        }
+        if "compilacao" in ctx:
+            relatorio["compilacao_latex"] = ctx["compilacao"]
+
+        with open(args.saida_json, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=4)
+        print(f"Resultados gravados em {args.saida_json}")
+
+        if args.comparar:
+            with open(args.comparar, 'r', encoding='utf-8') as f:
+                base = json.load(f)
+            regressoes = comparar_resultados(relatorio, base, args.tolerancia)
+            if regressoes:
+                print("Regressões encontradas:")
+                for regressao in regressoes:
+                    print(f"  {regressao['etapa']}: {regressao['base_s']:.4f}s -> {regressao['atual_s']:.4f}s")
+                sys.exit(1)
+            print("Nenhuma regressão acima da tolerância.")
+    finally:
+        shutil.rmtree(pasta_trabalho, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# backend/tools/gerar_scans_sinteticos.py
+"""
+Gerador de dados sintéticos de scans para testes de carga e benchmarks do pipeline de
+relatórios, no mesmo formato que o Tenable entrega e que os parsers esperam:
+
+- JSON de scans WAS (um arquivo por site): info, history, scan.target e findings
+  (name, plugin_id, risk_factor, uri).
+- CSV de scans de servidores no formato do Nessus (Plugin ID, CVE, Risk, Host, Name, ...).
+
+Os nomes das vulnerabilidades vêm do catálogo em shared_data (quando disponível), para que
+a etapa de LaTeX encontre as descrições como em um relatório real. A mesma semente sempre
+gera os mesmos arquivos.
+
+Uso:
+    python tools/gerar_scans_sinteticos.py --saida /tmp/lista_sintetica --sites 500 --findings 1000000 --hosts 5000
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import time
+import uuid
+from pathlib import Path
+
+DESCRICOES_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '..', 'shared_data', 'report_templates', 'descriptions'
+)
+
+RISCOS_WAS = ["critical", "high", "medium", "low", "info"]
+PESOS_RISCOS_WAS = [0.05, 0.15, 0.30, 0.25, 0.25]
+RISCOS_NESSUS = ["Critical", "High", "Medium", "Low", "None"]
+PESOS_RISCOS_NESSUS = [0.05, 0.15, 0.35, 0.25, 0.20]
+
+CAMINHOS_URI = ["produto", "usuario", "pedido", "api/v1/item", "noticias", "busca", "login", "arquivos"]
+PORTAS = [22, 80, 443, 445, 3306, 3389, 5432, 8080, 8443]
+
+CABECALHO_NESSUS = [
+    "Plugin ID", "CVE", "CVSS v2.0 Base Score", "Risk", "Host", "Protocol", "Port",
+    "Name", "Synopsis", "Description", "Solution", "See Also", "Plugin Output"
+]
+
+# Tamanhos prontos para os cenários de benchmark
+ESCALAS = {
+    "pequena": {"sites": 20, "findings": 10_000, "hosts": 200, "csv_findings": 10_000},
+    "media": {"sites": 100, "findings": 100_000, "hosts": 1_000, "csv_findings": 100_000},
+    "grande": {"sites": 500, "findings": 1_000_000, "hosts": 5_000, "csv_findings": 1_000_000},
+}
+
+
+def carregar_catalogo(arquivo: str, padrao: str, quantidade: int):
+    """Nomes do catálogo de vulnerabilidades; se o catálogo não existir, usa nomes genéricos."""
+    try:
+        with open(os.path.join(DESCRICOES_DIR, arquivo), 'r', encoding='utf-8') as f:
+            nomes = [v["Vulnerabilidade"] for v in json.load(f) if v.get("Vulnerabilidade")]
+        if nomes:
+            return nomes
+    except (OSError, ValueError):
+        pass
+    return [f"{padrao} {i}" for i in range(quantidade)]
+
+
+def _riscos_por_nome(rng: random.Random, nomes, riscos, pesos):
+    """Cada vulnerabilidade tem um único nível de risco, como acontece com um plugin real."""
+    return {nome: rng.choices(riscos, pesos)[0] for nome in nomes}
+
+
+def gerar_scans_was(destino, sites: int, findings_total: int, seed: int = 42) -> list:
+    """
+    Gera `sites` arquivos JSON de scans WAS em `destino`, com `findings_total` findings
+    distribuídos entre eles. Retorna a lista de arquivos gerados.
+    """
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    nomes = carregar_catalogo("vulnerabilities_webapp.json", "WebApp Vulnerability", 80)
+    plugin_ids = {nome: 98000 + i for i, nome in enumerate(nomes)}
+    riscos = _riscos_por_nome(rng, nomes, RISCOS_WAS, PESOS_RISCOS_WAS)
+
+    arquivos = []
+    findings_por_site = max(1, findings_total // max(1, sites))
+    for indice in range(sites):
+        nome_site = f"site{indice:04d}"
+        findings = []
+        for _ in range(findings_por_site):
+            nome = rng.choice(nomes)
+            findings.append({
+                "name": nome,
+                "plugin_id": plugin_ids[nome],
+                "risk_factor": riscos[nome],
+                "uri": f"/{rng.choice(CAMINHOS_URI)}/{rng.randint(1, 5000)}",
+            })
+        scan = {
+            "info": {"uuid": str(uuid.UUID(int=rng.getrandbits(128))), "name": nome_site},
+            "history": [{"history_id": 1000 + indice, "status": "completed"}],
+            "scan": {"target": f"https://{nome_site}.saude.example.gov.br"},
+            "findings": findings,
+        }
+        caminho = destino / f"{nome_site}.json"
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(scan, f, ensure_ascii=False)
+        arquivos.append(str(caminho))
+    return arquivos
+
+
+def gerar_csv_nessus(caminho_csv, hosts: int, findings: int, seed: int = 42) -> str:
+    """Gera um CSV de scan de servidores no formato do Nessus com `findings` linhas sobre `hosts` hosts."""
+    caminho_csv = Path(caminho_csv)
+    caminho_csv.parent.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed + 1)
+    nomes = carregar_catalogo("vulnerabilities_servers.json", "Server Vulnerability", 40)
+    plugin_ids = {nome: 19000 + i for i, nome in enumerate(nomes)}
+    riscos = _riscos_por_nome(rng, nomes, RISCOS_NESSUS, PESOS_RISCOS_NESSUS)
+    lista_hosts = [f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}" for i in range(1, hosts + 1)]
+
+    with open(caminho_csv, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CABECALHO_NESSUS)
+        for _ in range(findings):
+            nome = rng.choice(nomes)
+            writer.writerow([
+                plugin_ids[nome], "", "5.0", riscos[nome], rng.choice(lista_hosts), "tcp",
+                rng.choice(PORTAS), nome, "Synthetic finding", "Synthetic description",
+                "Apply the vendor patch.", "", ""
+            ])
+    return str(caminho_csv)
+
+
+def gerar_lista_sintetica(destino, sites: int, findings: int, hosts: int, csv_findings: int, seed: int = 42) -> dict:
+    """
+    Gera uma pasta de lista completa (JSONs WAS + servidores_scan.csv), como a pasta
+    pastas_scans_webapp de uma lista real.
+    """
+    inicio = time.perf_counter()
+    arquivos_json = gerar_scans_was(destino, sites, findings, seed)
+    caminho_csv = gerar_csv_nessus(Path(destino) / "servidores_scan.csv", hosts, csv_findings, seed)
+    return {
+        "destino": str(destino),
+        "arquivos_json": len(arquivos_json),
+        "csv": caminho_csv,
+        "segundos": round(time.perf_counter() - inicio, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera scans sintéticos (JSON WAS e CSV Nessus) para testes de carga.")
+    parser.add_argument("--saida", required=True, help="Pasta de destino (equivalente à pasta de scans de uma lista).")
+    parser.add_argument("--escala", choices=sorted(ESCALAS), help="Tamanho pronto; os demais parâmetros sobrescrevem a escala.")
+    parser.add_argument("--sites", type=int, help="Quantidade de scans WAS (um JSON por site).")
+    parser.add_argument("--findings", type=int, help="Total de findings distribuídos entre os sites.")
+    parser.add_argument("--hosts", type=int, help="Quantidade de hosts no CSV de servidores.")
+    parser.add_argument("--csv-findings", type=int, help="Linhas do CSV de servidores.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    parametros = dict(ESCALAS[args.escala or "pequena"])
+    for campo in ("sites", "findings", "hosts", "csv_findings"):
+        if getattr(args, campo) is not None:
+            parametros[campo] = getattr(args, campo)
+
+    resultado = gerar_lista_sintetica(args.saida, seed=args.seed, **parametros)
+    print(json.dumps(resultado, ensure_ascii=False, indent=4))
+
+
+if __name__ == "__main__":
+    main()
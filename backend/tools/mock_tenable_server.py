@@ -0,0 +1,268 @@
+# backend/tools/mock_tenable_server.py
+"""
+Servidor local que imita a API do Tenable (cloud.tenable.com) para testes de carga e
+de latência do TenableApi sem acesso à nuvem.
+
+Serve, a partir de dados sintéticos determinísticos (mesma semente -> mesmos dados):
+- GET  /scans                                   lista de scans (VM e WAS)
+- GET  /scans/<id>                              detalhes do scan (info, history, scan.target, findings)
+- POST /scans/<id>/export                       solicita exportação CSV
+- GET  /scans/<id>/export/<file>/status         status da exportação ("loading" -> "ready")
+- GET  /scans/<id>/export/<file>/download       CSV no formato do Nessus (Name, Host, Risk, ...), em stream
+- POST /vulns/export                            exportação de vulnerabilidades em chunks
+- GET  /vulns/export/<uuid>/status              status com chunks_available
+- GET  /vulns/export/<uuid>/chunks/<id>         chunk (lista JSON de vulnerabilidades)
+
+Injeção de falhas: latência fixa + jitter, taxa de erros 500 e taxa de respostas 429
+(com Retry-After). Os parâmetros podem ser alterados em tempo de execução com
+POST /_mock/config e os contadores são lidos em GET /_mock/stats.
+
+Uso:
+    python tools/mock_tenable_server.py --port 8089 --latency 0.2 --error-rate 0.02 --rate-429 0.05
+    TENABLE_BASE_URL=http://localhost:8089 flask run
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from flask import Flask, Response, jsonify, request
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, TOOLS_DIR)
+
+# Mesmos nomes do catálogo (ou genéricos) que o gerador de scans sintéticos usa
+from gerar_scans_sinteticos import carregar_catalogo  # noqa: E402
+
+RISCOS = ["Critical", "High", "Medium", "Low", "None"]
+PESOS_RISCOS = [0.05, 0.15, 0.35, 0.25, 0.20]
+
+
+class MockConfig:
+    def __init__(self, args):
+        self.seed = args.seed
+        self.num_scans = args.scans
+        self.hosts_por_scan = args.hosts
+        self.findings_por_scan = args.findings
+        self.latency = args.latency
+        self.jitter = args.jitter
+        self.error_rate = args.error_rate
+        self.rate_429 = args.rate_429
+        self.retry_after = args.retry_after
+        self.export_polls = args.export_polls
+        self.chunks = args.chunks
+
+    def atualizar(self, dados: dict):
+        for campo in ("latency", "jitter", "error_rate", "rate_429", "retry_after", "export_polls"):
+            if campo in dados:
+                setattr(self, campo, type(getattr(self, campo))(dados[campo]))
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+
+def criar_app(config: MockConfig) -> Flask:
+    app = Flask(__name__)
+    nomes_webapp = carregar_catalogo("vulnerabilities_webapp.json", "WebApp Vulnerability", 80)
+    nomes_servers = carregar_catalogo("vulnerabilities_servers.json", "Server Vulnerability", 40)
+
+    stats = Counter()
+    stats_lock = threading.Lock()
+    exportacoes = {} # file_id/export_uuid -> número de consultas de status já feitas
+    exportacoes_lock = threading.Lock()
+
+    def contar(chave: str):
+        with stats_lock:
+            stats[chave] += 1
+
+    def rng_scan(scan_id: int) -> random.Random:
+        return random.Random(config.seed * 1_000_003 + scan_id)
+
+    def scan_eh_webapp(scan_id: int) -> bool:
+        return scan_id % 2 == 0
+
+    def hosts_do_scan(scan_id: int):
+        return [f"10.{(scan_id >> 8) & 255}.{scan_id & 255}.{i % 254 + 1}" if i < 254 else f"host-{scan_id}-{i}.local"
+                for i in range(config.hosts_por_scan)]
+
+    @app.before_request
+    def injetar_falhas():
+        if request.path.startswith("/_mock"):
+            return None
+        contar("requests")
+        atraso = config.latency + random.uniform(0, config.jitter)
+        if atraso > 0:
+            time.sleep(atraso)
+        sorteio = random.random()
+        if sorteio < config.rate_429:
+            contar("injected_429")
+            resposta = jsonify({"error": "You have exceeded the rate limit"})
+            resposta.status_code = 429
+            resposta.headers["Retry-After"] = str(config.retry_after)
+            return resposta
+        if sorteio < config.rate_429 + config.error_rate:
+            contar("injected_500")
+            resposta = jsonify({"error": "Internal Server Error"})
+            resposta.status_code = 500
+            return resposta
+        return None
+
+    @app.route('/scans', methods=['GET'])
+    def listar_scans():
+        contar("scans")
+        agora = int(time.time())
+        scans = []
+        for scan_id in range(1, config.num_scans + 1):
+            rng = rng_scan(scan_id)
+            scans.append({
+                "id": scan_id,
+                "uuid": str(uuid.UUID(int=rng.getrandbits(128))),
+                "name": f"{'WAS' if scan_eh_webapp(scan_id) else 'VM'} Scan {scan_id:04d}",
+                "type": "webapp" if scan_eh_webapp(scan_id) else "remote",
+                "status": "completed",
+                "last_modification_date": agora - rng.randint(0, 30 * 24 * 3600),
+            })
+        return jsonify({"scans": scans, "folders": [], "timestamp": agora})
+
+    @app.route('/scans/<int:scan_id>', methods=['GET'])
+    def detalhes_scan(scan_id):
+        contar("scan_details")
+        rng = rng_scan(scan_id)
+        historico = [
+            {"history_id": scan_id * 100 + h, "uuid": str(uuid.UUID(int=rng.getrandbits(128))),
+             "status": "completed", "creation_date": 1_700_000_000 + h * 86400}
+            for h in range(rng.randint(1, 5))
+        ]
+        detalhes = {
+            "info": {"uuid": str(uuid.UUID(int=rng.getrandbits(128))), "name": f"Scan {scan_id}", "hostcount": config.hosts_por_scan},
+            "history": historico,
+        }
+        if scan_eh_webapp(scan_id):
+            target = f"https://site{scan_id}.saude.example.gov.br"
+            detalhes["scan"] = {"target": target}
+            findings = []
+            for _ in range(config.findings_por_scan):
+                nome = rng.choice(nomes_webapp)
+                findings.append({
+                    "name": nome,
+                    "plugin_id": 98000 + nomes_webapp.index(nome),
+                    "risk_factor": rng.choices(RISCOS, PESOS_RISCOS)[0].lower().replace("none", "info"),
+                    "uri": f"/{rng.choice(['produto', 'usuario', 'pedido', 'api/v1/item'])}/{rng.randint(1, 5000)}",
+                })
+            detalhes["findings"] = findings
+        return jsonify(detalhes)
+
+    @app.route('/scans/<int:scan_id>/export', methods=['POST'])
+    def solicitar_exportacao(scan_id):
+        contar("export_requests")
+        file_id = random.randint(10**8, 10**9)
+        with exportacoes_lock:
+            exportacoes[str(file_id)] = 0
+        return jsonify({"file": file_id})
+
+    @app.route('/scans/<int:scan_id>/export/<file_id>/status', methods=['GET'])
+    def status_exportacao(scan_id, file_id):
+        contar("export_status")
+        with exportacoes_lock:
+            if file_id not in exportacoes:
+                return jsonify({"error": "Export not found"}), 404
+            exportacoes[file_id] += 1
+            pronto = exportacoes[file_id] > config.export_polls
+        return jsonify({"status": "ready" if pronto else "loading"})
+
+    @app.route('/scans/<int:scan_id>/export/<file_id>/download', methods=['GET'])
+    def baixar_exportacao(scan_id, file_id):
+        contar("export_downloads")
+        rng = rng_scan(scan_id)
+        hosts = hosts_do_scan(scan_id)
+
+        def gerar_csv():
+            yield "Plugin ID,CVE,CVSS v2.0 Base Score,Risk,Host,Protocol,Port,Name,Synopsis\n"
+            for _ in range(config.findings_por_scan):
+                nome = rng.choice(nomes_servers).replace('"', "'")
+                yield (f"{19000 + nomes_servers.index(nome)},,5.0,{rng.choices(RISCOS, PESOS_RISCOS)[0]},"
+                       f"{rng.choice(hosts)},tcp,{rng.choice([22, 80, 443, 3389, 8080])},\"{nome}\",Synthetic finding\n")
+
+        return Response(gerar_csv(), mimetype='text/csv')
+
+    @app.route('/vulns/export', methods=['POST'])
+    def solicitar_vulns_export():
+        contar("vulns_export_requests")
+        export_uuid = str(uuid.uuid4())
+        with exportacoes_lock:
+            exportacoes[export_uuid] = 0
+        return jsonify({"export_uuid": export_uuid})
+
+    @app.route('/vulns/export/<export_uuid>/status', methods=['GET'])
+    def status_vulns_export(export_uuid):
+        contar("vulns_export_status")
+        with exportacoes_lock:
+            if export_uuid not in exportacoes:
+                return jsonify({"error": "Export not found"}), 404
+            exportacoes[export_uuid] += 1
+            pronto = exportacoes[export_uuid] > config.export_polls
+        if not pronto:
+            return jsonify({"status": "PROCESSING", "chunks_available": []})
+        return jsonify({"status": "FINISHED", "chunks_available": list(range(1, config.chunks + 1))})
+
+    @app.route('/vulns/export/<export_uuid>/chunks/<int:chunk_id>', methods=['GET'])
+    def chunk_vulns_export(export_uuid, chunk_id):
+        contar("vulns_export_chunks")
+        rng = rng_scan(chunk_id)
+        hosts = hosts_do_scan(chunk_id)
+        vulnerabilidades = []
+        for _ in range(config.findings_por_scan):
+            host = rng.choice(hosts)
+            nome = rng.choice(nomes_servers)
+            vulnerabilidades.append({
+                "asset": {"ipv4": host, "hostname": host},
+                "plugin": {"id": 19000 + nomes_servers.index(nome), "name": nome},
+                "severity": rng.choices(RISCOS, PESOS_RISCOS)[0].lower().replace("none", "info"),
+                "state": "OPEN",
+            })
+        return jsonify(vulnerabilidades)
+
+    @app.route('/_mock/config', methods=['GET', 'POST'])
+    def mock_config():
+        if request.method == 'POST':
+            config.atualizar(request.get_json(silent=True) or {})
+        return jsonify(config.to_dict())
+
+    @app.route('/_mock/stats', methods=['GET', 'DELETE'])
+    def mock_stats():
+        with stats_lock:
+            if request.method == 'DELETE':
+                stats.clear()
+            return jsonify(dict(stats))
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que simula a API do Tenable.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--seed", type=int, default=42, help="Semente dos dados sintéticos.")
+    parser.add_argument("--scans", type=int, default=50, help="Quantidade de scans listados.")
+    parser.add_argument("--hosts", type=int, default=200, help="Hosts por scan VM / chunk.")
+    parser.add_argument("--findings", type=int, default=2000, help="Findings por scan, CSV ou chunk.")
+    parser.add_argument("--chunks", type=int, default=4, help="Chunks da exportação de vulnerabilidades.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latência fixa por requisição (s).")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Latência aleatória adicional máxima (s).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fração de respostas 500.")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fração de respostas 429.")
+    parser.add_argument("--retry-after", type=int, default=1, help="Valor do cabeçalho Retry-After nas respostas 429.")
+    parser.add_argument("--export-polls", type=int, default=2, help="Consultas de status antes da exportação ficar pronta.")
+    args = parser.parse_args()
+
+    app = criar_app(MockConfig(args))
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
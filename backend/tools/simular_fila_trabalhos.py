@@ -0,0 +1,166 @@
+# backend/tools/simular_fila_trabalhos.py
+"""
+Simulação da fila de trabalhos (core.work_queue) contra um MongoDB local, com vários nós
+concorrentes em processos separados.
+
+Enfileira trabalhos de teste (com prioridades aleatórias) em uma coleção própria, apagada no
+início, e inicia os nós: cada um é um processo com um TrabalhadorFila (limite
+--concorrencia) cujos trabalhos esperam um tempo aleatório e registram a execução. Com
+--matar-no, um dos nós é encerrado com SIGKILL no meio da simulação, para exercitar a
+retomada dos leases vencidos pelos demais.
+
+Ao final, verifica que:
+- todos os trabalhos foram concluídos;
+- cada trabalho teve uma única conclusão aceita (sem duplicidade entre nós);
+- nenhum nó executou mais trabalhos ao mesmo tempo que o seu limite;
+- só foram executados mais de uma vez trabalhos cujo lease venceu no nó encerrado.
+
+Uso:
+    docker run -d --name mongo-fila -p 27017:27017 mongo:7
+    MONGO_URI=mongodb://localhost:27017/auditex_fila python tools/simular_fila_trabalhos.py --nos 4 --trabalhos 300 --matar-no
+"""
+
+import argparse
+import multiprocessing
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from src.core.database import Database  # noqa: E402
+from src.core.work_queue import FilaTrabalhos, TrabalhadorFila, STATUS_CONCLUIDO, STATUS_EXECUTANDO, STATUS_PENDENTE  # noqa: E402
+
+COLECAO_SIMULACAO = "fila_trabalhos_simulacao"
+COLECAO_EXECUCOES = "fila_simulacao_execucoes"
+TIPO_SIMULACAO = "simulacao"
+
+
+def _executar_trabalho(db_instance: Database, no: str, trabalho: dict, duracao: float):
+    execucao = db_instance.insert_one(COLECAO_EXECUCOES, {
+        "trabalho": trabalho["_id"], "no": no, "tentativa": trabalho["tentativas"], "inicio": datetime.utcnow(), "fim": None, "aceita": False
+    }).inserted_id
+    time.sleep(duracao)
+    db_instance.update_one(COLECAO_EXECUCOES, {"_id": execucao}, {"fim": datetime.utcnow()})
+    return execucao
+
+
+def _no(indice: int, args) -> None:
+    """Processo de um nó: consome a fila até não haver mais trabalhos pendentes ou em execução."""
+    no = f"no-{indice}"
+    random.seed(args.seed + indice)
+    db_instance = Database()
+    fila = FilaTrabalhos(COLECAO_SIMULACAO, db_instance)
+    executor = ThreadPoolExecutor(max_workers=args.concorrencia)
+
+    def submeter(trabalho):
+        return executor.submit(_executar_trabalho, db_instance, no, trabalho, random.uniform(args.duracao_min, args.duracao_max))
+
+    def ao_terminar(trabalho, futuro):
+        execucao = futuro.result()
+        if fila.concluir(trabalho, {"no": no}):
+            db_instance.update_one(COLECAO_EXECUCOES, {"_id": execucao}, {"aceita": True})
+
+    trabalhador = TrabalhadorFila(
+        fila, [TIPO_SIMULACAO], submeter, ao_terminar,
+        no=no, max_concorrentes=args.concorrencia, lease_segundos=args.lease, intervalo_busca=args.intervalo
+    )
+    trabalhador.iniciar()
+    while db_instance.count_documents(COLECAO_SIMULACAO, {"status": {"$in": [STATUS_PENDENTE, STATUS_EXECUTANDO]}}):
+        time.sleep(args.intervalo)
+    trabalhador.parar()
+    executor.shutdown()
+
+
+def _maximo_simultaneo(intervalos) -> int:
+    eventos = sorted([(inicio, 1) for inicio, _ in intervalos] + [(fim, -1) for _, fim in intervalos], key=lambda e: (e[0], e[1]))
+    atual = maximo = 0
+    for _, delta in eventos:
+        atual += delta
+        maximo = max(maximo, atual)
+    return maximo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simula vários nós consumindo a fila de trabalhos do MongoDB.")
+    parser.add_argument("--nos", type=int, default=3)
+    parser.add_argument("--trabalhos", type=int, default=200)
+    parser.add_argument("--concorrencia", type=int, default=4, help="Trabalhos simultâneos por nó.")
+    parser.add_argument("--lease", type=float, default=3.0, help="Duração do lease em segundos.")
+    parser.add_argument("--intervalo", type=float, default=0.2, help="Intervalo de busca por trabalhos em segundos.")
+    parser.add_argument("--duracao-min", type=float, default=0.05)
+    parser.add_argument("--duracao-max", type=float, default=0.4)
+    parser.add_argument("--matar-no", action="store_true", help="Encerra um nó com SIGKILL no meio da simulação.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    db_instance = Database()
+    db_instance.delete_many(COLECAO_SIMULACAO, {})
+    db_instance.delete_many(COLECAO_EXECUCOES, {})
+    fila = FilaTrabalhos(COLECAO_SIMULACAO, db_instance)
+    fila.garantir_indices()
+
+    random.seed(args.seed)
+    for _ in range(args.trabalhos):
+        # Trabalhos enfileirados um a um, com prioridades de 0 a 3
+        fila.enfileirar(TIPO_SIMULACAO, {}, prioridade=random.randint(0, 3), max_tentativas=10)
+
+    contexto = multiprocessing.get_context("spawn")
+    processos = [contexto.Process(target=_no, args=(indice, args), name=f"no-{indice}") for indice in range(args.nos)]
+    inicio = time.monotonic()
+    for processo in processos:
+        processo.start()
+
+    no_encerrado = None
+    if args.matar_no and processos:
+        # Espera o nó ter trabalhos em execução antes de encerrá-lo
+        while not db_instance.count_documents(COLECAO_SIMULACAO, {"status": STATUS_EXECUTANDO, "no": "no-0"}):
+            time.sleep(0.05)
+        processos[0].kill()
+        no_encerrado = "no-0"
+        print("no-0 encerrado com SIGKILL")
+
+    for processo in processos:
+        processo.join()
+    duracao = time.monotonic() - inicio
+
+    trabalhos = db_instance.find(COLECAO_SIMULACAO)
+    execucoes = db_instance.find(COLECAO_EXECUCOES)
+    concluidos = sum(1 for trabalho in trabalhos if trabalho["status"] == STATUS_CONCLUIDO)
+    aceitas = Counter(execucao["trabalho"] for execucao in execucoes if execucao["aceita"])
+    execucoes_por_trabalho = Counter(execucao["trabalho"] for execucao in execucoes)
+    interrompidos = {execucao["trabalho"] for execucao in execucoes if execucao["no"] == no_encerrado and execucao["fim"] is None}
+
+    intervalos_por_no = defaultdict(list)
+    for execucao in execucoes:
+        if execucao["fim"] is not None:
+            intervalos_por_no[execucao["no"]].append((execucao["inicio"], execucao["fim"]))
+    simultaneos = {no: _maximo_simultaneo(intervalos) for no, intervalos in sorted(intervalos_por_no.items())}
+
+    repetidos = {trabalho for trabalho, quantidade in execucoes_por_trabalho.items() if quantidade > 1}
+    falhas = []
+    if concluidos != args.trabalhos:
+        falhas.append(f"{args.trabalhos - concluidos} trabalho(s) não concluído(s)")
+    if any(quantidade > 1 for quantidade in aceitas.values()) or len(aceitas) != concluidos:
+        falhas.append("conclusões aceitas em duplicidade ou ausentes")
+    if any(maximo > args.concorrencia for maximo in simultaneos.values()):
+        falhas.append(f"limite de concorrência excedido: {simultaneos}")
+    if repetidos - interrompidos:
+        falhas.append(f"{len(repetidos - interrompidos)} trabalho(s) repetido(s) sem lease vencido")
+
+    print(f"{args.trabalhos} trabalhos, {args.nos} nós, {duracao:.1f} s")
+    print(f"concluídos: {concluidos}; execuções: {len(execucoes)}; retomados de lease vencido: {len(interrompidos)}")
+    print(f"conclusões por nó: {dict(sorted(Counter(t['resultado']['no'] for t in trabalhos if t.get('resultado')).items()))}")
+    print(f"máximo simultâneo por nó: {simultaneos}")
+    print("OK" if not falhas else "FALHAS: " + "; ".join(falhas))
+    db_instance.close()
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+# backend/tools/verificar_tempo_importacao.py
+"""
+Verifica o custo de importação do backend com `python -X importtime`.
+
+Importa o módulo alvo (src.main por padrão) em um processo novo, `--repeticoes` vezes, e
+falha (código de saída 1) se:
+- a mediana do tempo cumulativo de importação passar de `--orcamento-ms`; ou
+- algum módulo pesado que deve ser importado só no primeiro uso (pandas, matplotlib,
+  numpy, scipy) aparecer entre os módulos importados.
+
+Os módulos que mais pesam na importação são listados para ajudar a achar a regressão.
+
+Uso:
+    python tools/verificar_tempo_importacao.py
+    python tools/verificar_tempo_importacao.py --orcamento-ms 600 --repeticoes 5
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+MODULOS_ADIADOS = ("pandas", "matplotlib", "numpy", "scipy")
+
+# "import time:       777 |     564277 | src.main" (self e cumulativo em microssegundos)
+PADRAO_LINHA = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def medir_importacao(modulo: str) -> dict:
+    """Importa `modulo` em um interpretador novo e retorna {nome: (self_us, cumulativo_us)} do -X importtime."""
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {modulo}:\n{resultado.stderr[-2000:]}")
+
+    tempos = {}
+    for linha in resultado.stderr.splitlines():
+        match = PADRAO_LINHA.match(linha)
+        if match:
+            tempos[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return tempos
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modulo", default="src.main", help="módulo importado (padrão: src.main)")
+    parser.add_argument("--orcamento-ms", type=float, default=800.0, help="limite para a mediana do tempo cumulativo (ms)")
+    parser.add_argument("--repeticoes", type=int, default=3, help="importações medidas (a primeira também aquece o cache de disco)")
+    parser.add_argument("--top", type=int, default=10, help="módulos mais lentos listados")
+    args = parser.parse_args()
+
+    medicoes = [medir_importacao(args.modulo) for _ in range(max(1, args.repeticoes))]
+    tempos_ms = [m[args.modulo][1] / 1000 for m in medicoes if args.modulo in m]
+    if not tempos_ms:
+        print(f"Módulo {args.modulo} não encontrado na saída do -X importtime.")
+        return 1
+    mediana_ms = statistics.median(tempos_ms)
+
+    ultima = medicoes[-1]
+    print(f"{args.modulo}: mediana {mediana_ms:.0f} ms em {len(tempos_ms)} importações "
+          f"(orçamento {args.orcamento_ms:.0f} ms)")
+    print("Módulos com maior tempo próprio:")
+    for nome, (proprio, cumulativo) in sorted(ultima.items(), key=lambda item: item[1][0], reverse=True)[:args.top]:
+        print(f"  {proprio / 1000:8.1f} ms (cumulativo {cumulativo / 1000:8.1f} ms)  {nome}")
+
+    falhou = False
+    adiados = sorted({nome for nome in ultima if nome.split(".")[0] in MODULOS_ADIADOS})
+    if adiados:
+        raizes = sorted({nome.split(".")[0] for nome in adiados})
+        print(f"FALHA: módulos que deveriam ser importados só no primeiro uso: {', '.join(raizes)}")
+        falhou = True
+    if mediana_ms > args.orcamento_ms:
+        print(f"FALHA: importação acima do orçamento ({mediana_ms:.0f} ms > {args.orcamento_ms:.0f} ms)")
+        falhou = True
+
+    return 1 if falhou else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -34,6 +34,7 @@ export interface ListData {
     pastas_scans_vm?: string; // Alterado para vm de servers
     id_scan?: string;
     historyid_scanservidor?: string; // history_id
+    fonte_scan_servidores?: 'csv' | 'vulns_export'; // Fonte dos dados de servidores no relatório
     relatorioGerado?: boolean;
 }
 
@@ -136,8 +137,8 @@ export const listsApi = {
         return response.data;
     },
     exportScanCsv: async (scanId: string, historyId: string): Promise<string> => { // Adicionado para exportar CSV
-        const response = await api.get(`/scans/exportScanCsv/${scanId}/${historyId}`);
-        return response.data.csv_content;
+        const response = await api.get(`/scans/exportScanCsv/${scanId}/${historyId}`, { responseType: 'text' });
+        return response.data;
     },
     // MÉTODO PARA ADICIONAR/ATUALIZAR SCAN VM NA LISTA
     addVMScanToList: async (nomeLista: string, idScan: string, nomeScan: string, criadoPor: string, idNmr: string): Promise<{ message: string }> => {
@@ -236,6 +237,31 @@ export const reportsApi = {
     getMissingVulnerabilities: async (relatorioId: string, type: 'webapp' | 'servers'): Promise<{ content: string[] }> => {
         const response = await api.get(`/reports/getRelatorioMissingVulnerabilities/?relatorioId=${relatorioId}&type=${type}`);
         return response.data;
+    },
+    // Vulnerabilidades novas, corrigidas e persistentes entre dois relatórios (base = o mais antigo)
+    compareReports: async (relatorioBaseId: string, relatorioAtualId: string): Promise<any> => {
+        const response = await api.get(`/reports/compararRelatorios/?relatorioBaseId=${relatorioBaseId}&relatorioAtualId=${relatorioAtualId}`);
+        return response.data;
+    },
+    // Gera os relatórios de várias listas em segundo plano; os campos de cada lista têm precedência sobre camposComuns
+    generateReportsBatch: async (relatorios: Array<{ idLista: string; [campo: string]: any }>, camposComuns: Record<string, any> = {}, gerarZip = false, prioridade = 0): Promise<{ idLote: string; total: number }> => {
+        const response = await api.post('/reports/gerarRelatoriosEmLote/', { relatorios, camposComuns, gerarZip, prioridade });
+        return response.data;
+    },
+    getReportsBatch: async (idLote: string): Promise<any> => {
+        const response = await api.get(`/reports/lotes/${idLote}`);
+        return response.data;
+    },
+    downloadReportsBatchZip: async (idLote: string): Promise<void> => {
+        const response = await api.get(`/reports/lotes/${idLote}/zip`, { responseType: 'blob' });
+        const url = window.URL.createObjectURL(response.data);
+        const link = document.createElement('a');
+        link.href = url;
+        link.setAttribute('download', `Relatorios_Auditoria_${idLote}.zip`);
+        document.body.appendChild(link);
+        link.click();
+        link.parentNode?.removeChild(link);
+        window.URL.revokeObjectURL(url);
     }
 };
 